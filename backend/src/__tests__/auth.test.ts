@@ -0,0 +1,23 @@
+import express from 'express';
+import request from 'supertest';
+import { requireOpsToken } from '../auth.middleware';
+
+describe('requireOpsToken', () => {
+  const ops = express();
+  ops.get('/metrics', requireOpsToken, (_, res) => res.send('ok'));
+
+  afterEach(() => {
+    delete process.env.OPS_TOKEN;
+  });
+
+  it('should hide operational endpoints unless OPS_TOKEN is set', async () => {
+    await request(ops).get('/metrics').expect(404);
+  });
+
+  it('should require the ops bearer token', async () => {
+    process.env.OPS_TOKEN = 'ops-secret';
+    await request(ops).get('/metrics').expect(401);
+    await request(ops).get('/metrics').set('Authorization', 'Bearer wrong').expect(401);
+    await request(ops).get('/metrics').set('Authorization', 'Bearer ops-secret').expect(200, 'ok');
+  });
+});
@@ -0,0 +1,55 @@
+import { once } from 'events';
+import http from 'http';
+import net, { AddressInfo } from 'net';
+import { Server } from 'socket.io';
+import { onClusterMessage, publishToCluster } from '../cluster-bus';
+import { CLUSTER_SOCKET_TRANSPORTS } from '../cluster';
+
+describe('cluster-bus', () => {
+  it('should not deliver a process its own messages', () => {
+    const received: unknown[] = [];
+    onClusterMessage('test:channel', (payload) => received.push(payload));
+
+    expect(() => publishToCluster('test:channel', { id: 'r1' })).not.toThrow();
+    expect(received).toEqual([]);
+  });
+});
+
+describe('cluster Socket.IO transports', () => {
+  let server: http.Server;
+  let io: Server;
+  let port: number;
+
+  beforeAll(async () => {
+    server = http.createServer();
+    io = new Server(server, { transports: CLUSTER_SOCKET_TRANSPORTS });
+    await new Promise<void>((resolve) => server.listen(0, resolve));
+    port = (server.address() as AddressInfo).port;
+  });
+
+  afterAll(async () => {
+    io.close();
+    await new Promise((resolve) => server.close(resolve));
+  });
+
+  it('should refuse long-polling, whose requests could reach another worker', async () => {
+    const req = http.get(`http://127.0.0.1:${port}/socket.io/?EIO=4&transport=polling`);
+    const [res] = (await once(req, 'response')) as [http.IncomingMessage];
+    res.resume();
+    expect(res.statusCode).toBe(400);
+  });
+
+  it('should open a session on a single WebSocket connection', async () => {
+    const req = http.get(`http://127.0.0.1:${port}/socket.io/?EIO=4&transport=websocket`, {
+      headers: {
+        Connection: 'Upgrade',
+        Upgrade: 'websocket',
+        'Sec-WebSocket-Version': '13',
+        'Sec-WebSocket-Key': 'dGhlIHNhbXBsZSBub25jZQ==',
+      },
+    });
+    const [res, socket] = (await once(req, 'upgrade')) as [http.IncomingMessage, net.Socket];
+    expect(res.statusCode).toBe(101);
+    socket.destroy();
+  });
+});
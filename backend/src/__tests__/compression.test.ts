@@ -0,0 +1,74 @@
+import express from 'express';
+import http from 'http';
+import { AddressInfo } from 'net';
+import zlib from 'zlib';
+import { COMPRESSION_THRESHOLD, compressionMiddleware, negotiateEncoding } from '../compression';
+
+const big = JSON.stringify({ text: 'x'.repeat(COMPRESSION_THRESHOLD * 2) });
+
+const app = express();
+app.use(compressionMiddleware);
+app.get('/big', (_, res) => {
+  res.type('json').send(big);
+});
+app.get('/small', (_, res) => {
+  res.json({ ok: true });
+});
+app.get('/stream', (_, res) => {
+  res.setHeader('Content-Type', 'application/x-ndjson');
+  res.write('{"a":1}\n');
+  res.end('{"a":2}\n');
+});
+
+let server: http.Server;
+
+beforeAll((done) => {
+  server = app.listen(0, done);
+});
+
+afterAll((done) => {
+  server.close(done);
+});
+
+/** GET with plain http, so the body stays compressed. */
+function get(path: string, acceptEncoding: string) {
+  const { port } = server.address() as AddressInfo;
+  return new Promise<{ headers: http.IncomingHttpHeaders; body: Buffer }>((resolve, reject) => {
+    http
+      .get({ port, path, headers: { 'Accept-Encoding': acceptEncoding } }, (res) => {
+        const chunks: Buffer[] = [];
+        res.on('data', (c: Buffer) => chunks.push(c));
+        res.on('end', () => resolve({ headers: res.headers, body: Buffer.concat(chunks) }));
+      })
+      .on('error', reject);
+  });
+}
+
+describe('negotiateEncoding', () => {
+  it('should prefer brotli and honour q-values', () => {
+    expect(negotiateEncoding('gzip, deflate, br')).toBe('br');
+    expect(negotiateEncoding('br;q=0.5, gzip')).toBe('gzip');
+    expect(negotiateEncoding('br;q=0, *')).toBe('gzip');
+    expect(negotiateEncoding('identity')).toBeNull();
+    expect(negotiateEncoding(undefined)).toBeNull();
+  });
+});
+
+describe('compressionMiddleware', () => {
+  it('should compress large and streamed bodies only', async () => {
+    const br = await get('/big', 'br');
+    expect(br.headers['content-encoding']).toBe('br');
+    expect(br.headers.vary).toMatch(/Accept-Encoding/);
+    expect(zlib.brotliDecompressSync(br.body).toString()).toBe(big);
+
+    const stream = await get('/stream', 'gzip');
+    expect(stream.headers['content-encoding']).toBe('gzip');
+    expect(zlib.gunzipSync(stream.body).toString()).toBe('{"a":1}\n{"a":2}\n');
+
+    const small = await get('/small', 'br');
+    expect(small.headers['content-encoding']).toBeUndefined();
+    const identity = await get('/big', 'identity');
+    expect(identity.body.toString()).toBe(big);
+    expect(identity.headers['content-encoding']).toBeUndefined();
+  });
+});
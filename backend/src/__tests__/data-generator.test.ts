@@ -0,0 +1,59 @@
+process.env.DB_PATH = ':memory:';
+
+import { Database } from 'sqlite';
+import { getDB, seedFoods } from '../db';
+import {
+  DATASET_CURRENT_WEEK,
+  datasetRecipeId,
+  datasetWeeks,
+  DEFAULT_DATASET,
+  generateDataset,
+} from '../bench/data-generator';
+
+let db: Database;
+
+beforeAll(async () => {
+  db = await getDB();
+  await seedFoods();
+});
+
+afterAll(async () => {
+  await db.close();
+});
+
+const OPTIONS = {
+  ...DEFAULT_DATASET,
+  users: 6,
+  recipesPerUser: 3,
+  followsPerUser: 2,
+  groupSize: 4,
+  planningWeeks: 4,
+  mealsPerWeek: 2,
+};
+
+describe('synthetic data generator', () => {
+  it('should end histories at the fixed current week', () => {
+    expect(datasetWeeks(3)).toEqual(['2025-12-22', '2025-12-29', DATASET_CURRENT_WEEK]);
+  });
+
+  it('should write the requested shape, identically for the same seed', async () => {
+    const dataset = await generateDataset(db, OPTIONS);
+    const count = async (table: string) =>
+      (await db.get<{ n: number }>(`SELECT COUNT(*) AS n FROM ${table}`))!.n;
+
+    expect(dataset.groups).toBe(2);
+    expect(await count('users')).toBe(6);
+    expect(await count('recipes')).toBe(18);
+    expect(await count('recipe_ingredients')).toBe(18 * OPTIONS.ingredientsPerRecipe);
+    expect(await count('planning')).toBe(6 * 4 * 2);
+    expect(await count('group_members')).toBe(6);
+
+    const first = await db.all('SELECT * FROM recipes ORDER BY id');
+    await db.exec(
+      'DELETE FROM planning; DELETE FROM followers; DELETE FROM groups_table; DELETE FROM recipes; DELETE FROM users;',
+    );
+    await generateDataset(db, OPTIONS);
+    expect(await db.all('SELECT * FROM recipes ORDER BY id')).toEqual(first);
+    expect(first.some((r: { id: string }) => r.id === datasetRecipeId(5, 2))).toBe(true);
+  });
+});
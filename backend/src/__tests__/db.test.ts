@@ -0,0 +1,94 @@
+import fs from 'fs';
+import os from 'os';
+import path from 'path';
+
+const dir = fs.mkdtempSync(path.join(os.tmpdir(), 'food-recipes-db-'));
+process.env.DB_PATH = path.join(dir, 'test.sqlite');
+
+import { closeDB, getDB, getReadDB, withTransaction } from '../db';
+
+afterAll(async () => {
+  await closeDB();
+  fs.rmSync(dir, { recursive: true, force: true });
+});
+
+describe('connection layer', () => {
+  it('should tune the writer connection', async () => {
+    const db = await getDB();
+
+    expect(await db.get('PRAGMA journal_mode')).toEqual({ journal_mode: 'wal' });
+    expect(await db.get('PRAGMA synchronous')).toEqual({ synchronous: 1 });
+    expect(await db.get('PRAGMA busy_timeout')).toEqual({ timeout: 5000 });
+  });
+
+  it('should serve committed writes from read-only connections', async () => {
+    const db = await getDB();
+    await db.run("INSERT INTO foods (id, name) VALUES ('db-test', 'Fennel')");
+
+    const reader = await getReadDB();
+
+    expect(reader).not.toBe(db);
+    expect(await reader.get("SELECT name FROM foods WHERE id = 'db-test'")).toEqual({
+      name: 'Fennel',
+    });
+    await expect(reader.run("DELETE FROM foods WHERE id = 'db-test'")).rejects.toThrow(
+      /readonly/,
+    );
+  });
+
+  it('should prepare each SQL text once per connection', async () => {
+    const db = await getDB();
+    const prepare = jest.spyOn(db, 'prepare');
+
+    for (let i = 0; i < 5; i++) {
+      await db.get('SELECT COUNT(*) AS n FROM foods WHERE name > ?', String(i));
+    }
+
+    expect(prepare).toHaveBeenCalledTimes(1);
+    prepare.mockRestore();
+  });
+});
+
+describe('withTransaction', () => {
+  it('should keep concurrent plain writes out of a transaction that rolls back', async () => {
+    const db = await getDB();
+    let opened!: () => void;
+    let release!: () => void;
+    const isOpen = new Promise<void>((resolve) => (opened = resolve));
+    const held = new Promise<void>((resolve) => (release = resolve));
+
+    const tx = withTransaction(async (txDb) => {
+      await txDb.run("INSERT INTO foods (id, name) VALUES ('tx-rolled-back', 'Leek')");
+      opened();
+      await held;
+      throw new Error('boom');
+    });
+    await isOpen;
+    // Issued while the transaction is open; must wait for it, not join it
+    const plain = db.run("INSERT INTO foods (id, name) VALUES ('tx-plain', 'Chard')");
+    release();
+
+    await expect(tx).rejects.toThrow('boom');
+    await plain;
+
+    const ids = await db.all<{ id: string }[]>(
+      "SELECT id FROM foods WHERE id IN ('tx-rolled-back', 'tx-plain')",
+    );
+    expect(ids).toEqual([{ id: 'tx-plain' }]);
+  });
+
+  it('should report the original error when ROLLBACK fails', async () => {
+    const error = jest.spyOn(console, 'error').mockImplementation(() => undefined);
+
+    await expect(
+      withTransaction(async (txDb) => {
+        // Ending the transaction early makes the final ROLLBACK fail
+        await txDb.exec('COMMIT');
+        throw new Error('original');
+      }),
+    ).rejects.toThrow('original');
+
+    expect(error).toHaveBeenCalled();
+    error.mockRestore();
+  });
+});
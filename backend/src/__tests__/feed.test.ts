@@ -0,0 +1,83 @@
+process.env.DB_PATH = ':memory:';
+
+import { Database } from 'sqlite';
+import { getDB } from '../db';
+import { fanOutRecipe, feedPage, followAuthor, unfollowAuthor } from '../feed';
+
+let db: Database;
+
+beforeAll(async () => {
+  db = await getDB();
+  await db.exec(`
+    INSERT INTO users (id, name, email) VALUES
+      ('reader', 'Reader', 'r@x'), ('chef', 'Chef', 'c@x'),
+      ('star', 'Star', 's@x'), ('fan', 'Fan', 'f@x');
+  `);
+});
+
+afterAll(async () => {
+  await db.close();
+});
+
+let clock = 0;
+async function createRecipe(userId: string, id: string) {
+  const createdAt = `2026-01-01 00:00:${String(clock++).padStart(2, '0')}`;
+  await db.run(
+    'INSERT INTO recipes (id, user_id, name, created_at) VALUES (?, ?, ?, ?)',
+    id,
+    userId,
+    id,
+    createdAt,
+  );
+  return fanOutRecipe(db, id);
+}
+
+async function follow(followerId: string, authorId: string, fanoutLimit?: number) {
+  await db.run(
+    'INSERT INTO followers (follower_id, followed_id) VALUES (?, ?)',
+    followerId,
+    authorId,
+  );
+  await followAuthor(db, followerId, authorId, fanoutLimit);
+}
+
+const ids = (rows: { id: string }[]) => rows.map((r) => r.id);
+
+describe('followed-chefs feed', () => {
+  it('should backfill on follow, push new recipes and drop them on unfollow', async () => {
+    await createRecipe('chef', 'old');
+    await follow('reader', 'chef');
+    expect(await createRecipe('chef', 'new')).toBe(1);
+    expect(await createRecipe('reader', 'own')).toBe(0);
+
+    expect(ids(await feedPage(db, 'reader', null, -1))).toEqual(['new', 'old']);
+
+    await db.run("DELETE FROM followers WHERE follower_id = 'reader' AND followed_id = 'chef'");
+    await unfollowAuthor(db, 'reader', 'chef');
+    expect(await feedPage(db, 'reader', null, -1)).toEqual([]);
+  });
+
+  it('should merge celebrities in at read time and page with the cursor', async () => {
+    await follow('reader', 'chef');
+    await createRecipe('star', 'star-1');
+    await follow('fan', 'star', 2);
+    await follow('reader', 'star', 2); // second follower: promoted, nothing backfilled
+    expect(await db.get("SELECT 1 FROM feed_pull_authors WHERE user_id = 'star'")).toBeTruthy();
+    expect(await createRecipe('star', 'star-2')).toBe(0);
+    await createRecipe('chef', 'chef-3');
+
+    const all = await feedPage(db, 'reader', null, -1);
+    expect(ids(all)).toEqual(['chef-3', 'star-2', 'star-1', 'new', 'old']);
+    // star-1 was pushed to the fan before the promotion and is pulled now: listed once
+    expect(ids(await feedPage(db, 'fan', null, -1))).toEqual(['star-2', 'star-1']);
+
+    const first = await feedPage(db, 'reader', null, 2);
+    const cursor = [first[1].cursor_key, first[1].id];
+    expect(ids(await feedPage(db, 'reader', cursor, 2))).toEqual(['star-1', 'new']);
+  });
+
+  it('should drop feed rows with their recipe', async () => {
+    await db.run("DELETE FROM recipes WHERE id = 'new'");
+    expect(ids(await feedPage(db, 'reader', null, -1))).not.toContain('new');
+  });
+});
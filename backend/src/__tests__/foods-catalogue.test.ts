@@ -0,0 +1,82 @@
+process.env.DB_PATH = ':memory:';
+
+import express from 'express';
+import request from 'supertest';
+import { Database } from 'sqlite';
+import { getDB } from '../db';
+import { keyStore } from '../key-store';
+import { signToken } from '../auth.middleware';
+import {
+  catalogueDelta,
+  getFoodsCatalogue,
+  getFoodsVersion,
+  serializeCatalogue,
+} from '../foods-catalogue';
+import { foodsRouter } from '../routes/foods.routes';
+
+let db: Database;
+
+const UPSERT =
+  'INSERT INTO foods (id, name, name_it, kcal) VALUES (?, ?, ?, ?) ON CONFLICT(id) DO UPDATE SET name_it = excluded.name_it, kcal = excluded.kcal';
+
+beforeAll(async () => {
+  db = await getDB();
+  await keyStore.init();
+  await db.run(UPSERT, 'f1', 'Tomato', 'Pomodoro', 18);
+  await db.run(UPSERT, 'f2', 'Basil', 'Basilico', 23);
+});
+
+afterAll(async () => {
+  keyStore.stop();
+  await db.close();
+});
+
+describe('foods catalogue', () => {
+  it('should keep the version when an upsert changes nothing', async () => {
+    const before = await getFoodsVersion(db);
+    await db.run(UPSERT, 'f1', 'Tomato', 'Pomodoro', 18);
+    expect(await getFoodsVersion(db)).toBe(before);
+  });
+
+  it('should reuse the snapshot and serialized body until a food changes', async () => {
+    const first = await getFoodsCatalogue();
+    const body = serializeCatalogue(first, 'it');
+    expect(JSON.parse(body).map((f: { name: string }) => f.name)).toEqual([
+      'Basilico',
+      'Pomodoro',
+    ]);
+    expect(await getFoodsCatalogue()).toBe(first);
+
+    await db.run(UPSERT, 'f1', 'Tomato', 'Pomodori', 18);
+    const second = await getFoodsCatalogue();
+
+    expect(second).not.toBe(first);
+    expect(second.version).toBeGreaterThan(first.version);
+    expect(catalogueDelta(second, first.version, 'it')).toEqual({
+      version: second.version,
+      foods: [expect.objectContaining({ id: 'f1', name: 'Pomodori' })],
+    });
+    expect(catalogueDelta(second, second.version, 'en').foods).toEqual([]);
+  });
+});
+
+describe('GET /foods', () => {
+  it('should tag each content coding with its own ETag', async () => {
+    const app = express();
+    app.use('/foods', foodsRouter);
+    const auth = `Bearer ${await signToken({ id: 'me', name: 'Me', email: 'me@x' })}`;
+    const get = (encoding: string) =>
+      request(app).get('/foods').set('Authorization', auth).set('Accept-Encoding', encoding);
+
+    const tags: string[] = [];
+    for (const encoding of ['br', 'gzip', 'identity']) {
+      const res = await get(encoding).expect(200);
+      expect(res.headers.vary).toMatch(/Accept-Encoding/);
+      tags.push(res.headers.etag);
+      await get(encoding).set('If-None-Match', res.headers.etag).expect(304);
+    }
+    expect(new Set(tags).size).toBe(3);
+    // A gzip copy does not validate a brotli request
+    await get('br').set('If-None-Match', tags[1]).expect(200);
+  });
+});
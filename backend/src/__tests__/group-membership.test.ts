@@ -0,0 +1,51 @@
+process.env.DB_PATH = ':memory:';
+
+import { Database } from 'sqlite';
+import { getDB } from '../db';
+import {
+  getGroupMemberIds,
+  getUserGroupId,
+  invalidateGroupMembership,
+  isGroupMember,
+} from '../group-membership';
+import { countQueries } from '../bench/bench-utils';
+
+let db: Database;
+
+beforeAll(async () => {
+  db = await getDB();
+  await db.exec(`
+    INSERT INTO users (id, name, email) VALUES ('u1', 'Ann', 'a@x'), ('u2', 'Bob', 'b@x'), ('u3', 'Cy', 'c@x');
+    INSERT INTO groups_table (id) VALUES ('g1'), ('g2');
+    INSERT INTO group_members (group_id, user_id) VALUES ('g1', 'u1'), ('g1', 'u2');
+  `);
+});
+
+afterAll(async () => {
+  await db.close();
+});
+
+describe('group membership index', () => {
+  it('should answer lookups from memory once loaded', async () => {
+    expect(await getUserGroupId('u1')).toBe('g1');
+
+    const { result, queries } = await countQueries(db, async () => [
+      await getGroupMemberIds('g1'),
+      await getUserGroupId('u3'),
+      await isGroupMember('g2', 'u1'),
+    ]);
+
+    expect(result).toEqual([['u1', 'u2'], null, false]);
+    expect(queries).toBe(0);
+  });
+
+  it('should reload after invalidation', async () => {
+    await db.run("INSERT INTO group_members (group_id, user_id) VALUES ('g2', 'u3')");
+    expect(await getUserGroupId('u3')).toBeNull();
+
+    invalidateGroupMembership();
+
+    expect(await getUserGroupId('u3')).toBe('g2');
+    expect(await isGroupMember('g2', 'u3')).toBe(true);
+  });
+});
@@ -6,76 +6,17 @@ import sqlite3 from 'sqlite3';
 import { open, Database } from 'sqlite';
 import crypto from 'crypto';
 import jwt from 'jsonwebtoken';
+import { migrate } from '../migrations';
 
 // ── In-memory DB ──────────────────────────────────────
 
 let db: Database;
 
-/** Open an in-memory database and create all tables */
+/** Open an in-memory database and apply the real schema migrations */
 export async function setupTestDB(): Promise<Database> {
   db = await open({ filename: ':memory:', driver: sqlite3.Database });
   await db.exec('PRAGMA foreign_keys = ON');
-  await db.exec(`
-    CREATE TABLE IF NOT EXISTS users (
-      id TEXT PRIMARY KEY, name TEXT NOT NULL, email TEXT UNIQUE NOT NULL,
-      password TEXT, avatar_url TEXT DEFAULT '', google_id TEXT UNIQUE,
-      created_at TEXT DEFAULT (datetime('now'))
-    );
-    CREATE TABLE IF NOT EXISTS recipes (
-      id TEXT PRIMARY KEY, user_id TEXT NOT NULL, name TEXT NOT NULL,
-      description TEXT DEFAULT '', cuisine TEXT DEFAULT '', type TEXT DEFAULT 'OTHER',
-      difficulty TEXT DEFAULT 'EASY', time_value REAL, time_unit TEXT DEFAULT 'MINUTE',
-      servings INTEGER DEFAULT 4, created_at TEXT DEFAULT (datetime('now')),
-      FOREIGN KEY(user_id) REFERENCES users(id) ON DELETE CASCADE
-    );
-    CREATE TABLE IF NOT EXISTS recipe_ingredients (
-      id TEXT PRIMARY KEY, recipe_id TEXT NOT NULL, food_id TEXT, name TEXT NOT NULL,
-      quantity_value REAL, quantity_unit TEXT, sort_order INTEGER DEFAULT 0,
-      FOREIGN KEY(recipe_id) REFERENCES recipes(id) ON DELETE CASCADE
-    );
-    CREATE TABLE IF NOT EXISTS recipe_steps (
-      id TEXT PRIMARY KEY, recipe_id TEXT NOT NULL, text TEXT NOT NULL,
-      image_url TEXT DEFAULT '', sort_order INTEGER DEFAULT 0,
-      FOREIGN KEY(recipe_id) REFERENCES recipes(id) ON DELETE CASCADE
-    );
-    CREATE TABLE IF NOT EXISTS recipe_tags (
-      recipe_id TEXT NOT NULL, tag TEXT NOT NULL, PRIMARY KEY(recipe_id, tag),
-      FOREIGN KEY(recipe_id) REFERENCES recipes(id) ON DELETE CASCADE
-    );
-    CREATE TABLE IF NOT EXISTS saved_recipes (
-      user_id TEXT NOT NULL, recipe_id TEXT NOT NULL, created_at TEXT DEFAULT (datetime('now')),
-      PRIMARY KEY(user_id, recipe_id),
-      FOREIGN KEY(user_id) REFERENCES users(id) ON DELETE CASCADE,
-      FOREIGN KEY(recipe_id) REFERENCES recipes(id) ON DELETE CASCADE
-    );
-    CREATE TABLE IF NOT EXISTS foods (
-      id TEXT PRIMARY KEY, name TEXT NOT NULL, default_unit TEXT DEFAULT 'GRAM',
-      created_by TEXT, kcal REAL, protein REAL, fat REAL, carbs REAL, fiber REAL,
-      FOREIGN KEY(created_by) REFERENCES users(id) ON DELETE SET NULL
-    );
-    CREATE TABLE IF NOT EXISTS planning (
-      id TEXT PRIMARY KEY, recipe_id TEXT NOT NULL, recipe_name TEXT NOT NULL DEFAULT '',
-      week TEXT NOT NULL, day TEXT, meal TEXT, user_id TEXT NOT NULL,
-      FOREIGN KEY(recipe_id) REFERENCES recipes(id) ON DELETE CASCADE,
-      FOREIGN KEY(user_id) REFERENCES users(id) ON DELETE CASCADE
-    );
-    CREATE TABLE IF NOT EXISTS followers (
-      follower_id TEXT NOT NULL, followed_id TEXT NOT NULL,
-      created_at TEXT DEFAULT (datetime('now')),
-      PRIMARY KEY(follower_id, followed_id),
-      FOREIGN KEY(follower_id) REFERENCES users(id) ON DELETE CASCADE,
-      FOREIGN KEY(followed_id) REFERENCES users(id) ON DELETE CASCADE
-    );
-    CREATE TABLE IF NOT EXISTS groups_table (
-      id TEXT PRIMARY KEY, created_at TEXT DEFAULT (datetime('now'))
-    );
-    CREATE TABLE IF NOT EXISTS group_members (
-      group_id TEXT NOT NULL, user_id TEXT NOT NULL,
-      PRIMARY KEY(group_id, user_id),
-      FOREIGN KEY(group_id) REFERENCES groups_table(id) ON DELETE CASCADE,
-      FOREIGN KEY(user_id) REFERENCES users(id) ON DELETE CASCADE
-    );
-  `);
+  await migrate(db);
   return db;
 }
 
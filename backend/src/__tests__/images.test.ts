@@ -0,0 +1,106 @@
+process.env.DB_PATH = ':memory:';
+process.env.UPLOADS_DIR = `${process.env.TMPDIR || '/tmp'}/food-recipes-uploads-${process.pid}`;
+
+import express from 'express';
+import fs from 'fs';
+import path from 'path';
+import { Readable } from 'stream';
+import request from 'supertest';
+import { Database } from 'sqlite';
+import { getDB } from '../db';
+import { keyStore } from '../key-store';
+import { signToken } from '../auth.middleware';
+import { storeImage, sweepImages, UPLOADS_DIR } from '../images';
+import { imagesRouter } from '../routes/images.routes';
+
+let db: Database;
+let token: string;
+const app = express();
+app.use('/images', imagesRouter);
+
+const PNG = Buffer.concat([
+  Buffer.from([0x89, 0x50, 0x4e, 0x47, 0x0d, 0x0a, 0x1a, 0x0a]),
+  Buffer.alloc(2000, 1),
+]);
+
+beforeAll(async () => {
+  db = await getDB();
+  await keyStore.init();
+  await db.exec(`
+    INSERT INTO users (id, name, email) VALUES ('me', 'Me', 'me@x');
+    INSERT INTO recipes (id, user_id, name) VALUES ('r1', 'me', 'Pie');
+  `);
+  token = await signToken({ id: 'me', name: 'Me', email: 'me@x' });
+});
+
+afterAll(async () => {
+  keyStore.stop();
+  await db.close();
+  fs.rmSync(UPLOADS_DIR, { recursive: true, force: true });
+});
+
+const upload = (body: Buffer, filename = 'photo.png') =>
+  request(app)
+    .post('/images')
+    .set('Authorization', `Bearer ${token}`)
+    .attach('image', body, filename);
+
+describe('POST /images', () => {
+  it('should store an image once under its content hash', async () => {
+    const first = await upload(PNG).expect(201);
+    const second = await upload(PNG, 'copy.png').expect(201);
+    expect(first.body.url).toMatch(/^\/images\/[0-9a-f]{64}\.png$/);
+    expect(second.body.url).toBe(first.body.url);
+    expect(fs.readdirSync(UPLOADS_DIR).filter((f) => f.endsWith('.png'))).toHaveLength(1);
+
+    await upload(Buffer.from('<script>alert(1)</script>'), 'x.png').expect(415);
+    await request(app).post('/images').attach('image', PNG, 'a.png').expect(401);
+  });
+
+  it('should serve immutable files with range support', async () => {
+    const { body } = await upload(PNG).expect(201);
+    const full = await request(app).get(body.url).expect(200);
+    expect(full.headers['cache-control']).toMatch(/immutable/);
+    expect(full.headers['content-type']).toBe('image/png');
+
+    const part = await request(app).get(body.url).set('Range', 'bytes=0-7').expect(206);
+    expect(part.headers['content-length']).toBe('8');
+  });
+});
+
+describe('sweepImages', () => {
+  it('should remove only unreferenced images past the grace period', async () => {
+    const kept = (await upload(PNG).expect(201)).body.url;
+    const other = Buffer.concat([PNG, Buffer.from('other')]);
+    const dropped = (await upload(other).expect(201)).body.url;
+    await db.run(
+      "INSERT INTO recipe_steps (id, recipe_id, text, image_url) VALUES ('s1', 'r1', 'Bake', ?)",
+      `http://localhost:3000${kept}`,
+    );
+
+    expect(await sweepImages(db, 60_000)).toBe(0);
+    expect(await sweepImages(db, -1)).toBe(1);
+    expect(fs.existsSync(path.join(UPLOADS_DIR, path.basename(kept)))).toBe(true);
+    expect(fs.existsSync(path.join(UPLOADS_DIR, path.basename(dropped)))).toBe(false);
+  });
+});
+
+describe('storeImage', () => {
+  it('should store the upload again when the sweep removes the copy it matched', async () => {
+    const image = Buffer.concat([PNG, Buffer.from('raced')]);
+    const first = await storeImage(Readable.from([image]));
+    const target = path.join(UPLOADS_DIR, first.name);
+
+    // The sweep deletes the file between the dedup check and the refresh
+    const utimes = fs.promises.utimes;
+    jest.spyOn(fs.promises, 'utimes').mockImplementationOnce(async (file, atime, mtime) => {
+      fs.rmSync(file);
+      return utimes(file, atime, mtime);
+    });
+    const second = await storeImage(Readable.from([image]));
+
+    expect(second).toEqual({ name: first.name, size: first.size, created: true });
+    expect(fs.readFileSync(target)).toEqual(image);
+    expect(fs.readdirSync(UPLOADS_DIR).filter((f) => f.startsWith('.upload-'))).toEqual([]);
+  });
+});
@@ -0,0 +1,61 @@
+process.env.DB_PATH = ':memory:';
+
+import { Database } from 'sqlite';
+import { getDB } from '../db';
+import { keyStore } from '../key-store';
+import { countQueries } from '../bench/bench-utils';
+
+const PAYLOAD = { id: 'u1', name: 'Ada', email: 'ada@example.com' };
+
+let db: Database;
+
+beforeAll(async () => {
+  db = await getDB();
+  await keyStore.init();
+});
+
+afterAll(async () => {
+  keyStore.stop();
+  await db.close();
+});
+
+describe('keyStore', () => {
+  it('should sign and verify without touching the database', async () => {
+    const { result, queries } = await countQueries(db, async () => {
+      const token = await keyStore.signAccessToken(PAYLOAD);
+      return keyStore.verifyToken(token);
+    });
+
+    expect(result).toMatchObject(PAYLOAD);
+    expect(queries).toBe(0);
+  });
+
+  it('should share one key generation between concurrent rotations', async () => {
+    const before = await db.get<{ n: number }>('SELECT COUNT(*) AS n FROM jwt_keys');
+
+    await Promise.all([keyStore.rotate(), keyStore.rotate(), keyStore.rotate()]);
+
+    const after = await db.get<{ n: number }>('SELECT COUNT(*) AS n FROM jwt_keys');
+    expect(after!.n).toBe(before!.n + 1);
+  });
+
+  it('should keep verifying tokens signed with the previous key after rotation', async () => {
+    const oldToken = await keyStore.signAccessToken(PAYLOAD);
+
+    await keyStore.rotate();
+    const newToken = await keyStore.signAccessToken(PAYLOAD);
+
+    expect(newToken).not.toBe(oldToken);
+    await expect(keyStore.verifyToken(oldToken)).resolves.toMatchObject(PAYLOAD);
+    await expect(keyStore.verifyToken(newToken)).resolves.toMatchObject(PAYLOAD);
+  });
+
+  it('should reject tokens whose key was removed', async () => {
+    const token = await keyStore.signAccessToken(PAYLOAD);
+    await keyStore.rotate();
+    await db.run('DELETE FROM jwt_keys WHERE is_current = 0');
+    await keyStore.rotate();
+
+    await expect(keyStore.verifyToken(token)).rejects.toThrow('Signing key not found');
+  });
+});
@@ -0,0 +1,40 @@
+import { LruCache } from '../lru-cache';
+
+describe('LruCache', () => {
+  it('should evict the least recently used entry when full', () => {
+    const cache = new LruCache<number>(2, 60_000);
+    cache.set('a', 1);
+    cache.set('b', 2);
+    cache.get('a');
+    cache.set('c', 3);
+
+    expect(cache.get('b')).toBeUndefined();
+    expect(cache.get('a')).toBe(1);
+    expect(cache.get('c')).toBe(3);
+    expect(cache.stats()).toMatchObject({ size: 2, hits: 3, misses: 1, evictions: 1 });
+  });
+
+  it('should expire entries after their TTL', () => {
+    const now = jest.spyOn(Date, 'now').mockReturnValue(1_000);
+    const cache = new LruCache<string>(10, 500);
+    cache.set('k', 'v');
+
+    now.mockReturnValue(1_499);
+    expect(cache.get('k')).toBe('v');
+    now.mockReturnValue(1_500);
+    expect(cache.get('k')).toBeUndefined();
+    expect(cache.stats()).toMatchObject({ size: 0, expirations: 1 });
+    now.mockRestore();
+  });
+
+  it('should count explicit invalidations', () => {
+    const cache = new LruCache<number>(10, 60_000);
+    cache.set('a', 1);
+    cache.set('b', 2);
+    cache.delete('a');
+    cache.delete('missing');
+    cache.clear();
+
+    expect(cache.stats()).toMatchObject({ size: 0, invalidations: 2 });
+  });
+});
@@ -0,0 +1,89 @@
+process.env.DB_PATH = ':memory:';
+
+import express from 'express';
+import request from 'supertest';
+import { Database } from 'sqlite';
+import { getDB } from '../db';
+import {
+  metricsMiddleware,
+  normalizeSql,
+  queryDuration,
+  renderMetrics,
+  RequestMetrics,
+  resetMetrics,
+  withRequestMetrics,
+} from '../metrics';
+
+let db: Database;
+
+beforeAll(async () => {
+  db = await getDB();
+  await db.exec("INSERT INTO users (id, name, email) VALUES ('u1', 'Ann', 'a@x')");
+});
+
+afterAll(async () => {
+  await db.close();
+});
+
+beforeEach(() => resetMetrics());
+
+describe('normalizeSql', () => {
+  it('should collapse whitespace, literals and placeholder lists', () => {
+    expect(
+      normalizeSql(`SELECT * FROM recipes
+        WHERE user_id IN (?, ?, ?) AND name = 'Pie' AND servings > 4 LIMIT 10`),
+    ).toBe('SELECT * FROM recipes WHERE user_id IN (?…) AND name = ? AND servings > ? LIMIT ?');
+    expect(normalizeSql('SELECT id FROM recipes_fts WHERE id IN (?, ?)')).toBe(
+      normalizeSql('SELECT id FROM recipes_fts WHERE id IN (?,?,?,?)'),
+    );
+  });
+});
+
+describe('query timing', () => {
+  it('should count the queries of the surrounding request', async () => {
+    const metrics: RequestMetrics = { queries: 0, dbSeconds: 0 };
+
+    await withRequestMetrics(metrics, async () => {
+      await db.get('SELECT name FROM users WHERE id = ?', 'u1');
+      await Promise.all([db.all('SELECT id FROM users'), db.all('SELECT id FROM users')]);
+    });
+    await db.get('SELECT name FROM users WHERE id = ?', 'u1');
+
+    expect(metrics.queries).toBe(3);
+    expect(metrics.dbSeconds).toBeGreaterThan(0);
+    expect(queryDuration.render()).toContain(
+      'db_query_duration_seconds_count{sql="SELECT name FROM users WHERE id = ?"} 2',
+    );
+  });
+});
+
+describe('metricsMiddleware', () => {
+  it('should record latency and queries by route template', async () => {
+    const app = express();
+    app.use(metricsMiddleware);
+    const router = express.Router();
+    router.get('/:id', async (req, res) => {
+      const user = await db.get('SELECT name FROM users WHERE id = ?', req.params.id);
+      if (!user) return res.status(404).json({ error: 'Not found' });
+      res.json(user);
+    });
+    app.use('/users', router);
+
+    await request(app).get('/users/u1').expect(200);
+    await request(app).get('/users/nobody').expect(404);
+    await request(app).get('/nowhere').expect(404);
+
+    const text = renderMetrics();
+    expect(text).toContain('# TYPE http_request_duration_seconds histogram');
+    expect(text).toContain(
+      'http_request_duration_seconds_count{method="GET",route="/users/:id",status="200"} 1',
+    );
+    expect(text).toContain(
+      'http_request_duration_seconds_count{method="GET",route="unmatched",status="404"} 1',
+    );
+    expect(text).toContain('http_request_db_queries_sum{method="GET",route="/users/:id"} 2');
+    expect(text).toContain(
+      'http_request_db_queries_bucket{method="GET",route="/users/:id",le="1"} 2',
+    );
+  });
+});
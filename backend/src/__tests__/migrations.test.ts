@@ -0,0 +1,61 @@
+import sqlite3 from 'sqlite3';
+import { open, Database } from 'sqlite';
+import { getSchemaVersion, LATEST_SCHEMA_VERSION, migrate } from '../migrations';
+
+let db: Database;
+
+beforeEach(async () => {
+  db = await open({ filename: ':memory:', driver: sqlite3.Database });
+});
+
+afterEach(async () => {
+  await db.close();
+});
+
+describe('migrate', () => {
+  it('should bring an empty database to the latest version', async () => {
+    const from = await migrate(db);
+
+    expect(from).toBe(0);
+    expect(await getSchemaVersion(db)).toBe(LATEST_SCHEMA_VERSION);
+    const tables = await db.all<{ name: string }[]>(
+      "SELECT name FROM sqlite_master WHERE type = 'table'",
+    );
+    expect(tables.map((t) => t.name)).toEqual(
+      expect.arrayContaining(['users', 'recipes', 'planning', 'jwt_keys']),
+    );
+  });
+
+  it('should skip all DDL when the schema is current', async () => {
+    await migrate(db);
+    const statements: string[] = [];
+    db.on('trace', (sql: string) => statements.push(sql));
+
+    const from = await migrate(db);
+
+    expect(from).toBe(LATEST_SCHEMA_VERSION);
+    expect(statements).toEqual(['PRAGMA user_version']);
+  });
+
+  it('should add missing columns to a database created before versioning', async () => {
+    await db.exec(`
+      CREATE TABLE users (id TEXT PRIMARY KEY, name TEXT NOT NULL, email TEXT UNIQUE NOT NULL);
+      CREATE TABLE recipes (id TEXT PRIMARY KEY, user_id TEXT NOT NULL, name TEXT NOT NULL);
+      CREATE TABLE planning (
+        id TEXT PRIMARY KEY, recipe_id TEXT NOT NULL, recipe_name TEXT NOT NULL DEFAULT '',
+        week TEXT NOT NULL, day TEXT, meal TEXT, user_id TEXT NOT NULL
+      );
+    `);
+
+    await migrate(db);
+
+    const recipeColumns = await db.all<{ name: string }[]>('PRAGMA table_info(recipes)');
+    expect(recipeColumns.map((c) => c.name)).toEqual(
+      expect.arrayContaining(['min_servings', 'split_servings', 'wip', 'notes']),
+    );
+    const planningColumns = await db.all<{ name: string }[]>('PRAGMA table_info(planning)');
+    expect(planningColumns.map((c) => c.name)).toEqual(
+      expect.arrayContaining(['servings', 'assigned_to']),
+    );
+  });
+});
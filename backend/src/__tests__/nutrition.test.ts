@@ -0,0 +1,85 @@
+process.env.DB_PATH = ':memory:';
+
+import { Database } from 'sqlite';
+import { getDB } from '../db';
+import { summarizeNutrition } from '../nutrition';
+
+let db: Database;
+
+beforeAll(async () => {
+  db = await getDB();
+  await db.exec(`
+    INSERT INTO users (id, name, email) VALUES ('u1', 'Ann', 'a@x');
+    INSERT INTO foods (id, name, kcal, protein, fat, carbs, fiber)
+      VALUES ('pasta', 'Pasta', 350, 12, 1.5, 72, 3);
+    INSERT INTO foods (id, name) VALUES ('mystery', 'Mystery');
+    INSERT INTO recipes (id, user_id, name, servings) VALUES ('r1', 'u1', 'Pasta', 2);
+    INSERT INTO recipe_ingredients (recipe_id, food_id, name, quantity_value, quantity_unit)
+      VALUES ('r1', 'pasta', 'Pasta', 0.2, 'KILO'), ('r1', 'mystery', 'Mystery', 50, 'GRAM');
+    INSERT INTO planning (id, recipe_id, week, day, user_id, servings)
+      VALUES ('p1', 'r1', '2026-01-05', 'MON', 'u1', 1),
+             ('p2', 'r1', '2026-01-12', 'TUE', 'u1', 3);
+  `);
+});
+
+afterAll(async () => {
+  await db.close();
+});
+
+describe('recipe_nutrition', () => {
+  it('should store per-serving values and skip foods without data', async () => {
+    // 200 g of pasta for 2 servings
+    const row = await db.get('SELECT kcal, items FROM recipe_nutrition WHERE recipe_id = ?', 'r1');
+    expect(row).toEqual({ kcal: 350, items: 1 });
+  });
+
+  it('should follow recipe and food changes', async () => {
+    await db.run("UPDATE recipes SET servings = 1 WHERE id = 'r1'");
+    await db.run("UPDATE foods SET kcal = 100 WHERE id = 'pasta'");
+    expect(await db.get('SELECT kcal FROM recipe_nutrition WHERE recipe_id = ?', 'r1')).toEqual({
+      kcal: 200,
+    });
+    await db.run("UPDATE foods SET kcal = 350 WHERE id = 'pasta'");
+    await db.run("UPDATE recipes SET servings = 2 WHERE id = 'r1'");
+  });
+
+  it('should not recompute when a food upsert leaves the values unchanged', async () => {
+    await db.exec(`
+      CREATE TEMP TABLE nutrition_refreshes (recipe_id TEXT);
+      CREATE TEMP TRIGGER count_nutrition_refreshes AFTER DELETE ON main.recipe_nutrition BEGIN
+        INSERT INTO nutrition_refreshes VALUES (old.recipe_id);
+      END;
+    `);
+    // What seedFoods() does on every boot
+    await db.run(
+      "UPDATE foods SET kcal = 350, protein = 12, fat = 1.5, carbs = 72, fiber = 3 WHERE id = 'pasta'",
+    );
+    expect(await db.all('SELECT * FROM nutrition_refreshes')).toEqual([]);
+
+    await db.run("UPDATE foods SET protein = 13 WHERE id = 'pasta'");
+    expect(await db.all('SELECT * FROM nutrition_refreshes')).toEqual([{ recipe_id: 'r1' }]);
+    await db.exec(`
+      UPDATE foods SET protein = 12 WHERE id = 'pasta';
+      DROP TRIGGER count_nutrition_refreshes;
+      DROP TABLE nutrition_refreshes;
+    `);
+  });
+});
+
+describe('summarizeNutrition', () => {
+  it('should multiply per-serving values by planned servings per week', async () => {
+    const { weeks, total } = await summarizeNutrition(db, ['u1'], '2026-01-01', '2026-01-31');
+
+    expect(weeks.map((w) => w.week)).toEqual(['2026-01-05', '2026-01-12']);
+    expect(weeks[0].days.MON.kcal).toBe(350);
+    expect(weeks[1].weekTotal).toEqual({ kcal: 1050, protein: 36, fat: 4.5, carbs: 216, fiber: 9 });
+    expect(total.kcal).toBe(1400);
+  });
+
+  it('should return nothing outside the range', async () => {
+    expect(await summarizeNutrition(db, ['u1'], '2026-02-01', '2026-02-28')).toEqual({
+      weeks: [],
+      total: { kcal: 0, protein: 0, fat: 0, carbs: 0, fiber: 0 },
+    });
+  });
+});
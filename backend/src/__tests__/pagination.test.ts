@@ -0,0 +1,141 @@
+process.env.DB_PATH = ':memory:';
+
+import express from 'express';
+import request from 'supertest';
+import { Database } from 'sqlite';
+import { getDB } from '../db';
+import { keyStore } from '../key-store';
+import { signToken } from '../auth.middleware';
+import {
+  decodeCursor,
+  encodeCursor,
+  MAX_PAGE_SIZE,
+  NEXT_CURSOR_HEADER,
+  parseLimit,
+} from '../pagination';
+import { recipesRouter } from '../routes/recipes.routes';
+
+let db: Database;
+let token: string;
+const app = express();
+app.use(express.json());
+app.use('/recipes', recipesRouter);
+
+// Every row shares one timestamp, so only the id tiebreaker keeps pages apart
+const SAME_TIME = '2026-01-05 10:00:00';
+
+beforeAll(async () => {
+  db = await getDB();
+  await keyStore.init();
+  await db.exec(`
+    INSERT INTO users (id, name, email) VALUES ('me', 'Me', 'me@x'), ('u1', 'Ann', 'a@x');
+    INSERT INTO recipes (id, user_id, name, created_at) VALUES
+      ('m1', 'me', 'Soup', '${SAME_TIME}'), ('m2', 'me', 'Stew', '${SAME_TIME}'),
+      ('m3', 'me', 'Salad', '${SAME_TIME}'), ('m4', 'me', 'Risotto', '${SAME_TIME}'),
+      ('m5', 'me', 'Pasta', '${SAME_TIME}'),
+      ('a1', 'u1', 'Pie', '${SAME_TIME}'), ('a2', 'u1', 'Tart', '${SAME_TIME}');
+    INSERT INTO saved_recipes (user_id, recipe_id, created_at) VALUES
+      ('me', 'a1', '${SAME_TIME}'), ('me', 'a2', '${SAME_TIME}'),
+      ('me', 'm2', '${SAME_TIME}'), ('me', 'm4', '${SAME_TIME}'),
+      ('me', 'm5', '${SAME_TIME}');
+  `);
+  token = await signToken({ id: 'me', name: 'Me', email: 'me@x' });
+});
+
+afterAll(async () => {
+  keyStore.stop();
+  await db.close();
+});
+
+const get = (path: string) => request(app).get(path).set('Authorization', `Bearer ${token}`);
+
+/** Follow X-Next-Cursor from the first page to the last, collecting recipe ids. */
+async function walk(path: string, limit: number): Promise<string[]> {
+  const ids: string[] = [];
+  let cursor: string | undefined;
+  do {
+    const query = `limit=${limit}${cursor ? `&cursor=${cursor}` : ''}`;
+    const page = await get(`${path}?${query}`).expect(200);
+    expect(page.body.length).toBeLessThanOrEqual(limit);
+    ids.push(...page.body.map((r: { id: string }) => r.id));
+    cursor = page.headers[NEXT_CURSOR_HEADER.toLowerCase()];
+  } while (cursor);
+  return ids;
+}
+
+/** Buffer an NDJSON body as text: supertest does not parse that type. */
+function readText(res: any, callback: (err: Error | null, body: string) => void) {
+  let text = '';
+  res.setEncoding('utf8');
+  res.on('data', (chunk: string) => (text += chunk));
+  res.on('end', () => callback(null, text));
+}
+
+describe('cursor encoding', () => {
+  it('should round-trip a sort key', () => {
+    const key = ['2026-01-05 10:00:00', 'r1'];
+    expect(decodeCursor(encodeCursor(key), 2)).toEqual(key);
+  });
+
+  it('should reject malformed or mismatched cursors', () => {
+    expect(decodeCursor('not-a-cursor', 2)).toBeNull();
+    expect(decodeCursor(encodeCursor(['a']), 2)).toBeNull();
+    expect(decodeCursor(Buffer.from('{"a":1}').toString('base64url'), 1)).toBeNull();
+    expect(decodeCursor(undefined, 2)).toBeNull();
+  });
+});
+
+describe('parseLimit', () => {
+  it('should fall back when absent and clamp explicit values', () => {
+    expect(parseLimit(undefined)).toBeUndefined();
+    expect(parseLimit(undefined, 50)).toBe(50);
+    expect(parseLimit('0')).toBe(1);
+    expect(parseLimit('10')).toBe(10);
+    expect(parseLimit('100000')).toBe(MAX_PAGE_SIZE);
+    expect(parseLimit('abc', 50)).toBe(50);
+  });
+});
+
+describe('recipe list pagination', () => {
+  it('should walk /recipes without duplicates or gaps on equal created_at', async () => {
+    expect(await walk('/recipes', 2)).toEqual(['m5', 'm4', 'm3', 'm2', 'm1']);
+  });
+
+  it('should walk /recipes/saved without duplicates or gaps on equal created_at', async () => {
+    expect(await walk('/recipes/saved', 2)).toEqual(['m5', 'm4', 'm2', 'a2', 'a1']);
+  });
+
+  it('should walk /recipes/discover without duplicates or gaps on equal created_at', async () => {
+    expect(await walk('/recipes/discover', 3)).toEqual(['m5', 'm4', 'm3', 'm2', 'm1', 'a2', 'a1']);
+    // One page under the default limit, so no cursor
+    const all = await get('/recipes/discover').expect(200);
+    expect(all.body).toHaveLength(7);
+    expect(all.headers[NEXT_CURSOR_HEADER.toLowerCase()]).toBeUndefined();
+  });
+
+  it('should reject a malformed cursor', async () => {
+    await get('/recipes?cursor=nope').expect(400, { error: 'Invalid cursor' });
+    await get('/recipes/saved?cursor=nope').expect(400);
+    await get(`/recipes/discover?cursor=${encodeCursor([SAME_TIME])}`).expect(400);
+  });
+
+  it('should stream NDJSON, one recipe per line, up to the limit', async () => {
+    const res = await get('/recipes/discover?format=ndjson&limit=4')
+      .buffer(true)
+      .parse(readText)
+      .expect(200)
+      .expect('Content-Type', /application\/x-ndjson/);
+    const lines = (res.body as string).split('\n');
+    expect(lines.pop()).toBe('');
+    expect(lines.map((line) => JSON.parse(line).id)).toEqual(['m5', 'm4', 'm3', 'm2']);
+
+    const all = await get('/recipes/saved')
+      .set('Accept', 'application/x-ndjson')
+      .buffer(true)
+      .parse(readText)
+      .expect(200);
+    const saved = (all.body as string).trim().split('\n').map((line) => JSON.parse(line));
+    expect(saved.map((r) => r.id)).toEqual(['m5', 'm4', 'm2', 'a2', 'a1']);
+    expect(saved[3]).toEqual(expect.objectContaining({ name: 'Tart', userId: 'u1' }));
+  });
+});
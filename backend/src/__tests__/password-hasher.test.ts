@@ -0,0 +1,34 @@
+import { PasswordHasherBusyError, PasswordHasherPool } from '../password-hasher';
+
+let pool: PasswordHasherPool;
+
+beforeEach(() => {
+  // Low cost keeps the tests fast; the algorithm is the same
+  pool = new PasswordHasherPool(2, 2, 4);
+});
+
+afterEach(async () => {
+  await pool.close();
+});
+
+describe('PasswordHasherPool', () => {
+  it('should hash on a worker and verify the result', async () => {
+    const hash = await pool.hash('s3cret');
+
+    expect(hash).toMatch(/^\$2[aby]\$04\$/);
+    await expect(pool.compare('s3cret', hash)).resolves.toBe(true);
+    await expect(pool.compare('wrong', hash)).resolves.toBe(false);
+    expect(pool.stats()).toMatchObject({ workers: 1, completed: 3, failed: 0 });
+  });
+
+  it('should queue jobs beyond the pool size and reject past the queue limit', async () => {
+    const jobs = Array.from({ length: 4 }, (_, i) => pool.hash(`pw${i}`));
+
+    await expect(pool.hash('overflow')).rejects.toBeInstanceOf(PasswordHasherBusyError);
+    expect(pool.stats()).toMatchObject({ workers: 2, queueDepth: 2, rejected: 1 });
+
+    const hashes = await Promise.all(jobs);
+    expect(new Set(hashes).size).toBe(4);
+    expect(pool.stats()).toMatchObject({ queueDepth: 0, maxQueueDepth: 2, completed: 4 });
+  });
+});
@@ -0,0 +1,91 @@
+process.env.DB_PATH = ':memory:';
+
+import { Database } from 'sqlite';
+import { getDB, withTransaction } from '../db';
+import {
+  applyPlanningBatch,
+  parsePlanningBatch,
+  PlanningBatchError,
+  planningBatchEvent,
+} from '../planning-batch';
+
+let db: Database;
+
+beforeAll(async () => {
+  db = await getDB();
+  await db.exec(`
+    INSERT INTO users (id, name, email) VALUES ('u1', 'Ann', 'a@x'), ('u2', 'Bob', 'b@x');
+    INSERT INTO recipes (id, user_id, name, min_servings) VALUES ('soup', 'u1', 'Soup', 2);
+    INSERT INTO planning (id, recipe_id, week, day, user_id) VALUES
+      ('p1', 'soup', '2026-01-05', 'MONDAY', 'u1'),
+      ('p2', 'soup', '2026-01-05', 'TUESDAY', 'u1'),
+      ('p3', 'soup', '2026-01-05', 'FRIDAY', 'u2');
+  `);
+});
+
+afterAll(async () => {
+  await db.close();
+});
+
+describe('planning batch', () => {
+  it('should reject malformed batches', () => {
+    expect(() => parsePlanningBatch({})).toThrow('Batch is empty');
+    expect(() => parsePlanningBatch({ add: [{ week: '2026-01-05' }] })).toThrow(
+      PlanningBatchError,
+    );
+    expect(() =>
+      parsePlanningBatch({ add: [{ recipe_id: 'soup', week: '2400-01-03' }] }),
+    ).toThrow('YYYY-MM-DD week');
+    expect(() => parsePlanningBatch({ move: [{ id: 'p1', week: '2026-02-30' }] })).toThrow(
+      'YYYY-MM-DD date',
+    );
+    expect(() => parsePlanningBatch({ move: [{ id: 'p1' }], delete: ['p1'] })).toThrow(
+      'only be moved or deleted once',
+    );
+  });
+
+  it('should apply adds, moves and deletes in one transaction', async () => {
+    const batch = parsePlanningBatch({
+      add: [{ recipe_id: 'soup', week: '2026-01-05', day: 'SUNDAY', servings: 3 }],
+      move: [
+        { id: 'p1', day: 'WEDNESDAY' },
+        { id: 'p2', week: '2026-01-12' },
+      ],
+      delete: ['p3'],
+    });
+
+    const result = await withTransaction((tx) => applyPlanningBatch(tx, 'u1', ['u1', 'u2'], batch));
+
+    expect(result.added).toEqual([
+      expect.objectContaining({ recipe_name: 'Soup', day: 'SUNDAY', servings: 3, minServings: 2 }),
+    ]);
+    expect(result.updated.map((i) => [i.id, i.week, i.day])).toEqual([
+      ['p1', '2026-01-05', 'WEDNESDAY'],
+      ['p2', '2026-01-12', 'TUESDAY'],
+    ]);
+    expect(result.deleted).toEqual([{ id: 'p3', week: '2026-01-05', user_id: 'u2' }]);
+    expect(await db.get("SELECT id FROM planning WHERE id = 'p3'")).toBeUndefined();
+
+    const { payload, weeks } = planningBatchEvent(result, 'u1');
+    expect(payload.added.map((i) => i.id)).toEqual([result.added[0].id, 'p2']);
+    expect(payload.updated.map((i) => i.id)).toEqual(['p1']);
+    expect(payload.deleted.map((d) => d.id)).toEqual(['p3', 'p2']);
+    expect(weeks.sort()).toEqual(['2026-01-05', '2026-01-12']);
+  });
+
+  it('should change nothing when a target is not visible to the caller', async () => {
+    await db.run(
+      "INSERT INTO planning (id, recipe_id, week, user_id) VALUES ('p4', 'soup', '2026-01-05', 'u2')",
+    );
+    const batch = parsePlanningBatch({
+      add: [{ recipe_id: 'soup', week: '2026-01-19' }],
+      delete: ['p1', 'p4'],
+    });
+
+    await expect(
+      withTransaction((tx) => applyPlanningBatch(tx, 'u1', ['u1'], batch)),
+    ).rejects.toMatchObject({ status: 404, ids: ['p4'] });
+    expect(await db.get("SELECT id FROM planning WHERE id = 'p1'")).toBeDefined();
+    expect(await db.get("SELECT id FROM planning WHERE week = '2026-01-19'")).toBeUndefined();
+  });
+});
@@ -205,6 +205,18 @@ describe('POST /planning', () => {
     // recipe_name defaults to the recipe table lookup name
     expect(res.status).toBe(200);
   });
+
+  it('should reject a week that is not a YYYY-MM-DD date in range', async () => {
+    const recipe = await seedRecipe(user1.id, 'Toast');
+
+    for (const week of [undefined, '2026-3-2', '2026-02-30', '2400-01-03']) {
+      const res = await request(app)
+        .post('/planning')
+        .set('Authorization', `Bearer ${token1}`)
+        .send({ recipe_id: recipe.id, week });
+      expect(res.status).toBe(400);
+    }
+  });
 });
 
 // ── PUT /planning/:id ───────────────────────────────
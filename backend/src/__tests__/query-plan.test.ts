@@ -0,0 +1,210 @@
+/**
+ * Query-plan regression suite.
+ *
+ * Drives the real routers through supertest against the schema from
+ * `getDB()`, records every statement they issue through the metrics
+ * `onQuery` hook, and runs EXPLAIN QUERY PLAN on each: the suite fails if any
+ * of them falls back to a full table scan. Because the SQL is captured rather
+ * than copied, it cannot drift from the routes; when you add a route, add a
+ * request for it to `exerciseRoutes`.
+ */
+process.env.DB_PATH = ':memory:';
+
+import express from 'express';
+import request from 'supertest';
+import { OAuth2Client } from 'google-auth-library';
+import { Database } from 'sqlite';
+import { getDB } from '../db';
+import { keyStore } from '../key-store';
+import { signToken } from '../auth.middleware';
+import { onQuery } from '../metrics';
+import { encodeCursor } from '../pagination';
+import { authRouter } from '../routes/auth.routes';
+import { foodsRouter } from '../routes/foods.routes';
+import { groupsRouter } from '../routes/groups.routes';
+import { planningRouter } from '../routes/planning.routes';
+import { recipesRouter } from '../routes/recipes.routes';
+import { usersRouter } from '../routes/users.routes';
+
+let db: Database;
+const tokens: Record<string, string> = {};
+const app = express();
+app.use(express.json());
+app.use('/auth', authRouter);
+app.use('/recipes', recipesRouter);
+app.use('/planning', planningRouter);
+app.use('/users', usersRouter);
+app.use('/groups', groupsRouter);
+app.use('/foods', foodsRouter);
+
+const WEEK = '2026-01-05';
+
+beforeAll(async () => {
+  db = await getDB();
+  await keyStore.init();
+  await db.exec(`
+    INSERT INTO users (id, name, email) VALUES
+      ('me', 'Me', 'me@x'), ('u1', 'Ann', 'a@x'), ('u2', 'Andrea', 'b@x'), ('gone', 'Gone', 'g@x');
+    INSERT INTO foods (id, name, name_it, kcal) VALUES ('flour', 'Flour', 'Farina', 364);
+    INSERT INTO recipes (id, user_id, name, created_at) VALUES
+      ('r1', 'u1', 'Pasta al forno', '2026-01-05 10:00:00'),
+      ('r2', 'u2', 'Pasta fredda', '2026-01-06 10:00:00'),
+      ('r3', 'me', 'Bread', '2026-01-07 10:00:00');
+    INSERT INTO recipe_ingredients (recipe_id, food_id, name, quantity_value, quantity_unit)
+      VALUES ('r1', 'flour', 'Flour', 200, 'GRAM');
+    INSERT INTO groups_table (id) VALUES ('g1');
+    INSERT INTO group_members (group_id, user_id) VALUES ('g1', 'me'), ('g1', 'u2');
+    -- u2 is merged into the feed at read time (see feed.ts)
+    INSERT INTO feed_pull_authors (user_id) VALUES ('u2');
+    INSERT INTO followers (follower_id, followed_id) VALUES ('me', 'u2');
+  `);
+  for (const [id, name, email] of [
+    ['me', 'Me', 'me@x'],
+    ['u1', 'Ann', 'a@x'],
+    ['gone', 'Gone', 'g@x'],
+  ]) {
+    tokens[id] = await signToken({ id, name, email });
+  }
+});
+
+afterAll(async () => {
+  keyStore.stop();
+  await db.close();
+});
+
+type Method = 'get' | 'post' | 'put' | 'patch' | 'delete';
+
+async function call(method: Method, path: string, body?: object, as = 'me') {
+  const req = request(app)[method](path).set('Authorization', `Bearer ${tokens[as]}`);
+  const res = await (body ? req.send(body) : req);
+  expect({ path, status: res.status }).toEqual({ path, status: 200 });
+  return res.body;
+}
+
+/** One request per route, reaching the branches that issue different SQL. */
+async function exerciseRoutes() {
+  const cursor = `cursor=${encodeCursor(['2026-01-06 10:00:00', 'r2'])}`;
+
+  // ── recipes ──
+  for (const list of ['', '/saved', '/discover', '/feed']) {
+    await call('get', `/recipes${list}`);
+    await call('get', `/recipes${list}?${cursor}`);
+  }
+  await call('get', '/recipes/feed', undefined, 'u1');
+  await call('get', `/recipes/feed?${cursor}`, undefined, 'u1');
+  await call('get', '/recipes/search?q=pasta');
+  await call('get', '/recipes/r1');
+  const { data: created } = await call('post', '/recipes', {
+    name: 'Soup',
+    ingredients: [
+      { id: 'flour', name: 'Flour', quantity: { value: 100, unit: 'GRAM' } },
+      { name: 'Salt', quantity: { value: 5, unit: 'GRAM' } },
+    ],
+    steps: [{ text: 'Boil' }, { text: 'Serve' }],
+    tags: ['quick'],
+  });
+  await call('put', `/recipes/${created.id}`, {
+    name: 'Soup',
+    ingredients: [
+      { name: 'Water', quantity: { value: 1, unit: 'LITER' } },
+      { id: 'flour', name: 'Flour', quantity: { value: 100, unit: 'GRAM' } },
+    ],
+    steps: [{ text: 'Serve' }],
+    tags: ['easy'],
+  });
+  await call('post', '/recipes/r1/save');
+  await call('delete', '/recipes/r1/save');
+
+  // ── planning ──
+  const planned = await call('post', '/planning', {
+    recipe_id: created.id,
+    week: WEEK,
+    day: 'MON',
+    meal: 'LUNCH',
+    servings: 2,
+  });
+  await call('put', `/planning/${planned.id}`, { day: 'TUE', meal: 'DINNER', servings: 3 });
+  await call('post', `/planning/${WEEK}/quick-add`, { foodId: 'flour', foodName: 'Flour' });
+  await call('post', `/planning/${WEEK}/quick-add`, { foodId: 'flour', foodName: 'Flour' });
+  const batch = await call('patch', '/planning/batch', {
+    add: [{ recipe_id: 'r1', week: WEEK, day: 'WED' }],
+    move: [{ id: planned.id, week: '2026-01-12', day: 'MON' }],
+  });
+  await call('post', '/planning/batch', { items: [{ recipe_id: 'r2', week: WEEK }] });
+  await call('patch', '/planning/batch', { delete: [batch.added[0].id] });
+  await call('get', `/planning/${WEEK}`);
+  await call('get', `/planning/${WEEK}?groupId=g1`);
+  await call('get', `/planning/nutrition-summary?from=${WEEK}&to=2026-01-12&assignedTo=me`);
+  await call('get', `/planning/${WEEK}/nutrition-summary?groupId=g1`);
+  await call('get', `/planning/${WEEK}/suggestions?meal=LUNCH`);
+  await call('get', `/planning/${WEEK}/shopping-list?groupId=g1`);
+  await call('delete', `/planning/${planned.id}`);
+  await call('delete', `/recipes/${created.id}`);
+
+  // ── users ──
+  await call('get', '/users');
+  await call('get', '/users?q=an');
+  await call('get', `/users?q=an&cursor=${encodeCursor(['Andrea', 'u2'])}`);
+  await call('get', '/users?ids=u1,u2');
+  await call('get', '/users/u1');
+  await call('get', '/users/u1/stats');
+  await call('post', '/users/u1/follow');
+  await call('delete', '/users/u1/follow');
+
+  // ── foods ──
+  await call('get', '/foods');
+  await call('get', '/foods/search?q=flo');
+  await call('post', '/foods', { name: 'Oats', kcal: 389 });
+
+  // ── groups ──
+  await call('get', '/groups/mine');
+  const group = await call('post', '/groups', undefined, 'u1');
+  await call('post', `/groups/${group.id}/join`, undefined, 'gone');
+  await call('post', `/groups/${group.id}/leave`, undefined, 'gone');
+
+  // ── auth ──
+  jest.spyOn(OAuth2Client.prototype, 'verifyIdToken').mockResolvedValue({
+    getPayload: () => ({ sub: 'google-me', email: 'me@x', name: 'Me' }),
+  } as never);
+  await call('post', '/auth/google', { idToken: 'id-token' });
+  await call('get', '/auth/me');
+  await call('delete', '/auth/me', undefined, 'gone');
+}
+
+/** Scratch tables that only ever hold the rows of the transaction in progress. */
+const SCRATCH_TABLES = new Set(['dirty_recipes', 'recipe_refresh_deferred']);
+
+/** The plan steps that read a whole table without any index. */
+function fullScans(details: string[]): string[] {
+  // A subquery the plan materializes is scanned by its name, e.g. "SCAN x"
+  const subqueries = new Set(details.map((d) => /^(?:MATERIALIZE|CO-ROUTINE) (\S+)/.exec(d)?.[1]));
+  return details.filter((detail) => {
+    const scanned = /^SCAN (\S+)/.exec(detail)?.[1];
+    if (!scanned || subqueries.has(scanned) || SCRATCH_TABLES.has(scanned)) return false;
+    // FTS5 MATCH lookups show up as "SCAN <table> VIRTUAL TABLE INDEX ..."
+    return !/USING (COVERING )?INDEX|USING INTEGER PRIMARY KEY|VIRTUAL TABLE INDEX/.test(detail);
+  });
+}
+
+describe('EXPLAIN QUERY PLAN', () => {
+  it('should not fall back to a table scan in any statement the routers issue', async () => {
+    const statements = new Set<string>();
+    const stop = onQuery((sql) => statements.add(sql));
+    try {
+      await exerciseRoutes();
+    } finally {
+      stop();
+    }
+    // Guards against the requests above silently reaching fewer routes
+    expect(statements.size).toBeGreaterThan(50);
+
+    const scans: Record<string, string[]> = {};
+    for (const sql of statements) {
+      // Unbound parameters are NULL; the plan does not depend on them
+      const plan = await db.all<{ detail: string }[]>(`EXPLAIN QUERY PLAN ${sql}`);
+      const found = fullScans(plan.map((step) => step.detail));
+      if (found.length) scans[sql] = found;
+    }
+    expect(scans).toEqual({});
+  });
+});
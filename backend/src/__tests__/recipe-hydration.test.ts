@@ -0,0 +1,153 @@
+process.env.DB_PATH = ':memory:';
+
+import crypto from 'crypto';
+import { Database } from 'sqlite';
+import { getDB } from '../db';
+import { hydrateRecipes, invalidateRecipe, recipeCache, RecipeRow } from '../recipe-hydration';
+
+const uuid = () => crypto.randomUUID();
+
+let db: Database;
+let ownerId: string;
+let viewerId: string;
+
+async function createRecipe(name: string, ingredientCount: number, tags: string[] = []) {
+  const id = uuid();
+  await db.run('INSERT INTO recipes (id, user_id, name) VALUES (?, ?, ?)', id, ownerId, name);
+  for (let i = 0; i < ingredientCount; i++) {
+    await db.run(
+      'INSERT INTO recipe_ingredients (id, recipe_id, food_id, name, quantity_value, quantity_unit, sort_order) VALUES (?, ?, ?, ?, ?, ?, ?)',
+      uuid(),
+      id,
+      null,
+      `${name} ingredient ${i}`,
+      i * 10,
+      'GRAM',
+      i,
+    );
+  }
+  await db.run(
+    'INSERT INTO recipe_steps (id, recipe_id, text, sort_order) VALUES (?, ?, ?, ?)',
+    uuid(),
+    id,
+    `Cook ${name}`,
+    0,
+  );
+  for (const tag of tags) {
+    await db.run('INSERT INTO recipe_tags (recipe_id, tag) VALUES (?, ?)', id, tag);
+  }
+  return id;
+}
+
+beforeAll(async () => {
+  db = await getDB();
+  ownerId = uuid();
+  viewerId = uuid();
+  await db.run('INSERT INTO users (id, name, email) VALUES (?, ?, ?)', ownerId, 'Chef', 'c@x');
+  await db.run('INSERT INTO users (id, name, email) VALUES (?, ?, ?)', viewerId, 'Bob', 'b@x');
+});
+
+afterAll(async () => {
+  await db.close();
+});
+
+describe('hydrateRecipes', () => {
+  it('should return an empty list without querying for empty input', async () => {
+    expect(await hydrateRecipes([], viewerId)).toEqual([]);
+  });
+
+  it('should assemble child rows per recipe and preserve input order', async () => {
+    const pasta = await createRecipe('Pasta', 3, ['quick', 'italian']);
+    const soup = await createRecipe('Soup', 1);
+    await db.run('INSERT INTO saved_recipes (user_id, recipe_id) VALUES (?, ?)', viewerId, soup);
+
+    const rows = await db.all<RecipeRow[]>(
+      'SELECT * FROM recipes WHERE id IN (?, ?) ORDER BY name DESC',
+      pasta,
+      soup,
+    );
+    const recipes = await hydrateRecipes(rows, viewerId);
+
+    expect(recipes.map((r) => r.name)).toEqual(['Soup', 'Pasta']);
+    expect(recipes[0].isAdded).toBe(true);
+    expect(recipes[1].isAdded).toBe(false);
+    expect(recipes[1].userName).toBe('Chef');
+    expect(recipes[1].ingredients.map((i) => i.name)).toEqual([
+      'Pasta ingredient 0',
+      'Pasta ingredient 1',
+      'Pasta ingredient 2',
+    ]);
+    expect(recipes[1].ingredients[2].quantity).toEqual({ value: 20, unit: 'GRAM' });
+    expect(recipes[1].steps).toEqual([{ text: 'Cook Pasta', imageUrl: '' }]);
+    expect(recipes[1].tags.sort()).toEqual(['italian', 'quick']);
+    expect(recipes[0].tags).toEqual([]);
+  });
+});
+
+describe('recipe cache', () => {
+  async function rowsFor(id: string) {
+    return db.all<RecipeRow[]>('SELECT * FROM recipes WHERE id = ?', id);
+  }
+
+  it('should serve repeat reads from the cache and overlay isAdded per user', async () => {
+    const id = await createRecipe('Cached', 2);
+    await db.run('INSERT INTO saved_recipes (user_id, recipe_id) VALUES (?, ?)', viewerId, id);
+    const rows = await rowsFor(id);
+
+    const [first] = await hydrateRecipes(rows, viewerId);
+    const statements: string[] = [];
+    const onTrace = (sql: string) => statements.push(sql);
+    db.on('trace', onTrace);
+    const [forViewer] = await hydrateRecipes(rows, viewerId);
+    const [forOwner] = await hydrateRecipes(rows, ownerId);
+    db.getDatabaseInstance().removeListener('trace', onTrace);
+
+    expect(forViewer).toEqual(first);
+    expect(forViewer.isAdded).toBe(true);
+    expect(forOwner.isAdded).toBe(false);
+    // Only what other tables own is read again: saved flags, owner names, foods version
+    expect(statements.some((sql) => /recipe_(ingredients|steps|tags)/.test(sql))).toBe(false);
+  });
+
+  it('should rebuild a recipe after it is invalidated', async () => {
+    const id = await createRecipe('Stale', 1);
+    const rows = await rowsFor(id);
+    await hydrateRecipes(rows, viewerId);
+
+    await db.run("UPDATE recipe_ingredients SET name = 'Fresh' WHERE recipe_id = ?", id);
+    const [stale] = await hydrateRecipes(rows, viewerId);
+    invalidateRecipe(id);
+    const [fresh] = await hydrateRecipes(rows, viewerId);
+
+    expect(stale.ingredients[0].name).toBe('Stale ingredient 0');
+    expect(fresh.ingredients[0].name).toBe('Fresh');
+    expect(recipeCache.stats().invalidations).toBeGreaterThan(0);
+  });
+
+  it('should show renamed owners and foods without invalidating the recipe', async () => {
+    await db.run("INSERT INTO foods (id, name, name_it) VALUES ('basil', 'Basil', 'Basilico')");
+    const id = await createRecipe('Pesto', 0);
+    await db.run(
+      "INSERT INTO recipe_ingredients (id, recipe_id, food_id, name) VALUES (?, ?, 'basil', 'leaves')",
+      uuid(),
+      id,
+    );
+    const rows = await rowsFor(id);
+    const [before] = await hydrateRecipes(rows, viewerId, 'it');
+    expect(before.ingredients[0]).toEqual(
+      expect.objectContaining({ id: 'basil', name: 'Basilico' }),
+    );
+
+    await db.run("UPDATE users SET name = 'Head Chef' WHERE id = ?", ownerId);
+    await db.run("UPDATE foods SET name = 'Sweet basil', name_it = NULL WHERE id = 'basil'");
+    const { hits } = recipeCache.stats();
+    const [en] = await hydrateRecipes(rows, viewerId, 'en');
+    const [it] = await hydrateRecipes(rows, viewerId, 'it');
+
+    expect(recipeCache.stats().hits - hits).toBe(2);
+    expect(en.userName).toBe('Head Chef');
+    expect(en.ingredients[0].name).toBe('Sweet basil');
+    // Without an Italian name the name stored with the ingredient is shown
+    expect(it.ingredients[0].name).toBe('leaves');
+  });
+});
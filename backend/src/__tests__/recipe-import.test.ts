@@ -0,0 +1,140 @@
+process.env.DB_PATH = ':memory:';
+
+import { Readable } from 'stream';
+import { Database } from 'sqlite';
+import { getDB } from '../db';
+import {
+  FoodNameIndex,
+  ImportRecord,
+  parseIngredient,
+  readCsv,
+  readJsonLines,
+  RecipeImporter,
+  toRecipeInput,
+} from '../recipe-import';
+
+let db: Database;
+
+beforeAll(async () => {
+  db = await getDB();
+  await db.exec(`
+    INSERT INTO users (id, name, email) VALUES ('u1', 'Ann', 'a@x');
+    INSERT INTO foods (id, name, name_it, default_unit) VALUES
+      ('flour', 'Flour', 'Farina', 'GRAM'),
+      ('cflour', 'Coconut flour', 'Farina di cocco', 'GRAM'),
+      ('egg', 'Eggs', 'Uova', 'PIECE');
+  `);
+});
+
+afterAll(async () => {
+  await db.close();
+});
+
+async function collect(records: AsyncGenerator<ImportRecord>) {
+  const out: ImportRecord[] = [];
+  for await (const record of records) out.push(record);
+  return out;
+}
+
+/** A stream that hands out `text` in small chunks, to split fields across reads. */
+const chunked = (text: string) =>
+  Readable.from(text.match(/[\s\S]{1,7}/g) ?? [], { objectMode: false });
+
+describe('recipe import readers', () => {
+  it('should parse quoted CSV fields across chunk boundaries', async () => {
+    const csv =
+      '\uFEFFname,ingredients,steps\r\n' +
+      '"Pie, apple","[""200 g Farina"", ""2 Uova""]","Mix|Bake ""hot""\nfor 30\'"\r\n' +
+      'Soup,,\n';
+
+    const records = await collect(readCsv(chunked(csv)));
+
+    expect(records.map((r) => r.value)).toEqual([
+      {
+        name: 'Pie, apple',
+        ingredients: '["200 g Farina", "2 Uova"]',
+        steps: 'Mix|Bake "hot"\nfor 30\'',
+      },
+      { name: 'Soup', ingredients: '', steps: '' },
+    ]);
+  });
+
+  it('should report bad JSON lines without stopping', async () => {
+    const records = await collect(readJsonLines(chunked('{"name":"A"}\n\nnot json\n[1]\n')));
+
+    expect(records).toEqual([
+      { line: 1, value: { name: 'A' } },
+      { line: 3, error: 'invalid JSON' },
+      { line: 4, error: 'not a JSON object' },
+    ]);
+  });
+
+  it('should map free-text ingredients and dataset field names', () => {
+    expect(parseIngredient('200 g flour')).toEqual({ name: 'flour', qty: 200, unit: 'GRAM' });
+    expect(parseIngredient('2 large eggs')).toEqual({ name: 'large eggs', qty: 2, unit: 'PIECE' });
+    expect(parseIngredient('salt to taste')).toEqual({
+      name: 'salt to taste',
+      qty: null,
+      unit: null,
+    });
+
+    const recipe = toRecipeInput({
+      title: 'Pancakes',
+      ingredients: '["1,5 kg flour", "1,5 kg flour"]',
+      directions: 'Mix|Cook',
+      tags: 'sweet|sweet',
+    });
+    expect(recipe).toMatchObject({
+      name: 'Pancakes',
+      ingredients: [{ name: 'flour', qty: 1.5, unit: 'KILO' }],
+      steps: ['Mix', 'Cook'],
+      tags: ['sweet'],
+    });
+    expect(() => toRecipeInput({ description: 'no name' })).toThrow('Recipe has no name');
+  });
+});
+
+describe('recipe importer', () => {
+  it('should resolve food names exactly, then by the longest contained name', async () => {
+    const foods = await FoodNameIndex.load(db);
+
+    expect(foods.find(' farina ')?.id).toBe('flour');
+    expect(foods.find('Farina di cocco bio')?.id).toBe('cflour');
+    expect(foods.find('uova')?.id).toBe('egg');
+    expect(foods.find('Saffron')).toBeUndefined();
+  });
+
+  it('should import in batches, skip duplicates and upgrade WIP recipes', async () => {
+    const batches: number[] = [];
+    const importer = new RecipeImporter(db, 'u1', await FoodNameIndex.load(db), 2, (s) =>
+      batches.push(s.read),
+    );
+    const recipe = (name: string, wip = false) =>
+      toRecipeInput({ name, wip, ingredients: ['100 g Farina', '1 pinch saffron'], steps: ['Go'] });
+
+    expect(await importer.add(recipe('Bread', true))).toBe(true);
+    expect(await importer.add(recipe('Cake'))).toBe(true);
+    expect(await importer.add(recipe('Cake'))).toBe(false);
+    expect(await importer.add(recipe('Bread'))).toBe(true);
+    const stats = await importer.finish();
+
+    expect(stats).toMatchObject({
+      read: 4,
+      imported: 2,
+      upgraded: 1,
+      duplicates: 1,
+      ingredients: 6,
+      unresolved: 3,
+    });
+    expect(batches).toEqual([2, 4]);
+    const rows = await db.all(
+      `SELECT r.name, r.wip, COUNT(ri.id) AS ingredients FROM recipes r
+       JOIN recipe_ingredients ri ON ri.recipe_id = r.id
+       WHERE r.user_id = 'u1' GROUP BY r.id ORDER BY r.name`,
+    );
+    expect(rows).toEqual([
+      { name: 'Bread', wip: 0, ingredients: 2 },
+      { name: 'Cake', wip: 0, ingredients: 2 },
+    ]);
+  });
+});
@@ -0,0 +1,105 @@
+process.env.DB_PATH = ':memory:';
+
+import { Database } from 'sqlite';
+import { getDB, withTransaction } from '../db';
+import { toFtsQuery } from '../search';
+
+let db: Database;
+
+beforeAll(async () => {
+  db = await getDB();
+  await db.run("INSERT INTO users (id, name, email) VALUES ('u1', 'Chef', 'chef@test.com')");
+});
+
+afterAll(async () => {
+  await db.close();
+});
+
+async function searchRecipes(q: string) {
+  const rows = await db.all<{ id: string }[]>(
+    `SELECT r.id FROM recipes_fts
+     JOIN recipes r ON r.rowid = recipes_fts.rowid
+     WHERE recipes_fts MATCH ?
+     ORDER BY bm25(recipes_fts, 10.0, 2.0, 5.0, 3.0)`,
+    toFtsQuery(q),
+  );
+  return rows.map((r) => r.id);
+}
+
+describe('toFtsQuery', () => {
+  it('should quote every word as a prefix term', () => {
+    expect(toFtsQuery('pasta pom')).toBe('"pasta"* "pom"*');
+  });
+
+  it('should neutralise FTS syntax and reject empty input', () => {
+    expect(toFtsQuery('"tomato" OR -(x*')).toBe('"tomato"* "OR"* "x"*');
+    expect(toFtsQuery('  ** ')).toBeNull();
+    expect(toFtsQuery(undefined)).toBeNull();
+  });
+});
+
+describe('recipes_fts triggers', () => {
+  it('should index name, tags and ingredient names and follow edits', async () => {
+    await db.run("INSERT INTO recipes (id, user_id, name) VALUES ('r1', 'u1', 'Risotto')");
+    await db.run(
+      "INSERT INTO recipe_ingredients (id, recipe_id, name) VALUES ('i1', 'r1', 'Zafferano')",
+    );
+    await db.run("INSERT INTO recipe_tags (recipe_id, tag) VALUES ('r1', 'vegetariano')");
+
+    expect(await searchRecipes('riso')).toEqual(['r1']);
+    expect(await searchRecipes('zaff')).toEqual(['r1']);
+    expect(await searchRecipes('veget')).toEqual(['r1']);
+
+    await db.run("UPDATE recipe_ingredients SET name = 'Funghi' WHERE id = 'i1'");
+    expect(await searchRecipes('zaff')).toEqual([]);
+    expect(await searchRecipes('fung')).toEqual(['r1']);
+
+    await db.run("DELETE FROM recipes WHERE id = 'r1'");
+    expect(await searchRecipes('riso')).toEqual([]);
+  });
+
+  it('should rank name matches above ingredient matches', async () => {
+    await db.run("INSERT INTO recipes (id, user_id, name) VALUES ('r2', 'u1', 'Tomato soup')");
+    await db.run("INSERT INTO recipes (id, user_id, name) VALUES ('r3', 'u1', 'Bruschetta')");
+    await db.run(
+      "INSERT INTO recipe_ingredients (id, recipe_id, name) VALUES ('i3', 'r3', 'Tomato')",
+    );
+
+    expect(await searchRecipes('tomato')).toEqual(['r2', 'r3']);
+  });
+
+  it('should index a recipe written in a transaction once, at commit', async () => {
+    const before = await db.get('SELECT COUNT(*) AS n FROM recipes_fts');
+    await withTransaction(async (tx) => {
+      await tx.run("INSERT INTO recipes (id, user_id, name) VALUES ('r4', 'u1', 'Polenta')");
+      for (const name of ['Cornmeal', 'Butter', 'Parmigiano']) {
+        await tx.run("INSERT INTO recipe_ingredients (recipe_id, name) VALUES ('r4', ?)", name);
+      }
+      await tx.run("INSERT INTO recipe_tags (recipe_id, tag) VALUES ('r4', 'invernale')");
+      // Not indexed until the transaction ends
+      expect(await tx.get('SELECT COUNT(*) AS n FROM recipes_fts')).toEqual(before);
+    });
+
+    expect(await searchRecipes('parmig')).toEqual(['r4']);
+    expect(await searchRecipes('invern')).toEqual(['r4']);
+  });
+});
+
+describe('foods_fts triggers', () => {
+  it('should match either language and follow upserts', async () => {
+    await db.run(
+      "INSERT INTO foods (id, name, name_it) VALUES ('f1', 'Tomato', 'Pomodoro') ON CONFLICT(id) DO UPDATE SET name_it = excluded.name_it",
+    );
+    const find = (q: string) =>
+      db.all<{ id: string }[]>(
+        'SELECT f.id FROM foods_fts JOIN foods f ON f.rowid = foods_fts.rowid WHERE foods_fts MATCH ?',
+        toFtsQuery(q),
+      );
+
+    expect(await find('pomo')).toEqual([{ id: 'f1' }]);
+    expect(await find('tom')).toEqual([{ id: 'f1' }]);
+
+    await db.run("UPDATE foods SET name_it = 'Pomodori' WHERE id = 'f1'");
+    expect(await find('pomodori')).toEqual([{ id: 'f1' }]);
+  });
+});
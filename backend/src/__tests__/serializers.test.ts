@@ -0,0 +1,47 @@
+import { compileSerializer, serializeRecipes, serializeWeekNutrition } from '../serializers';
+
+const recipe = (id: string) => ({
+  id,
+  userId: 'u1',
+  userName: 'Zoë "the chef"',
+  name: 'Pie\n',
+  description: '',
+  cuisine: 'ITALIAN',
+  type: 'MAIN',
+  time: { value: undefined, unit: 'MINUTE' },
+  difficulty: 'EASY',
+  ingredients: [{ id: 'f1', name: 'Salt', quantity: { value: 1.5, unit: null }, brand: '' }],
+  steps: [{ text: 'Mix \\ bake', imageUrl: '' }],
+  tags: ['quick', '\ud83c'],
+  servings: NaN,
+  minServings: -0,
+  splitServings: 1e21,
+  wip: false,
+  notes: '',
+  isAdded: true,
+});
+
+describe('compiled serializers', () => {
+  it('should produce the same text as JSON.stringify', () => {
+    const recipes = [recipe('r1'), recipe('r2')];
+    expect(serializeRecipes(recipes)).toBe(JSON.stringify(recipes));
+
+    const week = {
+      week: '2026-01-05',
+      days: { '2026-01-05': { kcal: 100, protein: 1, fat: 2, carbs: 3, fiber: null } },
+      weekTotal: { kcal: 100, protein: 1, fat: 2, carbs: 3, fiber: 0 },
+    };
+    expect(serializeWeekNutrition(week)).toBe(JSON.stringify(week));
+  });
+
+  it('should fall back to JSON.stringify for values that do not match the schema', () => {
+    const serialize = compileSerializer({
+      type: 'object',
+      properties: { n: { type: 'number' }, list: { type: 'array', items: { type: 'string' } } },
+    });
+    const odd = { n: '7', list: [null, undefined, 3], extra: true };
+    expect(serialize(odd)).toBe('{"n":"7","list":[null,null,3]}');
+    expect(serialize({ list: 'x' })).toBe('{"list":"x"}');
+    expect(serialize(null)).toBe('null');
+  });
+});
@@ -0,0 +1,147 @@
+process.env.DB_PATH = ':memory:';
+
+import express from 'express';
+import request from 'supertest';
+import { Database } from 'sqlite';
+import { getDB, withTransaction } from '../db';
+import { keyStore } from '../key-store';
+import { signToken } from '../auth.middleware';
+import { getShoppingList } from '../shopping-list';
+import { recipesRouter } from '../routes/recipes.routes';
+import * as socket from '../socket';
+
+let db: Database;
+const WEEK = '2026-01-05';
+
+async function addIngredient(
+  recipeId: string,
+  foodId: string | null,
+  name: string,
+  value: number,
+  unit: string,
+) {
+  await db.run(
+    'INSERT INTO recipe_ingredients (recipe_id, food_id, name, quantity_value, quantity_unit) VALUES (?, ?, ?, ?, ?)',
+    recipeId,
+    foodId,
+    name,
+    value,
+    unit,
+  );
+}
+
+async function plan(id: string, recipeId: string, userId: string, servings: number) {
+  await db.run(
+    'INSERT INTO planning (id, recipe_id, week, user_id, servings) VALUES (?, ?, ?, ?, ?)',
+    id,
+    recipeId,
+    WEEK,
+    userId,
+    servings,
+  );
+}
+
+beforeAll(async () => {
+  db = await getDB();
+  await keyStore.init();
+  await db.exec(`
+    INSERT INTO users (id, name, email) VALUES ('u1', 'Ann', 'a@x'), ('u2', 'Bob', 'b@x');
+    INSERT INTO foods (id, name, name_it) VALUES ('flour', 'Flour', 'Farina');
+    INSERT INTO recipes (id, user_id, name, servings) VALUES ('bread', 'u1', 'Bread', 2);
+    INSERT INTO recipes (id, user_id, name, servings) VALUES ('cake', 'u2', 'Cake', 4);
+  `);
+  await addIngredient('bread', 'flour', 'Flour', 500, 'GRAM');
+  await addIngredient('bread', null, 'Salt ', 5, 'GRAM');
+  await addIngredient('cake', 'flour', 'flour', 1, 'KILO');
+  await addIngredient('cake', null, 'salt', 2, 'GRAM');
+});
+
+afterAll(async () => {
+  keyStore.stop();
+  await db.close();
+});
+
+describe('shopping list engine', () => {
+  it('should scale by servings, convert units and group by food', async () => {
+    await plan('p1', 'bread', 'u1', 4); // ×2
+    await plan('p2', 'cake', 'u2', 2); // ×0.5
+
+    const list = await getShoppingList(db, ['u1', 'u2'], WEEK, 'it');
+
+    expect(list).toEqual(
+      expect.arrayContaining([
+        { id: 'flour', name: 'Farina', quantity: { value: 1500, unit: 'GRAM' } },
+        { id: 'name:salt', name: 'Salt ', quantity: { value: 11, unit: 'GRAM' } },
+      ]),
+    );
+    expect(list).toHaveLength(2);
+  });
+
+  it('should follow planning and recipe changes incrementally', async () => {
+    await db.run('UPDATE planning SET servings = 2 WHERE id = ?', 'p1');
+    expect(await getShoppingList(db, ['u1'], WEEK, 'en')).toEqual(
+      expect.arrayContaining([
+        { id: 'flour', name: 'Flour', quantity: { value: 500, unit: 'GRAM' } },
+      ]),
+    );
+
+    await db.run('UPDATE recipes SET servings = 1 WHERE id = ?', 'bread');
+    await db.run("DELETE FROM recipe_ingredients WHERE recipe_id = 'bread' AND food_id IS NULL");
+    expect(await getShoppingList(db, ['u1'], WEEK, 'en')).toEqual([
+      { id: 'flour', name: 'Flour', quantity: { value: 1000, unit: 'GRAM' } },
+    ]);
+
+    await db.run('DELETE FROM planning WHERE id = ?', 'p1');
+    await db.run('DELETE FROM recipes WHERE id = ?', 'cake');
+    expect(await getShoppingList(db, ['u1', 'u2'], WEEK, 'en')).toEqual([]);
+    expect(await db.get('SELECT COUNT(*) AS c FROM shopping_list_totals')).toEqual({ c: 0 });
+  });
+
+  it('should rebuild a recipe once per transaction, at commit', async () => {
+    await plan('p3', 'bread', 'u1', 1);
+
+    await withTransaction(async (tx) => {
+      await tx.run("DELETE FROM recipe_ingredients WHERE recipe_id = 'bread'");
+      for (const name of ['Oats', 'Rye', 'Spelt']) {
+        await tx.run(
+          "INSERT INTO recipe_ingredients (recipe_id, name, quantity_value, quantity_unit) VALUES ('bread', ?, 1, 'KILO')",
+          name,
+        );
+      }
+      // Marked, not rebuilt, until the transaction ends
+      expect(await tx.all('SELECT recipe_id FROM dirty_recipes')).toEqual([{ recipe_id: 'bread' }]);
+      expect(await getShoppingList(tx, ['u1'], WEEK, 'en')).toEqual([
+        { id: 'flour', name: 'Flour', quantity: { value: 500, unit: 'GRAM' } },
+      ]);
+    });
+
+    expect(await getShoppingList(db, ['u1'], WEEK, 'en')).toEqual(
+      ['oats', 'rye', 'spelt'].map((key) =>
+        expect.objectContaining({ id: `name:${key}`, quantity: { value: 1000, unit: 'GRAM' } }),
+      ),
+    );
+    expect(await db.all('SELECT * FROM dirty_recipes')).toEqual([]);
+  });
+});
+
+describe('DELETE /recipes/:id', () => {
+  it('should invalidate the shopping lists of the weeks the recipe was planned in', async () => {
+    const app = express();
+    app.use('/recipes', recipesRouter);
+    await db.exec(`
+      INSERT INTO groups_table (id) VALUES ('g1');
+      INSERT INTO group_members (group_id, user_id) VALUES ('g1', 'u2');
+      INSERT INTO recipes (id, user_id, name) VALUES ('pie', 'u2', 'Pie');
+    `);
+    await addIngredient('pie', 'flour', 'Flour', 300, 'GRAM');
+    await plan('p4', 'pie', 'u2', 1);
+    const invalidate = jest.spyOn(socket, 'emitShoppingListInvalidate').mockImplementation();
+
+    const token = await signToken({ id: 'u2', name: 'Bob', email: 'b@x' });
+    await request(app).delete('/recipes/pie').set('Authorization', `Bearer ${token}`).expect(200);
+
+    expect(invalidate.mock.calls).toEqual([['g1', WEEK]]);
+    expect(await getShoppingList(db, ['u2'], WEEK, 'en')).toEqual([]);
+    invalidate.mockRestore();
+  });
+});
@@ -0,0 +1,60 @@
+import { PlanningBatchMessage, RoomOutbox } from '../socket-outbox';
+
+let sent: PlanningBatchMessage[];
+let outbox: RoomOutbox;
+
+beforeEach(() => {
+  jest.useFakeTimers();
+  sent = [];
+  outbox = new RoomOutbox((message) => sent.push(message), 50, 200);
+});
+
+afterEach(() => {
+  jest.useRealTimers();
+});
+
+describe('RoomOutbox', () => {
+  it('should merge changes per item and de-duplicate weeks', () => {
+    outbox.addChange('added', { id: 'p1', kind: 'recipe', week: 'w1', day: 'MONDAY' });
+    outbox.addChange('updated', { id: 'p1', day: 'FRIDAY' });
+    outbox.addChange('updated', { id: 'p2', servings: 2 });
+    outbox.addChange('updated', { id: 'p2', meal: 'DINNER', servings: undefined });
+    outbox.addChange('added', { id: 'p3', week: 'w1' });
+    outbox.addChange('deleted', { id: 'p3', week: 'w1' });
+    outbox.invalidateWeek('w1');
+    outbox.invalidateWeek('w1');
+
+    jest.advanceTimersByTime(50);
+
+    expect(sent).toEqual([
+      {
+        added: [{ id: 'p1', week: 'w1', day: 'FRIDAY' }],
+        updated: [{ id: 'p2', servings: 2, meal: 'DINNER' }],
+        deleted: [],
+        weeks: ['w1'],
+      },
+    ]);
+  });
+
+  it('should report a delete followed by an add as an update', () => {
+    outbox.addChange('deleted', { id: 'p1', week: 'w1' });
+    outbox.addChange('added', { id: 'p1', week: 'w2' });
+    outbox.flush();
+
+    expect(sent[0]).toMatchObject({ added: [], updated: [{ id: 'p1', week: 'w2' }], deleted: [] });
+  });
+
+  it('should debounce but never hold events past the maximum delay', () => {
+    for (let t = 0; t < 10; t++) {
+      outbox.invalidateWeek(`w${t}`);
+      jest.advanceTimersByTime(30);
+    }
+
+    // Flushed at 200 ms despite events every 30 ms, then once more after the last one
+    expect(sent).toHaveLength(1);
+    expect(sent[0].weeks).toEqual(['w0', 'w1', 'w2', 'w3', 'w4', 'w5', 'w6']);
+    jest.advanceTimersByTime(50);
+    expect(sent).toHaveLength(2);
+    expect(sent[1].weeks).toEqual(['w7', 'w8', 'w9']);
+  });
+});
@@ -0,0 +1,128 @@
+process.env.DB_PATH = ':memory:';
+
+import { Database } from 'sqlite';
+import { getDB } from '../db';
+import {
+  getPlanningSuggestions,
+  recordPlanningDelete,
+  recordPlanningInsert,
+  recordPlanningUpdate,
+  UserUsage,
+} from '../suggestions';
+import { countQueries } from '../bench/bench-utils';
+
+let db: Database;
+
+beforeAll(async () => {
+  db = await getDB();
+  await db.exec(`
+    INSERT INTO users (id, name, email) VALUES ('u1', 'Ann', 'a@x'), ('u2', 'Bob', 'b@x');
+    INSERT INTO recipes (id, user_id, name, type) VALUES
+      ('soup', 'u1', 'Soup', 'FIRST_COURSE'),
+      ('pie', 'u1', 'Pie', 'DESSERT'),
+      ('eggs', 'u2', 'Eggs', 'OTHER');
+    INSERT INTO planning (id, recipe_id, week, meal, user_id) VALUES
+      ('p1', 'soup', '2025-06-02', 'DINNER', 'u1'),
+      ('p2', 'soup', '2025-06-09', 'DINNER', 'u1'),
+      ('p3', 'soup', '2025-06-16', 'LUNCH', 'u1'),
+      ('p4', 'pie', '2025-12-29', 'DINNER', 'u1'),
+      ('p5', 'eggs', '2025-12-29', 'BREAKFAST', 'u2');
+  `);
+});
+
+afterAll(async () => {
+  await db.close();
+});
+
+describe('user usage counters', () => {
+  it('should rank recent use above old frequent use', () => {
+    const usage = new UserUsage();
+    for (let i = 0; i < 5; i++) {
+      usage.add({ id: `old${i}`, recipe_id: 'old', week: `2020-01-0${i + 1}`, meal: 'LUNCH' });
+    }
+    usage.add({ id: 'new', recipe_id: 'new', week: '2026-01-05', meal: 'DINNER' });
+
+    expect(usage.rank().map((r) => r.recipeId)).toEqual(['new', 'old']);
+  });
+
+  it('should undo a row exactly when it is removed or moved', () => {
+    const usage = new UserUsage();
+    usage.add({ id: 'a', recipe_id: 'soup', week: '2026-01-05', meal: 'LUNCH' });
+    usage.add({ id: 'b', recipe_id: 'soup', week: '2026-01-12', meal: 'DINNER' });
+
+    usage.update('b', { week: '2026-01-19', meal: 'LUNCH' });
+    expect(usage.get('soup')).toMatchObject({ frequency: 2, lastWeek: '2026-01-19' });
+    expect([...usage.get('soup')!.meals]).toEqual([['LUNCH', 2]]);
+
+    usage.remove('b');
+    expect(usage.get('soup')).toMatchObject({ frequency: 1, lastWeek: '2026-01-05' });
+
+    usage.remove('a');
+    expect(usage.get('soup')).toBeUndefined();
+    expect(usage.size).toBe(0);
+  });
+
+  it('should keep weights finite and exact around a far-off week', () => {
+    const usage = new UserUsage();
+    usage.add({ id: 'a', recipe_id: 'soup', week: '2026-01-05' });
+    usage.add({ id: 'b', recipe_id: 'pie', week: '2025-12-29' });
+    usage.add({ id: 'far', recipe_id: 'pie', week: '9999-12-27' });
+    expect(usage.rank().map((r) => r.recipeId)).toEqual(['pie', 'soup']);
+    expect(Number.isFinite(usage.get('pie')!.weight)).toBe(true);
+
+    usage.remove('far');
+    expect(usage.rank().map((r) => r.recipeId)).toEqual(['soup', 'pie']);
+    expect(usage.get('pie')!.weight).toBeGreaterThan(0);
+    expect(usage.get('soup')!.weight / usage.get('pie')!.weight).toBeCloseTo(2 ** (1 / 8));
+  });
+});
+
+describe('planning suggestions', () => {
+  it('should skip recipes already planned in the week', async () => {
+    const suggestions = await getPlanningSuggestions(['u1'], '2025-12-29');
+
+    expect(suggestions).toEqual([
+      expect.objectContaining({
+        recipe_id: 'soup',
+        recipe_name: 'Soup',
+        recipe_type: 'FIRST_COURSE',
+        frequency: 3,
+        last_used_week: '2025-06-16',
+        meals_used: ['DINNER', 'LUNCH'],
+        meal_affinity: { DINNER: 0.667, LUNCH: 0.333 },
+      }),
+    ]);
+  });
+
+  it('should follow recorded changes without re-reading the history', async () => {
+    await getPlanningSuggestions(['u1'], '2026-01-05');
+    await db.run(
+      "INSERT INTO planning (id, recipe_id, week, meal, user_id) VALUES ('p6', 'pie', '2026-01-05', 'LUNCH', 'u1')",
+    );
+    recordPlanningInsert('u1', { id: 'p6', recipe_id: 'pie', week: '2026-01-05', meal: 'LUNCH' });
+    await db.run("UPDATE planning SET meal = 'LUNCH' WHERE id = 'p4'");
+    recordPlanningUpdate('u1', 'p4', { meal: 'LUNCH' });
+    await db.run("DELETE FROM planning WHERE id = 'p1'");
+    recordPlanningDelete('u1', 'p1');
+
+    const { result, queries } = await countQueries(db, () =>
+      getPlanningSuggestions(['u1'], '2026-01-12'),
+    );
+
+    expect(result.map((s) => [s.recipe_id, s.frequency, s.meals_used])).toEqual([
+      ['pie', 2, ['LUNCH']],
+      ['soup', 2, ['DINNER', 'LUNCH']],
+    ]);
+    // Only the name/type lookup for the suggested recipes
+    expect(queries).toBe(1);
+  });
+
+  it('should merge group members and rank by meal-slot affinity', async () => {
+    const suggestions = await getPlanningSuggestions(['u1', 'u2'], '2026-02-02', {
+      meal: 'BREAKFAST',
+    });
+
+    expect(suggestions[0]).toMatchObject({ recipe_id: 'eggs', recipe_name: 'Eggs' });
+    expect(suggestions.map((s) => s.recipe_id).sort()).toEqual(['eggs', 'pie', 'soup']);
+  });
+});
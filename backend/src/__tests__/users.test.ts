@@ -0,0 +1,76 @@
+process.env.DB_PATH = ':memory:';
+
+import express from 'express';
+import request from 'supertest';
+import { Database } from 'sqlite';
+import { getDB } from '../db';
+import { keyStore } from '../key-store';
+import { signToken } from '../auth.middleware';
+import { NEXT_CURSOR_HEADER } from '../pagination';
+import { usersRouter } from '../routes/users.routes';
+
+let db: Database;
+let token: string;
+const app = express();
+app.use('/users', usersRouter);
+
+beforeAll(async () => {
+  db = await getDB();
+  await keyStore.init();
+  await db.exec(`
+    INSERT INTO users (id, name, email) VALUES
+      ('me', 'Me', 'me@x'), ('u1', 'anna', 'a1@x'), ('u2', 'Andrea', 'a2@x'),
+      ('u3', 'Anselmo', 'a3@x'), ('u4', 'Bruno', 'b@x');
+    INSERT INTO recipes (id, user_id, name) VALUES ('r1', 'u1', 'Pie'), ('r2', 'u1', 'Tart');
+  `);
+  token = await signToken({ id: 'me', name: 'Me', email: 'me@x' });
+});
+
+afterAll(async () => {
+  keyStore.stop();
+  await db.close();
+});
+
+const get = (path: string) => request(app).get(path).set('Authorization', `Bearer ${token}`);
+
+describe('GET /users', () => {
+  it('should page through a case-insensitive name prefix', async () => {
+    const first = await get('/users?q=AN&limit=2').expect(200);
+    expect(first.body.map((u: { name: string }) => u.name)).toEqual(['Andrea', 'anna']);
+
+    const cursor = first.headers[NEXT_CURSOR_HEADER.toLowerCase()];
+    const second = await get(`/users?q=AN&limit=2&cursor=${cursor}`).expect(200);
+    expect(second.body.map((u: { name: string }) => u.name)).toEqual(['Anselmo']);
+    expect(second.headers[NEXT_CURSOR_HEADER.toLowerCase()]).toBeUndefined();
+  });
+
+  it('should list everybody but the caller, and look users up by id', async () => {
+    const all = await get('/users').expect(200);
+    expect(all.body.map((u: { id: string }) => u.id)).toEqual(['u2', 'u1', 'u3', 'u4']);
+
+    const some = await get('/users?ids=u4,u1,u4').expect(200);
+    expect(some.body.map((u: { id: string }) => u.id).sort()).toEqual(['u1', 'u4']);
+    await get('/users?cursor=nope').expect(400);
+  });
+});
+
+describe('user counters', () => {
+  it('should track follows and saves through the triggers', async () => {
+    await request(app).post('/users/u1/follow').set('Authorization', `Bearer ${token}`);
+    await request(app).post('/users/u1/follow').set('Authorization', `Bearer ${token}`);
+    await request(app).post('/users/u2/follow').set('Authorization', `Bearer ${token}`);
+    await request(app).delete('/users/u2/follow').set('Authorization', `Bearer ${token}`);
+    await db.exec(
+      "INSERT INTO saved_recipes (user_id, recipe_id) VALUES ('me', 'r1'), ('me', 'r2')",
+    );
+    await db.run("DELETE FROM recipes WHERE id = 'r2'");
+
+    expect((await get('/users/me/stats').expect(200)).body).toEqual({
+      saved: 1,
+      followers: 0,
+      followed: 1,
+    });
+    expect((await get('/users/u1/stats')).body).toMatchObject({ followers: 1 });
+    expect((await get('/users/u2/stats')).body).toMatchObject({ followers: 0 });
+  });
+});
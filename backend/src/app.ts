@@ -1,19 +1,31 @@
 import dotenv from 'dotenv';
 dotenv.config();
 
+import cluster from 'cluster';
 import express from 'express';
 import http from 'http';
 import cors from 'cors';
 import bodyParser from 'body-parser';
 import { getDB, seedFoods } from './db';
 import { keyStore } from './key-store';
+import { requireOpsToken } from './auth.middleware';
 import { authRouter } from './routes/auth.routes';
 import { recipesRouter } from './routes/recipes.routes';
 import { planningRouter } from './routes/planning.routes';
 import { usersRouter } from './routes/users.routes';
 import { groupsRouter } from './routes/groups.routes';
 import { foodsRouter } from './routes/foods.routes';
+import { imagesRouter } from './routes/images.routes';
 import { initSocketIO } from './socket';
+import { NEXT_CURSOR_HEADER } from './pagination';
+import { recipeCache } from './recipe-hydration';
+import { usageCache } from './suggestions';
+import { FOODS_VERSION_HEADER } from './foods-catalogue';
+import { passwordHasher } from './password-hasher';
+import { METRICS_CONTENT_TYPE, metricsMiddleware, renderMetrics } from './metrics';
+import { compressionMiddleware } from './compression';
+import { IMAGES_PATH, startImageSweep } from './images';
+import { CLUSTER_WORKERS, startPrimary } from './cluster';
 
 export const app = express();
 export const server = http.createServer(app);
@@ -23,9 +35,13 @@ app.use(
   cors({
     origin: process.env.FRONTEND_URL || 'http://localhost:8100',
     credentials: true,
+    exposedHeaders: [NEXT_CURSOR_HEADER, FOODS_VERSION_HEADER],
   }),
 );
-app.use(bodyParser.json({ limit: '10mb' }));
+app.use(compressionMiddleware);
+// Images go through POST /images, so JSON bodies stay small
+app.use(bodyParser.json({ limit: process.env.JSON_BODY_LIMIT || '256kb' }));
+app.use(metricsMiddleware);
 
 app.use('/auth', authRouter);
 app.use('/recipes', recipesRouter);
@@ -33,19 +49,66 @@ app.use('/planning', planningRouter);
 app.use('/users', usersRouter);
 app.use('/groups', groupsRouter);
 app.use('/foods', foodsRouter);
+app.use(IMAGES_PATH, imagesRouter);
 
 app.get('/', (_, res) => res.send('Food Recipes API running'));
 
+// Operational endpoints: only with the OPS_TOKEN bearer token (see requireOpsToken)
+app.get('/stats/cache', requireOpsToken, (_, res) =>
+  res.json({ recipes: recipeCache.stats(), planningUsage: usageCache.stats() }),
+);
+app.get('/stats/password-hasher', requireOpsToken, (_, res) => res.json(passwordHasher.stats()));
+app.get('/metrics', requireOpsToken, (_, res) => {
+  res.type(METRICS_CONTENT_TYPE).send(renderMetrics());
+});
+
 // Initialize Socket.IO for real-time group sync
 initSocketIO(server);
 
-async function start() {
+/** Prepare the database and keys, then listen; resolves once the server accepts connections. */
+export async function start(port: number | string = PORT): Promise<http.Server> {
   await getDB();
   await seedFoods();
   await keyStore.init();
-  server.listen(PORT, () => {
-    console.log(`Server running at http://localhost:${PORT}`);
-  });
+  startImageSweep(getDB);
+  await new Promise<void>((resolve) => server.listen(port, resolve));
+  return server;
 }
 
-start().catch(console.error);
+/**
+ * Cluster mode (CLUSTER_WORKERS > 0, see cluster.ts): the primary prepares the
+ * database and keys once and forks the workers; each worker serves the app on
+ * the shared port.
+ */
+export async function startClustered(port: number | string = PORT, workers = CLUSTER_WORKERS) {
+  if (cluster.isPrimary) {
+    await startPrimary(workers, async () => {
+      await getDB();
+      await seedFoods();
+      await keyStore.init();
+      startImageSweep(getDB);
+    });
+    return;
+  }
+  await getDB();
+  await keyStore.init();
+  await new Promise<void>((resolve) => server.listen(port, resolve));
+}
+
+// Only listen when run directly, so scripts (e.g. the load test) can import the app
+if (require.main === module) {
+  if (CLUSTER_WORKERS > 0) {
+    startClustered()
+      .then(() => {
+        if (cluster.isPrimary) console.log(`Server running at http://localhost:${PORT}`);
+      })
+      .catch((err) => {
+        console.error(err);
+        process.exit(1);
+      });
+  } else {
+    start()
+      .then(() => console.log(`Server running at http://localhost:${PORT}`))
+      .catch(console.error);
+  }
+}
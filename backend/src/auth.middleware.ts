@@ -1,3 +1,4 @@
+import crypto from 'crypto';
 import { Request, Response, NextFunction } from 'express';
 import { keyStore, JwtPayload } from './key-store';
 
@@ -26,6 +27,28 @@ export function authenticateToken(req: any, res: Response, next: NextFunction) {
     });
 }
 
+const digest = (value: string) => crypto.createHash('sha256').update(value).digest();
+
+/**
+ * Express middleware for operational endpoints (`/metrics`, `/stats/*`), which
+ * expose SQL text and traffic figures. Requires `Authorization: Bearer
+ * <OPS_TOKEN>`; when OPS_TOKEN is not set the endpoints do not exist (404).
+ */
+export function requireOpsToken(req: Request, res: Response, next: NextFunction) {
+  const expected = process.env.OPS_TOKEN;
+  if (!expected) {
+    res.status(404).json({ error: 'Not found' });
+    return;
+  }
+  const token = req.headers['authorization']?.split(' ')[1] ?? '';
+  // Compare digests: equal length, and no timing hint about the token
+  if (!crypto.timingSafeEqual(digest(token), digest(expected))) {
+    res.status(401).json({ error: 'Invalid ops token' });
+    return;
+  }
+  next();
+}
+
 /** Sign an access token (15 min). */
 export function signToken(payload: JwtPayload): Promise<string> {
   return keyStore.signAccessToken(payload);
@@ -0,0 +1,142 @@
+/**
+ * Auth middleware benchmark.
+ *
+ * Drives `authenticateToken` with mock requests at increasing concurrency and
+ * compares it with the legacy verifier, which looked the signing key up in
+ * the database and parsed its PEM on every request. Reports per-request p50/
+ * p95 latency, throughput and SQL queries per request.
+ *
+ * Also measures how long the event loop stalls while a key pair is generated
+ * synchronously (old rotation) versus with the async `crypto.generateKeyPair`.
+ *
+ * Usage:
+ *   npm run bench:auth
+ */
+
+import crypto from 'crypto';
+import jwt from 'jsonwebtoken';
+import { monitorEventLoopDelay } from 'perf_hooks';
+import { getDB } from '../db';
+import { authenticateToken, signToken } from '../auth.middleware';
+import { keyStore, JwtPayload } from '../key-store';
+import { countQueries, elapsedMs, percentile, round2 } from './bench-utils';
+
+const CONCURRENCY = [1, 10, 100, 1000];
+const REQUESTS = Number(process.env.BENCH_REQUESTS || 5000);
+
+const PAYLOAD: JwtPayload = { id: 'bench-user', name: 'Bench', email: 'bench@example.com' };
+
+/** The pre-cache verifier, kept here as the baseline. */
+async function legacyVerify(token: string): Promise<JwtPayload> {
+  const decoded = jwt.decode(token, { complete: true });
+  if (!decoded || !decoded.header.kid) throw new Error('Token missing kid header');
+  const db = await getDB();
+  const row = await db.get<{ public_key: string }>(
+    'SELECT public_key FROM jwt_keys WHERE kid = ? AND expires_at > ?',
+    decoded.header.kid,
+    Date.now(),
+  );
+  if (!row) throw new Error('Signing key not found or expired');
+  return new Promise((resolve, reject) => {
+    jwt.verify(token, row.public_key, { algorithms: ['RS256'] }, (err, payload) => {
+      if (err) return reject(err);
+      resolve(payload as JwtPayload);
+    });
+  });
+}
+
+function legacyMiddleware(req: any, res: any, next: () => void) {
+  legacyVerify(req.headers['authorization'].split(' ')[1])
+    .then((payload) => {
+      req.user = payload;
+      next();
+    })
+    .catch(() => res.status(403).json({ error: 'Invalid or expired token' }));
+}
+
+type Middleware = (req: any, res: any, next: () => void) => void;
+
+/** Run one request through `middleware`, resolving with its latency in ms. */
+function callOnce(middleware: Middleware, token: string): Promise<number> {
+  return new Promise((resolve, reject) => {
+    const start = process.hrtime.bigint();
+    const req = { headers: { authorization: `Bearer ${token}` } };
+    const res = {
+      status: () => res,
+      json: () => reject(new Error('Request rejected by middleware')),
+    };
+    middleware(req, res, () => resolve(elapsedMs(start)));
+  });
+}
+
+async function run(middleware: Middleware, token: string, concurrency: number) {
+  const samples: number[] = [];
+  let issued = 0;
+  const worker = async () => {
+    while (issued < REQUESTS) {
+      issued++;
+      samples.push(await callOnce(middleware, token));
+    }
+  };
+
+  const db = await getDB();
+  const start = process.hrtime.bigint();
+  const { queries } = await countQueries(db, () =>
+    Promise.all(Array.from({ length: concurrency }, worker)),
+  );
+  const totalMs = elapsedMs(start);
+
+  return {
+    'p50 ms': round2(percentile(samples, 50)),
+    'p95 ms': round2(percentile(samples, 95)),
+    'req/s': Math.round((REQUESTS / totalMs) * 1000),
+    'queries/req': round2(queries / REQUESTS),
+  };
+}
+
+/** Worst event-loop stall (ms) while `fn` runs alongside a 1 ms timer. */
+async function maxLoopDelay(fn: () => Promise<unknown>): Promise<number> {
+  const histogram = monitorEventLoopDelay({ resolution: 1 });
+  histogram.enable();
+  await fn();
+  // Give the timer a chance to observe a stall caused by synchronous work
+  await new Promise((resolve) => setTimeout(resolve, 20));
+  histogram.disable();
+  return round2(histogram.max / 1e6);
+}
+
+const KEYGEN_OPTIONS = {
+  modulusLength: 2048,
+  publicKeyEncoding: { type: 'spki', format: 'pem' },
+  privateKeyEncoding: { type: 'pkcs8', format: 'pem' },
+} as const;
+
+async function main() {
+  process.env.DB_PATH = process.env.DB_PATH || ':memory:';
+  await keyStore.init();
+  const token = await signToken(PAYLOAD);
+
+  const results: Record<string, unknown> = {};
+  for (const concurrency of CONCURRENCY) {
+    results[`legacy c=${concurrency}`] = await run(legacyMiddleware, token, concurrency);
+    results[`cached c=${concurrency}`] = await run(authenticateToken, token, concurrency);
+  }
+  console.log(`Auth middleware — ${REQUESTS} requests per run`);
+  console.table(results);
+
+  const keygen = {
+    'generateKeyPairSync (legacy)': await maxLoopDelay(async () => {
+      crypto.generateKeyPairSync('rsa', KEYGEN_OPTIONS);
+    }),
+    'keyStore.rotate (async)': await maxLoopDelay(() => keyStore.rotate()),
+  };
+  console.log('Key generation — max event-loop delay in ms');
+  console.table(keygen);
+
+  keyStore.stop();
+}
+
+main().catch((err) => {
+  console.error('Error:', err);
+  process.exit(1);
+});
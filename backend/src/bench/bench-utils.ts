@@ -0,0 +1,57 @@
+/**
+ * Small helpers shared by the benchmark scripts in this folder.
+ * Benchmarks are plain ts-node scripts; none of this is loaded by the server.
+ */
+
+import { Database } from 'sqlite';
+
+/** p-th percentile (0–100) of a list of samples, in the samples' unit. */
+export function percentile(samples: number[], p: number): number {
+  if (samples.length === 0) return 0;
+  const sorted = [...samples].sort((a, b) => a - b);
+  const idx = Math.min(sorted.length - 1, Math.ceil((p / 100) * sorted.length) - 1);
+  return sorted[Math.max(0, idx)];
+}
+
+/** Milliseconds elapsed since `start` (from `process.hrtime.bigint()`). */
+export function elapsedMs(start: bigint): number {
+  return Number(process.hrtime.bigint() - start) / 1e6;
+}
+
+/** Round to two decimals for table output. */
+export function round2(v: number): number {
+  return Math.round(v * 100) / 100;
+}
+
+/**
+ * Count the SQL statements executed on `db` while `fn` runs.
+ * Relies on the sqlite3 `trace` event, which fires once per statement.
+ */
+export async function countQueries<T>(
+  db: Database,
+  fn: () => Promise<T>,
+): Promise<{ result: T; queries: number }> {
+  let queries = 0;
+  const onTrace = () => {
+    queries++;
+  };
+  db.on('trace', onTrace);
+  try {
+    const result = await fn();
+    return { result, queries };
+  } finally {
+    db.getDatabaseInstance().removeListener('trace', onTrace);
+  }
+}
+
+/** Deterministic PRNG (mulberry32) so runs are comparable across commits. */
+export function createRandom(seed: number) {
+  let a = seed >>> 0;
+  return () => {
+    a = (a + 0x6d2b79f5) >>> 0;
+    let t = a;
+    t = Math.imul(t ^ (t >>> 15), t | 1);
+    t ^= t + Math.imul(t ^ (t >>> 7), t | 61);
+    return ((t ^ (t >>> 14)) >>> 0) / 4294967296;
+  };
+}
@@ -0,0 +1,261 @@
+/**
+ * Deterministic synthetic dataset for load tests and benchmarks.
+ *
+ * Generates users, followers (skewed towards a few popular users), groups,
+ * recipes with ingredients, steps and tags, and years of weekly planning.
+ * The same options always produce the same rows and ids, so results from
+ * different commits are comparable. Ids are derived from a counter; the
+ * helpers below rebuild them without reading the database back.
+ *
+ * Usage (fills the database at DB_PATH):
+ *   DB_PATH=/tmp/load.sqlite BENCH_USERS=10000 BENCH_RECIPES_PER_USER=100 npm run bench:data
+ */
+
+import { Database } from 'sqlite';
+import { getDB, seedFoods } from '../db';
+import { createRandom } from './bench-utils';
+
+export interface DatasetOptions {
+  seed: number;
+  users: number;
+  recipesPerUser: number;
+  ingredientsPerRecipe: number;
+  stepsPerRecipe: number;
+  followsPerUser: number;
+  /** Users per family group; 1 or less disables groups. */
+  groupSize: number;
+  planningWeeks: number;
+  mealsPerWeek: number;
+}
+
+export const DEFAULT_DATASET: DatasetOptions = {
+  seed: 1,
+  users: 1000,
+  recipesPerUser: 20,
+  ingredientsPerRecipe: 8,
+  stepsPerRecipe: 5,
+  followsPerUser: 20,
+  groupSize: 4,
+  planningWeeks: 104,
+  mealsPerWeek: 10,
+};
+
+/** DEFAULT_DATASET overridden by BENCH_USERS, BENCH_RECIPES_PER_USER, … */
+export function datasetFromEnv(): DatasetOptions {
+  const env = (name: string, fallback: number) => Number(process.env[name] ?? fallback);
+  return {
+    seed: env('BENCH_SEED', DEFAULT_DATASET.seed),
+    users: env('BENCH_USERS', DEFAULT_DATASET.users),
+    recipesPerUser: env('BENCH_RECIPES_PER_USER', DEFAULT_DATASET.recipesPerUser),
+    ingredientsPerRecipe: env('BENCH_INGREDIENTS', DEFAULT_DATASET.ingredientsPerRecipe),
+    stepsPerRecipe: env('BENCH_STEPS', DEFAULT_DATASET.stepsPerRecipe),
+    followsPerUser: env('BENCH_FOLLOWS_PER_USER', DEFAULT_DATASET.followsPerUser),
+    groupSize: env('BENCH_GROUP_SIZE', DEFAULT_DATASET.groupSize),
+    planningWeeks: env('BENCH_PLANNING_WEEKS', DEFAULT_DATASET.planningWeeks),
+    mealsPerWeek: env('BENCH_MEALS_PER_WEEK', DEFAULT_DATASET.mealsPerWeek),
+  };
+}
+
+/** The week (a Monday) planning histories end at; fixed so datasets never drift. */
+export const DATASET_CURRENT_WEEK = '2026-01-05';
+const WEEK_MS = 7 * 24 * 60 * 60 * 1000;
+
+export const datasetUserId = (u: number) => `user-${u}`;
+export const datasetRecipeId = (u: number, r: number) => `recipe-${u}-${r}`;
+export const datasetGroupId = (g: number) => `group-${g}`;
+
+/** `weeks` Mondays ending at DATASET_CURRENT_WEEK, oldest first. */
+export function datasetWeeks(weeks: number): string[] {
+  const end = Date.parse(DATASET_CURRENT_WEEK);
+  return Array.from({ length: weeks }, (_, i) =>
+    new Date(end - (weeks - 1 - i) * WEEK_MS).toISOString().slice(0, 10),
+  );
+}
+
+const DISHES = ['Pasta', 'Risotto', 'Soup', 'Salad', 'Pie', 'Stew', 'Curry', 'Omelette', 'Cake'];
+const STYLES = ['Grandma', 'Quick', 'Spicy', 'Summer', 'Winter', 'Rustic', 'Creamy', 'Light'];
+const TAGS = ['veggie', 'quick', 'family', 'spicy', 'dessert', 'gluten-free', 'batch'];
+const CUISINES = ['ITALIAN', 'FRENCH', 'CHINESE', 'INDIAN', 'MEXICAN', 'JAPANESE'];
+const TYPES = ['FIRSTCOURSE', 'SECONDCOURSE', 'SIDE', 'DESSERT', 'OTHER'];
+const MEALS = ['BREAKFAST', 'LUNCH', 'DINNER'];
+const DAYS = ['MONDAY', 'TUESDAY', 'WEDNESDAY', 'THURSDAY', 'FRIDAY', 'SATURDAY', 'SUNDAY'];
+const UNITS = ['GRAM', 'MILLILITER', 'PIECE'];
+
+/** Statements per transaction. */
+const STATEMENTS_PER_COMMIT = 20_000;
+
+export interface GeneratedDataset {
+  options: DatasetOptions;
+  weeks: string[];
+  groups: number;
+  rows: number;
+}
+
+/**
+ * Write the dataset into `db`, which must hold the migrated schema and no
+ * rows from a previous run with the same ids.
+ */
+export async function generateDataset(
+  db: Database,
+  options: DatasetOptions = DEFAULT_DATASET,
+  onProgress?: (done: number, total: number) => void,
+): Promise<GeneratedDataset> {
+  const random = createRandom(options.seed);
+  const pick = <T>(list: T[]) => list[Math.floor(random() * list.length)];
+  const foodIds = (await db.all<{ id: string }[]>('SELECT id FROM foods ORDER BY id')).map(
+    (f) => f.id,
+  );
+  const weeks = datasetWeeks(options.planningWeeks);
+  const baseTime = Date.parse(DATASET_CURRENT_WEEK);
+
+  let rows = 0;
+  let sinceCommit = 0;
+  await db.exec('BEGIN');
+  const run = async (sql: string, ...params: unknown[]) => {
+    await db.run(sql, ...params);
+    rows++;
+    if (++sinceCommit >= STATEMENTS_PER_COMMIT) {
+      await db.exec('COMMIT');
+      await db.exec('BEGIN');
+      sinceCommit = 0;
+    }
+  };
+
+  for (let u = 0; u < options.users; u++) {
+    await run(
+      'INSERT INTO users (id, name, email) VALUES (?, ?, ?)',
+      datasetUserId(u),
+      `User ${u}`,
+      `user${u}@load.test`,
+    );
+  }
+
+  for (let u = 0; u < options.users; u++) {
+    const userId = datasetUserId(u);
+    for (let r = 0; r < options.recipesPerUser; r++) {
+      const recipeId = datasetRecipeId(u, r);
+      const createdAt = new Date(baseTime - random() * 3 * 365 * 24 * 3600 * 1000)
+        .toISOString()
+        .replace('T', ' ')
+        .slice(0, 19);
+      await run(
+        `INSERT INTO recipes (id, user_id, name, description, cuisine, type, difficulty, time_value, time_unit, servings, created_at)
+         VALUES (?, ?, ?, ?, ?, ?, ?, ?, 'MINUTE', ?, ?)`,
+        recipeId,
+        userId,
+        `${pick(STYLES)} ${pick(DISHES)} ${u}-${r}`,
+        `A ${pick(STYLES).toLowerCase()} recipe by user ${u}.`,
+        pick(CUISINES),
+        pick(TYPES),
+        pick(['EASY', 'MEDIUM', 'HARD']),
+        10 + Math.floor(random() * 110),
+        1 + Math.floor(random() * 6),
+        createdAt,
+      );
+      for (let i = 0; i < options.ingredientsPerRecipe; i++) {
+        const foodId = pick(foodIds);
+        await run(
+          `INSERT INTO recipe_ingredients (id, recipe_id, food_id, name, quantity_value, quantity_unit, sort_order)
+           VALUES (?, ?, ?, ?, ?, ?, ?)`,
+          `${recipeId}-i${i}`,
+          recipeId,
+          foodId ?? null,
+          `Ingredient ${foodId ?? i}`,
+          Math.round(5 + random() * 495),
+          pick(UNITS),
+          i,
+        );
+      }
+      for (let s = 0; s < options.stepsPerRecipe; s++) {
+        await run(
+          'INSERT INTO recipe_steps (id, recipe_id, text, sort_order) VALUES (?, ?, ?, ?)',
+          `${recipeId}-s${s}`,
+          recipeId,
+          `Step ${s + 1}: ${pick(['mix', 'stir', 'bake', 'chop', 'simmer', 'rest'])} well.`,
+          s,
+        );
+      }
+      for (const tag of TAGS.filter(() => random() < 0.25)) {
+        await run('INSERT INTO recipe_tags (recipe_id, tag) VALUES (?, ?)', recipeId, tag);
+      }
+    }
+    onProgress?.(u + 1, options.users);
+  }
+
+  // Followers: squaring the draw favours low user numbers, giving a few celebrities
+  for (let u = 0; u < options.users && options.users > 1; u++) {
+    for (let f = 0; f < options.followsPerUser; f++) {
+      const followed = Math.floor(random() ** 2 * options.users);
+      if (followed === u) continue;
+      await run(
+        'INSERT OR IGNORE INTO followers (follower_id, followed_id) VALUES (?, ?)',
+        datasetUserId(u),
+        datasetUserId(followed),
+      );
+    }
+  }
+
+  // Groups of consecutive users
+  let groups = 0;
+  if (options.groupSize > 1) {
+    for (let u = 0; u + 1 < options.users; u += options.groupSize) {
+      const groupId = datasetGroupId(groups++);
+      await run('INSERT INTO groups_table (id) VALUES (?)', groupId);
+      for (let m = u; m < Math.min(u + options.groupSize, options.users); m++) {
+        await run(
+          'INSERT INTO group_members (group_id, user_id) VALUES (?, ?)',
+          groupId,
+          datasetUserId(m),
+        );
+      }
+    }
+  }
+
+  // Planning: each user plans from their own recipes, favourites more often
+  for (let u = 0; u < options.users && options.recipesPerUser > 0; u++) {
+    for (const week of weeks) {
+      for (let m = 0; m < options.mealsPerWeek; m++) {
+        const r = Math.floor(random() ** 2 * options.recipesPerUser);
+        await run(
+          'INSERT INTO planning (id, recipe_id, week, day, meal, user_id, servings) VALUES (?, ?, ?, ?, ?, ?, ?)',
+          `plan-${u}-${week}-${m}`,
+          datasetRecipeId(u, r),
+          week,
+          DAYS[m % DAYS.length],
+          MEALS[m % MEALS.length],
+          datasetUserId(u),
+          1 + Math.floor(random() * 4),
+        );
+      }
+    }
+  }
+
+  await db.exec('COMMIT');
+  return { options, weeks, groups, rows };
+}
+
+if (require.main === module) {
+  (async () => {
+    if (!process.env.DB_PATH) throw new Error('Set DB_PATH to the database file to fill');
+    const options = datasetFromEnv();
+    const db = await getDB();
+    await seedFoods();
+    const start = Date.now();
+    let lastLog = 0;
+    const dataset = await generateDataset(db, options, (done, total) => {
+      if (Date.now() - lastLog < 5000 && done < total) return;
+      lastLog = Date.now();
+      console.log(`  ${done}/${total} users' recipes written`);
+    });
+    const seconds = (Date.now() - start) / 1000;
+    console.log(
+      `Done! ${dataset.rows} rows in ${seconds.toFixed(1)}s ` +
+        `(${Math.round(dataset.rows / seconds)} rows/s) into ${process.env.DB_PATH}`,
+    );
+    console.log(JSON.stringify(options));
+    process.exit(0);
+  })().catch((err) => {
+    console.error('Error:', err);
+    process.exit(1);
+  });
+}
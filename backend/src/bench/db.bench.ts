@@ -0,0 +1,159 @@
+/**
+ * Connection layer benchmark.
+ *
+ * Runs a mixed workload (mostly recipe lookups and per-user ingredient
+ * reports, plus recipe note updates) from many concurrent clients against a
+ * scratch database file, in three setups:
+ *   - legacy:  one plain sqlite connection for everything
+ *   - writer:  the cached-statement writer for everything
+ *   - pool:    writes on the writer, reads on the read-only pool
+ *
+ * Reports read and write throughput and p95 latency per setup.
+ *
+ * Usage:
+ *   npm run bench:db
+ */
+
+import crypto from 'crypto';
+import fs from 'fs';
+import os from 'os';
+import path from 'path';
+import sqlite3 from 'sqlite3';
+import { open, Database } from 'sqlite';
+import { closeDB, getDB, getReadDB } from '../db';
+import { createRandom, elapsedMs, percentile, round2 } from './bench-utils';
+
+const USERS = 50;
+const RECIPES_PER_USER = 40;
+const INGREDIENTS_PER_RECIPE = 8;
+const CONCURRENCY = Number(process.env.BENCH_CONCURRENCY || 32);
+const OPERATIONS = Number(process.env.BENCH_OPERATIONS || 20000);
+/** Share of operations that are writes. */
+const WRITE_RATIO = 0.1;
+
+const uuid = () => crypto.randomUUID();
+
+async function seed(db: Database) {
+  const recipeIds: string[] = [];
+  const userIds: string[] = [];
+  await db.exec('BEGIN');
+  for (let u = 0; u < USERS; u++) {
+    const userId = uuid();
+    userIds.push(userId);
+    await db.run(
+      'INSERT INTO users (id, name, email) VALUES (?, ?, ?)',
+      userId,
+      `User ${u}`,
+      `user${u}@bench.local`,
+    );
+    for (let r = 0; r < RECIPES_PER_USER; r++) {
+      const recipeId = uuid();
+      recipeIds.push(recipeId);
+      await db.run(
+        'INSERT INTO recipes (id, user_id, name) VALUES (?, ?, ?)',
+        recipeId,
+        userId,
+        `Recipe ${u}-${r}`,
+      );
+      for (let i = 0; i < INGREDIENTS_PER_RECIPE; i++) {
+        await db.run(
+          `INSERT INTO recipe_ingredients (id, recipe_id, food_id, name, quantity_value, quantity_unit, sort_order)
+           VALUES (?, ?, ?, ?, ?, 'GRAM', ?)`,
+          uuid(),
+          recipeId,
+          `f${(i % 12) + 1}`,
+          `Ingredient ${i}`,
+          100 + i,
+          i,
+        );
+      }
+    }
+  }
+  await db.exec('COMMIT');
+  return { userIds, recipeIds };
+}
+
+interface Setup {
+  writer: () => Promise<Database>;
+  reader: () => Promise<Database>;
+}
+
+async function run(setup: Setup, userIds: string[], recipeIds: string[]) {
+  const random = createRandom(42);
+  const pick = <T>(list: T[]) => list[Math.floor(random() * list.length)];
+  const reads: number[] = [];
+  const writes: number[] = [];
+  let issued = 0;
+
+  const client = async () => {
+    while (issued < OPERATIONS) {
+      issued++;
+      const start = process.hrtime.bigint();
+      const roll = random();
+      if (roll < WRITE_RATIO) {
+        const db = await setup.writer();
+        await db.run('UPDATE recipes SET notes = ? WHERE id = ?', `n${issued}`, pick(recipeIds));
+        writes.push(elapsedMs(start));
+      } else if (roll < 0.6) {
+        const db = await setup.reader();
+        await db.get('SELECT * FROM recipes WHERE id = ?', pick(recipeIds));
+        reads.push(elapsedMs(start));
+      } else {
+        const db = await setup.reader();
+        await db.all(
+          `SELECT ri.food_id, ri.quantity_unit, SUM(ri.quantity_value) AS total, COUNT(*) AS uses
+           FROM recipes r JOIN recipe_ingredients ri ON ri.recipe_id = r.id
+           WHERE r.user_id = ? GROUP BY ri.food_id, ri.quantity_unit`,
+          pick(userIds),
+        );
+        reads.push(elapsedMs(start));
+      }
+    }
+  };
+
+  const start = process.hrtime.bigint();
+  await Promise.all(Array.from({ length: CONCURRENCY }, client));
+  const seconds = elapsedMs(start) / 1000;
+
+  return {
+    'ops/s': Math.round(OPERATIONS / seconds),
+    'reads/s': Math.round(reads.length / seconds),
+    'writes/s': Math.round(writes.length / seconds),
+    'read p95 ms': round2(percentile(reads, 95)),
+    'write p95 ms': round2(percentile(writes, 95)),
+  };
+}
+
+async function main() {
+  const dir = fs.mkdtempSync(path.join(os.tmpdir(), 'food-recipes-db-'));
+  const filename = path.join(dir, 'bench.sqlite');
+  process.env.DB_PATH = filename;
+
+  const writer = await getDB();
+  const { userIds, recipeIds } = await seed(writer);
+
+  const legacy = await open({ filename, driver: sqlite3.Database });
+  await legacy.exec('PRAGMA foreign_keys = ON');
+  const single = async () => legacy;
+
+  const results = {
+    legacy: await run({ writer: single, reader: single }, userIds, recipeIds),
+    writer: await run({ writer: getDB, reader: getDB }, userIds, recipeIds),
+    pool: await run({ writer: getDB, reader: getReadDB }, userIds, recipeIds),
+  };
+
+  console.log(
+    `Mixed workload — ${OPERATIONS} operations, ${CONCURRENCY} clients, ` +
+      `${WRITE_RATIO * 100}% writes`,
+  );
+  console.table(results);
+
+  await legacy.close();
+  await closeDB();
+  fs.rmSync(dir, { recursive: true, force: true });
+}
+
+main().catch((err) => {
+  console.error('Error:', err);
+  process.exit(1);
+});
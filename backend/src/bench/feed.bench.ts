@@ -0,0 +1,167 @@
+/**
+ * Followed-chefs feed benchmark.
+ *
+ * Seeds one celebrity with CELEBRITY_FOLLOWERS followers and a few regular
+ * chefs followed by FOLLOWING_READERS of them, then measures two things for
+ * each strategy. Publishing is the cost of one celebrity recipe (insert plus
+ * fan-out). Reading is one feed page of a reader who follows everybody.
+ *   - read-time: the old approach, joining followers to recipes on every read
+ *   - push:      fan-out-on-write for everybody, the celebrity included
+ *   - hybrid:    what feed.ts does; the celebrity is pulled at read time
+ *
+ * Usage:
+ *   npm run bench:feed
+ *   BENCH_CELEBRITY_FOLLOWERS=20000 npm run bench:feed
+ */
+
+import { getDB } from '../db';
+import { fanOutRecipe, feedPage } from '../feed';
+import { elapsedMs, percentile, round2 } from './bench-utils';
+
+const CELEBRITY_FOLLOWERS = Number(process.env.BENCH_CELEBRITY_FOLLOWERS || 100_000);
+const FOLLOWING_READERS = 1000;
+const CHEFS = 10;
+const RECIPES_PER_AUTHOR = 20;
+const PAGE = 20;
+const PUBLISHES = Number(process.env.BENCH_PUBLISHES || 5);
+const READS = Number(process.env.BENCH_ITERATIONS || 200);
+
+const readerId = (i: number) => `reader-${i}`;
+const chefId = (i: number) => `chef-${i}`;
+const STAR = 'star';
+
+let clock = Date.UTC(2025, 0, 1);
+const nextCreatedAt = () =>
+  new Date((clock += 60_000)).toISOString().replace('T', ' ').slice(0, 19);
+
+async function seed() {
+  const db = await getDB();
+  await db.exec('BEGIN');
+  await db.run("INSERT INTO users (id, name, email) VALUES (?, 'Star', 'star@bench')", STAR);
+  for (let c = 0; c < CHEFS; c++) {
+    await db.run(
+      "INSERT INTO users (id, name, email) VALUES (?, 'Chef', ?)",
+      chefId(c),
+      `${chefId(c)}@bench`,
+    );
+  }
+  for (let i = 0; i < CELEBRITY_FOLLOWERS; i++) {
+    await db.run(
+      "INSERT INTO users (id, name, email) VALUES (?, 'Reader', ?)",
+      readerId(i),
+      `${readerId(i)}@bench`,
+    );
+    await db.run(
+      'INSERT INTO followers (follower_id, followed_id) VALUES (?, ?)',
+      readerId(i),
+      STAR,
+    );
+    if (i >= FOLLOWING_READERS) continue;
+    for (let c = 0; c < CHEFS; c++) {
+      await db.run(
+        'INSERT INTO followers (follower_id, followed_id) VALUES (?, ?)',
+        readerId(i),
+        chefId(c),
+      );
+    }
+  }
+  for (const author of [STAR, ...Array.from({ length: CHEFS }, (_, c) => chefId(c))]) {
+    for (let r = 0; r < RECIPES_PER_AUTHOR; r++) await publish(author, false);
+  }
+  await db.exec('COMMIT');
+}
+
+let recipeNumber = 0;
+/** Insert a recipe and fan it out; returns the feed rows written. */
+async function publish(author: string, transaction = true): Promise<number> {
+  const db = await getDB();
+  const id = `recipe-${recipeNumber++}`;
+  if (transaction) await db.exec('BEGIN IMMEDIATE');
+  await db.run(
+    'INSERT INTO recipes (id, user_id, name, created_at) VALUES (?, ?, ?, ?)',
+    id,
+    author,
+    `Recipe ${id}`,
+    nextCreatedAt(),
+  );
+  const rows = await fanOutRecipe(db, id);
+  if (transaction) await db.exec('COMMIT');
+  return rows;
+}
+
+async function timeAll(times: number, fn: () => Promise<unknown>) {
+  const samples: number[] = [];
+  for (let i = 0; i < times; i++) {
+    const start = process.hrtime.bigint();
+    await fn();
+    samples.push(elapsedMs(start));
+  }
+  return samples;
+}
+
+async function readTimeFeed() {
+  const db = await getDB();
+  return db.all(
+    `SELECT r.* FROM followers f JOIN recipes r ON r.user_id = f.followed_id
+     WHERE f.follower_id = ? ORDER BY r.created_at DESC, r.id DESC LIMIT ?`,
+    readerId(0),
+    PAGE,
+  );
+}
+
+async function main() {
+  process.env.DB_PATH = process.env.DB_PATH || ':memory:';
+  const db = await getDB();
+  const started = process.hrtime.bigint();
+  await seed();
+  console.log(`Seeded in ${round2(elapsedMs(started) / 1000)}s`);
+
+  const results = [];
+  const readPage = () => feedPage(db, readerId(0), null, PAGE);
+
+  const readTime = await timeAll(READS, readTimeFeed);
+  results.push({
+    strategy: 'read-time',
+    publishP50: 0,
+    rowsPerPublish: 0,
+    readP50: round2(percentile(readTime, 50)),
+    readP95: round2(percentile(readTime, 95)),
+  });
+
+  // Everything pushed (the seed already fanned the celebrity out)
+  let rows = 0;
+  const pushPublish = await timeAll(PUBLISHES, async () => (rows = await publish(STAR)));
+  const pushRead = await timeAll(READS, readPage);
+  results.push({
+    strategy: 'push',
+    publishP50: round2(percentile(pushPublish, 50)),
+    rowsPerPublish: rows,
+    readP50: round2(percentile(pushRead, 50)),
+    readP95: round2(percentile(pushRead, 95)),
+  });
+
+  // Hybrid: the celebrity is promoted and their pushed rows are dropped
+  await db.run('INSERT INTO feed_pull_authors (user_id) VALUES (?)', STAR);
+  await db.run('DELETE FROM feed_items WHERE author_id = ?', STAR);
+  const hybridPublish = await timeAll(PUBLISHES, async () => (rows = await publish(STAR)));
+  const hybridRead = await timeAll(READS, readPage);
+  results.push({
+    strategy: 'hybrid',
+    publishP50: round2(percentile(hybridPublish, 50)),
+    rowsPerPublish: rows,
+    readP50: round2(percentile(hybridRead, 50)),
+    readP95: round2(percentile(hybridRead, 95)),
+  });
+
+  console.log(
+    `Feed — celebrity with ${CELEBRITY_FOLLOWERS} followers, ${CHEFS} chefs followed by ` +
+      `${FOLLOWING_READERS} readers, ${PAGE}-recipe pages, latency in ms`,
+  );
+  console.table(results);
+  await db.close();
+}
+
+main().catch((err) => {
+  console.error('Error:', err);
+  process.exit(1);
+});
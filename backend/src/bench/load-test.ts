@@ -0,0 +1,464 @@
+/**
+ * End-to-end HTTP load test.
+ *
+ * Boots the real Express app (`start()` from app.ts) on a random local port
+ * over a generated dataset (see data-generator.ts), then runs CONCURRENCY
+ * virtual users for DURATION_MS. Each one signs in as a dataset user and
+ * loops over a weighted mix of planner and recipe-browsing requests.
+ *
+ * Reports throughput and p50/p95/p99 latency per route. Each run is saved
+ * as JSON under bench-results/load-test/ with the git commit and the
+ * options. The table is then compared with the latest earlier run that used
+ * the same options, so regressions between commits show up.
+ *
+ * Usage:
+ *   npm run bench:load
+ *   LOAD_CONCURRENCY=100 LOAD_DURATION_MS=60000 BENCH_USERS=10000 npm run bench:load
+ *   LOAD_DB_PATH=/tmp/load.sqlite npm run bench:load   # reuse a database from bench:data
+ *
+ * Cluster scaling: with LOAD_WORKERS set to a list of worker counts, the same
+ * mix runs once per count against a separate server process started with
+ * CLUSTER_WORKERS=<count> (0 = the single-process server), all over one
+ * database file, and a req/s table compares the counts. Give the clients room
+ * to saturate several cores (LOAD_CONCURRENCY of 100 or more). These runs are
+ * not saved.
+ *   LOAD_WORKERS=0,1,2,4 npm run bench:load
+ *   npm run bench:cluster
+ */
+
+import { ChildProcess, execSync, spawn } from 'child_process';
+import fs from 'fs';
+import net from 'net';
+import os from 'os';
+import path from 'path';
+import {
+  datasetFromEnv,
+  DatasetOptions,
+  datasetRecipeId,
+  datasetUserId,
+  datasetWeeks,
+  generateDataset,
+} from './data-generator';
+import { createRandom, elapsedMs, percentile, round2 } from './bench-utils';
+import type { JwtPayload } from '../key-store';
+
+const CONCURRENCY = Number(process.env.LOAD_CONCURRENCY || 100);
+const DURATION_MS = Number(process.env.LOAD_DURATION_MS || 30000);
+const SEARCHES = ['pasta', 'soup', 'creamy', 'rustic%20cake'];
+const RESULTS_DIR = path.join(__dirname, '..', '..', 'bench-results', 'load-test');
+const SERVER_START_TIMEOUT_MS = 60000;
+
+interface Client {
+  userId: string;
+  userNumber: number;
+  token: string;
+  random: () => number;
+  /** Planning items this client added and has not removed yet. */
+  planned: string[];
+}
+
+interface Action {
+  route: string;
+  weight: number;
+  request: (c: Client) => { method?: string; path: string; body?: unknown } | null;
+}
+
+function buildActions(options: DatasetOptions): Action[] {
+  const weeks = datasetWeeks(Math.max(options.planningWeeks, 1));
+  const recentWeek = (c: Client) =>
+    weeks[weeks.length - 1 - Math.floor(c.random() * 8)] ?? weeks[0];
+  const ownRecipe = (c: Client) =>
+    datasetRecipeId(c.userNumber, Math.floor(c.random() * Math.max(options.recipesPerUser, 1)));
+  const anyRecipe = (c: Client) =>
+    datasetRecipeId(
+      Math.floor(c.random() * options.users),
+      Math.floor(c.random() * Math.max(options.recipesPerUser, 1)),
+    );
+  const pick = <T>(c: Client, list: T[]) => list[Math.floor(c.random() * list.length)];
+  const groupQuery = (c: Client) =>
+    options.groupSize > 1
+      ? `?groupId=group-${Math.floor(c.userNumber / options.groupSize)}`
+      : '';
+
+  return [
+    {
+      route: 'GET /planning/:week',
+      weight: 25,
+      request: (c) => ({ path: `/planning/${recentWeek(c)}${groupQuery(c)}` }),
+    },
+    {
+      route: 'GET /planning/:week/shopping-list',
+      weight: 10,
+      request: (c) => ({ path: `/planning/${recentWeek(c)}/shopping-list${groupQuery(c)}` }),
+    },
+    {
+      route: 'GET /planning/:week/suggestions',
+      weight: 8,
+      request: (c) => ({ path: `/planning/${recentWeek(c)}/suggestions` }),
+    },
+    {
+      route: 'GET /planning/:week/nutrition-summary',
+      weight: 5,
+      request: (c) => ({ path: `/planning/${recentWeek(c)}/nutrition-summary` }),
+    },
+    {
+      route: 'POST /planning',
+      weight: 8,
+      request: (c) => ({
+        method: 'POST',
+        path: '/planning',
+        body: { recipe_id: ownRecipe(c), week: recentWeek(c), day: 'MONDAY', meal: 'DINNER' },
+      }),
+    },
+    {
+      route: 'DELETE /planning/:id',
+      weight: 6,
+      request: (c) => {
+        const id = c.planned.shift();
+        return id ? { method: 'DELETE', path: `/planning/${id}` } : null;
+      },
+    },
+    { route: 'GET /recipes', weight: 10, request: () => ({ path: '/recipes?limit=20' }) },
+    {
+      route: 'GET /recipes/:id',
+      weight: 15,
+      request: (c) => ({ path: `/recipes/${anyRecipe(c)}` }),
+    },
+    {
+      route: 'GET /recipes/discover',
+      weight: 5,
+      request: () => ({ path: '/recipes/discover?limit=20' }),
+    },
+    {
+      route: 'GET /recipes/search',
+      weight: 5,
+      request: (c) => ({ path: `/recipes/search?q=${pick(c, SEARCHES)}` }),
+    },
+    { route: 'GET /groups/mine', weight: 3, request: () => ({ path: '/groups/mine' }) },
+    {
+      route: 'GET /users/:id',
+      weight: 3,
+      request: (c) => ({
+        path: `/users/${datasetUserId(Math.floor(c.random() * options.users))}`,
+      }),
+    },
+  ];
+}
+
+interface RouteSamples {
+  latencies: number[];
+  errors: number;
+}
+
+function gitCommit(): string {
+  try {
+    return execSync('git rev-parse --short HEAD', { stdio: ['ignore', 'pipe', 'ignore'] })
+      .toString()
+      .trim();
+  } catch {
+    return 'unknown';
+  }
+}
+
+type RouteResult = {
+  requests: number;
+  'req/s': number;
+  errors: number;
+  p50: number;
+  p95: number;
+  p99: number;
+};
+
+interface SavedRun {
+  commit: string;
+  date: string;
+  concurrency: number;
+  durationMs: number;
+  dataset: DatasetOptions;
+  routes: Record<string, RouteResult>;
+}
+
+/** The newest saved run with the same dataset, concurrency and duration. */
+function findBaseline(run: SavedRun): SavedRun | null {
+  if (!fs.existsSync(RESULTS_DIR)) return null;
+  const files = fs.readdirSync(RESULTS_DIR).filter((f) => f.endsWith('.json')).sort().reverse();
+  for (const file of files) {
+    const saved = JSON.parse(fs.readFileSync(path.join(RESULTS_DIR, file), 'utf8')) as SavedRun;
+    if (
+      saved.concurrency === run.concurrency &&
+      saved.durationMs === run.durationMs &&
+      JSON.stringify(saved.dataset) === JSON.stringify(run.dataset)
+    ) {
+      return saved;
+    }
+  }
+  return null;
+}
+
+async function createClients(
+  options: DatasetOptions,
+  signToken: (payload: JwtPayload) => Promise<string>,
+): Promise<Client[]> {
+  const clients: Client[] = [];
+  for (let i = 0; i < CONCURRENCY; i++) {
+    const userNumber = (i * 7919) % options.users;
+    const userId = datasetUserId(userNumber);
+    clients.push({
+      userId,
+      userNumber,
+      token: await signToken({ id: userId, name: `User ${userNumber}`, email: `${userId}@load` }),
+      random: createRandom(options.seed * 1000 + i),
+      planned: [],
+    });
+  }
+  return clients;
+}
+
+/** Run every client through the weighted mix for DURATION_MS; returns per-route results. */
+async function runMix(
+  baseUrl: string,
+  actions: Action[],
+  clients: Client[],
+): Promise<{ routes: Record<string, RouteResult>; errors: number }> {
+  const totalWeight = actions.reduce((sum, a) => sum + a.weight, 0);
+  const samples = new Map<string, RouteSamples>(
+    actions.map((a) => [a.route, { latencies: [], errors: 0 }]),
+  );
+
+  const deadline = Date.now() + DURATION_MS;
+  const runClient = async (client: Client) => {
+    while (Date.now() < deadline) {
+      let roll = client.random() * totalWeight;
+      const action = actions.find((a) => (roll -= a.weight) < 0) ?? actions[0];
+      const request = action.request(client);
+      if (!request) continue;
+
+      const started = process.hrtime.bigint();
+      const stats = samples.get(action.route)!;
+      try {
+        const res = await fetch(baseUrl + request.path, {
+          method: request.method ?? 'GET',
+          headers: {
+            Authorization: `Bearer ${client.token}`,
+            'Content-Type': 'application/json',
+          },
+          body: request.body === undefined ? undefined : JSON.stringify(request.body),
+        });
+        const body = await res.text();
+        stats.latencies.push(elapsedMs(started));
+        if (!res.ok) stats.errors++;
+        else if (action.route === 'POST /planning') client.planned.push(JSON.parse(body).id);
+      } catch {
+        stats.latencies.push(elapsedMs(started));
+        stats.errors++;
+      }
+    }
+  };
+
+  const started = process.hrtime.bigint();
+  await Promise.all(clients.map(runClient));
+  const seconds = elapsedMs(started) / 1000;
+
+  const routes: Record<string, RouteResult> = {};
+  const all: number[] = [];
+  let errors = 0;
+  for (const [route, { latencies, errors: routeErrors }] of samples) {
+    all.push(...latencies);
+    errors += routeErrors;
+    routes[route] = {
+      requests: latencies.length,
+      'req/s': round2(latencies.length / seconds),
+      errors: routeErrors,
+      p50: round2(percentile(latencies, 50)),
+      p95: round2(percentile(latencies, 95)),
+      p99: round2(percentile(latencies, 99)),
+    };
+  }
+  routes.total = {
+    requests: all.length,
+    'req/s': round2(all.length / seconds),
+    errors,
+    p50: round2(percentile(all, 50)),
+    p95: round2(percentile(all, 95)),
+    p99: round2(percentile(all, 99)),
+  };
+  return { routes, errors };
+}
+
+const describeRun = (options: DatasetOptions) =>
+  `${CONCURRENCY} clients for ${DURATION_MS / 1000}s ` +
+  `(${options.users} users, ${options.users * options.recipesPerUser} recipes, ` +
+  `${options.planningWeeks} weeks of planning)`;
+
+async function main() {
+  const options = datasetFromEnv();
+  const reuse = process.env.LOAD_DB_PATH;
+  const dir = reuse ? null : fs.mkdtempSync(path.join(os.tmpdir(), 'food-recipes-load-'));
+  process.env.DB_PATH = reuse || path.join(dir!, 'load.sqlite');
+
+  // Imported only now so the app opens the database chosen above
+  const { start, server } = await import('../app');
+  const { getDB, closeDB } = await import('../db');
+  const { signToken } = await import('../auth.middleware');
+  const { passwordHasher } = await import('../password-hasher');
+  const { outboxes } = await import('../socket');
+
+  await start(0);
+  if (!reuse) {
+    console.log('Generating dataset…');
+    await generateDataset(await getDB(), options);
+  }
+  const address = server.address();
+  const baseUrl = `http://127.0.0.1:${typeof address === 'object' && address ? address.port : 0}`;
+
+  const clients = await createClients(options, signToken);
+  console.log(`Load test — ${describeRun(options)} against ${baseUrl}`);
+  const { routes, errors } = await runMix(baseUrl, buildActions(options), clients);
+  console.table(routes);
+
+  const run: SavedRun = {
+    commit: gitCommit(),
+    date: new Date().toISOString(),
+    concurrency: CONCURRENCY,
+    durationMs: DURATION_MS,
+    dataset: options,
+    routes,
+  };
+  const baseline = findBaseline(run);
+  if (baseline) {
+    const change = (now: number, before: number) =>
+      before ? `${now >= before ? '+' : ''}${Math.round(((now - before) / before) * 100)}%` : 'n/a';
+    const diff: Record<string, Record<string, string>> = {};
+    for (const [route, result] of Object.entries(routes)) {
+      const before = baseline.routes[route];
+      if (!before) continue;
+      diff[route] = {
+        'req/s': change(result['req/s'], before['req/s']),
+        p95: change(result.p95, before.p95),
+        p99: change(result.p99, before.p99),
+      };
+    }
+    console.log(`Compared with ${baseline.commit} (${baseline.date}):`);
+    console.table(diff);
+  }
+
+  fs.mkdirSync(RESULTS_DIR, { recursive: true });
+  const file = path.join(RESULTS_DIR, `${run.date.replace(/[:.]/g, '-')}-${run.commit}.json`);
+  fs.writeFileSync(file, JSON.stringify(run, null, 2) + '\n');
+  console.log(`Saved ${path.relative(process.cwd(), file)}`);
+
+  outboxes.flushAll();
+  await passwordHasher.close();
+  await new Promise((resolve) => server.close(resolve));
+  await closeDB();
+  if (dir) fs.rmSync(dir, { recursive: true, force: true });
+  process.exit(errors > 0 && process.env.LOAD_FAIL_ON_ERROR ? 1 : 0);
+}
+
+// ── Cluster scaling ─────────────────────────────────
+
+function freePort(): Promise<number> {
+  return new Promise((resolve, reject) => {
+    const probe = net.createServer();
+    probe.once('error', reject);
+    probe.listen(0, () => {
+      const { port } = probe.address() as net.AddressInfo;
+      probe.close(() => resolve(port));
+    });
+  });
+}
+
+/** Start app.ts in its own process with CLUSTER_WORKERS=`workers`; resolves once it answers. */
+async function spawnServer(workers: number, dbPath: string): Promise<[ChildProcess, string]> {
+  const port = await freePort();
+  // Under ts-node the child needs the loader as well
+  const execArgv = __filename.endsWith('.ts') ? ['-r', 'ts-node/register'] : [];
+  const child = spawn(process.execPath, [...execArgv, require.resolve('../app')], {
+    env: { ...process.env, CLUSTER_WORKERS: String(workers), PORT: String(port), DB_PATH: dbPath },
+    stdio: ['ignore', 'ignore', 'inherit'],
+  });
+  const baseUrl = `http://127.0.0.1:${port}`;
+  const deadline = Date.now() + SERVER_START_TIMEOUT_MS;
+  while (Date.now() < deadline) {
+    if (child.exitCode !== null) throw new Error(`Server exited with code ${child.exitCode}`);
+    try {
+      if ((await fetch(`${baseUrl}/`)).ok) return [child, baseUrl];
+    } catch {
+      // not listening yet
+    }
+    await new Promise((resolve) => setTimeout(resolve, 200));
+  }
+  child.kill('SIGKILL');
+  throw new Error(`Server with ${workers} workers did not start`);
+}
+
+async function stopServer(child: ChildProcess) {
+  if (child.exitCode !== null) return;
+  const exited = new Promise((resolve) => child.once('exit', resolve));
+  child.kill('SIGTERM');
+  const timer = setTimeout(() => child.kill('SIGKILL'), 5000);
+  await exited;
+  clearTimeout(timer);
+}
+
+async function scaling(counts: number[]) {
+  const options = datasetFromEnv();
+  const reuse = process.env.LOAD_DB_PATH;
+  const dir = reuse ? null : fs.mkdtempSync(path.join(os.tmpdir(), 'food-recipes-load-'));
+  const dbPath = reuse || path.join(dir!, 'load.sqlite');
+  process.env.DB_PATH = dbPath;
+
+  // Prepare the database and a signing key here, then leave the file to the servers
+  const { getDB, seedFoods, closeDB } = await import('../db');
+  const { signToken } = await import('../auth.middleware');
+  const { keyStore } = await import('../key-store');
+  const db = await getDB();
+  if (!reuse) {
+    console.log('Generating dataset…');
+    await seedFoods();
+    await generateDataset(db, options);
+  }
+  await keyStore.init();
+  const tokens = new Map<string, string>();
+  for (const client of await createClients(options, signToken)) {
+    tokens.set(client.userId, client.token);
+  }
+  keyStore.stop();
+  await closeDB();
+
+  console.log(
+    `Cluster scaling — ${describeRun(options)} per worker count, ${os.cpus().length} CPUs`,
+  );
+  const results: Record<string, Record<string, number | string>> = {};
+  let first: number | null = null;
+  for (const workers of counts) {
+    const [child, baseUrl] = await spawnServer(workers, dbPath);
+    try {
+      // Fresh clients, so every count replays the same request sequence
+      const clients = await createClients(options, async (user) => tokens.get(user.id)!);
+      const { routes } = await runMix(baseUrl, buildActions(options), clients);
+      const total = routes.total;
+      first ??= total['req/s'];
+      results[workers === 0 ? 'single process' : `${workers} workers`] = {
+        'req/s': total['req/s'],
+        speedup: `${round2(total['req/s'] / first)}x`,
+        errors: total.errors,
+        p50: total.p50,
+        p95: total.p95,
+        p99: total.p99,
+      };
+    } finally {
+      await stopServer(child);
+    }
+  }
+  console.table(results);
+
+  if (dir) fs.rmSync(dir, { recursive: true, force: true });
+  process.exit(0);
+}
+
+const workerCounts = process.env.LOAD_WORKERS?.split(',').map(Number);
+(workerCounts ? scaling(workerCounts) : main()).catch((err) => {
+  console.error('Error:', err);
+  process.exit(1);
+});
@@ -0,0 +1,118 @@
+/**
+ * Login storm benchmark.
+ *
+ * Serves a cheap, unrelated endpoint over HTTP and probes its latency while a
+ * steady stream of bcrypt hashes (cost 10) runs alongside:
+ *   - idle:        no hashing, the baseline
+ *   - main thread: bcryptjs called directly, as a route handler would
+ *   - worker pool: the same jobs through `passwordHasher`
+ *
+ * Reports p50/p99 latency of the probe endpoint, hashes completed and the
+ * pool's own job latency and queue depth.
+ *
+ * Usage:
+ *   npm run bench:password-hasher
+ */
+
+import http from 'http';
+import { AddressInfo } from 'net';
+import bcrypt from 'bcryptjs';
+import express from 'express';
+import { getDB } from '../db';
+import { passwordHasher } from '../password-hasher';
+import { elapsedMs, percentile, round2 } from './bench-utils';
+
+const PROBE_REQUESTS = Number(process.env.BENCH_REQUESTS || 2000);
+const PROBE_CONCURRENCY = 10;
+/** Concurrent logins kept in flight during the storm. */
+const STORM_CONCURRENCY = Number(process.env.BENCH_STORM || 32);
+
+type Hasher = ((password: string) => Promise<unknown>) | null;
+
+function get(agent: http.Agent, port: number): Promise<void> {
+  return new Promise((resolve, reject) => {
+    http
+      .get({ host: '127.0.0.1', port, path: '/ping', agent }, (res) => {
+        res.resume();
+        res.on('end', resolve);
+      })
+      .on('error', reject);
+  });
+}
+
+async function probe(port: number) {
+  const agent = new http.Agent({ keepAlive: true, maxSockets: PROBE_CONCURRENCY });
+  const samples: number[] = [];
+  let issued = 0;
+  const worker = async () => {
+    while (issued < PROBE_REQUESTS) {
+      issued++;
+      const start = process.hrtime.bigint();
+      await get(agent, port);
+      samples.push(elapsedMs(start));
+    }
+  };
+  await Promise.all(Array.from({ length: PROBE_CONCURRENCY }, worker));
+  agent.destroy();
+  return samples;
+}
+
+async function phase(port: number, hasher: Hasher) {
+  let running = true;
+  let hashes = 0;
+  const storm = async (i: number) => {
+    while (running && hasher) {
+      await hasher(`password-${i}-${hashes}`);
+      hashes++;
+    }
+  };
+  const storms = Array.from({ length: STORM_CONCURRENCY }, (_, i) => storm(i));
+
+  const start = process.hrtime.bigint();
+  const samples = await probe(port);
+  const seconds = elapsedMs(start) / 1000;
+  running = false;
+  await Promise.all(storms);
+
+  return {
+    'probe p50 ms': round2(percentile(samples, 50)),
+    'probe p99 ms': round2(percentile(samples, 99)),
+    'hashes/s': Math.round(hashes / seconds),
+  };
+}
+
+async function main() {
+  process.env.DB_PATH = process.env.DB_PATH || ':memory:';
+  const db = await getDB();
+
+  const app = express();
+  app.get('/ping', async (_req, res) => {
+    res.json(await db.get('SELECT COUNT(*) AS foods FROM foods'));
+  });
+  const server = app.listen(0, '127.0.0.1');
+  await new Promise((resolve) => server.once('listening', resolve));
+  const { port } = server.address() as AddressInfo;
+
+  const results = {
+    idle: await phase(port, null),
+    'main thread': await phase(port, (pw) => bcrypt.hash(pw, 10)),
+    'worker pool': await phase(port, (pw) => passwordHasher.hash(pw)),
+  };
+
+  console.log(
+    `Login storm — ${PROBE_REQUESTS} probe requests (concurrency ${PROBE_CONCURRENCY}), ` +
+      `${STORM_CONCURRENCY} concurrent hashes`,
+  );
+  console.table(results);
+  console.log('Worker pool stats');
+  console.log(passwordHasher.stats());
+
+  server.close();
+  await passwordHasher.close();
+  await db.close();
+}
+
+main().catch((err) => {
+  console.error('Error:', err);
+  process.exit(1);
+});
@@ -0,0 +1,181 @@
+/**
+ * Recipe hydration benchmark.
+ *
+ * Compares the legacy per-recipe hydration (ingredients, steps, tags, owner and
+ * saved status fetched one recipe at a time) with the batched `hydrateRecipes`
+ * path on a cold and on a warm recipe cache, reporting SQL queries per request
+ * and p50/p95 latency per list size.
+ *
+ * Usage:
+ *   npm run bench:hydration
+ */
+
+import crypto from 'crypto';
+import { getDB, seedFoods } from '../db';
+import { hydrateRecipes, recipeCache, RecipeRow } from '../recipe-hydration';
+import { countQueries, createRandom, elapsedMs, percentile, round2 } from './bench-utils';
+
+const LIST_SIZES = [1, 10, 50, 100, 250, 500];
+const ITERATIONS = Number(process.env.BENCH_ITERATIONS || 30);
+
+const uuid = () => crypto.randomUUID();
+
+/** The pre-batching implementation, kept here as the baseline. */
+async function legacyBuildRecipe(recipeRow: RecipeRow, userId: string, lang: string) {
+  const db = await getDB();
+  const ingredients = await db.all(
+    `SELECT ri.*, f.name as food_name_en, f.name_it as food_name_it
+     FROM recipe_ingredients ri
+     LEFT JOIN foods f ON ri.food_id = f.id
+     WHERE ri.recipe_id = ?
+     ORDER BY ri.sort_order`,
+    recipeRow.id,
+  );
+  const steps = await db.all(
+    'SELECT * FROM recipe_steps WHERE recipe_id = ? ORDER BY sort_order',
+    recipeRow.id,
+  );
+  const tagRows = await db.all('SELECT tag FROM recipe_tags WHERE recipe_id = ?', recipeRow.id);
+  const user = await db.get('SELECT name FROM users WHERE id = ?', recipeRow.user_id);
+  const saved = await db.get(
+    'SELECT 1 FROM saved_recipes WHERE user_id = ? AND recipe_id = ?',
+    userId,
+    recipeRow.id,
+  );
+  return {
+    id: recipeRow.id,
+    userName: user?.name || '',
+    ingredients: ingredients.map(
+      (i: { food_name_en?: string; food_name_it?: string; name: string }) =>
+        lang === 'it' ? i.food_name_it || i.name : i.food_name_en || i.name,
+    ),
+    steps: steps.length,
+    tags: tagRows.map((t: { tag: string }) => t.tag),
+    isAdded: !!saved,
+  };
+}
+
+async function seed(recipeCount: number): Promise<string> {
+  const db = await getDB();
+  const random = createRandom(42);
+  const userIds: string[] = [];
+  for (let u = 0; u < 20; u++) {
+    const id = uuid();
+    userIds.push(id);
+    await db.run(
+      'INSERT INTO users (id, name, email) VALUES (?, ?, ?)',
+      id,
+      `User ${u}`,
+      `${id}@bench`,
+    );
+  }
+  await db.exec('BEGIN');
+  for (let r = 0; r < recipeCount; r++) {
+    const recipeId = uuid();
+    const owner = userIds[Math.floor(random() * userIds.length)];
+    await db.run(
+      'INSERT INTO recipes (id, user_id, name) VALUES (?, ?, ?)',
+      recipeId,
+      owner,
+      `Recipe ${r}`,
+    );
+    for (let i = 0; i < 8; i++) {
+      await db.run(
+        'INSERT INTO recipe_ingredients (id, recipe_id, food_id, name, quantity_value, quantity_unit, sort_order) VALUES (?, ?, ?, ?, ?, ?, ?)',
+        uuid(),
+        recipeId,
+        `f${1 + Math.floor(random() * 45)}`,
+        `Ingredient ${i}`,
+        Math.round(random() * 500),
+        'GRAM',
+        i,
+      );
+    }
+    for (let s = 0; s < 5; s++) {
+      await db.run(
+        'INSERT INTO recipe_steps (id, recipe_id, text, sort_order) VALUES (?, ?, ?, ?)',
+        uuid(),
+        recipeId,
+        `Step ${s}`,
+        s,
+      );
+    }
+    for (const tag of ['quick', 'veggie', 'family'].filter(() => random() < 0.5)) {
+      await db.run('INSERT INTO recipe_tags (recipe_id, tag) VALUES (?, ?)', recipeId, tag);
+    }
+    if (random() < 0.3) {
+      await db.run(
+        'INSERT INTO saved_recipes (user_id, recipe_id) VALUES (?, ?)',
+        userIds[0],
+        recipeId,
+      );
+    }
+  }
+  await db.exec('COMMIT');
+  return userIds[0];
+}
+
+async function main() {
+  process.env.DB_PATH = process.env.DB_PATH || ':memory:';
+  const db = await getDB();
+  await seedFoods();
+  const viewerId = await seed(Math.max(...LIST_SIZES));
+
+  const results = [];
+  for (const size of LIST_SIZES) {
+    const rows = await db.all<RecipeRow[]>(
+      'SELECT * FROM recipes ORDER BY created_at DESC LIMIT ?',
+      size,
+    );
+
+    const legacy: number[] = [];
+    const batched: number[] = [];
+    const cached: number[] = [];
+    let legacyQueries = 0;
+    let batchedQueries = 0;
+    let cachedQueries = 0;
+    for (let i = 0; i < ITERATIONS; i++) {
+      let start = process.hrtime.bigint();
+      const l = await countQueries(db, () =>
+        Promise.all(rows.map((r) => legacyBuildRecipe(r, viewerId, 'en'))),
+      );
+      legacy.push(elapsedMs(start));
+      legacyQueries = l.queries;
+
+      recipeCache.clear();
+      start = process.hrtime.bigint();
+      const b = await countQueries(db, () => hydrateRecipes(rows, viewerId, 'en'));
+      batched.push(elapsedMs(start));
+      batchedQueries = b.queries;
+
+      // Second read of the same list is served from the warm recipe cache
+      start = process.hrtime.bigint();
+      const c = await countQueries(db, () => hydrateRecipes(rows, viewerId, 'en'));
+      cached.push(elapsedMs(start));
+      cachedQueries = c.queries;
+    }
+
+    results.push({
+      listSize: size,
+      legacyQueries,
+      batchedQueries,
+      legacyP50: round2(percentile(legacy, 50)),
+      legacyP95: round2(percentile(legacy, 95)),
+      batchedP50: round2(percentile(batched, 50)),
+      batchedP95: round2(percentile(batched, 95)),
+      cachedQueries,
+      cachedP50: round2(percentile(cached, 50)),
+      cachedP95: round2(percentile(cached, 95)),
+    });
+  }
+
+  console.log(`Recipe hydration — ${ITERATIONS} iterations per size, latency in ms`);
+  console.table(results);
+  console.log('Recipe cache:', recipeCache.stats());
+  await db.close();
+}
+
+main().catch((err) => {
+  console.error('Error:', err);
+  process.exit(1);
+});
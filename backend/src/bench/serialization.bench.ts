@@ -0,0 +1,127 @@
+/**
+ * Response serialization and compression benchmark.
+ *
+ * Builds the main payloads from a synthetic dataset with the same functions
+ * the routes use, then reports per endpoint:
+ *   - bytes on the wire: identity, gzip and brotli (at the server's settings)
+ *   - serialization CPU: JSON.stringify (before) vs the compiled serializer
+ *   - compression CPU: gzip and brotli of the serialized body
+ *
+ * Times are p50 in microseconds over BENCH_ITERATIONS runs.
+ *
+ * Usage:
+ *   npm run bench:serialization
+ *   BENCH_USERS=500 npm run bench:serialization
+ */
+
+import { getDB, seedFoods } from '../db';
+import { hydrateRecipes, RecipeRow } from '../recipe-hydration';
+import { PlanningRow, toPlannedItem } from '../planning-batch';
+import { getShoppingList } from '../shopping-list';
+import { summarizeNutrition } from '../nutrition';
+import { compressBody, Encoding } from '../compression';
+import {
+  serializeNutritionRange,
+  serializePlanningWeek,
+  serializeRecipe,
+  serializeRecipes,
+  serializeShoppingList,
+  Serializer,
+} from '../serializers';
+import { datasetFromEnv, datasetGroupId, generateDataset } from './data-generator';
+import { percentile, round2 } from './bench-utils';
+
+const ITERATIONS = Number(process.env.BENCH_ITERATIONS || 200);
+const LIST_PAGE = 50;
+
+/** p50 of `fn` in microseconds. */
+function timeSync(fn: () => unknown, iterations = ITERATIONS): number {
+  for (let i = 0; i < Math.min(iterations, 20); i++) fn(); // warm up
+  const samples: number[] = [];
+  for (let i = 0; i < iterations; i++) {
+    const start = process.hrtime.bigint();
+    fn();
+    samples.push(Number(process.hrtime.bigint() - start) / 1000);
+  }
+  return percentile(samples, 50);
+}
+
+function measure(endpoint: string, serialize: Serializer, value: unknown) {
+  const body = JSON.stringify(value);
+  if (serialize(value) !== body) throw new Error(`${endpoint}: compiled output differs`);
+  const compress = (encoding: Encoding) => compressBody(body, encoding);
+  // Compression is much slower than serializing; fewer runs keep the total reasonable
+  const compressRuns = Math.max(10, Math.floor(ITERATIONS / 10));
+  return {
+    endpoint,
+    bytes: Buffer.byteLength(body),
+    gzipBytes: compress('gzip').length,
+    brBytes: compress('br').length,
+    stringifyUs: round2(timeSync(() => JSON.stringify(value))),
+    compiledUs: round2(timeSync(() => serialize(value))),
+    gzipUs: round2(timeSync(() => compress('gzip'), compressRuns)),
+    brUs: round2(timeSync(() => compress('br'), compressRuns)),
+  };
+}
+
+async function main() {
+  process.env.DB_PATH = process.env.DB_PATH || ':memory:';
+  const db = await getDB();
+  await seedFoods();
+  const options = { ...datasetFromEnv(), users: Number(process.env.BENCH_USERS || 200) };
+  const dataset = await generateDataset(db, options);
+  const week = dataset.weeks[dataset.weeks.length - 1];
+
+  const members = (
+    await db.all<{ user_id: string }[]>(
+      'SELECT user_id FROM group_members WHERE group_id = ?',
+      datasetGroupId(0),
+    )
+  ).map((m) => m.user_id);
+  const userIds = members.length > 0 ? members : ['user-0'];
+  const placeholders = userIds.map(() => '?').join(',');
+
+  const rows = await db.all<RecipeRow[]>(
+    'SELECT * FROM recipes ORDER BY created_at DESC, id DESC LIMIT ?',
+    LIST_PAGE,
+  );
+  const recipes = await hydrateRecipes(rows, userIds[0], 'en');
+
+  const planned = await db.all<PlanningRow[]>(
+    `SELECT p.*, r.name as recipe_name_lookup, r.min_servings, r.split_servings
+     FROM planning p LEFT JOIN recipes r ON r.id = p.recipe_id
+     WHERE p.week = ? AND p.user_id IN (${placeholders})`,
+    week,
+    ...userIds,
+  );
+  const shoppingList = await getShoppingList(db, userIds, week, 'en');
+  const from = dataset.weeks[Math.max(0, dataset.weeks.length - 52)];
+  const nutrition = await summarizeNutrition(db, userIds, from, week);
+
+  const results = [
+    measure('GET /recipes/:id', serializeRecipe, recipes[0]),
+    measure(`GET /recipes (${recipes.length})`, serializeRecipes, recipes),
+    measure('GET /planning/:week', serializePlanningWeek, {
+      startDate: week,
+      recipes: planned.map(toPlannedItem),
+    }),
+    measure('GET /planning/:week/shopping-list', serializeShoppingList, shoppingList),
+    measure('GET /planning/nutrition-summary (52w)', serializeNutritionRange, {
+      from,
+      to: week,
+      ...nutrition,
+    }),
+  ];
+
+  console.log(
+    `Serialization — ${options.users} users, group of ${userIds.length}, ` +
+      `p50 over ${ITERATIONS} runs, times in µs`,
+  );
+  console.table(results);
+  await db.close();
+}
+
+main().catch((err) => {
+  console.error('Error:', err);
+  process.exit(1);
+});
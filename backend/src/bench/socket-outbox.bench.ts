@@ -0,0 +1,97 @@
+/**
+ * Group broadcast benchmark.
+ *
+ * Simulates a busy group: several members drag recipes around the planner in
+ * bursts, and every change is followed by a shopping-list invalidation, as
+ * the planning routes do. The same event stream is counted twice:
+ *   - immediate: one Socket.IO message per event (the old emit functions)
+ *   - outbox:    the per-room `RoomOutbox` used by socket.ts
+ *
+ * For each, reports messages and bytes per client per second, and how many
+ * shopping-list refetches clients make. The old shopping-list page refetched
+ * on every invalidation; the current one refetches at most once per message,
+ * and only for the week it shows.
+ *
+ * Usage:
+ *   npm run bench:socket
+ */
+
+import { PlanningBatchMessage, RoomOutbox } from '../socket-outbox';
+import { createRandom, round2 } from './bench-utils';
+
+const MEMBERS = Number(process.env.BENCH_MEMBERS || 6);
+const EDITORS = Number(process.env.BENCH_EDITORS || 3);
+const DURATION_MS = Number(process.env.BENCH_DURATION_MS || 5000);
+/** Changes per drag-and-drop burst, and the gap between them. */
+const BURST_SIZE = 8;
+const BURST_STEP_MS = 15;
+const WEEKS = ['2026-01-05', '2026-01-12'];
+/** The week every client has on screen. */
+const SHOWN_WEEK = WEEKS[0];
+
+const sleep = (ms: number) => new Promise((resolve) => setTimeout(resolve, ms));
+
+async function main() {
+  const random = createRandom(7);
+  const immediate = { messages: 0, bytes: 0, refetches: 0 };
+  const outboxed = { messages: 0, bytes: 0, refetches: 0 };
+
+  // Senders never receive their own events, but for simplicity every member counts
+  const deliver = (counter: typeof immediate, message: unknown, refetch: boolean) => {
+    counter.messages += MEMBERS;
+    counter.bytes += JSON.stringify(message).length * MEMBERS;
+    if (refetch) counter.refetches += MEMBERS;
+  };
+
+  const outbox = new RoomOutbox((message: PlanningBatchMessage) =>
+    deliver(outboxed, message, message.weeks.includes(SHOWN_WEEK)),
+  );
+
+  const editor = async (editorId: number) => {
+    const deadline = Date.now() + DURATION_MS;
+    while (Date.now() < deadline) {
+      const week = random() < 0.8 ? WEEKS[0] : WEEKS[1];
+      const itemId = `e${editorId}-${Math.floor(random() * 20)}`;
+      for (let i = 0; i < BURST_SIZE; i++) {
+        const change = {
+          id: itemId,
+          kind: 'recipe',
+          week,
+          day: ['MONDAY', 'TUESDAY', 'WEDNESDAY'][i % 3],
+          servings: 2,
+          assignedTo: null,
+          user_id: `u${editorId}`,
+        };
+        deliver(immediate, change, false);
+        outbox.addChange('updated', change);
+
+        // The old page refetched on every invalidation, whatever the week
+        deliver(immediate, { week }, true);
+        outbox.invalidateWeek(week);
+        await sleep(BURST_STEP_MS);
+      }
+      await sleep(100 + random() * 400);
+    }
+  };
+
+  await Promise.all(Array.from({ length: EDITORS }, (_, i) => editor(i)));
+  outbox.flush();
+
+  const seconds = DURATION_MS / 1000;
+  const row = (c: typeof immediate) => ({
+    'msgs/client/s': round2(c.messages / MEMBERS / seconds),
+    'KB/client/s': round2(c.bytes / MEMBERS / seconds / 1024),
+    'refetches/client/s': round2(c.refetches / MEMBERS / seconds),
+  });
+
+  console.log(
+    `Busy group — ${MEMBERS} members, ${EDITORS} editing, ${DURATION_MS / 1000}s, ` +
+      `bursts of ${BURST_SIZE} changes`,
+  );
+  console.table({ immediate: row(immediate), outbox: row(outboxed) });
+}
+
+main().catch((err) => {
+  console.error('Error:', err);
+  process.exit(1);
+});
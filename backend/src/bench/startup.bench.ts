@@ -0,0 +1,95 @@
+/**
+ * Database startup benchmark.
+ *
+ * Measures how long opening the database and preparing the schema takes:
+ *   - legacy boot:   the old unconditional CREATE TABLE IF NOT EXISTS script
+ *                    followed by try/catch ALTER TABLE statements
+ *   - fresh migrate: `migrate()` on an empty file (all steps pending)
+ *   - warm migrate:  `migrate()` on an up-to-date file (fast path, no DDL)
+ *
+ * Usage:
+ *   npm run bench:startup
+ */
+
+import fs from 'fs';
+import os from 'os';
+import path from 'path';
+import sqlite3 from 'sqlite3';
+import { open, Database } from 'sqlite';
+import { migrate, MIGRATIONS } from '../migrations';
+import { elapsedMs, percentile, round2 } from './bench-utils';
+
+const ITERATIONS = Number(process.env.BENCH_ITERATIONS || 50);
+
+/** Column additions the old getDB() attempted on every boot. */
+const LEGACY_ALTERS = [
+  ...['kcal', 'protein', 'fat', 'carbs', 'fiber', 'portion_value'].map(
+    (c) => `ALTER TABLE foods ADD COLUMN ${c} REAL`,
+  ),
+  'ALTER TABLE foods ADD COLUMN name_it TEXT',
+  'ALTER TABLE recipes ADD COLUMN min_servings INTEGER DEFAULT 1',
+  'ALTER TABLE recipes ADD COLUMN split_servings INTEGER DEFAULT 1',
+  'ALTER TABLE planning ADD COLUMN servings INTEGER DEFAULT 1',
+  'ALTER TABLE planning ADD COLUMN assigned_to TEXT REFERENCES users(id) ON DELETE SET NULL',
+  "ALTER TABLE recipe_ingredients ADD COLUMN brand TEXT DEFAULT ''",
+  'ALTER TABLE recipes ADD COLUMN wip INTEGER DEFAULT 0',
+  "ALTER TABLE recipes ADD COLUMN notes TEXT DEFAULT ''",
+];
+
+async function openFile(filename: string): Promise<Database> {
+  const db = await open({ filename, driver: sqlite3.Database });
+  await db.exec('PRAGMA journal_mode = WAL');
+  await db.exec('PRAGMA foreign_keys = ON');
+  return db;
+}
+
+async function legacyBoot(db: Database) {
+  // The baseline migration is the old CREATE TABLE IF NOT EXISTS script
+  await MIGRATIONS[0].up(db);
+  for (const sql of LEGACY_ALTERS) {
+    try {
+      await db.exec(sql);
+    } catch {
+      // column already exists – ignore
+    }
+  }
+}
+
+async function measure(setup: () => string, boot: (db: Database) => Promise<unknown>) {
+  const samples: number[] = [];
+  for (let i = 0; i < ITERATIONS; i++) {
+    const filename = setup();
+    const start = process.hrtime.bigint();
+    const db = await openFile(filename);
+    await boot(db);
+    samples.push(elapsedMs(start));
+    await db.close();
+  }
+  return { p50: round2(percentile(samples, 50)), p95: round2(percentile(samples, 95)) };
+}
+
+async function main() {
+  const dir = fs.mkdtempSync(path.join(os.tmpdir(), 'food-recipes-startup-'));
+  const current = path.join(dir, 'current.sqlite');
+  const warm = await openFile(current);
+  await migrate(warm);
+  await warm.close();
+
+  let fresh = 0;
+  const freshFile = () => path.join(dir, `fresh-${fresh++}.sqlite`);
+
+  const results = {
+    'legacy boot (current schema)': await measure(() => current, legacyBoot),
+    'migrate (empty database)': await measure(freshFile, migrate),
+    'migrate (current schema)': await measure(() => current, migrate),
+  };
+
+  console.log(`Database startup — ${ITERATIONS} iterations, open + schema in ms`);
+  console.table(results);
+  fs.rmSync(dir, { recursive: true, force: true });
+}
+
+main().catch((err) => {
+  console.error('Error:', err);
+  process.exit(1);
+});
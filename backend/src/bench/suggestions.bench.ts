@@ -0,0 +1,167 @@
+/**
+ * Planning suggestions benchmark.
+ *
+ * Seeds one user per history length with years of synthetic planning (two
+ * meals a day, recipes drawn with a skewed popularity) and times a
+ * suggestions request three ways:
+ *   - legacy:  the old GROUP BY / GROUP_CONCAT aggregation over the history
+ *   - cold:    `getPlanningSuggestions` with the user's counters not loaded
+ *   - warm:    counters loaded, after one recorded planning change
+ *
+ * Legacy and cold grow with the history; warm should stay flat. Cold is what
+ * the first request after an LRU miss or TTL expiry costs, so it is reported
+ * next to the cache settings it depends on.
+ *
+ * Usage:
+ *   npm run bench:suggestions
+ */
+
+import crypto from 'crypto';
+import { getDB } from '../db';
+import { getPlanningSuggestions, recordPlanningInsert, usageCache } from '../suggestions';
+import { createRandom, elapsedMs, percentile, round2 } from './bench-utils';
+
+const HISTORY_YEARS = [1, 2, 5, 10];
+const RECIPES = 150;
+const MEALS_PER_WEEK = 14;
+const ITERATIONS = Number(process.env.BENCH_ITERATIONS || 50);
+const SLOTS = ['BREAKFAST', 'LUNCH', 'DINNER'];
+const WEEK_MS = 7 * 24 * 60 * 60 * 1000;
+/** Histories end the week before the one suggestions are asked for. */
+const CURRENT_WEEK = Date.UTC(2026, 0, 5);
+
+const uuid = () => crypto.randomUUID();
+const isoWeek = (time: number) => new Date(time).toISOString().slice(0, 10);
+
+/** The pre-engine implementation, kept here as the baseline. */
+async function legacySuggestions(userId: string, week: string) {
+  const db = await getDB();
+  const current = await db.all<{ recipe_id: string }[]>(
+    'SELECT DISTINCT recipe_id FROM planning WHERE week = ? AND user_id IN (?)',
+    week,
+    userId,
+  );
+  const currentIds = new Set(current.map((r) => r.recipe_id));
+  const rows = await db.all<{ recipe_id: string }[]>(
+    `SELECT p.recipe_id, p.recipe_name, r.name as recipe_name_lookup, r.type as recipe_type,
+       COUNT(*) as frequency, MAX(p.week) as last_used_week, GROUP_CONCAT(DISTINCT p.meal) as meals_used
+     FROM planning p
+     LEFT JOIN recipes r ON r.id = p.recipe_id
+     WHERE p.week != ? AND p.user_id IN (?)
+     GROUP BY p.recipe_id
+     ORDER BY frequency DESC
+     LIMIT 30`,
+    week,
+    userId,
+  );
+  return rows.filter((r) => !currentIds.has(r.recipe_id)).slice(0, 15);
+}
+
+async function seed(recipeIds: string[], years: number): Promise<string> {
+  const db = await getDB();
+  const random = createRandom(years);
+  const userId = uuid();
+  await db.run(
+    'INSERT INTO users (id, name, email) VALUES (?, ?, ?)',
+    userId,
+    `User ${years}y`,
+    `${userId}@bench`,
+  );
+  await db.exec('BEGIN');
+  const weeks = years * 52;
+  for (let w = weeks; w > 0; w--) {
+    const week = isoWeek(CURRENT_WEEK - w * WEEK_MS);
+    for (let m = 0; m < MEALS_PER_WEEK; m++) {
+      // Squaring skews picks towards the first recipes, like real favourites
+      const recipeId = recipeIds[Math.floor(random() ** 2 * recipeIds.length)];
+      await db.run(
+        'INSERT INTO planning (id, recipe_id, week, meal, user_id) VALUES (?, ?, ?, ?, ?)',
+        uuid(),
+        recipeId,
+        week,
+        SLOTS[m % SLOTS.length],
+        userId,
+      );
+    }
+  }
+  await db.exec('COMMIT');
+  return userId;
+}
+
+async function time(fn: () => Promise<unknown>) {
+  const start = process.hrtime.bigint();
+  await fn();
+  return elapsedMs(start);
+}
+
+async function main() {
+  process.env.DB_PATH = process.env.DB_PATH || ':memory:';
+  const db = await getDB();
+
+  const ownerId = uuid();
+  await db.run("INSERT INTO users (id, name, email) VALUES (?, 'Owner', 'owner@bench')", ownerId);
+  const recipeIds: string[] = [];
+  for (let r = 0; r < RECIPES; r++) {
+    const id = uuid();
+    recipeIds.push(id);
+    await db.run(
+      'INSERT INTO recipes (id, user_id, name) VALUES (?, ?, ?)',
+      id,
+      ownerId,
+      `Recipe ${r}`,
+    );
+  }
+
+  const week = isoWeek(CURRENT_WEEK);
+  const results = [];
+  for (const years of HISTORY_YEARS) {
+    const userId = await seed(recipeIds, years);
+    const legacy: number[] = [];
+    const cold: number[] = [];
+    const warm: number[] = [];
+    for (let i = 0; i < ITERATIONS; i++) {
+      legacy.push(await time(() => legacySuggestions(userId, week)));
+
+      usageCache.delete(userId);
+      cold.push(await time(() => getPlanningSuggestions([userId], week)));
+
+      // A change since the last request forces a re-rank, the worst warm case
+      recordPlanningInsert(userId, {
+        id: uuid(),
+        recipe_id: recipeIds[i % RECIPES],
+        week: isoWeek(CURRENT_WEEK - WEEK_MS),
+        meal: 'DINNER',
+      });
+      warm.push(await time(() => getPlanningSuggestions([userId], week)));
+    }
+
+    results.push({
+      years,
+      rows: years * 52 * MEALS_PER_WEEK,
+      legacyP50: round2(percentile(legacy, 50)),
+      legacyP95: round2(percentile(legacy, 95)),
+      coldP50: round2(percentile(cold, 50)),
+      coldP95: round2(percentile(cold, 95)),
+      warmP50: round2(percentile(warm, 50)),
+      warmP95: round2(percentile(warm, 95)),
+    });
+  }
+
+  console.log(
+    `Planning suggestions — ${RECIPES} recipes, ${MEALS_PER_WEEK} meals/week, ` +
+      `${ITERATIONS} iterations per history, latency in ms`,
+  );
+  console.table(results);
+  console.log(
+    `cold = first request after a miss: the counters are rebuilt from the whole history, ` +
+      `at most once per user per ${usageCache.ttlMs / 60000} min ` +
+      `(SUGGESTIONS_CACHE_TTL_MS) while ${usageCache.maxEntries} users fit ` +
+      `(SUGGESTIONS_CACHE_USERS).`,
+  );
+  await db.close();
+}
+
+main().catch((err) => {
+  console.error('Error:', err);
+  process.exit(1);
+});
@@ -0,0 +1,72 @@
+/**
+ * Message bus between the processes of cluster mode (see cluster.ts).
+ *
+ * In-memory state (cached recipes, group membership, planning counters,
+ * Socket.IO rooms) is per process. When one worker changes something, it
+ * applies the change locally and publishes it here. The message travels to the
+ * primary over the cluster IPC channel and is relayed to every other worker,
+ * where the channel's handlers apply it. A process never receives its own
+ * messages.
+ *
+ * Outside cluster mode there is nobody to tell and `publishToCluster` does
+ * nothing, so modules can publish unconditionally.
+ */
+
+import cluster from 'cluster';
+
+interface BusMessage {
+  bus: 'food-recipes';
+  channel: string;
+  payload: unknown;
+}
+
+type Handler = (payload: any) => void;
+
+const handlers = new Map<string, Handler[]>();
+
+const isBusMessage = (msg: unknown): msg is BusMessage =>
+  typeof msg === 'object' && msg !== null && (msg as BusMessage).bus === 'food-recipes';
+
+function dispatch(msg: BusMessage) {
+  for (const handler of handlers.get(msg.channel) ?? []) {
+    try {
+      handler(msg.payload);
+    } catch (err) {
+      console.error(`[cluster] Handler for ${msg.channel} failed:`, err);
+    }
+  }
+}
+
+/** Run `handler` for messages other processes publish on `channel`. */
+export function onClusterMessage(channel: string, handler: Handler) {
+  const list = handlers.get(channel);
+  if (list) list.push(handler);
+  else handlers.set(channel, [handler]);
+}
+
+/** Send `payload` to every other process; a no-op outside cluster mode. */
+export function publishToCluster(channel: string, payload: unknown) {
+  const msg: BusMessage = { bus: 'food-recipes', channel, payload };
+  if (cluster.isWorker) {
+    process.send?.(msg);
+    return;
+  }
+  for (const worker of Object.values(cluster.workers ?? {})) {
+    if (worker?.isConnected()) worker.send(msg);
+  }
+}
+
+if (cluster.isWorker) {
+  process.on('message', (msg: unknown) => {
+    if (isBusMessage(msg)) dispatch(msg);
+  });
+} else {
+  // Relay workers' messages to the others, and to the primary's own handlers
+  cluster.on('message', (from, msg: unknown) => {
+    if (!isBusMessage(msg)) return;
+    dispatch(msg);
+    for (const worker of Object.values(cluster.workers ?? {})) {
+      if (worker && worker !== from && worker.isConnected()) worker.send(msg);
+    }
+  });
+}
@@ -0,0 +1,76 @@
+/**
+ * Opt-in multi-process mode.
+ *
+ * With CLUSTER_WORKERS=N (or `auto`, one per CPU core) the process started
+ * by app.ts becomes a primary that prepares the database and forks N workers
+ * running the whole app. Workers listen on the shared port through Node's
+ * cluster module, whose primary accepts each connection and hands it to the
+ * next worker round-robin without reading from it, so no bytes can be lost in
+ * the hand-off.
+ *
+ * Sticky sessions: in cluster mode Socket.IO accepts only the WebSocket
+ * transport, which is what the frontend uses. The handshake and the whole
+ * session then travel over one connection, which stays on the worker that
+ * accepted it. Long-polling would spread a session's requests over workers,
+ * and routing them by client address does not work behind the reverse proxy,
+ * where every connection comes from the proxy.
+ *
+ * SQLite is shared through its file. Every connection uses WAL and a busy
+ * timeout (db.ts) and writes start with BEGIN IMMEDIATE, so writers in
+ * different workers queue on the lock rather than fail. Migrations, seeding
+ * and key rotation run in the primary only, before the workers start. Cache
+ * invalidations and socket broadcasts reach the other workers through
+ * cluster-bus.ts.
+ */
+
+import cluster from 'cluster';
+import os from 'os';
+
+/** Worker processes to fork; 0 (the default) runs everything in one process. */
+export const CLUSTER_WORKERS = parseWorkerCount(process.env.CLUSTER_WORKERS);
+
+/** Delay before replacing a worker that died, so a crash loop does not spin. */
+const RESPAWN_DELAY_MS = 1000;
+
+function parseWorkerCount(raw: string | undefined): number {
+  if (!raw) return 0;
+  if (raw === 'auto') return os.cpus().length;
+  const count = Number(raw);
+  return Number.isInteger(count) && count > 0 ? count : 0;
+}
+
+/** Socket.IO transports a cluster worker accepts (see above). */
+export const CLUSTER_SOCKET_TRANSPORTS = ['websocket' as const];
+
+/**
+ * Run `prepare` (migrations, seeding, key rotation), then fork `workers`
+ * workers; resolves once all of them are listening.
+ */
+export async function startPrimary(workers: number, prepare: () => Promise<void>): Promise<void> {
+  await prepare();
+
+  // Round-robin in the primary is Node's default except on Windows; ask for it everywhere
+  cluster.schedulingPolicy = cluster.SCHED_RR;
+  // Workers re-run the entry script; under ts-node (npm run dev) they need its loader too
+  if (process.argv[1]?.endsWith('.ts')) {
+    cluster.setupPrimary({ execArgv: [...process.execArgv, '-r', 'ts-node/register'] });
+  }
+
+  let stopping = false;
+  const fork = () =>
+    new Promise<void>((resolve) => cluster.fork().once('listening', () => resolve()));
+
+  cluster.on('exit', (worker, code, signal) => {
+    if (stopping) return;
+    console.warn(`[cluster] Worker ${worker.id} exited (${signal ?? code}); replacing it`);
+    setTimeout(() => fork(), RESPAWN_DELAY_MS);
+  });
+
+  process.once('SIGTERM', () => {
+    stopping = true;
+    for (const worker of Object.values(cluster.workers ?? {})) worker?.kill('SIGTERM');
+  });
+
+  await Promise.all(Array.from({ length: workers }, fork));
+  console.log(`[cluster] ${workers} workers ready`);
+}
@@ -0,0 +1,139 @@
+/**
+ * Response compression negotiated from `Accept-Encoding`.
+ *
+ * Brotli is preferred over gzip when the client accepts both. Only textual
+ * bodies (JSON, NDJSON, text) of at least COMPRESSION_THRESHOLD bytes are
+ * compressed; below that the headers cost more than they save. Bodies sent
+ * with `res.send`/`res.json` carry a Content-Length, which decides up front.
+ * Streamed bodies (NDJSON recipe lists) have none and are always compressed,
+ * with a flush after every write so clients still see each line as it is
+ * produced.
+ *
+ * Brotli runs at COMPRESSION_BROTLI_QUALITY (default 4): the default of 11 is
+ * meant for static assets and costs far too much CPU per response.
+ * Responses that already set Content-Encoding (e.g. the precompressed foods
+ * catalogue) pass through untouched.
+ */
+
+import zlib from 'zlib';
+import type { NextFunction, Request, Response } from 'express';
+
+export const COMPRESSION_THRESHOLD = Number(process.env.COMPRESSION_THRESHOLD ?? 1024);
+
+const BROTLI_QUALITY = Number(process.env.COMPRESSION_BROTLI_QUALITY ?? 4);
+
+const GZIP_LEVEL = Number(process.env.COMPRESSION_GZIP_LEVEL ?? 6);
+
+const COMPRESSIBLE = /^(?:text\/|application\/(?:json|x-ndjson|javascript|xml)|image\/svg)/i;
+
+export type Encoding = 'br' | 'gzip';
+
+/** The best encoding the client accepts, or null for identity. */
+export function negotiateEncoding(acceptEncoding: string | undefined): Encoding | null {
+  if (!acceptEncoding) return null;
+  const accepted = new Map<string, number>();
+  for (const part of acceptEncoding.split(',')) {
+    const [name, ...params] = part.trim().toLowerCase().split(';');
+    const q = params.map((p) => p.trim()).find((p) => p.startsWith('q='));
+    accepted.set(name, q ? Number(q.slice(2)) || 0 : 1);
+  }
+  const quality = (name: Encoding) => accepted.get(name) ?? accepted.get('*') ?? 0;
+  if (quality('br') > 0 && quality('br') >= quality('gzip')) return 'br';
+  if (quality('gzip') > 0) return 'gzip';
+  return null;
+}
+
+function brotliOptions(sizeHint = 0): zlib.BrotliOptions {
+  return {
+    params: {
+      [zlib.constants.BROTLI_PARAM_MODE]: zlib.constants.BROTLI_MODE_TEXT,
+      [zlib.constants.BROTLI_PARAM_QUALITY]: BROTLI_QUALITY,
+      [zlib.constants.BROTLI_PARAM_SIZE_HINT]: sizeHint,
+    },
+  };
+}
+
+/** Compress a whole body at once, e.g. to cache the result. */
+export function compressBody(body: string | Buffer, encoding: Encoding): Buffer {
+  return encoding === 'br'
+    ? zlib.brotliCompressSync(body, brotliOptions(Buffer.byteLength(body)))
+    : zlib.gzipSync(body, { level: GZIP_LEVEL });
+}
+
+function createStream(encoding: Encoding, sizeHint?: number): zlib.BrotliCompress | zlib.Gzip {
+  return encoding === 'br'
+    ? zlib.createBrotliCompress(brotliOptions(sizeHint))
+    : zlib.createGzip({ level: GZIP_LEVEL });
+}
+
+function shouldCompress(res: Response, knownLength: number | null): boolean {
+  if (res.statusCode < 200 || res.statusCode === 204 || res.statusCode === 304) return false;
+  if (res.getHeader('Content-Encoding')) return false;
+  if (/\bno-transform\b/.test(String(res.getHeader('Cache-Control') ?? ''))) return false;
+  if (!COMPRESSIBLE.test(String(res.getHeader('Content-Type') ?? ''))) return false;
+  const length = res.getHeader('Content-Length') ?? knownLength;
+  return length === null || Number(length) >= COMPRESSION_THRESHOLD;
+}
+
+const toBuffer = (chunk: any, encoding: BufferEncoding) =>
+  Buffer.isBuffer(chunk) ? chunk : Buffer.from(chunk, encoding);
+
+export function compressionMiddleware(req: Request, res: Response, next: NextFunction) {
+  res.vary('Accept-Encoding');
+  const encoding = negotiateEncoding(req.headers['accept-encoding']);
+  if (!encoding || req.method === 'HEAD') return next();
+
+  const write = res.write.bind(res) as (...args: any[]) => boolean;
+  const end = res.end.bind(res) as (...args: any[]) => Response;
+  let stream: zlib.BrotliCompress | zlib.Gzip | null = null;
+  let decided = false;
+
+  const start = (knownLength: number | null) => {
+    decided = true;
+    if (!shouldCompress(res, knownLength)) return;
+    const length = Number(res.getHeader('Content-Length') ?? knownLength ?? 0);
+    const compressor = createStream(encoding, length);
+    stream = compressor;
+    res.setHeader('Content-Encoding', encoding);
+    res.removeHeader('Content-Length');
+
+    // Respect the socket's backpressure, and let writers waiting on 'drain' go on
+    compressor.on('data', (data: Buffer) => {
+      if (!write(data)) compressor.pause();
+    });
+    compressor.on('drain', () => res.emit('drain'));
+    res.on('drain', () => compressor.resume());
+    compressor.on('end', () => end());
+  };
+
+  (res as any).write = (chunk: any, encodingOrCb?: any, cb?: any): boolean => {
+    if (!decided) start(null);
+    if (!stream) return write(chunk, encodingOrCb, cb);
+    const charset: BufferEncoding = typeof encodingOrCb === 'string' ? encodingOrCb : 'utf8';
+    const ok = stream.write(toBuffer(chunk, charset));
+    // Only streamed responses get here: push what we have so the client can use it now
+    stream.flush();
+    const callback = typeof encodingOrCb === 'function' ? encodingOrCb : cb;
+    if (callback) process.nextTick(callback);
+    return ok;
+  };
+
+  (res as any).end = (chunk?: any, encodingOrCb?: any, cb?: any): Response => {
+    if (typeof chunk === 'function') {
+      cb = chunk;
+      chunk = undefined;
+    } else if (typeof encodingOrCb === 'function') {
+      cb = encodingOrCb;
+      encodingOrCb = undefined;
+    }
+    const charset: BufferEncoding = encodingOrCb || 'utf8';
+    if (!decided) start(chunk ? Buffer.byteLength(chunk, charset) : 0);
+    if (!stream) return end(chunk, encodingOrCb, cb);
+    if (cb) res.once('finish', cb);
+    if (chunk) stream.end(toBuffer(chunk, charset));
+    else stream.end();
+    return res;
+  };
+
+  next();
+}
@@ -1,215 +1,329 @@
+import { AsyncLocalStorage } from 'async_hooks';
 import sqlite3 from 'sqlite3';
-import { open, Database } from 'sqlite';
+import { Database, ISqlite, Statement } from 'sqlite';
 import path from 'path';
 import fs from 'fs';
+import { migrate } from './migrations';
+import { deferRecipeRefresh, refreshDirtyRecipes } from './recipe-refresh';
+import { timeQuery } from './metrics';
 
 sqlite3.verbose();
 
-let dbInstance: Database | null = null;
+/*
+ * Connections
+ *
+ * All writes go through one writer connection (`getDB()`); read-only routes use
+ * a small pool of read-only connections (`getReadDB()`). In WAL mode readers
+ * see every committed write and never block, or are blocked by, the writer, so
+ * a slow report query no longer holds up recipe saves. An in-memory database
+ * cannot be shared between connections, so there `getReadDB()` returns the
+ * writer.
+ *
+ * The writer runs one statement at a time through a queue, and a transaction
+ * (`withTransaction`) holds the queue from BEGIN to COMMIT. A statement from
+ * another request therefore waits for the commit instead of landing inside
+ * the transaction, where a rollback would silently take it along.
+ */
 
-export async function getDB(): Promise<Database> {
-  if (dbInstance) return dbInstance;
+/** Read-only connections opened next to the writer (0 disables the pool). */
+const READ_CONNECTIONS = Number(process.env.DB_READ_CONNECTIONS ?? 4);
 
-  const dataDir = path.resolve(__dirname, '..', 'data');
-  if (!fs.existsSync(dataDir)) fs.mkdirSync(dataDir, { recursive: true });
+/** How long a statement waits on a locked database before failing. */
+const BUSY_TIMEOUT_MS = 5000;
 
-  const db = await open({
-    filename: path.join(dataDir, 'database.sqlite'),
-    driver: sqlite3.Database,
-  });
+/** Page cache per connection, in KiB. */
+const CACHE_SIZE_KIB = 16 * 1024;
 
-  await db.exec('PRAGMA journal_mode = WAL');
-  await db.exec('PRAGMA foreign_keys = ON');
+/** Bytes of the database file read through mmap instead of read(). */
+const MMAP_SIZE_BYTES = 256 * 1024 * 1024;
+
+/** Prepared statements kept per connection. */
+const STATEMENT_CACHE_SIZE = 200;
+
+/**
+ * Statements with more placeholders than this (chunked `IN (...)` lists) vary
+ * in length from call to call; they are run uncached instead of churning the
+ * statement cache.
+ */
+const MAX_CACHED_PARAMS = 32;
+
+interface CachedStatement {
+  stmt: Promise<Statement>;
+  users: number;
+  evicted: boolean;
+}
+
+/**
+ * A sqlite `Database` whose `get`, `all` and `run` reuse a prepared statement
+ * per SQL text (LRU, STATEMENT_CACHE_SIZE per connection) instead of
+ * preparing and finalizing one on every call. `exec` is not cached. Each
+ * call is timed for the metrics endpoint (see metrics.ts).
+ */
+export class CachedDatabase extends Database {
+  private readonly statements = new Map<string, CachedStatement>();
+
+  override get<T = any>(sql: ISqlite.SqlType, ...params: any[]): Promise<T | undefined> {
+    return timeQuery(sql, () => {
+      if (!isCacheable(sql)) return super.get<T>(sql, ...params);
+      return this.withStatement(sql, async (stmt) => {
+        try {
+          return await stmt.get<T>(...params);
+        } finally {
+          // get() stops after the first row; reset so no read stays open
+          await stmt.reset();
+        }
+      });
+    });
+  }
+
+  override all<T = any[]>(sql: ISqlite.SqlType, ...params: any[]): Promise<T> {
+    return timeQuery(sql, () => {
+      if (!isCacheable(sql)) return super.all<T>(sql, ...params);
+      return this.withStatement(sql, (stmt) => stmt.all<T>(...params));
+    });
+  }
+
+  override run(sql: ISqlite.SqlType, ...params: any[]): Promise<ISqlite.RunResult> {
+    return timeQuery(sql, () => {
+      if (!isCacheable(sql)) return super.run(sql, ...params);
+      return this.withStatement(sql, (stmt) => stmt.run(...params));
+    });
+  }
+
+  override async close(): Promise<void> {
+    const statements = [...this.statements.values()];
+    this.statements.clear();
+    for (const entry of statements) {
+      await entry.stmt.then((stmt) => stmt.finalize()).catch(() => undefined);
+    }
+    await super.close();
+  }
 
-  await db.exec(`
-    -- ── Users ───────────────────────────────────────────
-    CREATE TABLE IF NOT EXISTS users (
-      id            TEXT PRIMARY KEY,
-      name          TEXT NOT NULL,
-      email         TEXT UNIQUE NOT NULL,
-      password      TEXT,               -- NULL for OAuth-only users
-      avatar_url    TEXT DEFAULT '',
-      google_id     TEXT UNIQUE,
-      created_at    TEXT DEFAULT (datetime('now'))
-    );
-
-    -- ── Recipes ─────────────────────────────────────────
-    CREATE TABLE IF NOT EXISTS recipes (
-      id            TEXT PRIMARY KEY,
-      user_id       TEXT NOT NULL,
-      name          TEXT NOT NULL,
-      description   TEXT DEFAULT '',
-      cuisine       TEXT DEFAULT '',
-      type          TEXT DEFAULT 'OTHER',
-      difficulty    TEXT DEFAULT 'EASY',
-      time_value    REAL,
-      time_unit     TEXT DEFAULT 'MINUTE',
-      servings      INTEGER DEFAULT 4,
-      created_at    TEXT DEFAULT (datetime('now')),
-      FOREIGN KEY(user_id) REFERENCES users(id) ON DELETE CASCADE
-    );
-
-    -- ── Recipe ingredients ──────────────────────────────
-    CREATE TABLE IF NOT EXISTS recipe_ingredients (
-      id            TEXT PRIMARY KEY,
-      recipe_id     TEXT NOT NULL,
-      food_id       TEXT,
-      name          TEXT NOT NULL,
-      quantity_value REAL,
-      quantity_unit  TEXT,
-      sort_order    INTEGER DEFAULT 0,
-      FOREIGN KEY(recipe_id) REFERENCES recipes(id) ON DELETE CASCADE
-    );
-
-    -- ── Recipe steps ────────────────────────────────────
-    CREATE TABLE IF NOT EXISTS recipe_steps (
-      id            TEXT PRIMARY KEY,
-      recipe_id     TEXT NOT NULL,
-      text          TEXT NOT NULL,
-      image_url     TEXT DEFAULT '',
-      sort_order    INTEGER DEFAULT 0,
-      FOREIGN KEY(recipe_id) REFERENCES recipes(id) ON DELETE CASCADE
-    );
-
-    -- ── Recipe tags ─────────────────────────────────────
-    CREATE TABLE IF NOT EXISTS recipe_tags (
-      recipe_id     TEXT NOT NULL,
-      tag           TEXT NOT NULL,
-      PRIMARY KEY(recipe_id, tag),
-      FOREIGN KEY(recipe_id) REFERENCES recipes(id) ON DELETE CASCADE
-    );
-
-    -- ── Saved recipes (bookmarks) ──────────────────────
-    CREATE TABLE IF NOT EXISTS saved_recipes (
-      user_id       TEXT NOT NULL,
-      recipe_id     TEXT NOT NULL,
-      created_at    TEXT DEFAULT (datetime('now')),
-      PRIMARY KEY(user_id, recipe_id),
-      FOREIGN KEY(user_id)   REFERENCES users(id)   ON DELETE CASCADE,
-      FOREIGN KEY(recipe_id) REFERENCES recipes(id)  ON DELETE CASCADE
-    );
-
-    -- ── Foods (master ingredient list) ──────────────────
-    CREATE TABLE IF NOT EXISTS foods (
-      id            TEXT PRIMARY KEY,
-      name          TEXT NOT NULL,
-      name_it       TEXT,
-      default_unit  TEXT DEFAULT 'GRAM',
-      created_by    TEXT,
-      kcal          REAL,
-      protein       REAL,
-      fat           REAL,
-      carbs         REAL,
-      fiber         REAL,
-      portion_value REAL,
-      FOREIGN KEY(created_by) REFERENCES users(id) ON DELETE SET NULL
-    );
-
-    -- ── Planning ────────────────────────────────────────
-    CREATE TABLE IF NOT EXISTS planning (
-      id            TEXT PRIMARY KEY,
-      recipe_id     TEXT NOT NULL,
-      recipe_name   TEXT NOT NULL DEFAULT '',
-      week          TEXT NOT NULL,
-      day           TEXT,
-      meal          TEXT,
-      user_id       TEXT NOT NULL,
-      FOREIGN KEY(recipe_id) REFERENCES recipes(id)  ON DELETE CASCADE,
-      FOREIGN KEY(user_id)   REFERENCES users(id)    ON DELETE CASCADE
-    );
-
-    -- ── Followers ───────────────────────────────────────
-    CREATE TABLE IF NOT EXISTS followers (
-      follower_id   TEXT NOT NULL,
-      followed_id   TEXT NOT NULL,
-      created_at    TEXT DEFAULT (datetime('now')),
-      PRIMARY KEY(follower_id, followed_id),
-      FOREIGN KEY(follower_id) REFERENCES users(id) ON DELETE CASCADE,
-      FOREIGN KEY(followed_id) REFERENCES users(id) ON DELETE CASCADE
-    );
-
-    -- ── Groups ──────────────────────────────────────────
-    CREATE TABLE IF NOT EXISTS groups_table (
-      id            TEXT PRIMARY KEY,
-      created_at    TEXT DEFAULT (datetime('now'))
-    );
-
-    CREATE TABLE IF NOT EXISTS group_members (
-      group_id      TEXT NOT NULL,
-      user_id       TEXT NOT NULL,
-      PRIMARY KEY(group_id, user_id),
-      FOREIGN KEY(group_id) REFERENCES groups_table(id) ON DELETE CASCADE,
-      FOREIGN KEY(user_id)  REFERENCES users(id)        ON DELETE CASCADE
-    );
-  `);
-
-  // ── Migrations: add nutritional columns if they don't exist yet ──
-  for (const col of ['kcal', 'protein', 'fat', 'carbs', 'fiber', 'portion_value']) {
+  private async withStatement<T>(sql: string, fn: (stmt: Statement) => Promise<T>): Promise<T> {
+    const entry = this.acquire(sql);
     try {
-      await db.exec(`ALTER TABLE foods ADD COLUMN ${col} REAL`);
-    } catch {
-      // column already exists – ignore
+      return await fn(await entry.stmt);
+    } finally {
+      entry.users--;
+      if (entry.evicted && entry.users === 0) this.finalize(entry);
+    }
+  }
+
+  private acquire(sql: string): CachedStatement {
+    let entry = this.statements.get(sql);
+    if (entry) {
+      // Re-insert to mark as most recently used
+      this.statements.delete(sql);
+    } else {
+      entry = { stmt: this.prepare(sql), users: 0, evicted: false };
+      const created = entry;
+      // A statement that fails to prepare is not cached
+      created.stmt.catch(() => {
+        if (this.statements.get(sql) === created) this.statements.delete(sql);
+      });
+    }
+    this.statements.set(sql, entry);
+    entry.users++;
+
+    while (this.statements.size > STATEMENT_CACHE_SIZE) {
+      const [oldest, evicted] = this.statements.entries().next().value as [string, CachedStatement];
+      this.statements.delete(oldest);
+      evicted.evicted = true;
+      // Statements still in use are finalized by their last user
+      if (evicted.users === 0) this.finalize(evicted);
     }
+    return entry;
   }
 
-  // Migrations: add name_it column
-  try {
-    await db.run('ALTER TABLE foods ADD COLUMN name_it TEXT');
-  } catch (e) {
-    // Column might already exist
+  private finalize(entry: CachedStatement) {
+    entry.stmt.then((stmt) => stmt.finalize()).catch(() => undefined);
   }
-  // Migrations: add min_servings and split_servings to recipes
-  try {
-    await db.run('ALTER TABLE recipes ADD COLUMN min_servings INTEGER DEFAULT 1');
-  } catch (e) {
-    // Column might already exist
+}
+
+/** The transaction the current async context runs in — see `withTransaction`. */
+interface TransactionScope {
+  db: WriterDatabase;
+  /** Cleared at COMMIT/ROLLBACK, so callbacks that outlive the transaction queue again. */
+  open: boolean;
+}
+
+const transactionScope = new AsyncLocalStorage<TransactionScope>();
+
+/** The writer: a `CachedDatabase` whose statements go through one queue. */
+class WriterDatabase extends CachedDatabase {
+  private queue: Promise<unknown> = Promise.resolve();
+
+  /**
+   * Run `fn` once everything queued before it is done. Statements issued from
+   * inside an open transaction on this connection run at once; they are
+   * part of the queue entry the transaction holds.
+   */
+  exclusive<T>(fn: () => Promise<T>): Promise<T> {
+    const scope = transactionScope.getStore();
+    if (scope?.db === this && scope.open) return fn();
+    const run = this.queue.then(fn);
+    this.queue = run.catch(() => undefined);
+    return run;
   }
-  try {
-    await db.run('ALTER TABLE recipes ADD COLUMN split_servings INTEGER DEFAULT 1');
-  } catch (e) {
-    // Column might already exist
+
+  override get<T = any>(sql: ISqlite.SqlType, ...params: any[]): Promise<T | undefined> {
+    return this.exclusive(() => super.get<T>(sql, ...params));
   }
 
-  // Migrations: add servings and assigned_to to planning
-  try {
-    await db.run('ALTER TABLE planning ADD COLUMN servings INTEGER DEFAULT 1');
-  } catch (e) {
-    // Column might already exist
+  override all<T = any[]>(sql: ISqlite.SqlType, ...params: any[]): Promise<T> {
+    return this.exclusive(() => super.all<T>(sql, ...params));
   }
-  try {
-    await db.run(
-      'ALTER TABLE planning ADD COLUMN assigned_to TEXT REFERENCES users(id) ON DELETE SET NULL',
-    );
-  } catch (e) {
-    // Column might already exist
+
+  override run(sql: ISqlite.SqlType, ...params: any[]): Promise<ISqlite.RunResult> {
+    return this.exclusive(() => super.run(sql, ...params));
   }
 
-  // Migration: add brand column to recipe_ingredients
-  try {
-    await db.run("ALTER TABLE recipe_ingredients ADD COLUMN brand TEXT DEFAULT ''");
-  } catch (e) {
-    // Column might already exist
+  override exec(sql: ISqlite.SqlType): Promise<void> {
+    return this.exclusive(() => super.exec(sql));
   }
+}
 
-  // Migration: add wip flag to recipes
-  try {
-    await db.run('ALTER TABLE recipes ADD COLUMN wip INTEGER DEFAULT 0');
-  } catch (e) {
-    // Column might already exist
+function isCacheable(sql: ISqlite.SqlType): sql is string {
+  if (typeof sql !== 'string') return false;
+  let params = 0;
+  for (let i = 0; i < sql.length; i++) {
+    if (sql[i] === '?' && ++params > MAX_CACHED_PARAMS) return false;
   }
+  return true;
+}
+
+function databasePath(): string {
+  // DB_PATH lets scripts and benchmarks point at a scratch file or ':memory:'
+  if (process.env.DB_PATH) return process.env.DB_PATH;
+  const dataDir = path.resolve(__dirname, '..', 'data');
+  if (!fs.existsSync(dataDir)) fs.mkdirSync(dataDir, { recursive: true });
+  return path.join(dataDir, 'database.sqlite');
+}
+
+function isMemoryDatabase(filename: string): boolean {
+  return filename === '' || filename === ':memory:' || filename.startsWith('file::memory:');
+}
+
+async function openConnection(filename: string, readOnly: boolean): Promise<CachedDatabase> {
+  const config = {
+    filename,
+    driver: sqlite3.Database,
+    mode: readOnly ? sqlite3.OPEN_READONLY : sqlite3.OPEN_READWRITE | sqlite3.OPEN_CREATE,
+  };
+  const db = readOnly ? new CachedDatabase(config) : new WriterDatabase(config);
+  await db.open();
+  await db.exec(`PRAGMA busy_timeout = ${BUSY_TIMEOUT_MS}`);
+  await db.exec(`PRAGMA cache_size = -${CACHE_SIZE_KIB}`);
+  await db.exec(`PRAGMA mmap_size = ${MMAP_SIZE_BYTES}`);
+  await db.exec('PRAGMA temp_store = MEMORY');
+  return db;
+}
+
+let dbPromise: Promise<WriterDatabase> | null = null;
+let readersPromise: Promise<CachedDatabase[]> | null = null;
+let nextReader = 0;
 
-  // Migration: add notes column to recipes
-  try {
-    await db.run("ALTER TABLE recipes ADD COLUMN notes TEXT DEFAULT ''");
-  } catch (e) {
-    // Column might already exist
+/** The writer connection. Use it for anything that writes or must read its own writes. */
+export function getDB(): Promise<Database> {
+  // Memoise the promise so concurrent first callers share one connection
+  if (!dbPromise) {
+    dbPromise = openDB().catch((err) => {
+      dbPromise = null;
+      throw err;
+    });
   }
+  return dbPromise;
+}
+
+async function openDB(): Promise<WriterDatabase> {
+  const db = (await openConnection(databasePath(), false)) as WriterDatabase;
+
+  await db.exec('PRAGMA journal_mode = WAL');
+  // NORMAL is durable across application crashes in WAL mode and skips an fsync per commit
+  await db.exec('PRAGMA synchronous = NORMAL');
+  await db.exec('PRAGMA foreign_keys = ON');
+
+  // Applies only pending schema steps; a no-op when the schema is current
+  await migrate(db);
 
-  // NOTE: NULL quantity_unit is now allowed (e.g. for items like eggs counted as PIECE).
-  dbInstance = db;
   return db;
 }
 
+/** A read-only connection from the pool (round-robin), for routes that only read. */
+export async function getReadDB(): Promise<Database> {
+  if (!readersPromise) {
+    readersPromise = openReaders().catch((err) => {
+      readersPromise = null;
+      throw err;
+    });
+  }
+  const readers = await readersPromise;
+  if (readers.length === 0) return getDB();
+  return readers[nextReader++ % readers.length];
+}
+
+async function openReaders(): Promise<CachedDatabase[]> {
+  // The writer creates the file and runs migrations first
+  await getDB();
+  const filename = databasePath();
+  if (isMemoryDatabase(filename)) return [];
+  return Promise.all(
+    Array.from({ length: READ_CONNECTIONS }, () => openConnection(filename, true)),
+  );
+}
+
+/** Close the read pool and the writer; the next getDB() opens fresh connections. */
+export async function closeDB(): Promise<void> {
+  const readers = readersPromise;
+  const writer = dbPromise;
+  readersPromise = null;
+  dbPromise = null;
+  if (readers) await Promise.all((await readers).map((db) => db.close()));
+  if (writer) await (await writer).close();
+}
+
+/**
+ * Run `fn` inside a single `BEGIN IMMEDIATE … COMMIT` on the writer, rolling
+ * back if it throws.
+ *
+ * The transaction holds the writer's queue until it ends: other transactions
+ * and plain statements from other requests wait for it. Statements issued
+ * from within `fn` (through `db` or `getDB()`) run inside the transaction, and
+ * a nested call joins it. Keep `fn` short and free of unrelated awaits.
+ *
+ * Data derived from recipe child rows is refreshed once per recipe just
+ * before COMMIT (see recipe-refresh.ts), not after every row `fn` writes.
+ */
+export async function withTransaction<T>(fn: (db: Database) => Promise<T>): Promise<T> {
+  const db = (await getDB()) as WriterDatabase;
+  const current = transactionScope.getStore();
+  if (current?.db === db && current.open) return fn(db);
+
+  return db.exclusive(() => {
+    const scope: TransactionScope = { db, open: true };
+    return transactionScope.run(scope, async () => {
+      try {
+        await db.exec('BEGIN IMMEDIATE');
+        try {
+          await deferRecipeRefresh(db);
+          const result = await fn(db);
+          await refreshDirtyRecipes(db);
+          await db.exec('COMMIT');
+          return result;
+        } catch (err) {
+          // Report the error that caused the rollback, not a failure of the rollback itself
+          await db.exec('ROLLBACK').catch((rollbackErr) => {
+            console.error('[DB] ROLLBACK failed:', rollbackErr);
+          });
+          throw err;
+        }
+      } finally {
+        scope.open = false;
+      }
+    });
+  });
+}
+
 /** Seed some default foods if table is empty */
 export async function seedFoods() {
   const db = await getDB();
@@ -0,0 +1,148 @@
+/**
+ * Followed-chefs feed.
+ *
+ * The feed is materialized on write. When a recipe is created, one
+ * `feed_items` row is inserted per follower of its author, keyed by
+ * (reader, created_at, recipe). A feed page is then a single range scan of the
+ * reader's rows, walked with the usual `(created_at, recipe_id) < (?, ?)`
+ * cursor.
+ *
+ * Chefs with FEED_FANOUT_LIMIT followers or more are not fanned out, since one
+ * recipe would write that many rows. They are listed in `feed_pull_authors`,
+ * and each reader merges their recipes in at read time: one extra range scan
+ * per followed celebrity over `idx_recipes_user_created`. A chef is promoted
+ * when a follow takes them over the limit, and is never demoted. Rows pushed
+ * before the promotion stay and are de-duplicated by the UNION.
+ *
+ * Following someone copies their latest FEED_BACKFILL recipes into the feed;
+ * unfollowing removes their rows. Deleting a recipe or a user cascades.
+ */
+
+import { Database } from 'sqlite';
+import { CursorKey } from './pagination';
+import type { RecipeRow } from './recipe-hydration';
+
+export const FEED_FANOUT_LIMIT = Number(process.env.FEED_FANOUT_LIMIT ?? 10_000);
+
+/** Recipes of a newly followed chef copied into the follower's feed. */
+export const FEED_BACKFILL = 50;
+
+/**
+ * Followed celebrities merged with a range scan each; beyond this they share
+ * one sorted arm, which also keeps the compound SELECT under SQLite's limit.
+ */
+const MAX_PULL_ARMS = 100;
+
+export type FeedRow = RecipeRow & { cursor_key: string };
+
+/** Push a just-created recipe into its author's followers' feeds, unless the author is pulled. */
+export async function fanOutRecipe(db: Database, recipeId: string): Promise<number> {
+  const result = await db.run(
+    `INSERT OR IGNORE INTO feed_items (user_id, created_at, recipe_id, author_id)
+     SELECT f.follower_id, r.created_at, r.id, r.user_id
+     FROM recipes r JOIN followers f ON f.followed_id = r.user_id
+     WHERE r.id = ? AND NOT EXISTS (SELECT 1 FROM feed_pull_authors p WHERE p.user_id = r.user_id)`,
+    recipeId,
+  );
+  return result.changes ?? 0;
+}
+
+/**
+ * Call after `followerId` starts following `authorId`: backfill the feed and
+ * switch the author to read-time merging once they reach FEED_FANOUT_LIMIT.
+ */
+export async function followAuthor(
+  db: Database,
+  followerId: string,
+  authorId: string,
+  fanoutLimit = FEED_FANOUT_LIMIT,
+) {
+  const pulled = await db.get('SELECT 1 FROM feed_pull_authors WHERE user_id = ?', authorId);
+  if (pulled) return;
+
+  const author = await db.get<{ followers_count: number }>(
+    'SELECT followers_count FROM users WHERE id = ?',
+    authorId,
+  );
+  if (author && author.followers_count >= fanoutLimit) {
+    await db.run('INSERT OR IGNORE INTO feed_pull_authors (user_id) VALUES (?)', authorId);
+    return;
+  }
+
+  await db.run(
+    `INSERT OR IGNORE INTO feed_items (user_id, created_at, recipe_id, author_id)
+     SELECT ?, created_at, id, user_id FROM recipes
+     WHERE user_id = ? ORDER BY created_at DESC, id DESC LIMIT ?`,
+    followerId,
+    authorId,
+    FEED_BACKFILL,
+  );
+}
+
+/** Call after `followerId` stops following `authorId`. */
+export async function unfollowAuthor(db: Database, followerId: string, authorId: string) {
+  await db.run('DELETE FROM feed_items WHERE user_id = ? AND author_id = ?', followerId, authorId);
+}
+
+/**
+ * Up to `limit` (-1 = all) feed recipes after `cursor` (`[created_at, recipe_id]`),
+ * newest first.
+ */
+export async function feedPage(
+  db: Database,
+  userId: string,
+  cursor: CursorKey | null,
+  limit: number,
+): Promise<FeedRow[]> {
+  const pulled = await db.all<{ user_id: string }[]>(
+    `SELECT p.user_id FROM followers f
+     JOIN feed_pull_authors p ON p.user_id = f.followed_id
+     WHERE f.follower_id = ?`,
+    userId,
+  );
+
+  if (pulled.length === 0) {
+    return db.all<FeedRow[]>(
+      `SELECT r.*, fi.created_at AS cursor_key FROM feed_items fi
+       JOIN recipes r ON r.id = fi.recipe_id
+       WHERE fi.user_id = ?${cursor ? ' AND (fi.created_at, fi.recipe_id) < (?, ?)' : ''}
+       ORDER BY fi.created_at DESC, fi.recipe_id DESC LIMIT ?`,
+      userId,
+      ...(cursor || []),
+      limit,
+    );
+  }
+
+  // One LIMITed range scan per source, merged; each arm reads at most `limit` rows
+  const arms = [
+    `SELECT * FROM (SELECT created_at, recipe_id FROM feed_items
+       WHERE user_id = ?${cursor ? ' AND (created_at, recipe_id) < (?, ?)' : ''}
+       ORDER BY created_at DESC, recipe_id DESC LIMIT ?)`,
+  ];
+  const params: unknown[] = [userId, ...(cursor || []), limit];
+  const after = cursor ? ' AND (created_at, id) < (?, ?)' : '';
+  if (pulled.length <= MAX_PULL_ARMS) {
+    for (const { user_id } of pulled) {
+      arms.push(
+        `SELECT * FROM (SELECT created_at, id FROM recipes WHERE user_id = ?${after}
+           ORDER BY created_at DESC, id DESC LIMIT ?)`,
+      );
+      params.push(user_id, ...(cursor || []), limit);
+    }
+  } else {
+    arms.push(
+      `SELECT * FROM (SELECT created_at, id FROM recipes
+         WHERE user_id IN (SELECT p.user_id FROM followers f
+           JOIN feed_pull_authors p ON p.user_id = f.followed_id WHERE f.follower_id = ?)${after}
+         ORDER BY created_at DESC, id DESC LIMIT ?)`,
+    );
+    params.push(userId, ...(cursor || []), limit);
+  }
+  return db.all<FeedRow[]>(
+    `SELECT r.*, x.created_at AS cursor_key FROM (${arms.join(' UNION ')}) x
+     JOIN recipes r ON r.id = x.recipe_id
+     ORDER BY x.created_at DESC, x.recipe_id DESC LIMIT ?`,
+    ...params,
+    limit,
+  );
+}
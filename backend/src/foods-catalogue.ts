@@ -0,0 +1,131 @@
+/**
+ * In-memory foods catalogue.
+ *
+ * Every `foods` row carries a `version` (schema migration v5) that triggers
+ * bump to MAX(version) + 1 whenever a food is inserted or actually changed, so
+ * the catalogue version is simply MAX(version). Each request probes that
+ * value with one index lookup; while it is unchanged the serialized catalogue
+ * for the caller's language is served straight from memory. Because the
+ * version lives in the database, writes from seedFoods(), the import scripts
+ * or another process are picked up the same way as `POST /foods`.
+ *
+ * Foods are never deleted, so the delta for `?since=<version>` is just the
+ * rows whose version is greater than `since`.
+ */
+
+import { Database } from 'sqlite';
+import { getReadDB } from './db';
+import { compressBody, Encoding } from './compression';
+
+/** Response header carrying the catalogue version for later `?since=` calls. */
+export const FOODS_VERSION_HEADER = 'X-Foods-Version';
+
+export interface FoodRow {
+  id: string;
+  name: string;
+  name_it?: string;
+  default_unit: string;
+  kcal: number | null;
+  protein: number | null;
+  fat: number | null;
+  carbs: number | null;
+  fiber: number | null;
+  portion_value: number | null;
+  version: number;
+}
+
+export function toFood(f: FoodRow, lang: string) {
+  return {
+    id: f.id,
+    name: lang === 'it' ? f.name_it || f.name : f.name,
+    quantity: { unit: f.default_unit, value: f.portion_value },
+    kcal: f.kcal,
+    protein: f.protein,
+    fat: f.fat,
+    carbs: f.carbs,
+    fiber: f.fiber,
+  };
+}
+
+interface Snapshot {
+  version: number;
+  rows: FoodRow[];
+  /** Serialized full catalogue per language, built on first use. */
+  bodies: Map<string, string>;
+  /** Compressed bodies per language and encoding, e.g. `it:br`. */
+  compressed: Map<string, Buffer>;
+  /** Rows by food id, built on first use. */
+  byId?: Map<string, FoodRow>;
+}
+
+let snapshot: Promise<Snapshot> | null = null;
+
+export async function getFoodsVersion(db: Database): Promise<number> {
+  const row = await db.get<{ version: number }>(
+    'SELECT COALESCE(MAX(version), 0) AS version FROM foods',
+  );
+  return row?.version ?? 0;
+}
+
+async function loadSnapshot(db: Database, version: number): Promise<Snapshot> {
+  const rows = await db.all<FoodRow[]>('SELECT * FROM foods ORDER BY name');
+  return { version, rows, bodies: new Map(), compressed: new Map() };
+}
+
+/** The catalogue at its current version, reloaded only when the version moved. */
+export async function getFoodsCatalogue() {
+  const db = await getReadDB();
+  const version = await getFoodsVersion(db);
+  const current = snapshot && (await snapshot);
+  if (current && current.version === version) return current;
+
+  const loading = loadSnapshot(db, version);
+  snapshot = loading;
+  loading.catch(() => {
+    if (snapshot === loading) snapshot = null;
+  });
+  return loading;
+}
+
+/**
+ * Strong validator for the full catalogue in one language and content coding:
+ * each encoding is a different byte sequence, so each needs its own tag.
+ */
+export function catalogueETag(version: number, lang: string, encoding: Encoding | null) {
+  return `"foods-${version}-${lang}-${encoding ?? 'identity'}"`;
+}
+
+/** The full catalogue serialized for `lang`, cached on the snapshot. */
+export function serializeCatalogue(catalogue: Snapshot, lang: string): string {
+  let body = catalogue.bodies.get(lang);
+  if (!body) {
+    body = JSON.stringify(catalogue.rows.map((f) => toFood(f, lang)));
+    catalogue.bodies.set(lang, body);
+  }
+  return body;
+}
+
+/** The full catalogue for `lang` compressed with `encoding`, cached on the snapshot. */
+export function compressedCatalogue(catalogue: Snapshot, lang: string, encoding: Encoding) {
+  const key = `${lang}:${encoding}`;
+  let body = catalogue.compressed.get(key);
+  if (!body) {
+    body = compressBody(serializeCatalogue(catalogue, lang), encoding);
+    catalogue.compressed.set(key, body);
+  }
+  return body;
+}
+
+/** The catalogue row of food `id`, if any. */
+export function catalogueFood(catalogue: Snapshot, id: string): FoodRow | undefined {
+  if (!catalogue.byId) catalogue.byId = new Map(catalogue.rows.map((f) => [f.id, f]));
+  return catalogue.byId.get(id);
+}
+
+/** Foods added or changed after `since`, mapped for `lang`. */
+export function catalogueDelta(catalogue: Snapshot, since: number, lang: string) {
+  return {
+    version: catalogue.version,
+    foods: catalogue.rows.filter((f) => f.version > since).map((f) => toFood(f, lang)),
+  };
+}
@@ -0,0 +1,88 @@
+/**
+ * In-memory index of group membership.
+ *
+ * Socket connections and group-scoped planning endpoints look up "which group
+ * is this user in" and "who is in this group" on nearly every request. The
+ * whole `group_members` table is small, so it is loaded once into two maps
+ * and served from memory until a membership change calls
+ * `invalidateGroupMembership()`, which makes the next lookup reload it.
+ */
+
+import { getReadDB } from './db';
+import { onClusterMessage, publishToCluster } from './cluster-bus';
+
+interface MembershipIndex {
+  /** Group ids per user, sorted (the first is the user's group). */
+  groupsByUser: Map<string, string[]>;
+  membersByGroup: Map<string, string[]>;
+}
+
+let index: Promise<MembershipIndex> | null = null;
+/** Bumped on every invalidation so a reload that raced with one is not kept. */
+let epoch = 0;
+
+async function loadIndex(): Promise<MembershipIndex> {
+  const db = await getReadDB();
+  const rows = await db.all<{ group_id: string; user_id: string }[]>(
+    'SELECT group_id, user_id FROM group_members ORDER BY user_id, group_id',
+  );
+  const groupsByUser = new Map<string, string[]>();
+  const membersByGroup = new Map<string, string[]>();
+  for (const { group_id, user_id } of rows) {
+    const groups = groupsByUser.get(user_id);
+    if (groups) groups.push(group_id);
+    else groupsByUser.set(user_id, [group_id]);
+    const members = membersByGroup.get(group_id);
+    if (members) members.push(user_id);
+    else membersByGroup.set(group_id, [user_id]);
+  }
+  return { groupsByUser, membersByGroup };
+}
+
+function getIndex(): Promise<MembershipIndex> {
+  if (index) return index;
+  const startEpoch = epoch;
+  const loading = loadIndex();
+  index = loading;
+  loading.then(
+    () => {
+      if (epoch !== startEpoch && index === loading) index = null;
+    },
+    () => {
+      if (index === loading) index = null;
+    },
+  );
+  return loading;
+}
+
+function dropIndex() {
+  epoch++;
+  index = null;
+}
+
+/** Drop the index (in every process); call after any change to `group_members`. */
+export function invalidateGroupMembership() {
+  dropIndex();
+  publishToCluster('group-membership:invalidate', null);
+}
+
+onClusterMessage('group-membership:invalidate', dropIndex);
+
+/** The group a user belongs to, or null. */
+export async function getUserGroupId(userId: string): Promise<string | null> {
+  return (await getIndex()).groupsByUser.get(userId)?.[0] ?? null;
+}
+
+/** All groups a user belongs to. */
+export async function getUserGroupIds(userId: string): Promise<string[]> {
+  return (await getIndex()).groupsByUser.get(userId) ?? [];
+}
+
+/** Members of a group (empty for an unknown group). */
+export async function getGroupMemberIds(groupId: string): Promise<string[]> {
+  return (await getIndex()).membersByGroup.get(groupId) ?? [];
+}
+
+export async function isGroupMember(groupId: string, userId: string): Promise<boolean> {
+  return (await getGroupMemberIds(groupId)).includes(userId);
+}
@@ -0,0 +1,221 @@
+/**
+ * Content-addressed storage for recipe step images.
+ *
+ * Uploads are streamed straight to a temporary file under UPLOADS_DIR while
+ * their SHA-256 is computed, then renamed to `<sha256>.<ext>`. Uploading the
+ * same picture twice therefore stores it once, and since a name always maps
+ * to the same bytes, files can be served with immutable cache headers. The
+ * type is taken from the file's magic bytes, never from the client.
+ *
+ * No thumbnails are made: resizing needs an image library (e.g. `sharp`),
+ * which is not a dependency of this backend. Clients scale the original.
+ *
+ * Nothing tracks who uploaded what. Images are shared by content, so they
+ * are never deleted on request; instead a background sweep removes files
+ * that no `recipe_steps.image_url` points at once they are older than
+ * IMAGE_SWEEP_GRACE_MS (long enough to upload and then save a recipe).
+ */
+
+import crypto from 'crypto';
+import fs from 'fs';
+import path from 'path';
+import { Transform } from 'stream';
+import { pipeline } from 'stream/promises';
+import type { Request } from 'express';
+import type { StorageEngine } from 'multer';
+import { Database } from 'sqlite';
+
+export const UPLOADS_DIR =
+  process.env.UPLOADS_DIR || path.resolve(__dirname, '..', 'data', 'uploads');
+
+/** URL prefix the upload directory is served under. */
+export const IMAGES_PATH = '/images';
+
+export const MAX_IMAGE_BYTES = Number(process.env.IMAGE_MAX_BYTES ?? 10 * 1024 * 1024);
+
+const SWEEP_INTERVAL_MS = Number(process.env.IMAGE_SWEEP_INTERVAL_MS ?? 60 * 60 * 1000);
+
+export const IMAGE_SWEEP_GRACE_MS = Number(
+  process.env.IMAGE_SWEEP_GRACE_MS ?? 24 * 60 * 60 * 1000,
+);
+
+const TEMP_PREFIX = '.upload-';
+
+const IMAGE_NAME = /^[0-9a-f]{64}\.(?:jpg|png|gif|webp)$/;
+
+/** Thrown when an upload is not one of the accepted image types. */
+export class UnsupportedImageError extends Error {
+  constructor() {
+    super('Only JPEG, PNG, GIF and WebP images are accepted');
+    this.name = 'UnsupportedImageError';
+  }
+}
+
+/** Extension for the image type in the first bytes of a file, or null. */
+export function sniffImageType(head: Buffer): string | null {
+  if (head.length >= 3 && head[0] === 0xff && head[1] === 0xd8 && head[2] === 0xff) return 'jpg';
+  if (head.subarray(0, 8).equals(Buffer.from([0x89, 0x50, 0x4e, 0x47, 0x0d, 0x0a, 0x1a, 0x0a]))) {
+    return 'png';
+  }
+  if (head.subarray(0, 4).toString('latin1') === 'GIF8') return 'gif';
+  if (
+    head.subarray(0, 4).toString('latin1') === 'RIFF' &&
+    head.subarray(8, 12).toString('latin1') === 'WEBP'
+  ) {
+    return 'webp';
+  }
+  return null;
+}
+
+export interface StoredImage {
+  /** `<sha256>.<ext>` */
+  name: string;
+  size: number;
+  /** False when the same bytes were already stored. */
+  created: boolean;
+}
+
+/** The file name of an image URL served by this API, or null. */
+export function imageNameFromUrl(url: string | null | undefined): string | null {
+  if (!url) return null;
+  const name = url.slice(url.lastIndexOf('/') + 1);
+  return IMAGE_NAME.test(name) && url.includes(`${IMAGES_PATH}/`) ? name : null;
+}
+
+/** Set `file`'s times to now; false if it does not exist (any more). */
+async function touch(file: string): Promise<boolean> {
+  const now = new Date();
+  try {
+    await fs.promises.utimes(file, now, now);
+    return true;
+  } catch (err) {
+    if ((err as NodeJS.ErrnoException).code === 'ENOENT') return false;
+    throw err;
+  }
+}
+
+/**
+ * Stream `input` to disk under its content hash. `truncated` is checked at
+ * the end, so an upload cut off by a size limit is thrown away, not stored.
+ */
+export async function storeImage(
+  input: NodeJS.ReadableStream,
+  truncated: () => boolean = () => false,
+): Promise<StoredImage> {
+  await fs.promises.mkdir(UPLOADS_DIR, { recursive: true });
+  const temp = path.join(UPLOADS_DIR, `${TEMP_PREFIX}${crypto.randomUUID()}`);
+  const hash = crypto.createHash('sha256');
+  let head = Buffer.alloc(0);
+  let size = 0;
+  let rejected = false;
+
+  const inspect = new Transform({
+    transform(chunk: Buffer, _encoding, callback) {
+      // 12 bytes are enough for every signature
+      if (head.length < 12) {
+        head = Buffer.concat([head, chunk]).subarray(0, 12);
+        rejected = head.length >= 12 && !sniffImageType(head);
+      }
+      // Not an image: keep reading (the multipart parser must reach the end) but write nothing
+      if (rejected) {
+        callback();
+        return;
+      }
+      hash.update(chunk);
+      size += chunk.length;
+      callback(null, chunk);
+    },
+  });
+
+  try {
+    await pipeline(input, inspect, fs.createWriteStream(temp));
+    const ext = sniffImageType(head);
+    if (!ext) throw new UnsupportedImageError();
+    if (truncated()) throw new Error('Image too large');
+
+    const name = `${hash.digest('hex')}.${ext}`;
+    const target = path.join(UPLOADS_DIR, name);
+    // Already stored: keep the old file, and refresh it so the sweep's grace period restarts
+    if (await touch(target)) {
+      await fs.promises.unlink(temp);
+      return { name, size, created: false };
+    }
+    // Not stored, or the sweep removed it since: this upload becomes the stored copy
+    await fs.promises.rename(temp, target);
+    return { name, size, created: true };
+  } catch (err) {
+    await fs.promises.rm(temp, { force: true });
+    throw err;
+  }
+}
+
+/**
+ * multer storage engine writing through `storeImage`. Removing a file after a
+ * failed request is left to the sweep, as another upload may share it.
+ */
+export const contentAddressedStorage: StorageEngine = {
+  _handleFile(_req: Request, file, callback) {
+    let truncated = false;
+    file.stream.on('limit', () => (truncated = true));
+    storeImage(file.stream, () => truncated).then(
+      (stored) =>
+        callback(null, {
+          filename: stored.name,
+          path: path.join(UPLOADS_DIR, stored.name),
+          size: stored.size,
+        }),
+      (err) => callback(err),
+    );
+  },
+  _removeFile(_req, _file, callback) {
+    callback(null);
+  },
+};
+
+// ── Sweep ───────────────────────────────────────────
+
+/**
+ * Delete images no recipe step references, and abandoned temporary files,
+ * once older than `graceMs`. Returns the files removed.
+ */
+export async function sweepImages(db: Database, graceMs = IMAGE_SWEEP_GRACE_MS): Promise<number> {
+  if (!fs.existsSync(UPLOADS_DIR)) return 0;
+  const cutoff = Date.now() - graceMs;
+  const rows = await db.all<{ image_url: string }[]>(
+    'SELECT DISTINCT image_url FROM recipe_steps WHERE image_url LIKE ?',
+    `%${IMAGES_PATH}/%`,
+  );
+  const referenced = new Set(rows.map((r) => imageNameFromUrl(r.image_url)));
+
+  let removed = 0;
+  for (const entry of await fs.promises.readdir(UPLOADS_DIR)) {
+    if (!IMAGE_NAME.test(entry) && !entry.startsWith(TEMP_PREFIX)) continue;
+    const file = path.join(UPLOADS_DIR, entry);
+    const stat = await fs.promises.stat(file).catch(() => null);
+    if (!stat || stat.mtimeMs > cutoff || referenced.has(entry)) continue;
+    await fs.promises.rm(file, { force: true });
+    removed++;
+  }
+  return removed;
+}
+
+let sweepTimer: ReturnType<typeof setInterval> | null = null;
+
+/** Sweep every IMAGE_SWEEP_INTERVAL_MS using the database from `getDb`. */
+export function startImageSweep(getDb: () => Promise<Database>) {
+  if (sweepTimer) return;
+  sweepTimer = setInterval(() => {
+    getDb()
+      .then((db) => sweepImages(db))
+      .then((removed) => {
+        if (removed > 0) console.log(`[images] Swept ${removed} unreferenced files`);
+      })
+      .catch(console.error);
+  }, SWEEP_INTERVAL_MS);
+  sweepTimer.unref();
+}
+
+export function stopImageSweep() {
+  if (sweepTimer) clearInterval(sweepTimer);
+  sweepTimer = null;
+}
@@ -0,0 +1,124 @@
+/**
+ * Streaming bulk recipe import.
+ *
+ * Reads recipes from JSON Lines (.jsonl, .ndjson) or CSV (.csv) files and
+ * writes them for one user in batched transactions, reporting progress in
+ * recipes and rows per second. See recipe-import.ts for the accepted fields
+ * and the de-duplication rules.
+ *
+ * Usage:
+ *   npm run import:bulk -- [--user <id>] [--batch <recipes>] [--format jsonl|csv] <file...>
+ *
+ * Without --user, recipes go to the first user in the database.
+ */
+
+import fs from 'fs';
+import path from 'path';
+import { getDB, seedFoods } from './db';
+import {
+  DEFAULT_IMPORT_BATCH,
+  FoodNameIndex,
+  ImportRecord,
+  importRates,
+  ImportStats,
+  readCsv,
+  readJsonLines,
+  RecipeImporter,
+  RecipeImportError,
+  toRecipeInput,
+} from './recipe-import';
+
+/** At most this many invalid records are printed; the rest are only counted. */
+const MAX_REPORTED_ERRORS = 20;
+
+function parseArgs(argv: string[]) {
+  const options = { user: '', batch: DEFAULT_IMPORT_BATCH, format: '', files: [] as string[] };
+  for (let i = 0; i < argv.length; i++) {
+    const arg = argv[i];
+    if (arg === '--user') options.user = argv[++i] ?? '';
+    else if (arg === '--batch') options.batch = Number(argv[++i]);
+    else if (arg === '--format') options.format = argv[++i] ?? '';
+    else options.files.push(arg);
+  }
+  if (options.files.length === 0) throw new Error('No input files given');
+  if (!Number.isInteger(options.batch) || options.batch < 1) {
+    throw new Error('--batch must be a positive integer');
+  }
+  return options;
+}
+
+function readRecords(file: string, format: string): AsyncGenerator<ImportRecord> {
+  const kind = format || path.extname(file).slice(1).toLowerCase();
+  const input = fs.createReadStream(file);
+  if (kind === 'csv') return readCsv(input);
+  if (kind === 'jsonl' || kind === 'ndjson') return readJsonLines(input);
+  throw new Error(`Unknown format for ${file}; pass --format jsonl|csv`);
+}
+
+function logProgress(stats: ImportStats) {
+  const { recipesPerSecond, rowsPerSecond } = importRates(stats);
+  const mb = Math.round(process.memoryUsage().rss / 1024 / 1024);
+  console.log(
+    `  ${stats.read} recipes read, ${stats.imported} imported — ` +
+      `${recipesPerSecond} recipes/s, ${rowsPerSecond} rows/s, ${mb} MB RSS`,
+  );
+}
+
+async function main() {
+  const options = parseArgs(process.argv.slice(2));
+  const db = await getDB();
+  await seedFoods();
+
+  const user = options.user
+    ? await db.get('SELECT id FROM users WHERE id = ?', options.user)
+    : await db.get('SELECT id FROM users LIMIT 1');
+  if (!user) {
+    console.error(options.user ? `User ${options.user} not found.` : 'No user found!');
+    process.exit(1);
+  }
+  console.log(`Using user: ${user.id}`);
+
+  const foods = await FoodNameIndex.load(db);
+  console.log(`Indexed ${foods.size} food names.`);
+
+  const importer = new RecipeImporter(db, user.id, foods, options.batch, logProgress);
+  let errors = 0;
+  try {
+    for (const file of options.files) {
+      console.log(`Importing ${file}`);
+      for await (const record of readRecords(file, options.format)) {
+        try {
+          if (record.error) throw new RecipeImportError(record.error);
+          await importer.add(toRecipeInput(record.value!));
+        } catch (err: unknown) {
+          if (!(err instanceof RecipeImportError)) throw err;
+          importer.skipInvalid();
+          if (++errors <= MAX_REPORTED_ERRORS) {
+            console.warn(`  [SKIP] ${file}:${record.line} ${err.message}`);
+          }
+        }
+      }
+    }
+  } catch (err) {
+    await importer.abort();
+    throw err;
+  }
+
+  const stats = await importer.finish();
+  const { recipesPerSecond, rowsPerSecond } = importRates(stats);
+  console.log(
+    `\nDone! Imported ${stats.imported} recipes (${stats.upgraded} WIP upgraded, ` +
+      `${stats.duplicates} duplicates, ${stats.invalid} invalid) in ` +
+      `${(stats.elapsedMs / 1000).toFixed(1)}s.`,
+  );
+  console.log(
+    `  ${stats.rows} rows, ${recipesPerSecond} recipes/s, ${rowsPerSecond} rows/s; ` +
+      `${stats.unresolved} of ${stats.ingredients} ingredients matched no food.`,
+  );
+  process.exit(0);
+}
+
+main().catch((err) => {
+  console.error('Error:', err);
+  process.exit(1);
+});
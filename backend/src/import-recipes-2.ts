@@ -3,26 +3,8 @@
  * Usage:  npx ts-node src/import-recipes-2.ts
  */
 
-import crypto from 'crypto';
 import { getDB, seedFoods } from './db';
-
-const uuid = () => crypto.randomUUID();
-
-interface RecipeInput {
-  name: string;
-  description: string;
-  cuisine: string;
-  type: string;
-  difficulty: string;
-  time_value: number | null;
-  time_unit: string;
-  servings: number;
-  wip: boolean;
-  notes: string;
-  tags: string[];
-  ingredients: { name: string; qty: number | null; unit: string | null }[];
-  steps: string[];
-}
+import { FoodNameIndex, RecipeImporter, RecipeInput } from './recipe-import';
 
 async function main() {
   const db = await getDB();
@@ -525,22 +507,6 @@ async function main() {
   await foodStmt.finalize();
   console.log(`Seeded ${newFoods.length} new foods.`);
 
-  // Build lookup
-  const allFoods = await db.all('SELECT id, name, name_it, default_unit FROM foods');
-  const foodMap = new Map<string, { id: string; unit: string }>();
-  for (const f of allFoods) {
-    if (f.name_it) foodMap.set(f.name_it.toLowerCase(), { id: f.id, unit: f.default_unit });
-    if (f.name) foodMap.set(f.name.toLowerCase(), { id: f.id, unit: f.default_unit });
-  }
-  function findFood(name: string): { id: string; unit: string } | undefined {
-    const n = name.toLowerCase().trim();
-    if (foodMap.has(n)) return foodMap.get(n);
-    for (const [key, val] of foodMap) {
-      if (n.includes(key) || key.includes(n)) return val;
-    }
-    return undefined;
-  }
-
   // ── Recipes ────────────────────────────────────────────────────
   const recipes: RecipeInput[] = [
     // ─── Formaggi ───
@@ -2074,101 +2040,17 @@ async function main() {
     },
   ];
 
-  // Insert recipes
-  let count = 0;
+  // Insert recipes (existing ones are skipped, WIPs upgraded)
+  const importer = new RecipeImporter(db, userId, await FoodNameIndex.load(db), recipes.length);
   for (const r of recipes) {
-    // Check for duplicates
-    const existing = (await db.get(
-      'SELECT id, wip FROM recipes WHERE user_id = ? AND name = ?',
-      userId,
-      r.name,
-    )) as { id: string; wip: number } | undefined;
-
-    let recipeId: string;
-
-    if (existing && existing.wip && !r.wip) {
-      // Upgrade existing WIP recipe to full recipe
-      recipeId = existing.id;
-      await db.run(
-        `UPDATE recipes SET description=?, cuisine=?, type=?, difficulty=?, time_value=?, time_unit=?, servings=?, wip=?, notes=? WHERE id=?`,
-        r.description,
-        r.cuisine,
-        r.type,
-        r.difficulty,
-        r.time_value,
-        r.time_unit,
-        r.servings,
-        0,
-        r.notes,
-        recipeId,
-      );
-      // Remove old ingredients/steps/tags
-      await db.run('DELETE FROM recipe_ingredients WHERE recipe_id = ?', recipeId);
-      await db.run('DELETE FROM recipe_steps WHERE recipe_id = ?', recipeId);
-      await db.run('DELETE FROM recipe_tags WHERE recipe_id = ?', recipeId);
-      console.log(`  [UPD] ${r.name} (WIP → full recipe)`);
-    } else if (existing) {
-      console.log(`  [SKIP] ${r.name} (already exists)`);
-      continue;
-    } else {
-      recipeId = uuid();
-      await db.run(
-        `INSERT INTO recipes (id, user_id, name, description, cuisine, type, difficulty, time_value, time_unit, servings, wip, notes)
-         VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)`,
-        recipeId,
-        userId,
-        r.name,
-        r.description,
-        r.cuisine,
-        r.type,
-        r.difficulty,
-        r.time_value,
-        r.time_unit,
-        r.servings,
-        r.wip ? 1 : 0,
-        r.notes,
-      );
-    }
-
-    for (let i = 0; i < r.ingredients.length; i++) {
-      const ing = r.ingredients[i];
-      const food = findFood(ing.name);
-      await db.run(
-        `INSERT INTO recipe_ingredients (id, recipe_id, food_id, name, quantity_value, quantity_unit, sort_order)
-         VALUES (?, ?, ?, ?, ?, ?, ?)`,
-        uuid(),
-        recipeId,
-        food?.id || null,
-        ing.name,
-        ing.qty,
-        ing.unit,
-        i,
-      );
-    }
-
-    for (let i = 0; i < r.steps.length; i++) {
-      await db.run(
-        `INSERT INTO recipe_steps (id, recipe_id, text, image_url, sort_order) VALUES (?, ?, ?, '', ?)`,
-        uuid(),
-        recipeId,
-        r.steps[i],
-        i,
-      );
-    }
-
-    for (const tag of r.tags) {
-      await db.run(
-        'INSERT OR IGNORE INTO recipe_tags (recipe_id, tag) VALUES (?, ?)',
-        recipeId,
-        tag,
-      );
-    }
-
-    count++;
-    console.log(`  [${count}] ✓ ${r.name}${r.wip ? ' (WIP)' : ''}`);
+    const added = await importer.add(r);
+    console.log(`  ${added ? '✓' : '[SKIP]'} ${r.name}${r.wip ? ' (WIP)' : ''}`);
   }
+  const stats = await importer.finish();
 
-  console.log(`\nDone! Inserted ${count} recipes.`);
+  console.log(
+    `\nDone! Inserted ${stats.imported} recipes, upgraded ${stats.upgraded}, skipped ${stats.duplicates}.`,
+  );
   process.exit(0);
 }
 
@@ -8,25 +8,10 @@
 
 import crypto from 'crypto';
 import { getDB, seedFoods } from './db';
+import { FoodNameIndex, RecipeImporter, RecipeInput } from './recipe-import';
 
 const uuid = () => crypto.randomUUID();
 
-interface RecipeInput {
-  name: string;
-  description: string;
-  cuisine: string;
-  type: string;
-  difficulty: string;
-  time_value: number | null;
-  time_unit: string;
-  servings: number;
-  wip: boolean;
-  notes: string;
-  tags: string[];
-  ingredients: { name: string; qty: number | null; unit: string | null }[];
-  steps: string[];
-}
-
 async function main() {
   const db = await getDB();
   await seedFoods();
@@ -489,25 +474,6 @@ async function main() {
   await foodStmt.finalize();
   console.log(`Seeded ${newFoods.length} new foods.`);
 
-  // Build a lookup map: Italian food name -> food id (case-insensitive)
-  const allFoods = await db.all('SELECT id, name, name_it, default_unit FROM foods');
-  const foodMap = new Map<string, { id: string; unit: string }>();
-  for (const f of allFoods) {
-    if (f.name_it) foodMap.set(f.name_it.toLowerCase(), { id: f.id, unit: f.default_unit });
-    if (f.name) foodMap.set(f.name.toLowerCase(), { id: f.id, unit: f.default_unit });
-  }
-
-  // Helper to look up a food and try common aliases
-  function findFood(name: string): { id: string; unit: string } | undefined {
-    const n = name.toLowerCase().trim();
-    if (foodMap.has(n)) return foodMap.get(n);
-    // Try partial matches
-    for (const [key, val] of foodMap) {
-      if (n.includes(key) || key.includes(n)) return val;
-    }
-    return undefined;
-  }
-
   // ── Recipes ────────────────────────────────────────────────────
   const recipes: RecipeInput[] = [
     {
@@ -1217,70 +1183,17 @@ async function main() {
     },
   ];
 
-  // Insert recipes
-  let count = 0;
+  // Insert recipes (existing ones are skipped, WIPs upgraded)
+  const importer = new RecipeImporter(db, userId, await FoodNameIndex.load(db), recipes.length);
   for (const r of recipes) {
-    const recipeId = uuid();
-    await db.run(
-      `INSERT INTO recipes (id, user_id, name, description, cuisine, type, difficulty, time_value, time_unit, servings, wip, notes)
-       VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)`,
-      recipeId,
-      userId,
-      r.name,
-      r.description,
-      r.cuisine,
-      r.type,
-      r.difficulty,
-      r.time_value,
-      r.time_unit,
-      r.servings,
-      r.wip ? 1 : 0,
-      r.notes,
-    );
-
-    // Insert ingredients
-    for (let i = 0; i < r.ingredients.length; i++) {
-      const ing = r.ingredients[i];
-      const food = findFood(ing.name);
-      await db.run(
-        `INSERT INTO recipe_ingredients (id, recipe_id, food_id, name, quantity_value, quantity_unit, sort_order)
-         VALUES (?, ?, ?, ?, ?, ?, ?)`,
-        uuid(),
-        recipeId,
-        food?.id || null,
-        ing.name,
-        ing.qty,
-        ing.unit,
-        i,
-      );
-    }
-
-    // Insert steps
-    for (let i = 0; i < r.steps.length; i++) {
-      await db.run(
-        `INSERT INTO recipe_steps (id, recipe_id, text, image_url, sort_order)
-         VALUES (?, ?, ?, '', ?)`,
-        uuid(),
-        recipeId,
-        r.steps[i],
-        i,
-      );
-    }
-
-    // Insert tags
-    for (const tag of r.tags) {
-      await db.run(
-        'INSERT OR IGNORE INTO recipe_tags (recipe_id, tag) VALUES (?, ?)',
-        recipeId,
-        tag,
-      );
-    }
-
-    count++;
-    console.log(`  [${count}/${recipes.length}] ✓ ${r.name}${r.wip ? ' (WIP)' : ''}`);
+    const added = await importer.add(r);
+    console.log(`  ${added ? '✓' : '[SKIP]'} ${r.name}${r.wip ? ' (WIP)' : ''}`);
   }
+  const stats = await importer.finish();
 
-  console.log(`\nDone! Inserted ${count} recipes.`);
+  console.log(
+    `\nDone! Inserted ${stats.imported} recipes, upgraded ${stats.upgraded}, skipped ${stats.duplicates}.`,
+  );
   process.exit(0);
 }
 
@@ -8,11 +8,24 @@
  *
  * Tokens are signed with RS256 and include a `kid` (Key ID) header so the
  * verifier knows which public key to use.
+ *
+ * Valid keys are also held in memory as parsed `KeyObject`s indexed by kid, so
+ * signing and verifying never touch the database. The cache is reloaded after
+ * every rotation, and on an unknown kid (at most once per
+ * KEY_RELOAD_INTERVAL_MS) in case another process rotated.
+ *
+ * In cluster mode only the primary rotates on schedule; workers reload their
+ * keys when it announces a rotation.
  */
 
-import crypto from 'crypto';
-import jwt, { JwtHeader, SigningKeyCallback } from 'jsonwebtoken';
+import cluster from 'cluster';
+import crypto, { KeyObject } from 'crypto';
+import { promisify } from 'util';
+import jwt from 'jsonwebtoken';
 import { getDB } from './db';
+import { onClusterMessage, publishToCluster } from './cluster-bus';
+
+const generateKeyPair = promisify(crypto.generateKeyPair);
 
 /* ------------------------------------------------------------------ */
 /*  Configuration (all durations in milliseconds)                      */
@@ -24,6 +37,9 @@ const ROTATION_INTERVAL_MS = Number(process.env.KEY_ROTATION_HOURS || 24) * 60 *
 /** How long an old key stays valid for verification after rotation (default 48 h). */
 const KEY_GRACE_PERIOD_MS = Number(process.env.KEY_GRACE_HOURS || 48) * 60 * 60 * 1000;
 
+/** Minimum time between database reloads triggered by an unknown kid. */
+const KEY_RELOAD_INTERVAL_MS = 5 * 1000;
+
 /* ------------------------------------------------------------------ */
 /*  Types                                                              */
 /* ------------------------------------------------------------------ */
@@ -37,6 +53,13 @@ interface StoredKey {
   is_current: number; // 1 = active signing key
 }
 
+interface CachedKey {
+  kid: string;
+  publicKey: KeyObject;
+  privateKey: KeyObject;
+  expiresAt: number;
+}
+
 export interface JwtPayload {
   id: string;
   name: string;
@@ -51,38 +74,33 @@ class KeyStore {
   private rotationTimer: ReturnType<typeof setInterval> | null = null;
   private initialized = false;
 
+  /** Valid keys by kid, parsed once. */
+  private keys = new Map<string, CachedKey>();
+  private currentKid: string | null = null;
+  private lastReload = 0;
+  private rotating: Promise<void> | null = null;
+
   /* ---- bootstrap ------------------------------------------------- */
 
   async init(): Promise<void> {
     if (this.initialized) return;
 
-    const db = await getDB();
-
-    // Create table if it doesn't exist
-    await db.exec(`
-      CREATE TABLE IF NOT EXISTS jwt_keys (
-        kid         TEXT PRIMARY KEY,
-        public_key  TEXT NOT NULL,
-        private_key TEXT NOT NULL,
-        created_at  INTEGER NOT NULL,
-        expires_at  INTEGER NOT NULL,
-        is_current  INTEGER NOT NULL DEFAULT 0
-      )
-    `);
+    // The jwt_keys table is created by the schema migrations in getDB()
+    await this.reloadKeys();
 
     // Ensure at least one active, non-expired key exists
-    const current = await db.get<StoredKey>(
-      'SELECT * FROM jwt_keys WHERE is_current = 1 AND expires_at > ?',
-      Date.now(),
-    );
-    if (!current) {
+    if (!this.getCachedCurrentKey()) {
       await this.rotate();
     }
 
-    // Schedule periodic rotation
-    this.rotationTimer = setInterval(() => {
-      this.rotate().catch(console.error);
-    }, ROTATION_INTERVAL_MS);
+    if (cluster.isWorker) {
+      onClusterMessage('keys:rotated', () => this.reloadKeys().catch(console.error));
+    } else {
+      // Schedule periodic rotation
+      this.rotationTimer = setInterval(() => {
+        this.rotate().catch(console.error);
+      }, ROTATION_INTERVAL_MS);
+    }
 
     // Unref so the timer doesn't keep the process alive
     if (this.rotationTimer && typeof this.rotationTimer.unref === 'function') {
@@ -96,11 +114,65 @@ class KeyStore {
     );
   }
 
+  /* ---- key cache ------------------------------------------------- */
+
+  /** Replace the in-memory key map with the valid keys stored in the database. */
+  private async reloadKeys(): Promise<void> {
+    this.lastReload = Date.now();
+    const db = await getDB();
+    const rows = await db.all<StoredKey[]>(
+      'SELECT * FROM jwt_keys WHERE expires_at > ?',
+      Date.now(),
+    );
+    const keys = new Map<string, CachedKey>();
+    let currentKid: string | null = null;
+    for (const row of rows) {
+      keys.set(row.kid, {
+        kid: row.kid,
+        // Reuse already-parsed keys; parsing PEM is the expensive part
+        publicKey: this.keys.get(row.kid)?.publicKey ?? crypto.createPublicKey(row.public_key),
+        privateKey: this.keys.get(row.kid)?.privateKey ?? crypto.createPrivateKey(row.private_key),
+        expiresAt: row.expires_at,
+      });
+      if (row.is_current) currentKid = row.kid;
+    }
+    this.keys = keys;
+    this.currentKid = currentKid;
+  }
+
+  private getCachedCurrentKey(): CachedKey | null {
+    const key = this.currentKid ? this.keys.get(this.currentKid) : undefined;
+    return key && key.expiresAt > Date.now() ? key : null;
+  }
+
+  /** Look up a verification key, reloading (rate-limited) when the kid is unknown. */
+  private async getVerificationKey(kid: string): Promise<CachedKey | null> {
+    let key = this.keys.get(kid);
+    if (!key && Date.now() - this.lastReload >= KEY_RELOAD_INTERVAL_MS) {
+      await this.reloadKeys();
+      key = this.keys.get(kid);
+    }
+    return key && key.expiresAt > Date.now() ? key : null;
+  }
+
   /* ---- key rotation ---------------------------------------------- */
 
-  /** Generate a fresh RSA-2048 key pair and mark it as the current signing key. */
-  async rotate(): Promise<void> {
-    const { publicKey, privateKey } = crypto.generateKeyPairSync('rsa', {
+  /**
+   * Generate a fresh RSA-2048 key pair and mark it as the current signing key.
+   * Key generation runs on the libuv thread pool, so requests keep being
+   * served meanwhile; concurrent callers share one rotation.
+   */
+  rotate(): Promise<void> {
+    if (!this.rotating) {
+      this.rotating = this.doRotate().finally(() => {
+        this.rotating = null;
+      });
+    }
+    return this.rotating;
+  }
+
+  private async doRotate(): Promise<void> {
+    const { publicKey, privateKey } = await generateKeyPair('rsa', {
       modulusLength: 2048,
       publicKeyEncoding: { type: 'spki', format: 'pem' },
       privateKeyEncoding: { type: 'pkcs8', format: 'pem' },
@@ -129,35 +201,29 @@ class KeyStore {
     // Purge keys that are past their grace period
     await db.run('DELETE FROM jwt_keys WHERE expires_at < ?', now);
 
+    await this.reloadKeys();
+    publishToCluster('keys:rotated', kid);
     console.log(`[KeyStore] Rotated — new kid=${kid}`);
   }
 
   /* ---- signing --------------------------------------------------- */
 
   /** Return the current (active) key, rotating if it has expired. */
-  private async getCurrentKey(): Promise<StoredKey> {
-    const db = await getDB();
-    const key = await db.get<StoredKey>(
-      'SELECT * FROM jwt_keys WHERE is_current = 1 AND expires_at > ?',
-      Date.now(),
-    );
-    if (!key) {
-      // Current key is missing or expired — rotate immediately
-      await this.rotate();
-      const newKey = await db.get<StoredKey>(
-        'SELECT * FROM jwt_keys WHERE is_current = 1 AND expires_at > ?',
-        Date.now(),
-      );
-      if (!newKey) throw new Error('[KeyStore] No active signing key after rotation');
-      return newKey;
-    }
-    return key;
+  private async getCurrentKey(): Promise<CachedKey> {
+    const key = this.getCachedCurrentKey();
+    if (key) return key;
+
+    // Current key is missing or expired — rotate immediately
+    await this.rotate();
+    const newKey = this.getCachedCurrentKey();
+    if (!newKey) throw new Error('[KeyStore] No active signing key after rotation');
+    return newKey;
   }
 
   /** Sign an access token (short-lived, default 15 min). */
   async signAccessToken(payload: JwtPayload): Promise<string> {
     const key = await this.getCurrentKey();
-    return jwt.sign(payload, key.private_key, {
+    return jwt.sign(payload, key.privateKey, {
       algorithm: 'RS256',
       expiresIn: '15m',
       keyid: key.kid,
@@ -167,7 +233,7 @@ class KeyStore {
   /** Sign a refresh token (long-lived, default 7 days). */
   async signRefreshToken(payload: JwtPayload): Promise<string> {
     const key = await this.getCurrentKey();
-    return jwt.sign(payload, key.private_key, {
+    return jwt.sign(payload, key.privateKey, {
       algorithm: 'RS256',
       expiresIn: '7d',
       keyid: key.kid,
@@ -187,20 +253,13 @@ class KeyStore {
       throw new Error('Token missing kid header');
     }
 
-    const kid = decoded.header.kid;
-    const db = await getDB();
-    const key = await db.get<StoredKey>(
-      'SELECT * FROM jwt_keys WHERE kid = ? AND expires_at > ?',
-      kid,
-      Date.now(),
-    );
-
+    const key = await this.getVerificationKey(decoded.header.kid);
     if (!key) {
       throw new Error('Signing key not found or expired');
     }
 
     return new Promise<JwtPayload>((resolve, reject) => {
-      jwt.verify(token, key.public_key, { algorithms: ['RS256'] }, (err, payload) => {
+      jwt.verify(token, key.publicKey, { algorithms: ['RS256'] }, (err, payload) => {
         if (err) return reject(err);
         resolve(payload as JwtPayload);
       });
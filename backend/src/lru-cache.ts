@@ -0,0 +1,86 @@
+/**
+ * Bounded in-process LRU cache with a per-entry TTL.
+ *
+ * Recency is tracked with the insertion order of a Map: a hit re-inserts the
+ * key at the end, and eviction removes from the front. All operations are O(1).
+ */
+
+export interface CacheStats {
+  size: number;
+  maxEntries: number;
+  ttlMs: number;
+  hits: number;
+  misses: number;
+  evictions: number;
+  expirations: number;
+  invalidations: number;
+}
+
+interface Entry<V> {
+  value: V;
+  expiresAt: number;
+}
+
+export class LruCache<V> {
+  private readonly entries = new Map<string, Entry<V>>();
+  private hits = 0;
+  private misses = 0;
+  private evictions = 0;
+  private expirations = 0;
+  private invalidations = 0;
+
+  constructor(
+    readonly maxEntries: number,
+    readonly ttlMs: number,
+  ) {}
+
+  get(key: string): V | undefined {
+    const entry = this.entries.get(key);
+    if (!entry) {
+      this.misses++;
+      return undefined;
+    }
+    this.entries.delete(key);
+    if (entry.expiresAt <= Date.now()) {
+      this.expirations++;
+      this.misses++;
+      return undefined;
+    }
+    this.entries.set(key, entry);
+    this.hits++;
+    return entry.value;
+  }
+
+  set(key: string, value: V): void {
+    if (this.maxEntries <= 0) return;
+    this.entries.delete(key);
+    this.entries.set(key, { value, expiresAt: Date.now() + this.ttlMs });
+    while (this.entries.size > this.maxEntries) {
+      const oldest = this.entries.keys().next().value as string;
+      this.entries.delete(oldest);
+      this.evictions++;
+    }
+  }
+
+  delete(key: string): void {
+    if (this.entries.delete(key)) this.invalidations++;
+  }
+
+  clear(): void {
+    this.invalidations += this.entries.size;
+    this.entries.clear();
+  }
+
+  stats(): CacheStats {
+    return {
+      size: this.entries.size,
+      maxEntries: this.maxEntries,
+      ttlMs: this.ttlMs,
+      hits: this.hits,
+      misses: this.misses,
+      evictions: this.evictions,
+      expirations: this.expirations,
+      invalidations: this.invalidations,
+    };
+  }
+}
@@ -0,0 +1,316 @@
+/**
+ * Request and SQL timing metrics.
+ *
+ * `metricsMiddleware` times every request and records it per route template
+ * (`/planning/:week`, not the concrete URL). Every `get`, `all` and `run` on a
+ * `CachedDatabase` goes through `timeQuery`, which records the statement
+ * under its normalized SQL (literals and `IN (...)` lists collapsed), warns
+ * about statements slower than SLOW_QUERY_MS and adds the query to the
+ * current request's count. Everything is served in the Prometheus text format
+ * by `GET /metrics`. `onQuery` listeners see each statement's SQL as issued
+ * (the query-plan tests use it to collect what the routers run).
+ *
+ * With SERVER_TIMING=true each response also carries a `Server-Timing`
+ * header (`db;dur=12.3;desc="7 queries", app;dur=20.1`), which browser dev
+ * tools show next to the request.
+ */
+
+import { AsyncLocalStorage } from 'async_hooks';
+import type { NextFunction, Request, Response } from 'express';
+import type { ISqlite } from 'sqlite';
+
+/** Statements at least this slow are logged and counted in db_slow_queries_total. */
+export const SLOW_QUERY_MS = Number(process.env.SLOW_QUERY_MS ?? 100);
+
+const SERVER_TIMING = process.env.SERVER_TIMING === 'true';
+
+/** Upper bounds in seconds, from 1 ms to 5 s. */
+const LATENCY_BUCKETS = [0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5];
+
+const QUERY_COUNT_BUCKETS = [0, 1, 2, 5, 10, 20, 50, 100, 200];
+
+/** Label combinations kept per metric; later ones are folded into `other`. */
+const MAX_SERIES = 500;
+
+/** Normalized statements longer than this are cut, to keep labels readable. */
+const MAX_SQL_LABEL = 300;
+
+type Labels = Record<string, string>;
+
+function escapeLabel(value: string): string {
+  return value.replace(/\\/g, '\\\\').replace(/"/g, '\\"').replace(/\n/g, '\\n');
+}
+
+function formatLabels(labels: Labels, extra = ''): string {
+  const parts = Object.entries(labels).map(([k, v]) => `${k}="${escapeLabel(v)}"`);
+  if (extra) parts.push(extra);
+  return parts.length ? `{${parts.join(',')}}` : '';
+}
+
+/** Map labels to a series key, folding new series into `other` once the metric is full. */
+function seriesKey<T>(series: Map<string, T>, labels: Labels): [string, Labels] {
+  const key = JSON.stringify(labels);
+  if (series.has(key) || series.size < MAX_SERIES) return [key, labels];
+  const other: Labels = {};
+  for (const name of Object.keys(labels)) other[name] = 'other';
+  return [JSON.stringify(other), other];
+}
+
+interface HistogramSeries {
+  labels: Labels;
+  counts: number[];
+  sum: number;
+  count: number;
+}
+
+export class Histogram {
+  private readonly series = new Map<string, HistogramSeries>();
+
+  constructor(
+    readonly name: string,
+    readonly help: string,
+    readonly buckets: number[],
+  ) {}
+
+  observe(labels: Labels, value: number) {
+    const [key, used] = seriesKey(this.series, labels);
+    let series = this.series.get(key);
+    if (!series) {
+      series = { labels: used, counts: new Array(this.buckets.length).fill(0), sum: 0, count: 0 };
+      this.series.set(key, series);
+    }
+    const bucket = this.buckets.findIndex((bound) => value <= bound);
+    if (bucket >= 0) series.counts[bucket]++;
+    series.sum += value;
+    series.count++;
+  }
+
+  render(): string[] {
+    const lines = [`# HELP ${this.name} ${this.help}`, `# TYPE ${this.name} histogram`];
+    for (const { labels, counts, sum, count } of this.series.values()) {
+      let cumulative = 0;
+      this.buckets.forEach((bound, i) => {
+        cumulative += counts[i];
+        lines.push(`${this.name}_bucket${formatLabels(labels, `le="${bound}"`)} ${cumulative}`);
+      });
+      lines.push(`${this.name}_bucket${formatLabels(labels, 'le="+Inf"')} ${count}`);
+      lines.push(`${this.name}_sum${formatLabels(labels)} ${sum}`);
+      lines.push(`${this.name}_count${formatLabels(labels)} ${count}`);
+    }
+    return lines;
+  }
+
+  reset() {
+    this.series.clear();
+  }
+}
+
+export class Counter {
+  private readonly series = new Map<string, { labels: Labels; value: number }>();
+
+  constructor(
+    readonly name: string,
+    readonly help: string,
+  ) {}
+
+  inc(labels: Labels, by = 1) {
+    const [key, used] = seriesKey(this.series, labels);
+    const series = this.series.get(key);
+    if (series) series.value += by;
+    else this.series.set(key, { labels: used, value: by });
+  }
+
+  get(labels: Labels): number {
+    return this.series.get(JSON.stringify(labels))?.value ?? 0;
+  }
+
+  render(): string[] {
+    const lines = [`# HELP ${this.name} ${this.help}`, `# TYPE ${this.name} counter`];
+    for (const { labels, value } of this.series.values()) {
+      lines.push(`${this.name}${formatLabels(labels)} ${value}`);
+    }
+    return lines;
+  }
+
+  reset() {
+    this.series.clear();
+  }
+}
+
+export const httpDuration = new Histogram(
+  'http_request_duration_seconds',
+  'HTTP request latency by route template.',
+  LATENCY_BUCKETS,
+);
+export const httpQueries = new Histogram(
+  'http_request_db_queries',
+  'SQL statements run per HTTP request.',
+  QUERY_COUNT_BUCKETS,
+);
+export const httpDbDuration = new Histogram(
+  'http_request_db_duration_seconds',
+  'Summed SQL time per HTTP request; may exceed the latency when queries overlap.',
+  LATENCY_BUCKETS,
+);
+export const queryDuration = new Histogram(
+  'db_query_duration_seconds',
+  'SQL statement latency by normalized SQL.',
+  LATENCY_BUCKETS,
+);
+export const slowQueries = new Counter(
+  'db_slow_queries_total',
+  `SQL statements that took at least SLOW_QUERY_MS (${SLOW_QUERY_MS} ms).`,
+);
+export const queryErrors = new Counter('db_query_errors_total', 'SQL statements that failed.');
+
+// ── SQL normalization ──────────────────────────────────
+
+const normalized = new Map<string, string>();
+const MAX_NORMALIZED = 2000;
+
+/**
+ * The SQL with whitespace collapsed, string and number literals replaced by
+ * `?` and placeholder lists such as `IN (?, ?, ?)` folded to `(?…)`, so
+ * statements that differ only in their arguments share one label.
+ */
+export function normalizeSql(sql: string): string {
+  const cached = normalized.get(sql);
+  if (cached !== undefined) return cached;
+
+  let out = sql
+    .replace(/\s+/g, ' ')
+    .trim()
+    .replace(/'(?:[^']|'')*'/g, '?')
+    .replace(/\b\d+(?:\.\d+)?\b/g, '?')
+    .replace(/\(\s*\?(?:\s*,\s*\?)+\s*\)/g, '(?…)')
+    .replace(/\(\?…\)(?:\s*,\s*\(\?…\))+/g, '(?…), …');
+  if (out.length > MAX_SQL_LABEL) out = out.slice(0, MAX_SQL_LABEL) + '…';
+
+  // Dynamic SQL (chunked IN lists) keeps producing new texts; start over when full
+  if (normalized.size >= MAX_NORMALIZED) normalized.clear();
+  normalized.set(sql, out);
+  return out;
+}
+
+// ── Per-request context ────────────────────────────────
+
+export interface RequestMetrics {
+  queries: number;
+  dbSeconds: number;
+}
+
+const requestContext = new AsyncLocalStorage<RequestMetrics>();
+
+type QueryListener = (sql: string) => void;
+
+const queryListeners = new Set<QueryListener>();
+
+/** Call `listener` with the SQL of every statement passed to `timeQuery`; returns an unsubscribe. */
+export function onQuery(listener: QueryListener): () => void {
+  queryListeners.add(listener);
+  return () => queryListeners.delete(listener);
+}
+
+/** Run `fn` with its own query counters, as the middleware does for each request. */
+export function withRequestMetrics<T>(metrics: RequestMetrics, fn: () => T): T {
+  return requestContext.run(metrics, fn);
+}
+
+/** Time one SQL statement and attribute it to the current request, if any. */
+export async function timeQuery<T>(sql: ISqlite.SqlType, fn: () => Promise<T>): Promise<T> {
+  for (const listener of queryListeners) listener(typeof sql === 'string' ? sql : sql.sql);
+  const started = process.hrtime.bigint();
+  let failed = false;
+  try {
+    return await fn();
+  } catch (err) {
+    failed = true;
+    throw err;
+  } finally {
+    const seconds = Number(process.hrtime.bigint() - started) / 1e9;
+    const labels = { sql: normalizeSql(typeof sql === 'string' ? sql : sql.sql) };
+    queryDuration.observe(labels, seconds);
+    if (failed) queryErrors.inc(labels);
+    if (seconds * 1000 >= SLOW_QUERY_MS) {
+      slowQueries.inc(labels);
+      console.warn(`Slow query (${(seconds * 1000).toFixed(1)} ms): ${labels.sql}`);
+    }
+    const current = requestContext.getStore();
+    if (current) {
+      current.queries++;
+      current.dbSeconds += seconds;
+    }
+  }
+}
+
+// ── HTTP middleware ────────────────────────────────────
+
+/** The matched route template, e.g. `/planning/:week`; `unmatched` for 404s. */
+function routeLabel(req: Request): string {
+  const path = req.route?.path;
+  return typeof path === 'string' ? req.baseUrl + path : 'unmatched';
+}
+
+function serverTiming(metrics: RequestMetrics, started: bigint): string {
+  const total = Number(process.hrtime.bigint() - started) / 1e6;
+  const db = metrics.dbSeconds * 1000;
+  return `db;dur=${db.toFixed(1)};desc="${metrics.queries} queries", app;dur=${total.toFixed(1)}`;
+}
+
+/**
+ * Records latency and query counts per route. Mount it after the body parser:
+ * the per-request context does not survive the parser's stream callbacks.
+ */
+export function metricsMiddleware(req: Request, res: Response, next: NextFunction) {
+  const started = process.hrtime.bigint();
+  const metrics: RequestMetrics = { queries: 0, dbSeconds: 0 };
+
+  if (SERVER_TIMING) {
+    const writeHead = res.writeHead;
+    res.writeHead = function (this: Response, ...args: unknown[]) {
+      if (!this.headersSent) this.setHeader('Server-Timing', serverTiming(metrics, started));
+      return (writeHead as (...a: unknown[]) => Response).apply(this, args);
+    } as typeof res.writeHead;
+  }
+
+  res.on('finish', () => {
+    const seconds = Number(process.hrtime.bigint() - started) / 1e9;
+    const route = routeLabel(req);
+    httpDuration.observe({ method: req.method, route, status: String(res.statusCode) }, seconds);
+    httpQueries.observe({ method: req.method, route }, metrics.queries);
+    httpDbDuration.observe({ method: req.method, route }, metrics.dbSeconds);
+  });
+
+  withRequestMetrics(metrics, next);
+}
+
+// ── Exposition ─────────────────────────────────────────
+
+export const METRICS_CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8';
+
+function gauge(name: string, help: string, value: number): string[] {
+  return [`# HELP ${name} ${help}`, `# TYPE ${name} gauge`, `${name} ${value}`];
+}
+
+/** All metrics in the Prometheus text exposition format. */
+export function renderMetrics(): string {
+  const memory = process.memoryUsage();
+  return [
+    ...httpDuration.render(),
+    ...httpQueries.render(),
+    ...httpDbDuration.render(),
+    ...queryDuration.render(),
+    ...slowQueries.render(),
+    ...queryErrors.render(),
+    ...gauge('process_resident_memory_bytes', 'Resident memory size in bytes.', memory.rss),
+    ...gauge('nodejs_heap_used_bytes', 'V8 heap in use, in bytes.', memory.heapUsed),
+    ...gauge('process_uptime_seconds', 'Seconds since the process started.', process.uptime()),
+  ].join('\n') + '\n';
+}
+
+/** Clear every recorded series (tests). */
+export function resetMetrics() {
+  for (const metric of [httpDuration, httpQueries, httpDbDuration, queryDuration]) metric.reset();
+  slowQueries.reset();
+  queryErrors.reset();
+}
@@ -0,0 +1,595 @@
+/**
+ * Versioned schema migrations.
+ *
+ * The schema version lives in `PRAGMA user_version`. On boot `migrate()` reads
+ * it once: if the database is already current no DDL runs at all, otherwise
+ * every pending step is applied in a single transaction together with the
+ * version bump, so a crash can never leave a half-migrated schema.
+ *
+ * To change the schema, append a new entry to MIGRATIONS — never edit one
+ * that has already shipped.
+ */
+
+import { Database } from 'sqlite';
+import { FEED_BACKFILL, FEED_FANOUT_LIMIT } from './feed';
+import {
+  insertShoppingEntriesSql,
+  refreshNutritionSql,
+  refreshRecipesSql,
+  refreshSearchDocumentsSql,
+} from './recipe-refresh';
+
+export interface Migration {
+  version: number;
+  name: string;
+  up: (db: Database) => Promise<void>;
+}
+
+/** Add a column unless it is already there (databases created before v1). */
+async function addColumnIfMissing(db: Database, table: string, column: string, definition: string) {
+  const columns = await db.all<{ name: string }[]>(`PRAGMA table_info(${table})`);
+  if (!columns.some((c) => c.name === column)) {
+    await db.exec(`ALTER TABLE ${table} ADD COLUMN ${column} ${definition}`);
+  }
+}
+
+export const MIGRATIONS: Migration[] = [
+  {
+    version: 1,
+    name: 'baseline schema',
+    up: async (db) => {
+      await db.exec(`
+        -- ── Users ───────────────────────────────────────────
+        CREATE TABLE IF NOT EXISTS users (
+          id            TEXT PRIMARY KEY,
+          name          TEXT NOT NULL,
+          email         TEXT UNIQUE NOT NULL,
+          password      TEXT,               -- NULL for OAuth-only users
+          avatar_url    TEXT DEFAULT '',
+          google_id     TEXT UNIQUE,
+          created_at    TEXT DEFAULT (datetime('now'))
+        );
+
+        -- ── Recipes ─────────────────────────────────────────
+        CREATE TABLE IF NOT EXISTS recipes (
+          id             TEXT PRIMARY KEY,
+          user_id        TEXT NOT NULL,
+          name           TEXT NOT NULL,
+          description    TEXT DEFAULT '',
+          cuisine        TEXT DEFAULT '',
+          type           TEXT DEFAULT 'OTHER',
+          difficulty     TEXT DEFAULT 'EASY',
+          time_value     REAL,
+          time_unit      TEXT DEFAULT 'MINUTE',
+          servings       INTEGER DEFAULT 4,
+          created_at     TEXT DEFAULT (datetime('now')),
+          min_servings   INTEGER DEFAULT 1,
+          split_servings INTEGER DEFAULT 1,
+          wip            INTEGER DEFAULT 0,
+          notes          TEXT DEFAULT '',
+          FOREIGN KEY(user_id) REFERENCES users(id) ON DELETE CASCADE
+        );
+
+        -- ── Recipe ingredients ──────────────────────────────
+        -- NULL quantity_unit is allowed (e.g. for items like eggs counted as PIECE).
+        CREATE TABLE IF NOT EXISTS recipe_ingredients (
+          id             TEXT PRIMARY KEY,
+          recipe_id      TEXT NOT NULL,
+          food_id        TEXT,
+          name           TEXT NOT NULL,
+          quantity_value REAL,
+          quantity_unit  TEXT,
+          sort_order     INTEGER DEFAULT 0,
+          brand          TEXT DEFAULT '',
+          FOREIGN KEY(recipe_id) REFERENCES recipes(id) ON DELETE CASCADE
+        );
+
+        -- ── Recipe steps ────────────────────────────────────
+        CREATE TABLE IF NOT EXISTS recipe_steps (
+          id            TEXT PRIMARY KEY,
+          recipe_id     TEXT NOT NULL,
+          text          TEXT NOT NULL,
+          image_url     TEXT DEFAULT '',
+          sort_order    INTEGER DEFAULT 0,
+          FOREIGN KEY(recipe_id) REFERENCES recipes(id) ON DELETE CASCADE
+        );
+
+        -- ── Recipe tags ─────────────────────────────────────
+        CREATE TABLE IF NOT EXISTS recipe_tags (
+          recipe_id     TEXT NOT NULL,
+          tag           TEXT NOT NULL,
+          PRIMARY KEY(recipe_id, tag),
+          FOREIGN KEY(recipe_id) REFERENCES recipes(id) ON DELETE CASCADE
+        );
+
+        -- ── Saved recipes (bookmarks) ──────────────────────
+        CREATE TABLE IF NOT EXISTS saved_recipes (
+          user_id       TEXT NOT NULL,
+          recipe_id     TEXT NOT NULL,
+          created_at    TEXT DEFAULT (datetime('now')),
+          PRIMARY KEY(user_id, recipe_id),
+          FOREIGN KEY(user_id)   REFERENCES users(id)   ON DELETE CASCADE,
+          FOREIGN KEY(recipe_id) REFERENCES recipes(id)  ON DELETE CASCADE
+        );
+
+        -- ── Foods (master ingredient list) ──────────────────
+        CREATE TABLE IF NOT EXISTS foods (
+          id            TEXT PRIMARY KEY,
+          name          TEXT NOT NULL,
+          name_it       TEXT,
+          default_unit  TEXT DEFAULT 'GRAM',
+          created_by    TEXT,
+          kcal          REAL,
+          protein       REAL,
+          fat           REAL,
+          carbs         REAL,
+          fiber         REAL,
+          portion_value REAL,
+          FOREIGN KEY(created_by) REFERENCES users(id) ON DELETE SET NULL
+        );
+
+        -- ── Planning ────────────────────────────────────────
+        CREATE TABLE IF NOT EXISTS planning (
+          id            TEXT PRIMARY KEY,
+          recipe_id     TEXT NOT NULL,
+          recipe_name   TEXT NOT NULL DEFAULT '',
+          week          TEXT NOT NULL,
+          day           TEXT,
+          meal          TEXT,
+          user_id       TEXT NOT NULL,
+          servings      INTEGER DEFAULT 1,
+          assigned_to   TEXT REFERENCES users(id) ON DELETE SET NULL,
+          FOREIGN KEY(recipe_id) REFERENCES recipes(id)  ON DELETE CASCADE,
+          FOREIGN KEY(user_id)   REFERENCES users(id)    ON DELETE CASCADE
+        );
+
+        -- ── Followers ───────────────────────────────────────
+        CREATE TABLE IF NOT EXISTS followers (
+          follower_id   TEXT NOT NULL,
+          followed_id   TEXT NOT NULL,
+          created_at    TEXT DEFAULT (datetime('now')),
+          PRIMARY KEY(follower_id, followed_id),
+          FOREIGN KEY(follower_id) REFERENCES users(id) ON DELETE CASCADE,
+          FOREIGN KEY(followed_id) REFERENCES users(id) ON DELETE CASCADE
+        );
+
+        -- ── Groups ──────────────────────────────────────────
+        CREATE TABLE IF NOT EXISTS groups_table (
+          id            TEXT PRIMARY KEY,
+          created_at    TEXT DEFAULT (datetime('now'))
+        );
+
+        CREATE TABLE IF NOT EXISTS group_members (
+          group_id      TEXT NOT NULL,
+          user_id       TEXT NOT NULL,
+          PRIMARY KEY(group_id, user_id),
+          FOREIGN KEY(group_id) REFERENCES groups_table(id) ON DELETE CASCADE,
+          FOREIGN KEY(user_id)  REFERENCES users(id)        ON DELETE CASCADE
+        );
+
+        -- ── JWT signing keys (see key-store.ts) ─────────────
+        CREATE TABLE IF NOT EXISTS jwt_keys (
+          kid         TEXT PRIMARY KEY,
+          public_key  TEXT NOT NULL,
+          private_key TEXT NOT NULL,
+          created_at  INTEGER NOT NULL,
+          expires_at  INTEGER NOT NULL,
+          is_current  INTEGER NOT NULL DEFAULT 0
+        );
+      `);
+
+      // Databases created before versioned migrations may lack later columns
+      for (const col of ['kcal', 'protein', 'fat', 'carbs', 'fiber', 'portion_value']) {
+        await addColumnIfMissing(db, 'foods', col, 'REAL');
+      }
+      await addColumnIfMissing(db, 'foods', 'name_it', 'TEXT');
+      await addColumnIfMissing(db, 'recipes', 'min_servings', 'INTEGER DEFAULT 1');
+      await addColumnIfMissing(db, 'recipes', 'split_servings', 'INTEGER DEFAULT 1');
+      await addColumnIfMissing(db, 'recipes', 'wip', 'INTEGER DEFAULT 0');
+      await addColumnIfMissing(db, 'recipes', 'notes', "TEXT DEFAULT ''");
+      await addColumnIfMissing(db, 'planning', 'servings', 'INTEGER DEFAULT 1');
+      await addColumnIfMissing(
+        db,
+        'planning',
+        'assigned_to',
+        'TEXT REFERENCES users(id) ON DELETE SET NULL',
+      );
+      await addColumnIfMissing(db, 'recipe_ingredients', 'brand', "TEXT DEFAULT ''");
+    },
+  },
+  {
+    version: 2,
+    name: 'hot-path indexes',
+    up: async (db) => {
+      await db.exec(`
+        -- planning week views, shopping list, nutrition and suggestions
+        CREATE INDEX IF NOT EXISTS idx_planning_user_week ON planning(user_id, week, recipe_id);
+        CREATE INDEX IF NOT EXISTS idx_planning_recipe ON planning(recipe_id);
+        CREATE INDEX IF NOT EXISTS idx_planning_assigned_to ON planning(assigned_to);
+        -- recipe hydration and shopping-list joins
+        CREATE INDEX IF NOT EXISTS idx_recipe_ingredients_recipe ON recipe_ingredients(recipe_id, sort_order);
+        CREATE INDEX IF NOT EXISTS idx_recipe_steps_recipe ON recipe_steps(recipe_id, sort_order);
+        -- recipe lists (mine, saved, discover)
+        CREATE INDEX IF NOT EXISTS idx_recipes_user_created ON recipes(user_id, created_at);
+        CREATE INDEX IF NOT EXISTS idx_recipes_created ON recipes(created_at);
+        CREATE INDEX IF NOT EXISTS idx_saved_recipes_user_created ON saved_recipes(user_id, created_at);
+        CREATE INDEX IF NOT EXISTS idx_saved_recipes_recipe ON saved_recipes(recipe_id);
+        -- follower counts and group lookups
+        CREATE INDEX IF NOT EXISTS idx_followers_followed ON followers(followed_id, follower_id);
+        CREATE INDEX IF NOT EXISTS idx_group_members_user ON group_members(user_id, group_id);
+        -- foods catalogue ordering
+        CREATE INDEX IF NOT EXISTS idx_foods_name ON foods(name);
+        CREATE INDEX IF NOT EXISTS idx_foods_created_by ON foods(created_by);
+      `);
+    },
+  },
+  {
+    version: 3,
+    name: 'keyset pagination indexes',
+    up: async (db) => {
+      // Recipe lists page on (created_at, id); the id tiebreaker must be in the index
+      await db.exec(`
+        DROP INDEX IF EXISTS idx_recipes_user_created;
+        DROP INDEX IF EXISTS idx_recipes_created;
+        DROP INDEX IF EXISTS idx_saved_recipes_user_created;
+        CREATE INDEX IF NOT EXISTS idx_recipes_user_created_id ON recipes(user_id, created_at, id);
+        CREATE INDEX IF NOT EXISTS idx_recipes_created_id ON recipes(created_at, id);
+        CREATE INDEX IF NOT EXISTS idx_saved_recipes_user_created_recipe ON saved_recipes(user_id, created_at, recipe_id);
+      `);
+    },
+  },
+  {
+    version: 4,
+    name: 'full-text search',
+    up: async (db) => {
+      // FTS rows share the rowid of their source row. Recipe documents are
+      // rebuilt by the triggers of migration 11 (see recipe-refresh.ts).
+      await db.exec(`
+        CREATE VIRTUAL TABLE IF NOT EXISTS recipes_fts USING fts5(
+          name, description, tags, ingredients,
+          tokenize = 'unicode61 remove_diacritics 2', prefix = '2 3'
+        );
+        CREATE VIRTUAL TABLE IF NOT EXISTS foods_fts USING fts5(
+          name, name_it,
+          tokenize = 'unicode61 remove_diacritics 2', prefix = '2 3'
+        );
+
+        CREATE TRIGGER IF NOT EXISTS recipes_fts_ad AFTER DELETE ON recipes BEGIN
+          DELETE FROM recipes_fts WHERE rowid = old.rowid;
+        END;
+
+        CREATE TRIGGER IF NOT EXISTS foods_fts_ai AFTER INSERT ON foods BEGIN
+          INSERT INTO foods_fts (rowid, name, name_it) VALUES (new.rowid, new.name, COALESCE(new.name_it, ''));
+        END;
+        CREATE TRIGGER IF NOT EXISTS foods_fts_au AFTER UPDATE OF name, name_it ON foods BEGIN
+          DELETE FROM foods_fts WHERE rowid = old.rowid;
+          INSERT INTO foods_fts (rowid, name, name_it) VALUES (new.rowid, new.name, COALESCE(new.name_it, ''));
+        END;
+        CREATE TRIGGER IF NOT EXISTS foods_fts_ad AFTER DELETE ON foods BEGIN
+          DELETE FROM foods_fts WHERE rowid = old.rowid;
+        END;
+
+        -- index rows that existed before this migration
+        DELETE FROM recipes_fts;
+        ${refreshSearchDocumentsSql('(SELECT id FROM recipes)')}
+        DELETE FROM foods_fts;
+        INSERT INTO foods_fts (rowid, name, name_it)
+          SELECT rowid, name, COALESCE(name_it, '') FROM foods;
+      `);
+    },
+  },
+  {
+    version: 5,
+    name: 'foods catalogue versioning',
+    up: async (db) => {
+      // See foods-catalogue.ts: MAX(version) is the catalogue version
+      await addColumnIfMissing(db, 'foods', 'version', 'INTEGER NOT NULL DEFAULT 0');
+      await db.exec(`
+        UPDATE foods SET version = rowid;
+        CREATE INDEX IF NOT EXISTS idx_foods_version ON foods(version);
+
+        CREATE TRIGGER IF NOT EXISTS foods_version_ai AFTER INSERT ON foods BEGIN
+          UPDATE foods SET version = (SELECT MAX(version) + 1 FROM foods) WHERE rowid = new.rowid;
+        END;
+        -- seedFoods() upserts every boot: only bump rows whose content changed
+        CREATE TRIGGER IF NOT EXISTS foods_version_au AFTER UPDATE ON foods
+        WHEN new.version = old.version AND (
+          new.name IS NOT old.name OR new.name_it IS NOT old.name_it
+          OR new.default_unit IS NOT old.default_unit OR new.portion_value IS NOT old.portion_value
+          OR new.kcal IS NOT old.kcal OR new.protein IS NOT old.protein OR new.fat IS NOT old.fat
+          OR new.carbs IS NOT old.carbs OR new.fiber IS NOT old.fiber
+        ) BEGIN
+          UPDATE foods SET version = (SELECT MAX(version) + 1 FROM foods) WHERE rowid = new.rowid;
+        END;
+      `);
+    },
+  },
+  {
+    version: 6,
+    name: 'incremental shopping lists',
+    up: async (db) => {
+      // shopping_list_entries holds what each planning row contributes (one row
+      // per ingredient, already scaled and converted to the canonical unit);
+      // shopping_list_totals is their running sum per (user, week, item, unit).
+      // Entries carry their own values, so removing one never needs a join —
+      // which keeps totals right when planning rows disappear by FK cascade.
+      // Recipe changes rebuild entries through the triggers of migration 11.
+      await db.exec(`
+        CREATE TABLE IF NOT EXISTS unit_conversions (
+          unit           TEXT PRIMARY KEY,
+          canonical_unit TEXT NOT NULL,
+          factor         REAL NOT NULL
+        );
+        INSERT OR REPLACE INTO unit_conversions (unit, canonical_unit, factor) VALUES
+          ('GRAM', 'GRAM', 1),
+          ('KILO', 'GRAM', 1000),
+          ('MILLILITER', 'MILLILITER', 1),
+          ('LITER', 'MILLILITER', 1000),
+          ('PIECE', 'PIECE', 1);
+
+        CREATE TABLE IF NOT EXISTS shopping_list_entries (
+          planning_id TEXT NOT NULL,
+          user_id     TEXT NOT NULL,
+          week        TEXT NOT NULL,
+          item_key    TEXT NOT NULL,
+          unit        TEXT NOT NULL,
+          food_id     TEXT,
+          name        TEXT NOT NULL,
+          quantity    REAL NOT NULL
+        );
+        CREATE INDEX IF NOT EXISTS idx_shopping_list_entries_planning ON shopping_list_entries(planning_id);
+
+        CREATE TABLE IF NOT EXISTS shopping_list_totals (
+          user_id     TEXT NOT NULL,
+          week        TEXT NOT NULL,
+          item_key    TEXT NOT NULL,
+          unit        TEXT NOT NULL,
+          food_id     TEXT,
+          name        TEXT NOT NULL,
+          quantity    REAL NOT NULL,
+          entries     INTEGER NOT NULL,
+          PRIMARY KEY (user_id, week, item_key, unit)
+        );
+
+        CREATE TRIGGER IF NOT EXISTS shopping_list_entries_ai AFTER INSERT ON shopping_list_entries BEGIN
+          INSERT INTO shopping_list_totals (user_id, week, item_key, unit, food_id, name, quantity, entries)
+            VALUES (new.user_id, new.week, new.item_key, new.unit, new.food_id, new.name, new.quantity, 1)
+            ON CONFLICT (user_id, week, item_key, unit)
+            DO UPDATE SET quantity = quantity + excluded.quantity, entries = entries + 1;
+        END;
+        CREATE TRIGGER IF NOT EXISTS shopping_list_entries_ad AFTER DELETE ON shopping_list_entries BEGIN
+          UPDATE shopping_list_totals SET quantity = quantity - old.quantity, entries = entries - 1
+            WHERE user_id = old.user_id AND week = old.week AND item_key = old.item_key AND unit = old.unit;
+          DELETE FROM shopping_list_totals
+            WHERE user_id = old.user_id AND week = old.week AND item_key = old.item_key AND unit = old.unit
+              AND entries <= 0;
+        END;
+
+        CREATE TRIGGER IF NOT EXISTS planning_shopping_ai AFTER INSERT ON planning BEGIN
+          ${insertShoppingEntriesSql('p.id = new.id')}
+        END;
+        CREATE TRIGGER IF NOT EXISTS planning_shopping_au
+        AFTER UPDATE OF recipe_id, week, user_id, servings ON planning BEGIN
+          DELETE FROM shopping_list_entries WHERE planning_id = old.id;
+          ${insertShoppingEntriesSql('p.id = new.id')}
+        END;
+        CREATE TRIGGER IF NOT EXISTS planning_shopping_ad AFTER DELETE ON planning BEGIN
+          DELETE FROM shopping_list_entries WHERE planning_id = old.id;
+        END;
+
+        DELETE FROM shopping_list_entries;
+        ${insertShoppingEntriesSql('1')}
+      `);
+    },
+  },
+  {
+    version: 7,
+    name: 'materialized recipe nutrition',
+    up: async (db) => {
+      // recipe_nutrition holds per-serving kcal/macros for each recipe. Foods
+      // without any nutrition data are skipped; quantities are turned into
+      // grams through unit_conversions.grams (PIECE ≈ 100 g, 1 ml ≈ 1 g).
+      // Recipe changes recompute it through the triggers of migration 11.
+      await addColumnIfMissing(db, 'unit_conversions', 'grams', 'REAL');
+      await db.exec(`
+        UPDATE unit_conversions SET grams = CASE unit
+          WHEN 'GRAM' THEN 1 WHEN 'KILO' THEN 1000
+          WHEN 'MILLILITER' THEN 1 WHEN 'LITER' THEN 1000
+          WHEN 'PIECE' THEN 100 END;
+
+        CREATE TABLE IF NOT EXISTS recipe_nutrition (
+          recipe_id TEXT PRIMARY KEY,
+          kcal      REAL NOT NULL,
+          protein   REAL NOT NULL,
+          fat       REAL NOT NULL,
+          carbs     REAL NOT NULL,
+          fiber     REAL NOT NULL,
+          items     INTEGER NOT NULL -- ingredients with nutrition data
+        );
+        CREATE INDEX IF NOT EXISTS idx_recipe_ingredients_food ON recipe_ingredients(food_id);
+
+        CREATE TRIGGER IF NOT EXISTS recipes_nutrition_ad AFTER DELETE ON recipes BEGIN
+          DELETE FROM recipe_nutrition WHERE recipe_id = old.id;
+        END;
+        -- seedFoods() upserts every boot: only recompute when a value changed
+        CREATE TRIGGER IF NOT EXISTS foods_nutrition_au
+        AFTER UPDATE OF kcal, protein, fat, carbs, fiber, default_unit ON foods
+        WHEN new.kcal IS NOT old.kcal OR new.protein IS NOT old.protein OR new.fat IS NOT old.fat
+          OR new.carbs IS NOT old.carbs OR new.fiber IS NOT old.fiber
+          OR new.default_unit IS NOT old.default_unit BEGIN
+          ${refreshNutritionSql('(SELECT recipe_id FROM recipe_ingredients WHERE food_id = new.id)')}
+        END;
+
+        ${refreshNutritionSql('(SELECT id FROM recipes)')}
+      `);
+    },
+  },
+  {
+    version: 8,
+    name: 'recipe name lookup index',
+    up: async (db) => {
+      // Imports de-duplicate and quick-add finds products by (user_id, name)
+      await db.exec('CREATE INDEX IF NOT EXISTS idx_recipes_user_name ON recipes(user_id, name);');
+    },
+  },
+  {
+    version: 9,
+    name: 'followed chefs feed',
+    up: async (db) => {
+      // See feed.ts: one row per (reader, recipe), pushed when the recipe is created
+      await db.exec(`
+        CREATE TABLE IF NOT EXISTS feed_items (
+          user_id     TEXT NOT NULL,
+          created_at  TEXT NOT NULL,
+          recipe_id   TEXT NOT NULL,
+          author_id   TEXT NOT NULL,
+          PRIMARY KEY(user_id, created_at, recipe_id),
+          FOREIGN KEY(user_id)   REFERENCES users(id)   ON DELETE CASCADE,
+          FOREIGN KEY(recipe_id) REFERENCES recipes(id) ON DELETE CASCADE
+        ) WITHOUT ROWID;
+        CREATE INDEX IF NOT EXISTS idx_feed_items_recipe ON feed_items(recipe_id);
+        CREATE INDEX IF NOT EXISTS idx_feed_items_user_author ON feed_items(user_id, author_id);
+
+        CREATE TABLE IF NOT EXISTS feed_pull_authors (
+          user_id     TEXT PRIMARY KEY,
+          FOREIGN KEY(user_id) REFERENCES users(id) ON DELETE CASCADE
+        ) WITHOUT ROWID;
+
+        INSERT OR IGNORE INTO feed_pull_authors (user_id)
+        SELECT followed_id FROM followers
+        GROUP BY followed_id HAVING COUNT(*) >= ${FEED_FANOUT_LIMIT};
+
+        INSERT OR IGNORE INTO feed_items (user_id, created_at, recipe_id, author_id)
+        SELECT f.follower_id, r.created_at, r.id, r.user_id
+        FROM (
+          SELECT id, user_id, created_at,
+                 ROW_NUMBER() OVER (PARTITION BY user_id ORDER BY created_at DESC, id DESC) AS n
+          FROM recipes
+        ) r
+        JOIN followers f ON f.followed_id = r.user_id
+        WHERE r.n <= ${FEED_BACKFILL}
+          AND r.created_at IS NOT NULL
+          AND r.user_id NOT IN (SELECT user_id FROM feed_pull_authors);
+      `);
+    },
+  },
+  {
+    version: 10,
+    name: 'user counters and directory index',
+    up: async (db) => {
+      // Profile stats become a primary-key read; triggers keep them exact
+      await addColumnIfMissing(db, 'users', 'saved_count', 'INTEGER NOT NULL DEFAULT 0');
+      await addColumnIfMissing(db, 'users', 'followers_count', 'INTEGER NOT NULL DEFAULT 0');
+      await addColumnIfMissing(db, 'users', 'followed_count', 'INTEGER NOT NULL DEFAULT 0');
+      await db.exec(`
+        UPDATE users SET
+          saved_count     = (SELECT COUNT(*) FROM saved_recipes WHERE user_id = users.id),
+          followers_count = (SELECT COUNT(*) FROM followers WHERE followed_id = users.id),
+          followed_count  = (SELECT COUNT(*) FROM followers WHERE follower_id = users.id);
+
+        CREATE TRIGGER IF NOT EXISTS followers_count_ai AFTER INSERT ON followers BEGIN
+          UPDATE users SET followers_count = followers_count + 1 WHERE id = new.followed_id;
+          UPDATE users SET followed_count = followed_count + 1 WHERE id = new.follower_id;
+        END;
+        CREATE TRIGGER IF NOT EXISTS followers_count_ad AFTER DELETE ON followers BEGIN
+          UPDATE users SET followers_count = followers_count - 1 WHERE id = old.followed_id;
+          UPDATE users SET followed_count = followed_count - 1 WHERE id = old.follower_id;
+        END;
+        CREATE TRIGGER IF NOT EXISTS saved_count_ai AFTER INSERT ON saved_recipes BEGIN
+          UPDATE users SET saved_count = saved_count + 1 WHERE id = new.user_id;
+        END;
+        CREATE TRIGGER IF NOT EXISTS saved_count_ad AFTER DELETE ON saved_recipes BEGIN
+          UPDATE users SET saved_count = saved_count - 1 WHERE id = old.user_id;
+        END;
+
+        -- GET /users?q= walks names in this order from the typed prefix
+        CREATE INDEX IF NOT EXISTS idx_users_name ON users(name COLLATE NOCASE, id);
+      `);
+    },
+  },
+  {
+    version: 11,
+    name: 'batched recipe refresh',
+    up: async (db) => {
+      // See recipe-refresh.ts: the recipe and child-row triggers mark the
+      // recipe, and its search document, nutrition and shopping entries are
+      // rebuilt once — at once, or at the end of a batch
+      await db.exec(`
+        CREATE TABLE IF NOT EXISTS dirty_recipes (
+          recipe_id TEXT PRIMARY KEY
+        ) WITHOUT ROWID;
+        -- Holds its single row while a batch is open (inside a transaction)
+        CREATE TABLE IF NOT EXISTS recipe_refresh_deferred (
+          id INTEGER PRIMARY KEY CHECK (id = 1)
+        );
+
+        CREATE TRIGGER IF NOT EXISTS dirty_recipes_ai AFTER INSERT ON dirty_recipes
+        WHEN NOT EXISTS (SELECT 1 FROM recipe_refresh_deferred) BEGIN
+          ${refreshRecipesSql('(new.recipe_id)')}
+          DELETE FROM dirty_recipes WHERE recipe_id = new.recipe_id;
+        END;
+
+        CREATE TRIGGER IF NOT EXISTS recipes_dirty_ai AFTER INSERT ON recipes BEGIN
+          INSERT OR IGNORE INTO dirty_recipes (recipe_id) VALUES (new.id);
+        END;
+        CREATE TRIGGER IF NOT EXISTS recipes_dirty_au
+        AFTER UPDATE OF name, description, servings ON recipes BEGIN
+          INSERT OR IGNORE INTO dirty_recipes (recipe_id) VALUES (new.id);
+        END;
+        CREATE TRIGGER IF NOT EXISTS recipe_tags_dirty_ai AFTER INSERT ON recipe_tags BEGIN
+          INSERT OR IGNORE INTO dirty_recipes (recipe_id) VALUES (new.recipe_id);
+        END;
+        CREATE TRIGGER IF NOT EXISTS recipe_tags_dirty_ad AFTER DELETE ON recipe_tags BEGIN
+          INSERT OR IGNORE INTO dirty_recipes (recipe_id) VALUES (old.recipe_id);
+        END;
+        CREATE TRIGGER IF NOT EXISTS recipe_ingredients_dirty_ai AFTER INSERT ON recipe_ingredients BEGIN
+          INSERT OR IGNORE INTO dirty_recipes (recipe_id) VALUES (new.recipe_id);
+        END;
+        CREATE TRIGGER IF NOT EXISTS recipe_ingredients_dirty_au
+        AFTER UPDATE OF recipe_id, food_id, name, quantity_value, quantity_unit ON recipe_ingredients BEGIN
+          INSERT OR IGNORE INTO dirty_recipes (recipe_id)
+            SELECT old.recipe_id UNION SELECT new.recipe_id;
+        END;
+        CREATE TRIGGER IF NOT EXISTS recipe_ingredients_dirty_ad AFTER DELETE ON recipe_ingredients BEGIN
+          INSERT OR IGNORE INTO dirty_recipes (recipe_id) VALUES (old.recipe_id);
+        END;
+      `);
+    },
+  },
+];
+
+export const LATEST_SCHEMA_VERSION = MIGRATIONS[MIGRATIONS.length - 1].version;
+
+/** Read the schema version stored in the database header. */
+export async function getSchemaVersion(db: Database): Promise<number> {
+  const row = await db.get<{ user_version: number }>('PRAGMA user_version');
+  return row?.user_version ?? 0;
+}
+
+/**
+ * Bring the schema up to LATEST_SCHEMA_VERSION.
+ * Returns the version the database was at before migrating.
+ */
+export async function migrate(db: Database): Promise<number> {
+  const current = await getSchemaVersion(db);
+  if (current >= LATEST_SCHEMA_VERSION) return current; // fast path: no DDL
+
+  const pending = MIGRATIONS.filter((m) => m.version > current);
+  await db.exec('BEGIN IMMEDIATE');
+  try {
+    for (const m of pending) {
+      await m.up(db);
+    }
+    await db.exec(`PRAGMA user_version = ${LATEST_SCHEMA_VERSION}`);
+    await db.exec('COMMIT');
+  } catch (err) {
+    await db.exec('ROLLBACK');
+    throw err;
+  }
+  console.log(
+    `[DB] Migrated schema v${current} → v${LATEST_SCHEMA_VERSION} (${pending
+      .map((m) => m.name)
+      .join(', ')})`,
+  );
+  return current;
+}
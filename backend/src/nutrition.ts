@@ -0,0 +1,104 @@
+/**
+ * Nutrition summaries over planned recipes.
+ *
+ * Schema migration v7 keeps `recipe_nutrition` (per-serving kcal and macros
+ * of every recipe) current with triggers on recipes, recipe_ingredients and
+ * foods. A summary is then one grouped sum over the planning rows in range,
+ * each multiplied by its planned servings.
+ */
+
+import { Database } from 'sqlite';
+
+export interface DayNutrition {
+  kcal: number;
+  protein: number;
+  fat: number;
+  carbs: number;
+  fiber: number;
+}
+
+export interface WeekNutrition {
+  week: string;
+  days: Record<string, DayNutrition>;
+  weekTotal: DayNutrition;
+}
+
+type NutritionRow = DayNutrition & { week: string; day: string | null };
+
+const NUTRIENTS = ['kcal', 'protein', 'fat', 'carbs', 'fiber'] as const;
+
+const zero = (): DayNutrition => ({ kcal: 0, protein: 0, fat: 0, carbs: 0, fiber: 0 });
+
+const round = (v: number) => Math.round(v * 10) / 10;
+
+function roundAll(n: DayNutrition): DayNutrition {
+  return {
+    kcal: round(n.kcal),
+    protein: round(n.protein),
+    fat: round(n.fat),
+    carbs: round(n.carbs),
+    fiber: round(n.fiber),
+  };
+}
+
+/**
+ * Summaries for every week in [fromWeek, toWeek] (ISO start dates) that has
+ * planned recipes with nutrition data, in week order, plus the range total.
+ *
+ * With `assignedTo` (a user id), only items assigned to everyone or to that
+ * user are counted.
+ */
+export async function summarizeNutrition(
+  db: Database,
+  userIds: string[],
+  fromWeek: string,
+  toWeek: string,
+  assignedTo?: string,
+): Promise<{ weeks: WeekNutrition[]; total: DayNutrition }> {
+  if (userIds.length === 0) return { weeks: [], total: zero() };
+  const placeholders = userIds.map(() => '?').join(',');
+  const params: unknown[] = [...userIds, fromWeek, toWeek];
+  let assignedFilter = '';
+  if (assignedTo) {
+    assignedFilter = ' AND (p.assigned_to IS NULL OR p.assigned_to LIKE ?)';
+    params.push(`%${assignedTo}%`);
+  }
+
+  const servings = 'COALESCE(NULLIF(p.servings, 0), 1)';
+  const rows = await db.all<NutritionRow[]>(
+    `SELECT p.week, p.day, ${NUTRIENTS.map((n) => `SUM(rn.${n} * ${servings}) AS ${n}`).join(', ')}
+     FROM planning p
+     JOIN recipe_nutrition rn ON rn.recipe_id = p.recipe_id
+     WHERE p.user_id IN (${placeholders}) AND p.week BETWEEN ? AND ?
+       AND rn.items > 0${assignedFilter}
+     GROUP BY p.week, p.day
+     ORDER BY p.week`,
+    ...params,
+  );
+
+  const weeks = new Map<string, { days: Record<string, DayNutrition>; total: DayNutrition }>();
+  const total = zero();
+  for (const r of rows) {
+    let week = weeks.get(r.week);
+    if (!week) {
+      week = { days: {}, total: zero() };
+      weeks.set(r.week, week);
+    }
+    const day = r.day || 'UNASSIGNED';
+    const acc = (week.days[day] ??= zero());
+    for (const n of NUTRIENTS) {
+      acc[n] += r[n];
+      week.total[n] += r[n];
+      total[n] += r[n];
+    }
+  }
+
+  return {
+    weeks: [...weeks].map(([week, w]) => ({
+      week,
+      days: Object.fromEntries(Object.entries(w.days).map(([d, n]) => [d, roundAll(n)])),
+      weekTotal: roundAll(w.total),
+    })),
+    total: roundAll(total),
+  };
+}
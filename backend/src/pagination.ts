@@ -0,0 +1,46 @@
+/**
+ * Keyset (cursor) pagination helpers.
+ *
+ * A cursor is the sort key of the last row of a page, e.g. `[created_at, id]`,
+ * serialized as base64url JSON. The next page is fetched with a row-value
+ * comparison such as `(created_at, id) < (?, ?)`, which SQLite answers with a
+ * single index range scan no matter how deep the client has paged.
+ *
+ * List endpoints keep returning a JSON array; the cursor for the next page
+ * travels in the `X-Next-Cursor` response header (absent on the last page).
+ */
+
+export const NEXT_CURSOR_HEADER = 'X-Next-Cursor';
+
+/** Hard upper bound for `?limit=` on any paginated endpoint. */
+export const MAX_PAGE_SIZE = 200;
+
+export type CursorKey = (string | number)[];
+
+export function encodeCursor(key: CursorKey): string {
+  return Buffer.from(JSON.stringify(key)).toString('base64url');
+}
+
+/** Decode a cursor of `size` parts; returns null if it is malformed. */
+export function decodeCursor(raw: unknown, size: number): CursorKey | null {
+  if (typeof raw !== 'string' || !raw) return null;
+  try {
+    const key = JSON.parse(Buffer.from(raw, 'base64url').toString('utf8'));
+    if (!Array.isArray(key) || key.length !== size) return null;
+    if (!key.every((k) => typeof k === 'string' || typeof k === 'number')) return null;
+    return key;
+  } catch {
+    return null;
+  }
+}
+
+/**
+ * Parse `?limit=`. Returns `fallback` when absent (which may be undefined,
+ * meaning "no limit"), and clamps explicit values to 1..MAX_PAGE_SIZE.
+ */
+export function parseLimit(raw: unknown, fallback?: number): number | undefined {
+  if (raw === undefined || raw === '') return fallback;
+  const parsed = Math.trunc(Number(raw));
+  if (!Number.isFinite(parsed)) return fallback;
+  return Math.min(MAX_PAGE_SIZE, Math.max(1, parsed));
+}
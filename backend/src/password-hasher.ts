@@ -0,0 +1,240 @@
+/**
+ * Password hashing on a bounded worker_threads pool.
+ *
+ * bcryptjs is pure JavaScript, so a single `hash`/`compare` at cost 10 keeps
+ * the thread busy for tens of milliseconds. Running it on the main thread
+ * would stall every other request and socket event during a burst of logins;
+ * here each job runs on one of PASSWORD_HASH_WORKERS worker threads instead.
+ *
+ * Jobs wait in a FIFO queue while all workers are busy. Once
+ * PASSWORD_HASH_QUEUE jobs are waiting, new ones are rejected with
+ * `PasswordHasherBusyError` so callers can answer 503 rather than letting
+ * latency grow without bound.
+ */
+
+import os from 'os';
+import { Worker } from 'worker_threads';
+
+const BCRYPT_ROUNDS = 10;
+
+/** Latency samples kept for percentiles (a sliding window of recent jobs). */
+const LATENCY_WINDOW = 1000;
+
+/** Runs in each worker; plain JS so it works under ts-node, jest and dist alike. */
+const WORKER_SOURCE = `
+const { parentPort } = require('worker_threads');
+const bcrypt = require(${JSON.stringify(require.resolve('bcryptjs'))});
+parentPort.on('message', async ({ id, op, password, arg }) => {
+  try {
+    const result =
+      op === 'hash' ? await bcrypt.hash(password, arg) : await bcrypt.compare(password, arg);
+    parentPort.postMessage({ id, result });
+  } catch (err) {
+    parentPort.postMessage({ id, error: err instanceof Error ? err.message : String(err) });
+  }
+});
+`;
+
+export class PasswordHasherBusyError extends Error {
+  constructor() {
+    super('Password hashing queue is full');
+    this.name = 'PasswordHasherBusyError';
+  }
+}
+
+export interface PasswordHasherStats {
+  workers: number;
+  busyWorkers: number;
+  queueDepth: number;
+  maxQueueDepth: number;
+  queueLimit: number;
+  completed: number;
+  failed: number;
+  rejected: number;
+  /** Time from submission to result, over the last LATENCY_WINDOW jobs. */
+  latencyMs: { p50: number; p95: number; p99: number };
+  /** Time spent waiting for a free worker, over the same window. */
+  waitMs: { p50: number; p95: number; p99: number };
+}
+
+type Op = 'hash' | 'compare';
+
+interface Job {
+  id: number;
+  op: Op;
+  password: string;
+  arg: string | number;
+  submittedAt: number;
+  startedAt?: number;
+  resolve: (value: any) => void;
+  reject: (err: Error) => void;
+}
+
+interface PoolWorker {
+  worker: Worker;
+  job: Job | null;
+}
+
+function percentiles(samples: number[]) {
+  if (samples.length === 0) return { p50: 0, p95: 0, p99: 0 };
+  const sorted = [...samples].sort((a, b) => a - b);
+  const at = (p: number) => sorted[Math.min(sorted.length - 1, Math.ceil(p * sorted.length) - 1)];
+  const round = (v: number) => Math.round(v * 100) / 100;
+  return { p50: round(at(0.5)), p95: round(at(0.95)), p99: round(at(0.99)) };
+}
+
+export class PasswordHasherPool {
+  private readonly workers: PoolWorker[] = [];
+  private readonly queue: Job[] = [];
+  private nextId = 1;
+  private completed = 0;
+  private failed = 0;
+  private rejected = 0;
+  private maxQueueDepth = 0;
+  private latencies: number[] = [];
+  private waits: number[] = [];
+
+  constructor(
+    readonly size: number,
+    readonly queueLimit: number,
+    readonly rounds = BCRYPT_ROUNDS,
+  ) {}
+
+  hash(password: string): Promise<string> {
+    return this.submit('hash', password, this.rounds);
+  }
+
+  compare(password: string, hash: string): Promise<boolean> {
+    return this.submit('compare', password, hash);
+  }
+
+  stats(): PasswordHasherStats {
+    return {
+      workers: this.workers.length,
+      busyWorkers: this.workers.filter((w) => w.job).length,
+      queueDepth: this.queue.length,
+      maxQueueDepth: this.maxQueueDepth,
+      queueLimit: this.queueLimit,
+      completed: this.completed,
+      failed: this.failed,
+      rejected: this.rejected,
+      latencyMs: percentiles(this.latencies),
+      waitMs: percentiles(this.waits),
+    };
+  }
+
+  /** Terminate all workers; queued jobs are rejected. */
+  async close(): Promise<void> {
+    for (const job of this.queue.splice(0)) job.reject(new Error('Password hasher closed'));
+    const workers = this.workers.splice(0);
+    await Promise.all(workers.map((w) => w.worker.terminate()));
+  }
+
+  private submit<T>(op: Op, password: string, arg: string | number): Promise<T> {
+    return new Promise<T>((resolve, reject) => {
+      const job: Job = {
+        id: this.nextId++,
+        op,
+        password,
+        arg,
+        submittedAt: performance.now(),
+        resolve,
+        reject,
+      };
+
+      const idle = this.workers.find((w) => !w.job) ?? this.spawn();
+      if (idle) {
+        this.run(idle, job);
+        return;
+      }
+      if (this.queue.length >= this.queueLimit) {
+        this.rejected++;
+        reject(new PasswordHasherBusyError());
+        return;
+      }
+      this.queue.push(job);
+      this.maxQueueDepth = Math.max(this.maxQueueDepth, this.queue.length);
+    });
+  }
+
+  /** Start a new worker if the pool is not full yet (workers are created lazily). */
+  private spawn(): PoolWorker | null {
+    if (this.workers.length >= this.size) return null;
+    const entry: PoolWorker = { worker: new Worker(WORKER_SOURCE, { eval: true }), job: null };
+    // Idle workers must not keep the process alive
+    entry.worker.unref();
+    entry.worker.on('message', (msg: { id: number; result?: unknown; error?: string }) => {
+      const job = entry.job;
+      if (!job || job.id !== msg.id) return;
+      entry.job = null;
+      if (msg.error) {
+        this.failed++;
+        job.reject(new Error(msg.error));
+      } else {
+        this.completed++;
+        this.record(job);
+        job.resolve(msg.result);
+      }
+      this.next(entry);
+    });
+    entry.worker.on('error', (err) => this.replace(entry, err));
+    entry.worker.on('exit', (code) => {
+      if (this.workers.includes(entry)) this.replace(entry, new Error(`Worker exited (${code})`));
+    });
+    this.workers.push(entry);
+    return entry;
+  }
+
+  /** Drop a crashed worker, fail its job, and keep the queue moving. */
+  private replace(entry: PoolWorker, err: Error) {
+    const index = this.workers.indexOf(entry);
+    if (index === -1) return;
+    this.workers.splice(index, 1);
+    if (entry.job) {
+      this.failed++;
+      entry.job.reject(err);
+      entry.job = null;
+    }
+    const job = this.queue.shift();
+    if (job) {
+      const worker = this.spawn();
+      if (worker) this.run(worker, job);
+      else this.queue.unshift(job);
+    }
+  }
+
+  private run(entry: PoolWorker, job: Job) {
+    job.startedAt = performance.now();
+    entry.job = job;
+    entry.worker.postMessage({ id: job.id, op: job.op, password: job.password, arg: job.arg });
+  }
+
+  private next(entry: PoolWorker) {
+    const job = this.queue.shift();
+    if (job) this.run(entry, job);
+  }
+
+  private record(job: Job) {
+    const now = performance.now();
+    this.latencies.push(now - job.submittedAt);
+    this.waits.push((job.startedAt ?? now) - job.submittedAt);
+    if (this.latencies.length > LATENCY_WINDOW) {
+      this.latencies = this.latencies.slice(-LATENCY_WINDOW);
+      this.waits = this.waits.slice(-LATENCY_WINDOW);
+    }
+  }
+}
+
+/** Shared pool used by the auth routes. */
+export const passwordHasher = new PasswordHasherPool(
+  Number(process.env.PASSWORD_HASH_WORKERS) || Math.max(1, Math.min(4, os.cpus().length - 1)),
+  Number(process.env.PASSWORD_HASH_QUEUE) || 256,
+);
+
+export function hashPassword(password: string): Promise<string> {
+  return passwordHasher.hash(password);
+}
+
+export function verifyPassword(password: string, hash: string): Promise<boolean> {
+  return passwordHasher.compare(password, hash);
+}
@@ -0,0 +1,268 @@
+/**
+ * Batched planning changes.
+ *
+ * `POST /planning/batch` and `PATCH /planning/batch` apply many adds, moves and
+ * deletes in a single transaction, so filling or reshuffling a week costs one
+ * request and one broadcast instead of one per meal. Moves and deletes may
+ * only target items planned by the caller or by members of the caller's
+ * groups; if any target is missing, nothing is applied.
+ */
+
+import crypto from 'crypto';
+import { Database } from 'sqlite';
+
+const uuidv4 = () => crypto.randomUUID();
+
+/** Upper bound on adds + moves + deletes in one batch. */
+export const MAX_BATCH_OPERATIONS = 500;
+
+export interface PlanningAdd {
+  recipe_id: string;
+  recipe_name?: string;
+  week: string;
+  day?: string | null;
+  meal?: string | null;
+  servings?: number;
+  assignedTo?: string | null;
+}
+
+/** Fields present on a move are updated; absent ones are left as they are. */
+export interface PlanningMove {
+  id: string;
+  week?: string;
+  day?: string | null;
+  meal?: string | null;
+  servings?: number;
+  assignedTo?: string | null;
+}
+
+export interface PlanningBatch {
+  add: PlanningAdd[];
+  move: PlanningMove[];
+  delete: string[];
+}
+
+export interface PlanningRow {
+  id: string;
+  user_id: string;
+  recipe_id: string;
+  recipe_name: string;
+  recipe_name_lookup: string;
+  week: string;
+  day: string;
+  meal: string;
+  servings: number;
+  assigned_to: string;
+  min_servings: number;
+  split_servings: number;
+}
+
+export function toPlannedItem(r: PlanningRow) {
+  return {
+    kind: 'recipe' as const,
+    id: r.id,
+    user_id: r.user_id,
+    recipe_id: r.recipe_id,
+    recipe_name: r.recipe_name || r.recipe_name_lookup || '',
+    week: r.week,
+    day: r.day,
+    meal: r.meal,
+    servings: r.servings || 1,
+    assignedTo: r.assigned_to || null,
+    minServings: r.min_servings || 1,
+    splitServings: r.split_servings || 1,
+  };
+}
+
+export type PlannedItem = ReturnType<typeof toPlannedItem>;
+
+export interface PlanningBatchResult {
+  added: PlannedItem[];
+  updated: PlannedItem[];
+  /** Deleted items with their week and owner. */
+  deleted: { id: string; week: string; user_id: string }[];
+  /** Items whose week changed, with the week they left. */
+  movedFrom: { id: string; week: string }[];
+}
+
+/** Thrown for requests that must fail as a whole; `status` is the HTTP status. */
+export class PlanningBatchError extends Error {
+  constructor(
+    readonly status: number,
+    message: string,
+    readonly ids?: string[],
+  ) {
+    super(message);
+  }
+}
+
+const isText = (v: unknown): v is string => typeof v === 'string' && v.length > 0;
+
+/** Years a planned week may fall in; weeks outside them are client errors. */
+const PLANNING_YEARS = { min: 2000, max: 2099 };
+
+/** A real `YYYY-MM-DD` date within PLANNING_YEARS, the form weeks are stored in. */
+export function isPlanningWeek(v: unknown): v is string {
+  if (typeof v !== 'string' || !/^\d{4}-\d{2}-\d{2}$/.test(v)) return false;
+  const year = Number(v.slice(0, 4));
+  if (year < PLANNING_YEARS.min || year > PLANNING_YEARS.max) return false;
+  // Rejects dates such as 2026-02-30, which Date would roll over
+  const date = new Date(`${v}T00:00:00Z`);
+  return !Number.isNaN(date.getTime()) && date.toISOString().slice(0, 10) === v;
+}
+
+/** Validate a request body into a batch; throws PlanningBatchError (400) when malformed. */
+export function parsePlanningBatch(body: any): PlanningBatch {
+  const add = body?.add ?? [];
+  const move = body?.move ?? [];
+  const del = body?.delete ?? [];
+  if (!Array.isArray(add) || !Array.isArray(move) || !Array.isArray(del)) {
+    throw new PlanningBatchError(400, 'add, move and delete must be arrays');
+  }
+  if (add.length + move.length + del.length === 0) {
+    throw new PlanningBatchError(400, 'Batch is empty');
+  }
+  if (add.length + move.length + del.length > MAX_BATCH_OPERATIONS) {
+    throw new PlanningBatchError(400, `At most ${MAX_BATCH_OPERATIONS} operations per batch`);
+  }
+  if (!add.every((a: any) => isText(a?.recipe_id) && isPlanningWeek(a?.week))) {
+    throw new PlanningBatchError(400, 'Every add needs recipe_id and a YYYY-MM-DD week');
+  }
+  if (!move.every((m: any) => isText(m?.id)) || !del.every(isText)) {
+    throw new PlanningBatchError(400, 'Every move and delete needs an id');
+  }
+  if (!move.every((m: any) => m.week === undefined || isPlanningWeek(m.week))) {
+    throw new PlanningBatchError(400, 'A moved week must be a YYYY-MM-DD date');
+  }
+  const targets = [...move.map((m: PlanningMove) => m.id), ...del];
+  if (new Set(targets).size !== targets.length) {
+    throw new PlanningBatchError(400, 'An item can only be moved or deleted once per batch');
+  }
+  return { add, move, delete: del };
+}
+
+const SELECT_ITEMS =
+  'SELECT p.*, r.name as recipe_name_lookup, r.min_servings, r.split_servings FROM planning p LEFT JOIN recipes r ON r.id = p.recipe_id';
+
+/**
+ * Apply `batch` for `userId`. `visibleUserIds` are the users whose items the
+ * caller may move or delete (themselves and their group members). Must run
+ * inside `withTransaction`.
+ */
+export async function applyPlanningBatch(
+  db: Database,
+  userId: string,
+  visibleUserIds: string[],
+  batch: PlanningBatch,
+): Promise<PlanningBatchResult> {
+  const targetIds = [...batch.move.map((m) => m.id), ...batch.delete];
+  const existing = new Map<string, { week: string; user_id: string }>();
+  if (targetIds.length > 0) {
+    const rows = await db.all<{ id: string; week: string; user_id: string }[]>(
+      `SELECT id, week, user_id FROM planning WHERE id IN (${targetIds.map(() => '?').join(',')})
+       AND user_id IN (${visibleUserIds.map(() => '?').join(',')})`,
+      ...targetIds,
+      ...visibleUserIds,
+    );
+    for (const row of rows) existing.set(row.id, { week: row.week, user_id: row.user_id });
+    const missing = targetIds.filter((id) => !existing.has(id));
+    if (missing.length > 0) {
+      throw new PlanningBatchError(404, 'Planning items not found', missing);
+    }
+  }
+
+  if (batch.delete.length > 0) {
+    await db.run(
+      `DELETE FROM planning WHERE id IN (${batch.delete.map(() => '?').join(',')})`,
+      ...batch.delete,
+    );
+  }
+
+  for (const move of batch.move) {
+    const sets: string[] = [];
+    const values: unknown[] = [];
+    if (move.week !== undefined) {
+      sets.push('week = ?');
+      values.push(move.week);
+    }
+    if (move.day !== undefined) {
+      sets.push('day = ?');
+      values.push(move.day || null);
+    }
+    if (move.meal !== undefined) {
+      sets.push('meal = ?');
+      values.push(move.meal || null);
+    }
+    if (move.servings !== undefined) {
+      sets.push('servings = ?');
+      values.push(move.servings || 1);
+    }
+    if (move.assignedTo !== undefined) {
+      sets.push('assigned_to = ?');
+      values.push(move.assignedTo || null);
+    }
+    if (sets.length === 0) continue;
+    await db.run(`UPDATE planning SET ${sets.join(', ')} WHERE id = ?`, ...values, move.id);
+  }
+
+  const addedIds: string[] = [];
+  for (const add of batch.add) {
+    const id = uuidv4();
+    addedIds.push(id);
+    await db.run(
+      'INSERT INTO planning (id, recipe_id, recipe_name, week, day, meal, user_id, servings, assigned_to) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)',
+      id,
+      add.recipe_id,
+      add.recipe_name || '',
+      add.week,
+      add.day || null,
+      add.meal || null,
+      userId,
+      add.servings || 1,
+      add.assignedTo || null,
+    );
+  }
+
+  const resultIds = [...addedIds, ...batch.move.map((m) => m.id)];
+  const byId = new Map<string, PlannedItem>();
+  if (resultIds.length > 0) {
+    const rows = await db.all<PlanningRow[]>(
+      `${SELECT_ITEMS} WHERE p.id IN (${resultIds.map(() => '?').join(',')})`,
+      ...resultIds,
+    );
+    for (const row of rows) byId.set(row.id, toPlannedItem(row));
+  }
+
+  const updated = batch.move.map((m) => byId.get(m.id)!);
+  return {
+    added: addedIds.map((id) => byId.get(id)!),
+    updated,
+    deleted: batch.delete.map((id) => ({ id, ...existing.get(id)! })),
+    movedFrom: updated
+      .filter((item) => item.week !== existing.get(item.id)!.week)
+      .map((item) => ({ id: item.id, week: existing.get(item.id)!.week })),
+  };
+}
+
+/**
+ * The coalesced `planning:batch` payload for a result, plus every week it
+ * touched. Items moved to another week are reported as deleted from the old
+ * week and added to the new one; `user_id` is the actor, as for single events.
+ */
+export function planningBatchEvent(result: PlanningBatchResult, userId: string) {
+  const moved = new Set(result.movedFrom.map((m) => m.id));
+  const asActor = <T>(item: T) => ({ ...item, user_id: userId });
+  const payload = {
+    user_id: userId,
+    added: [...result.added, ...result.updated.filter((i) => moved.has(i.id))].map(asActor),
+    updated: result.updated.filter((i) => !moved.has(i.id)).map(asActor),
+    deleted: [...result.deleted, ...result.movedFrom].map(asActor),
+  };
+  const weeks = new Set([
+    ...result.added.map((i) => i.week),
+    ...result.updated.map((i) => i.week),
+    ...result.deleted.map((d) => d.week),
+    ...result.movedFrom.map((d) => d.week),
+  ]);
+  return { payload, weeks: [...weeks] };
+}
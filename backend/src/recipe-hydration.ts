@@ -0,0 +1,261 @@
+/**
+ * Bulk recipe hydration.
+ *
+ * Turns a list of `recipes` rows into the JSON shape served by the API by
+ * loading all child rows (ingredients, steps, tags, owner names and saved
+ * status) for the whole list in a fixed number of `IN (...)` queries,
+ * instead of four or five queries per recipe.
+ *
+ * Hydrated bodies are shared between users and kept in an LRU cache keyed by
+ * recipe id. Writers must call `invalidateRecipe()` after changing a recipe
+ * or its child rows. What other tables own is never cached, but overlaid on
+ * the shared body on every read: the per-user `isAdded` flag, the owner's
+ * name (one lookup per list) and the names of linked foods (from the foods
+ * catalogue, which follows every foods write by its version). Renaming a user
+ * or a food therefore shows up at once, without invalidating any recipe.
+ */
+
+import { getReadDB } from './db';
+import { catalogueFood, getFoodsCatalogue } from './foods-catalogue';
+import { LruCache } from './lru-cache';
+import { onClusterMessage, publishToCluster } from './cluster-bus';
+
+/** Max bound parameters per `IN (...)` list — well below SQLite's limit. */
+const CHUNK_SIZE = 500;
+
+export interface RecipeRow {
+  id: string;
+  user_id: string;
+  name: string;
+  description?: string;
+  cuisine?: string;
+  type?: string;
+  time_value?: number;
+  time_unit?: string;
+  difficulty?: string;
+  servings?: number;
+  min_servings?: number;
+  split_servings?: number;
+  wip?: number;
+  notes?: string;
+  created_at?: string;
+}
+
+interface IngredientRow {
+  id: string;
+  recipe_id: string;
+  food_id?: string;
+  name: string;
+  quantity_value?: number;
+  quantity_unit?: string;
+  brand?: string;
+}
+
+interface StepRow {
+  recipe_id: string;
+  text: string;
+  image_url?: string;
+}
+
+function chunk<T>(items: T[], size: number): T[][] {
+  const chunks: T[][] = [];
+  for (let i = 0; i < items.length; i += size) chunks.push(items.slice(i, i + size));
+  return chunks;
+}
+
+function groupBy<T extends { recipe_id: string }>(rows: T[]): Map<string, T[]> {
+  const map = new Map<string, T[]>();
+  for (const row of rows) {
+    const list = map.get(row.recipe_id);
+    if (list) list.push(row);
+    else map.set(row.recipe_id, [row]);
+  }
+  return map;
+}
+
+/**
+ * Build the shared body of each recipe, in order of `rows`, with the food
+ * linked to each ingredient (see `hydrateRecipes` for the overlaid names).
+ */
+async function loadRecipes(rows: RecipeRow[]) {
+  const db = await getReadDB();
+
+  const ingredients: IngredientRow[] = [];
+  const steps: StepRow[] = [];
+  const tags: { recipe_id: string; tag: string }[] = [];
+
+  const recipeIds = [...new Set(rows.map((r) => r.id))];
+  for (const ids of chunk(recipeIds, CHUNK_SIZE)) {
+    const placeholders = ids.map(() => '?').join(',');
+    ingredients.push(
+      ...(await db.all<IngredientRow[]>(
+        `SELECT * FROM recipe_ingredients
+         WHERE recipe_id IN (${placeholders})
+         ORDER BY sort_order`,
+        ...ids,
+      )),
+    );
+    steps.push(
+      ...(await db.all<StepRow[]>(
+        `SELECT recipe_id, text, image_url FROM recipe_steps
+         WHERE recipe_id IN (${placeholders})
+         ORDER BY sort_order`,
+        ...ids,
+      )),
+    );
+    tags.push(
+      ...(await db.all<{ recipe_id: string; tag: string }[]>(
+        `SELECT recipe_id, tag FROM recipe_tags WHERE recipe_id IN (${placeholders})`,
+        ...ids,
+      )),
+    );
+  }
+
+  const ingredientsByRecipe = groupBy(ingredients);
+  const stepsByRecipe = groupBy(steps);
+  const tagsByRecipe = groupBy(tags);
+
+  return rows.map((recipeRow) => {
+    const recipeIngredients = ingredientsByRecipe.get(recipeRow.id) || [];
+    const body = {
+      id: recipeRow.id,
+      userId: recipeRow.user_id,
+      name: recipeRow.name,
+    description: recipeRow.description || '',
+    cuisine: recipeRow.cuisine || '',
+    type: recipeRow.type || 'OTHER',
+    time: { value: recipeRow.time_value, unit: recipeRow.time_unit || 'MINUTE' },
+    difficulty: recipeRow.difficulty || 'EASY',
+      ingredients: recipeIngredients.map((i) => ({
+        id: i.food_id || i.id,
+        name: i.name,
+        quantity: { value: i.quantity_value, unit: i.quantity_unit },
+        brand: i.brand || '',
+      })),
+      steps: (stepsByRecipe.get(recipeRow.id) || []).map((s) => ({
+        text: s.text,
+        imageUrl: s.image_url || '',
+      })),
+      tags: (tagsByRecipe.get(recipeRow.id) || []).map((t) => t.tag),
+      servings: recipeRow.servings || 4,
+      minServings: recipeRow.min_servings || 1,
+      splitServings: recipeRow.split_servings || 1,
+      wip: !!recipeRow.wip,
+      notes: recipeRow.notes || '',
+    };
+    return { body, foodIds: recipeIngredients.map((i) => i.food_id || null) };
+  });
+}
+
+type CachedRecipe = Awaited<ReturnType<typeof loadRecipes>>[number];
+
+type RecipeBody = CachedRecipe['body'];
+
+export type HydratedRecipe = RecipeBody & { userName: string; isAdded: boolean };
+
+export const recipeCache = new LruCache<CachedRecipe>(
+  Number(process.env.RECIPE_CACHE_SIZE ?? 1000),
+  Number(process.env.RECIPE_CACHE_TTL_SECONDS ?? 300) * 1000,
+);
+
+/** Bumped by every invalidation so in-flight loads never cache stale bodies. */
+let cacheEpoch = 0;
+
+function dropRecipe(recipeId: string) {
+  cacheEpoch++;
+  recipeCache.delete(recipeId);
+}
+
+/** Drop the cached body of a recipe, in every process. */
+export function invalidateRecipe(recipeId: string) {
+  dropRecipe(recipeId);
+  publishToCluster('recipe:invalidate', recipeId);
+}
+
+onClusterMessage('recipe:invalidate', dropRecipe);
+
+/** Recipe ids among `recipeIds` that `userId` has saved. */
+async function loadSavedFlags(recipeIds: string[], userId: string) {
+  const db = await getReadDB();
+  const saved = new Set<string>();
+  for (const ids of chunk(recipeIds, CHUNK_SIZE)) {
+    const placeholders = ids.map(() => '?').join(',');
+    const savedRows = await db.all<{ recipe_id: string }[]>(
+      `SELECT recipe_id FROM saved_recipes WHERE user_id = ? AND recipe_id IN (${placeholders})`,
+      userId,
+      ...ids,
+    );
+    for (const s of savedRows) saved.add(s.recipe_id);
+  }
+  return saved;
+}
+
+/** The current name of each user in `userIds`. */
+async function loadUserNames(userIds: string[]) {
+  const db = await getReadDB();
+  const names = new Map<string, string>();
+  for (const ids of chunk(userIds, CHUNK_SIZE)) {
+    const userRows = await db.all<{ id: string; name: string }[]>(
+      `SELECT id, name FROM users WHERE id IN (${ids.map(() => '?').join(',')})`,
+      ...ids,
+    );
+    for (const u of userRows) names.set(u.id, u.name);
+  }
+  return names;
+}
+
+/**
+ * Hydrate many recipe rows at once. The result preserves the order of `rows`.
+ * `userId` is used to compute `isAdded` (saved by the caller).
+ */
+export async function hydrateRecipes(
+  rows: RecipeRow[],
+  userId?: string,
+  lang: string = 'en',
+): Promise<HydratedRecipe[]> {
+  if (rows.length === 0) return [];
+
+  // Cached bodies are shared between requests: treat them as immutable
+  const entries = new Map<string, CachedRecipe>();
+  const missing = new Map<string, RecipeRow>();
+  for (const row of rows) {
+    if (entries.has(row.id) || missing.has(row.id)) continue;
+    const cached = recipeCache.get(row.id);
+    if (cached) entries.set(row.id, cached);
+    else missing.set(row.id, row);
+  }
+
+  if (missing.size > 0) {
+    const epoch = cacheEpoch;
+    const loaded = await loadRecipes([...missing.values()]);
+    for (const entry of loaded) {
+      entries.set(entry.body.id, entry);
+      if (epoch === cacheEpoch) recipeCache.set(entry.body.id, entry);
+    }
+  }
+
+  const saved = userId ? await loadSavedFlags([...entries.keys()], userId) : new Set<string>();
+  const owners = await loadUserNames([...new Set(rows.map((r) => r.user_id))]);
+  const foods = await getFoodsCatalogue();
+  return rows.map((row) => {
+    const { body, foodIds } = entries.get(row.id)!;
+    return {
+      ...body,
+      userName: owners.get(body.userId) || '',
+      // A linked food's name in `lang` wins over the name stored with the ingredient
+      ingredients: body.ingredients.map((ingredient, i) => {
+        const foodId = foodIds[i];
+        const food = foodId ? catalogueFood(foods, foodId) : undefined;
+        const name = lang === 'it' ? food?.name_it : food?.name;
+        return name ? { ...ingredient, name } : ingredient;
+      }),
+      isAdded: saved.has(row.id),
+    };
+  });
+}
+
+/** Hydrate a single recipe row. */
+export async function buildRecipe(recipeRow: RecipeRow, userId?: string, lang: string = 'en') {
+  const [recipe] = await hydrateRecipes([recipeRow], userId, lang);
+  return recipe;
+}
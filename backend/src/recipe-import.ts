@@ -0,0 +1,502 @@
+/**
+ * Streaming recipe import.
+ *
+ * Recipes are read one at a time from JSON Lines or CSV files, their
+ * ingredients are resolved against `foods` through an in-memory name index,
+ * and they are written in large transactions through the writer's cached
+ * statements. Nothing but the current batch's counters and a bounded name
+ * memo is kept in memory, so files of any size import with flat memory use.
+ *
+ * Recipes are de-duplicated by name per user: an existing recipe is skipped,
+ * unless it is a WIP and the imported one is not, in which case it is
+ * replaced (same behaviour as the old hand-written import scripts).
+ *
+ * The importer holds a transaction open across awaits, so it is meant for
+ * offline use (see import-bulk.ts), not inside the server. Shopping entries of
+ * the imported recipes are rebuilt once per recipe at each batch commit.
+ */
+
+import crypto from 'crypto';
+import readline from 'readline';
+import { Readable } from 'stream';
+import { Database } from 'sqlite';
+import { deferRecipeRefresh, refreshDirtyRecipes } from './recipe-refresh';
+
+const uuid = () => crypto.randomUUID();
+
+export interface RecipeInput {
+  name: string;
+  description: string;
+  cuisine: string;
+  type: string;
+  difficulty: string;
+  time_value: number | null;
+  time_unit: string;
+  servings: number;
+  wip: boolean;
+  notes: string;
+  tags: string[];
+  ingredients: { name: string; qty: number | null; unit: string | null }[];
+  steps: string[];
+}
+
+/** A record that could not be turned into a recipe. */
+export class RecipeImportError extends Error {}
+
+// ── Food name index ──
+
+export interface FoodMatch {
+  id: string;
+  unit: string;
+}
+
+const normalizeName = (name: string) => name.toLowerCase().trim().replace(/\s+/g, ' ');
+
+/** Keys shorter than this never match as part of a longer name. */
+const MIN_PARTIAL_LENGTH = 3;
+const MEMO_LIMIT = 50_000;
+
+/**
+ * English and Italian food names, matched exactly (case-insensitively) or,
+ * failing that, by the longest food name contained in the ingredient name (or
+ * containing it). Results are memoised, since datasets repeat the same few
+ * thousand ingredient names; the memo is cleared when it grows too large.
+ */
+export class FoodNameIndex {
+  private readonly exact = new Map<string, FoodMatch>();
+  private readonly memo = new Map<string, FoodMatch | null>();
+  private readonly keys: string[];
+
+  constructor(
+    foods: { id: string; name: string; name_it?: string | null; default_unit: string }[],
+  ) {
+    for (const f of foods) {
+      const match = { id: f.id, unit: f.default_unit };
+      if (f.name_it) this.exact.set(normalizeName(f.name_it), match);
+      if (f.name) this.exact.set(normalizeName(f.name), match);
+    }
+    this.keys = [...this.exact.keys()]
+      .filter((key) => key.length >= MIN_PARTIAL_LENGTH)
+      .sort((a, b) => b.length - a.length);
+  }
+
+  static async load(db: Database): Promise<FoodNameIndex> {
+    return new FoodNameIndex(await db.all('SELECT id, name, name_it, default_unit FROM foods'));
+  }
+
+  get size(): number {
+    return this.exact.size;
+  }
+
+  find(name: string): FoodMatch | undefined {
+    const n = normalizeName(name);
+    const exact = this.exact.get(n);
+    if (exact) return exact;
+    const memoised = this.memo.get(n);
+    if (memoised !== undefined) return memoised ?? undefined;
+
+    let match: FoodMatch | null = null;
+    for (const key of this.keys) {
+      if (n.includes(key) || (n.length >= MIN_PARTIAL_LENGTH && key.includes(n))) {
+        match = this.exact.get(key)!;
+        break;
+      }
+    }
+    if (this.memo.size >= MEMO_LIMIT) this.memo.clear();
+    this.memo.set(n, match);
+    return match ?? undefined;
+  }
+}
+
+// ── Readers ──
+
+export interface ImportRecord {
+  /** 1-based line (JSON Lines) or record (CSV) number, for error messages. */
+  line: number;
+  value?: Record<string, unknown>;
+  /** Set instead of `value` when the record could not be parsed. */
+  error?: string;
+}
+
+/** Parse a JSON Lines stream, one object per non-empty line. */
+export async function* readJsonLines(input: Readable): AsyncGenerator<ImportRecord> {
+  const lines = readline.createInterface({ input, crlfDelay: Infinity });
+  let line = 0;
+  for await (const text of lines) {
+    line++;
+    if (!text.trim()) continue;
+    let value: unknown;
+    try {
+      value = JSON.parse(text);
+    } catch {
+      yield { line, error: 'invalid JSON' };
+      continue;
+    }
+    if (value && typeof value === 'object' && !Array.isArray(value)) {
+      yield { line, value: value as Record<string, unknown> };
+    } else {
+      yield { line, error: 'not a JSON object' };
+    }
+  }
+}
+
+/**
+ * Parse an RFC 4180 CSV stream (quoted fields may contain commas, quotes and
+ * newlines) into objects keyed by the header row.
+ */
+export async function* readCsv(input: Readable): AsyncGenerator<ImportRecord> {
+  let header: string[] | null = null;
+  let record: string[] = [];
+  let field = '';
+  let quoted = false;
+  /** A quote seen inside a quoted field: either an escaped quote or the closing one. */
+  let pendingQuote = false;
+  let line = 0;
+
+  const endRecord = (): ImportRecord | null => {
+    record.push(field);
+    field = '';
+    const fields = record;
+    record = [];
+    if (fields.length === 1 && fields[0] === '') return null;
+    if (!header) {
+      header = fields.map((h, i) => (i === 0 ? h.replace(/^\uFEFF/, '') : h).trim());
+      return null;
+    }
+    line++;
+    const value: Record<string, unknown> = {};
+    header.forEach((key, i) => (value[key] = fields[i] ?? ''));
+    return { line, value };
+  };
+
+  input.setEncoding('utf8');
+  for await (const chunk of input as AsyncIterable<string>) {
+    for (let i = 0; i < chunk.length; i++) {
+      const c = chunk[i];
+      if (pendingQuote) {
+        pendingQuote = false;
+        if (c === '"') {
+          field += '"';
+          continue;
+        }
+        quoted = false;
+      }
+      if (quoted) {
+        if (c === '"') pendingQuote = true;
+        else field += c;
+      } else if (c === '"' && field === '') {
+        quoted = true;
+      } else if (c === ',') {
+        record.push(field);
+        field = '';
+      } else if (c === '\n') {
+        const done = endRecord();
+        if (done) yield done;
+      } else if (c !== '\r') {
+        field += c;
+      }
+    }
+  }
+  if (quoted && !pendingQuote) throw new RecipeImportError('Unterminated quoted field');
+  if (field !== '' || record.length > 0) {
+    const done = endRecord();
+    if (done) yield done;
+  }
+}
+
+// ── Record → RecipeInput ──
+
+const UNITS: Record<string, string> = {
+  g: 'GRAM',
+  gr: 'GRAM',
+  gram: 'GRAM',
+  grams: 'GRAM',
+  grammi: 'GRAM',
+  kg: 'KILO',
+  ml: 'MILLILITER',
+  l: 'LITER',
+  lt: 'LITER',
+  pz: 'PIECE',
+  pc: 'PIECE',
+  pcs: 'PIECE',
+  piece: 'PIECE',
+  pieces: 'PIECE',
+};
+const KNOWN_UNITS = new Set(Object.values(UNITS));
+
+/** "200 g flour" → { qty: 200, unit: 'GRAM', name: 'flour' }; unparsable text is all name. */
+export function parseIngredient(text: string): RecipeInput['ingredients'][number] {
+  const match = /^\s*(\d+(?:[.,]\d+)?)\s*([a-zA-Z]+\.?)?\s+(.+)$/.exec(text);
+  if (!match) return { name: text.trim(), qty: null, unit: null };
+  const qty = Number(match[1].replace(',', '.'));
+  const unitWord = match[2]?.replace(/\.$/, '').toLowerCase();
+  const unit = unitWord ? UNITS[unitWord] : undefined;
+  if (unitWord && !unit) {
+    // Not a unit after all ("2 large eggs")
+    return { name: `${match[2]} ${match[3]}`.trim(), qty, unit: 'PIECE' };
+  }
+  return { name: match[3].trim(), qty, unit: unit ?? 'PIECE' };
+}
+
+/** A list cell: a JSON array, or values separated by `|`. */
+function toList(value: unknown): unknown[] {
+  if (Array.isArray(value)) return value;
+  if (typeof value !== 'string' || !value.trim()) return [];
+  const trimmed = value.trim();
+  if (trimmed.startsWith('[')) {
+    try {
+      const parsed = JSON.parse(trimmed);
+      if (Array.isArray(parsed)) return parsed;
+    } catch {
+      // Fall through to the separator form
+    }
+  }
+  return trimmed.split('|');
+}
+
+const text = (value: unknown, fallback = '') =>
+  typeof value === 'string' ? value.trim() : value == null ? fallback : String(value);
+
+const numberOrNull = (value: unknown) => {
+  if (value === null || value === undefined || value === '') return null;
+  const n = Number(value);
+  return Number.isFinite(n) ? n : null;
+};
+
+/**
+ * Map a parsed record onto a recipe. Accepts the field names of
+ * `RecipeInput`, plus `title`/`directions` as used by common public datasets.
+ * Ingredients may be objects or free text ("200 g flour").
+ */
+export function toRecipeInput(value: Record<string, unknown>): RecipeInput {
+  const name = text(value.name ?? value.title);
+  if (!name) throw new RecipeImportError('Recipe has no name');
+
+  const ingredients = toList(value.ingredients)
+    .map((i) => {
+      if (typeof i === 'string') return parseIngredient(i);
+      const o = (i ?? {}) as Record<string, unknown>;
+      const unit = text(o.unit);
+      return {
+        name: text(o.name),
+        qty: numberOrNull(o.qty ?? o.quantity),
+        unit: KNOWN_UNITS.has(unit.toUpperCase())
+          ? unit.toUpperCase()
+          : (UNITS[unit.toLowerCase()] ?? null),
+      };
+    })
+    .filter((i) => i.name);
+  // The same ingredient listed twice is one row
+  const seen = new Set<string>();
+  const unique = ingredients.filter((i) => {
+    const key = `${normalizeName(i.name)}|${i.unit}`;
+    if (seen.has(key)) return false;
+    seen.add(key);
+    return true;
+  });
+
+  return {
+    name,
+    description: text(value.description),
+    cuisine: text(value.cuisine),
+    type: text(value.type, 'OTHER') || 'OTHER',
+    difficulty: text(value.difficulty, 'EASY') || 'EASY',
+    time_value: numberOrNull(value.time_value),
+    time_unit: text(value.time_unit, 'MINUTE') || 'MINUTE',
+    servings: numberOrNull(value.servings) ?? 4,
+    wip: value.wip === true || value.wip === 'true' || value.wip === '1' || value.wip === 1,
+    notes: text(value.notes),
+    tags: [...new Set(toList(value.tags).map((t) => text(t)).filter(Boolean))],
+    ingredients: unique,
+    steps: toList(value.steps ?? value.directions)
+      .map((s) => text(s))
+      .filter(Boolean),
+  };
+}
+
+// ── Importer ──
+
+export interface ImportStats {
+  read: number;
+  imported: number;
+  /** Existing WIP recipes replaced by a full one. */
+  upgraded: number;
+  duplicates: number;
+  invalid: number;
+  ingredients: number;
+  /** Ingredients that matched no food. */
+  unresolved: number;
+  /** Rows written across recipes, ingredients, steps and tags. */
+  rows: number;
+  elapsedMs: number;
+}
+
+export const DEFAULT_IMPORT_BATCH = 1000;
+
+export class RecipeImporter {
+  private readonly started = process.hrtime.bigint();
+  private inTransaction = false;
+  private pending = 0;
+  private readonly counters: Omit<ImportStats, 'elapsedMs'> = {
+    read: 0,
+    imported: 0,
+    upgraded: 0,
+    duplicates: 0,
+    invalid: 0,
+    ingredients: 0,
+    unresolved: 0,
+    rows: 0,
+  };
+
+  constructor(
+    private readonly db: Database,
+    private readonly userId: string,
+    private readonly foods: FoodNameIndex,
+    private readonly batchSize = DEFAULT_IMPORT_BATCH,
+    /** Called after every committed batch. */
+    private readonly onBatch?: (stats: ImportStats) => void,
+  ) {}
+
+  /** Count a record that failed to parse. */
+  skipInvalid() {
+    this.counters.read++;
+    this.counters.invalid++;
+  }
+
+  /** Queue one recipe; commits when the batch is full. Returns false for a duplicate. */
+  async add(recipe: RecipeInput): Promise<boolean> {
+    this.counters.read++;
+    if (!this.inTransaction) {
+      await this.db.exec('BEGIN IMMEDIATE');
+      await deferRecipeRefresh(this.db);
+      this.inTransaction = true;
+    }
+
+    const existing = await this.db.get<{ id: string; wip: number }>(
+      'SELECT id, wip FROM recipes WHERE user_id = ? AND name = ?',
+      this.userId,
+      recipe.name,
+    );
+    if (existing && !(existing.wip && !recipe.wip)) {
+      this.counters.duplicates++;
+      return false;
+    }
+
+    let recipeId: string;
+    if (existing) {
+      recipeId = existing.id;
+      await this.db.run(
+        `UPDATE recipes SET description=?, cuisine=?, type=?, difficulty=?, time_value=?, time_unit=?, servings=?, wip=?, notes=? WHERE id=?`,
+        recipe.description,
+        recipe.cuisine,
+        recipe.type,
+        recipe.difficulty,
+        recipe.time_value,
+        recipe.time_unit,
+        recipe.servings,
+        0,
+        recipe.notes,
+        recipeId,
+      );
+      await this.db.run('DELETE FROM recipe_ingredients WHERE recipe_id = ?', recipeId);
+      await this.db.run('DELETE FROM recipe_steps WHERE recipe_id = ?', recipeId);
+      await this.db.run('DELETE FROM recipe_tags WHERE recipe_id = ?', recipeId);
+      this.counters.upgraded++;
+    } else {
+      recipeId = uuid();
+      await this.db.run(
+        `INSERT INTO recipes (id, user_id, name, description, cuisine, type, difficulty, time_value, time_unit, servings, wip, notes)
+         VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)`,
+        recipeId,
+        this.userId,
+        recipe.name,
+        recipe.description,
+        recipe.cuisine,
+        recipe.type,
+        recipe.difficulty,
+        recipe.time_value,
+        recipe.time_unit,
+        recipe.servings,
+        recipe.wip ? 1 : 0,
+        recipe.notes,
+      );
+      this.counters.imported++;
+    }
+    this.counters.rows++;
+
+    for (let i = 0; i < recipe.ingredients.length; i++) {
+      const ing = recipe.ingredients[i];
+      const food = this.foods.find(ing.name);
+      if (!food) this.counters.unresolved++;
+      await this.db.run(
+        `INSERT INTO recipe_ingredients (id, recipe_id, food_id, name, quantity_value, quantity_unit, sort_order)
+         VALUES (?, ?, ?, ?, ?, ?, ?)`,
+        uuid(),
+        recipeId,
+        food?.id || null,
+        ing.name,
+        ing.qty,
+        ing.unit,
+        i,
+      );
+    }
+    for (let i = 0; i < recipe.steps.length; i++) {
+      await this.db.run(
+        `INSERT INTO recipe_steps (id, recipe_id, text, image_url, sort_order) VALUES (?, ?, ?, '', ?)`,
+        uuid(),
+        recipeId,
+        recipe.steps[i],
+        i,
+      );
+    }
+    for (const tag of recipe.tags) {
+      await this.db.run(
+        'INSERT OR IGNORE INTO recipe_tags (recipe_id, tag) VALUES (?, ?)',
+        recipeId,
+        tag,
+      );
+    }
+    this.counters.ingredients += recipe.ingredients.length;
+    this.counters.rows += recipe.ingredients.length + recipe.steps.length + recipe.tags.length;
+
+    if (++this.pending >= this.batchSize) await this.commit();
+    return true;
+  }
+
+  /** Commit the open batch and return the totals. */
+  async finish(): Promise<ImportStats> {
+    await this.commit();
+    return this.stats();
+  }
+
+  /** Roll back the open batch (earlier batches stay committed). */
+  async abort() {
+    if (!this.inTransaction) return;
+    this.inTransaction = false;
+    this.pending = 0;
+    await this.db.exec('ROLLBACK');
+  }
+
+  stats(): ImportStats {
+    const elapsedMs = Number(process.hrtime.bigint() - this.started) / 1e6;
+    return { ...this.counters, elapsedMs };
+  }
+
+  private async commit() {
+    if (!this.inTransaction) return;
+    await refreshDirtyRecipes(this.db);
+    await this.db.exec('COMMIT');
+    this.inTransaction = false;
+    this.pending = 0;
+    this.onBatch?.(this.stats());
+  }
+}
+
+/** Recipes and rows per second so far. */
+export function importRates(stats: ImportStats) {
+  const seconds = Math.max(stats.elapsedMs, 1) / 1000;
+  return {
+    recipesPerSecond: Math.round(stats.read / seconds),
+    rowsPerSecond: Math.round(stats.rows / seconds),
+  };
+}
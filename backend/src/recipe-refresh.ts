@@ -0,0 +1,108 @@
+/**
+ * Batched refresh of the data derived from a recipe and its child rows: its
+ * full-text search document, its per-serving nutrition and the shopping-list
+ * entries of its planning rows.
+ *
+ * Triggers on recipes, recipe_tags and recipe_ingredients only mark the
+ * recipe in `dirty_recipes`. Outside a batch the `dirty_recipes_ai` trigger
+ * refreshes it at once, so a single statement behaves as before. Inside a
+ * batch (`deferRecipeRefresh`) marks accumulate, and `refreshDirtyRecipes`
+ * rebuilds each marked recipe once — a save that rewrites N ingredients costs
+ * one rebuild, not N.
+ *
+ * `withTransaction` and the recipe importer open a batch after BEGIN and
+ * refresh before COMMIT. The marker row lives inside the transaction, so no
+ * other connection ever sees it.
+ *
+ * The migrations compile these builders into triggers (`dirty_recipes_ai` in
+ * migration 11, the planning and foods triggers in 6 and 7) and use them to
+ * fill the derived tables; changing one needs a migration that recreates the
+ * triggers built from it.
+ */
+
+import { Database } from 'sqlite';
+
+/**
+ * Rebuild the recipes_fts document (name, description, tags, ingredient
+ * names) of the recipes in `recipeIds`, an SQL row-value list such as
+ * `(new.recipe_id)` or a subquery. FTS rows share the rowid of the recipe.
+ */
+export const refreshSearchDocumentsSql = (recipeIds: string) => `
+  DELETE FROM recipes_fts WHERE rowid IN (SELECT rowid FROM recipes WHERE id IN ${recipeIds});
+  INSERT INTO recipes_fts (rowid, name, description, tags, ingredients)
+    SELECT r.rowid, r.name, COALESCE(r.description, ''),
+      COALESCE((SELECT group_concat(tag, ' ') FROM recipe_tags WHERE recipe_id = r.id), ''),
+      COALESCE((SELECT group_concat(name, ' ') FROM recipe_ingredients WHERE recipe_id = r.id), '')
+    FROM recipes r WHERE r.id IN ${recipeIds};`;
+
+/**
+ * Insert the shopping-list entries (one per ingredient, scaled to the planned
+ * servings and converted to the canonical unit) of the planning rows `p`
+ * matching `where`.
+ */
+export const insertShoppingEntriesSql = (where: string) => `
+  INSERT INTO shopping_list_entries (planning_id, user_id, week, item_key, unit, food_id, name, quantity)
+    SELECT p.id, p.user_id, p.week,
+      COALESCE(ri.food_id, 'name:' || lower(trim(ri.name))),
+      COALESCE(uc.canonical_unit, ri.quantity_unit, ''),
+      ri.food_id, ri.name,
+      COALESCE(ri.quantity_value, 0) * COALESCE(uc.factor, 1.0)
+        * COALESCE(NULLIF(p.servings, 0), 1) / COALESCE(NULLIF(r.servings, 0), 1)
+    FROM planning p
+    JOIN recipes r ON r.id = p.recipe_id
+    JOIN recipe_ingredients ri ON ri.recipe_id = p.recipe_id
+    LEFT JOIN unit_conversions uc ON uc.unit = ri.quantity_unit
+    WHERE ${where};`;
+
+/**
+ * Rebuild the shopping-list entries of every planning row whose recipe is in
+ * `recipeIds`.
+ */
+export const refreshShoppingEntriesSql = (recipeIds: string) => `
+  DELETE FROM shopping_list_entries
+    WHERE planning_id IN (SELECT id FROM planning WHERE recipe_id IN ${recipeIds});
+  ${insertShoppingEntriesSql(`p.recipe_id IN ${recipeIds}`)}`;
+
+const perServing = (nutrient: string) =>
+  `COALESCE(SUM(CASE WHEN f.id IS NOT NULL THEN COALESCE(f.${nutrient}, 0)
+     * COALESCE(ri.quantity_value, 0) * COALESCE(uc.grams, 1.0) END), 0)
+     / 100 / COALESCE(NULLIF(r.servings, 0), 1)`;
+
+/**
+ * Recompute the recipe_nutrition rows of the recipes in `recipeIds` (see
+ * migration 7 for how quantities become grams).
+ */
+export const refreshNutritionSql = (recipeIds: string) => `
+  DELETE FROM recipe_nutrition WHERE recipe_id IN ${recipeIds};
+  INSERT INTO recipe_nutrition (recipe_id, kcal, protein, fat, carbs, fiber, items)
+    SELECT r.id, ${['kcal', 'protein', 'fat', 'carbs', 'fiber'].map(perServing).join(', ')},
+      COUNT(f.id)
+    FROM recipes r
+    LEFT JOIN recipe_ingredients ri ON ri.recipe_id = r.id
+    LEFT JOIN foods f ON f.id = ri.food_id
+      AND (f.kcal IS NOT NULL OR f.protein IS NOT NULL OR f.fat IS NOT NULL OR f.carbs IS NOT NULL)
+    LEFT JOIN unit_conversions uc ON uc.unit = COALESCE(ri.quantity_unit, f.default_unit, 'GRAM')
+    WHERE r.id IN ${recipeIds}
+    GROUP BY r.id;`;
+
+/** Everything derived from the recipes in `recipeIds` (see above). */
+export const refreshRecipesSql = (recipeIds: string) =>
+  refreshSearchDocumentsSql(recipeIds) +
+  refreshNutritionSql(recipeIds) +
+  refreshShoppingEntriesSql(recipeIds);
+
+/** Start a batch on `db`; must run inside a transaction. */
+export async function deferRecipeRefresh(db: Database): Promise<void> {
+  await db.run('INSERT OR IGNORE INTO recipe_refresh_deferred (id) VALUES (1)');
+}
+
+/** Rebuild each recipe marked since `deferRecipeRefresh` once, and end the batch. */
+export async function refreshDirtyRecipes(db: Database): Promise<void> {
+  if (await db.get('SELECT 1 AS dirty FROM dirty_recipes LIMIT 1')) {
+    await db.exec(`
+      ${refreshRecipesSql('(SELECT recipe_id FROM dirty_recipes)')}
+      DELETE FROM dirty_recipes;
+    `);
+  }
+  await db.run('DELETE FROM recipe_refresh_deferred');
+}
@@ -1,10 +1,12 @@
 import express from 'express';
 import { OAuth2Client } from 'google-auth-library';
-import { getDB } from '../db';
+import { getDB, getReadDB } from '../db';
 import crypto from 'crypto';
 const uuidv4 = () => crypto.randomUUID();
 import { signToken, signRefreshToken, authenticateToken, JwtPayload } from '../auth.middleware';
 import { keyStore } from '../key-store';
+import { invalidateGroupMembership } from '../group-membership';
+import { forgetPlanningUsage } from '../suggestions';
 import dotenv from 'dotenv';
 
 dotenv.config();
@@ -103,7 +105,7 @@ authRouter.post('/refresh', async (req: any, res) => {
 authRouter.get('/me', authenticateToken, async (req: any, res) => {
   try {
     const { id } = req.user as JwtPayload;
-    const db = await getDB();
+    const db = await getReadDB();
     const user = await db.get('SELECT id, name, email, avatar_url FROM users WHERE id = ?', id);
     if (!user) {
       res.status(404).json({ error: 'User not found' });
@@ -121,6 +123,9 @@ authRouter.delete('/me', authenticateToken, async (req: any, res) => {
     const { id } = req.user as JwtPayload;
     const db = await getDB();
     await db.run('DELETE FROM users WHERE id = ?', id);
+    // Memberships go with the user (ON DELETE CASCADE)
+    invalidateGroupMembership();
+    forgetPlanningUsage(id);
     res.json({ success: true });
   } catch (err: unknown) {
     const message = err instanceof Error ? err.message : 'Unknown error';
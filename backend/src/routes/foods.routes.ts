@@ -1,43 +1,89 @@
 import express from 'express';
-import { getDB } from '../db';
+import { getDB, getReadDB } from '../db';
 import crypto from 'crypto';
 const uuidv4 = () => crypto.randomUUID();
 import { authenticateToken, JwtPayload } from '../auth.middleware';
+import { parseLimit } from '../pagination';
+import { SEARCH_DEFAULT_LIMIT, toFtsQuery } from '../search';
+import { negotiateEncoding } from '../compression';
+import {
+  catalogueDelta,
+  catalogueETag,
+  compressedCatalogue,
+  FoodRow,
+  FOODS_VERSION_HEADER,
+  getFoodsCatalogue,
+  serializeCatalogue,
+  toFood,
+} from '../foods-catalogue';
 
 export const foodsRouter = express.Router();
 foodsRouter.use(authenticateToken);
 
 // ── GET /foods ──────────────────────────────────────
+// Full catalogue (304 when If-None-Match matches), or with ?since=<version>
+// only the foods added or changed after that version: { version, foods }.
 foodsRouter.get('/', async (req: any, res) => {
   try {
     const lang = req.acceptsLanguages('it', 'en') || 'en';
-    const db = await getDB();
-    const foods = await db.all('SELECT * FROM foods ORDER BY name');
-    res.json(
-      foods.map(
-        (f: {
-          id: string;
-          name: string;
-          name_it?: string;
-          default_unit: string;
-          kcal: number | null;
-          protein: number | null;
-          fat: number | null;
-          carbs: number | null;
-          fiber: number | null;
-          portion_value: number | null;
-        }) => ({
-          id: f.id,
-          name: lang === 'it' ? f.name_it || f.name : f.name,
-          quantity: { unit: f.default_unit, value: f.portion_value },
-          kcal: f.kcal,
-          protein: f.protein,
-          fat: f.fat,
-          carbs: f.carbs,
-          fiber: f.fiber,
-        }),
-      ),
+    const catalogue = await getFoodsCatalogue();
+    res.setHeader(FOODS_VERSION_HEADER, String(catalogue.version));
+    res.setHeader('Cache-Control', 'private, no-cache');
+
+    if (req.query.since !== undefined) {
+      const since = Number(req.query.since);
+      if (!Number.isInteger(since) || since < 0) {
+        res.status(400).json({ error: 'since must be a catalogue version' });
+        return;
+      }
+      res.json(catalogueDelta(catalogue, since, lang));
+      return;
+    }
+
+    const encoding = negotiateEncoding(req.headers['accept-encoding']);
+    res.setHeader('ETag', catalogueETag(catalogue.version, lang, encoding));
+    res.vary('Accept-Language');
+    res.vary('Accept-Encoding');
+    if (req.fresh) {
+      res.status(304).end();
+      return;
+    }
+    // Compressed once per catalogue version instead of on every request
+    if (encoding) {
+      res.setHeader('Content-Encoding', encoding);
+      res.type('json').send(compressedCatalogue(catalogue, lang, encoding));
+      return;
+    }
+    res.type('json').send(serializeCatalogue(catalogue, lang));
+  } catch (err: unknown) {
+    const message = err instanceof Error ? err.message : 'Unknown error';
+    res.status(500).json({ error: message });
+  }
+});
+
+// ── GET /foods/search?q= ────────────────────────────
+foodsRouter.get('/search', async (req: any, res) => {
+  try {
+    const lang = req.acceptsLanguages('it', 'en') || 'en';
+    const match = toFtsQuery(req.query.q);
+    if (!match) {
+      res.json([]);
+      return;
+    }
+    const db = await getReadDB();
+    // Rank hits in the caller's language above hits in the other one
+    const [enWeight, itWeight] = lang === 'it' ? [1.0, 4.0] : [4.0, 1.0];
+    const foods = await db.all<FoodRow[]>(
+      `SELECT f.* FROM foods_fts
+       JOIN foods f ON f.rowid = foods_fts.rowid
+       WHERE foods_fts MATCH ?
+       ORDER BY bm25(foods_fts, ?, ?), f.name LIMIT ?`,
+      match,
+      enWeight,
+      itWeight,
+      parseLimit(req.query.limit, SEARCH_DEFAULT_LIMIT),
     );
+    res.json(foods.map((f) => toFood(f, lang)));
   } catch (err: unknown) {
     const message = err instanceof Error ? err.message : 'Unknown error';
     res.status(500).json({ error: message });
@@ -3,6 +3,7 @@ import { getDB } from '../db';
 import crypto from 'crypto';
 const uuidv4 = () => crypto.randomUUID();
 import { authenticateToken, JwtPayload } from '../auth.middleware';
+import { getGroupMemberIds, getUserGroupId, invalidateGroupMembership } from '../group-membership';
 
 export const groupsRouter = express.Router();
 groupsRouter.use(authenticateToken);
@@ -10,17 +11,12 @@ groupsRouter.use(authenticateToken);
 groupsRouter.get('/mine', async (req: any, res) => {
   try {
     const me = req.user as JwtPayload;
-    const db = await getDB();
-    const row = await db.get(
-      `SELECT g.id FROM groups_table g JOIN group_members gm ON gm.group_id = g.id WHERE gm.user_id = ? LIMIT 1`,
-      me.id,
-    );
-    if (!row) {
+    const groupId = await getUserGroupId(me.id);
+    if (!groupId) {
       res.json(null);
       return;
     }
-    const members = await db.all('SELECT user_id FROM group_members WHERE group_id = ?', row.id);
-    res.json({ id: row.id, users: members.map((m: { user_id: string }) => m.user_id) });
+    res.json({ id: groupId, users: await getGroupMemberIds(groupId) });
   } catch (err: unknown) {
     const message = err instanceof Error ? err.message : 'Unknown error';
     res.status(500).json({ error: message });
@@ -34,6 +30,7 @@ groupsRouter.post('/', async (req: any, res) => {
     const id = uuidv4();
     await db.run('INSERT INTO groups_table (id) VALUES (?)', id);
     await db.run('INSERT INTO group_members (group_id, user_id) VALUES (?, ?)', id, me.id);
+    invalidateGroupMembership();
     res.json({ id, users: [me.id] });
   } catch (err: unknown) {
     const message = err instanceof Error ? err.message : 'Unknown error';
@@ -50,6 +47,7 @@ groupsRouter.post('/:id/join', async (req: any, res) => {
       req.params.id,
       me.id,
     );
+    invalidateGroupMembership();
     const members = await db.all(
       'SELECT user_id FROM group_members WHERE group_id = ?',
       req.params.id,
@@ -70,6 +68,7 @@ groupsRouter.post('/:id/leave', async (req: any, res) => {
       req.params.id,
       me.id,
     );
+    invalidateGroupMembership();
     const members = await db.all(
       'SELECT user_id FROM group_members WHERE group_id = ?',
       req.params.id,
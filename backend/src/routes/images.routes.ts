@@ -0,0 +1,56 @@
+import express from 'express';
+import multer from 'multer';
+import { authenticateToken } from '../auth.middleware';
+import {
+  contentAddressedStorage,
+  IMAGES_PATH,
+  MAX_IMAGE_BYTES,
+  UnsupportedImageError,
+  UPLOADS_DIR,
+} from '../images';
+
+export const imagesRouter = express.Router();
+
+const upload = multer({
+  storage: contentAddressedStorage,
+  limits: { fileSize: MAX_IMAGE_BYTES, files: 1 },
+}).single('image');
+
+// ── GET /images/<sha256>.<ext> ──
+// Public, like any <img> source; names are content hashes, so they never
+// change and are not guessable. Range requests and ETags come with express.static.
+imagesRouter.use(
+  express.static(UPLOADS_DIR, {
+    immutable: true,
+    maxAge: '365d',
+    index: false,
+    redirect: false,
+    setHeaders: (res) => res.setHeader('X-Content-Type-Options', 'nosniff'),
+  }),
+);
+
+// ── POST /images ── multipart/form-data with one `image` file
+// Returns { url }; put it in a step's imageUrl. No thumbnails are made (see images.ts).
+imagesRouter.post('/', authenticateToken, async (req: any, res) => {
+  try {
+    await new Promise<void>((resolve, reject) =>
+      upload(req, res, (err: unknown) => (err ? reject(err) : resolve())),
+    );
+    if (!req.file) {
+      res.status(400).json({ error: 'An image file is required' });
+      return;
+    }
+    res.status(201).json({ url: `${IMAGES_PATH}/${req.file.filename}` });
+  } catch (err: unknown) {
+    if (err instanceof multer.MulterError) {
+      res.status(err.code === 'LIMIT_FILE_SIZE' ? 413 : 400).json({ error: err.message });
+      return;
+    }
+    if (err instanceof UnsupportedImageError) {
+      res.status(415).json({ error: err.message });
+      return;
+    }
+    const message = err instanceof Error ? err.message : 'Unknown error';
+    res.status(500).json({ error: message });
+  }
+});
@@ -1,70 +1,94 @@
 import express from 'express';
-import { getDB } from '../db';
+import { getDB, getReadDB, withTransaction } from '../db';
 import crypto from 'crypto';
 const uuidv4 = () => crypto.randomUUID();
 import { authenticateToken, JwtPayload } from '../auth.middleware';
 import { emitPlanningChange, emitShoppingListInvalidate } from '../socket';
+import { getShoppingList } from '../shopping-list';
+import { summarizeNutrition } from '../nutrition';
+import {
+  sendSerialized,
+  serializeNutritionRange,
+  serializePlanningWeek,
+  serializeShoppingList,
+  serializeWeekNutrition,
+} from '../serializers';
+import { getGroupMemberIds, getUserGroupId, getUserGroupIds } from '../group-membership';
+import {
+  applyPlanningBatch,
+  isPlanningWeek,
+  parsePlanningBatch,
+  PlanningBatchError,
+  planningBatchEvent,
+  PlanningRow,
+  toPlannedItem,
+} from '../planning-batch';
+import {
+  getPlanningSuggestions,
+  recordPlanningDelete,
+  recordPlanningInsert,
+  recordPlanningUpdate,
+} from '../suggestions';
 
 export const planningRouter = express.Router();
 planningRouter.use(authenticateToken);
 
-/** Find the group a user belongs to (if any) */
-async function findUserGroupId(userId: string): Promise<string | null> {
-  const db = await getDB();
-  const row = await db.get('SELECT group_id FROM group_members WHERE user_id = ? LIMIT 1', userId);
-  return row ? row.group_id : null;
-}
+const WEEK_ERROR = 'week must be a YYYY-MM-DD date';
+
+// ── GET /planning/nutrition-summary?from=<week>&to=<week> ──
+// Must stay above /:week. Returns one summary per planned week plus the total.
+planningRouter.get('/nutrition-summary', async (req: any, res) => {
+  try {
+    const me = req.user as JwtPayload;
+    const { from, to } = req.query as { from?: string; to?: string };
+    const groupId = req.query.groupId as string | undefined;
+    const assignedTo = req.query.assignedTo as string | undefined;
+    if (!from || !to || from > to) {
+      res.status(400).json({ error: 'from and to weeks are required (from <= to)' });
+      return;
+    }
+    const db = await getReadDB();
+
+    let userIds = [me.id];
+    if (groupId) {
+      userIds = await getGroupMemberIds(groupId);
+    }
+
+    const { weeks, total } = await summarizeNutrition(
+      db,
+      userIds,
+      from,
+      to,
+      assignedTo && assignedTo !== 'all' ? assignedTo : undefined,
+    );
+    sendSerialized(res, serializeNutritionRange, { from, to, weeks, total });
+  } catch (err: unknown) {
+    const message = err instanceof Error ? err.message : 'Unknown error';
+    res.status(500).json({ error: message });
+  }
+});
 
 planningRouter.get('/:week', async (req: any, res) => {
   try {
     const me = req.user as JwtPayload;
     const groupId = req.query.groupId as string | undefined;
-    const db = await getDB();
+    const db = await getReadDB();
 
     let userIds = [me.id];
     if (groupId) {
-      const members = await db.all('SELECT user_id FROM group_members WHERE group_id = ?', groupId);
-      userIds = members.map((m: { user_id: string }) => m.user_id);
+      userIds = await getGroupMemberIds(groupId);
     }
 
     const placeholders = userIds.map(() => '?').join(',');
-    const rows = await db.all(
+    const rows = await db.all<PlanningRow[]>(
       `SELECT p.*, r.name as recipe_name_lookup, r.min_servings, r.split_servings FROM planning p LEFT JOIN recipes r ON r.id = p.recipe_id WHERE p.week = ? AND p.user_id IN (${placeholders})`,
       req.params.week,
       ...userIds,
     );
 
-    const items = rows.map(
-      (r: {
-        id: string;
-        user_id: string;
-        recipe_id: string;
-        recipe_name: string;
-        recipe_name_lookup: string;
-        week: string;
-        day: string;
-        meal: string;
-        servings: number;
-        assigned_to: string;
-        min_servings: number;
-        split_servings: number;
-      }) => ({
-        kind: 'recipe' as const,
-        id: r.id,
-        user_id: r.user_id,
-        recipe_id: r.recipe_id,
-        recipe_name: r.recipe_name || r.recipe_name_lookup || '',
-        week: r.week,
-        day: r.day,
-        meal: r.meal,
-        servings: r.servings || 1,
-        assignedTo: r.assigned_to || null,
-        minServings: r.min_servings || 1,
-        splitServings: r.split_servings || 1,
-      }),
-    );
+    const items = rows.map(toPlannedItem);
 
-    res.json({ startDate: req.params.week, recipes: items });
+    sendSerialized(res, serializePlanningWeek, { startDate: req.params.week, recipes: items });
   } catch (err: unknown) {
     const message = err instanceof Error ? err.message : 'Unknown error';
     res.status(500).json({ error: message });
@@ -80,6 +104,9 @@ planningRouter.post('/:week/quick-add', async (req: any, res) => {
     if (!foodId || !foodName) {
       return res.status(400).json({ error: 'Missing food data' });
     }
+    if (!isPlanningWeek(req.params.week)) {
+      return res.status(400).json({ error: WEEK_ERROR });
+    }
 
     let recipe = await db.get(
       'SELECT * FROM recipes WHERE user_id = ? AND type = ? AND name = ?',
@@ -131,6 +158,12 @@ planningRouter.post('/:week/quick-add', async (req: any, res) => {
       me.id,
       1,
     );
+    recordPlanningInsert(me.id, {
+      id: pId,
+      recipe_id: recipe.id,
+      recipe_name: recipe.name,
+      week: req.params.week,
+    });
 
     const inserted = await db.get(
       'SELECT p.*, r.name as recipe_name_lookup, r.min_servings, r.split_servings FROM planning p LEFT JOIN recipes r ON r.id = p.recipe_id WHERE p.id = ?',
@@ -154,7 +187,7 @@ planningRouter.post('/:week/quick-add', async (req: any, res) => {
 
     res.json({ success: true, item });
 
-    const groupId = await findUserGroupId(me.id);
+    const groupId = await getUserGroupId(me.id);
     if (groupId) {
       emitPlanningChange(groupId, 'planning:added', Object.assign({}, item, { user_id: me.id }));
       emitShoppingListInvalidate(groupId, req.params.week);
@@ -169,6 +202,10 @@ planningRouter.post('/', async (req: any, res) => {
   try {
     const me = req.user as JwtPayload;
     const { recipe_id, recipe_name, week, day, meal, servings, assignedTo } = req.body;
+    if (!isPlanningWeek(week)) {
+      res.status(400).json({ error: WEEK_ERROR });
+      return;
+    }
     const db = await getDB();
     const id = uuidv4();
     await db.run(
@@ -183,6 +220,7 @@ planningRouter.post('/', async (req: any, res) => {
       servings || 1,
       assignedTo || null,
     );
+    recordPlanningInsert(me.id, { id, recipe_id, recipe_name, week, meal });
     const result = {
       kind: 'recipe',
       id,
@@ -198,7 +236,7 @@ planningRouter.post('/', async (req: any, res) => {
     res.json(result);
 
     // Real-time: notify group members
-    const groupId = await findUserGroupId(me.id);
+    const groupId = await getUserGroupId(me.id);
     if (groupId) {
       emitPlanningChange(groupId, 'planning:added', result);
       emitShoppingListInvalidate(groupId, week);
@@ -209,6 +247,54 @@ planningRouter.post('/', async (req: any, res) => {
   }
 });
 
+/** Users whose planned items `userId` may change: themselves and their group members. */
+async function findVisibleUserIds(userId: string): Promise<string[]> {
+  const visible = new Set([userId]);
+  for (const groupId of await getUserGroupIds(userId)) {
+    for (const memberId of await getGroupMemberIds(groupId)) visible.add(memberId);
+  }
+  return [...visible];
+}
+
+/** Apply a batch, answer with the resulting items, and broadcast one event to the group. */
+async function handlePlanningBatch(req: any, res: express.Response, body: unknown) {
+  try {
+    const me = req.user as JwtPayload;
+    const batch = parsePlanningBatch(body);
+    const visibleUserIds = await findVisibleUserIds(me.id);
+    const result = await withTransaction((db) =>
+      applyPlanningBatch(db, me.id, visibleUserIds, batch),
+    );
+    for (const item of result.added) recordPlanningInsert(item.user_id, item);
+    for (const item of result.updated) recordPlanningUpdate(item.user_id, item.id, item);
+    for (const item of result.deleted) recordPlanningDelete(item.user_id, item.id);
+    res.json({ added: result.added, updated: result.updated, deleted: result.deleted });
+
+    // Real-time: one coalesced event instead of one per item
+    const groupId = await getUserGroupId(me.id);
+    if (groupId) {
+      const { payload, weeks } = planningBatchEvent(result, me.id);
+      emitPlanningChange(groupId, 'planning:batch', payload);
+      for (const week of weeks) emitShoppingListInvalidate(groupId, week);
+    }
+  } catch (err: unknown) {
+    if (err instanceof PlanningBatchError) {
+      res.status(err.status).json({ error: err.message, ids: err.ids });
+      return;
+    }
+    const message = err instanceof Error ? err.message : 'Unknown error';
+    res.status(500).json({ error: message });
+  }
+}
+
+// ── POST /planning/batch ── body: { items: PlanningAdd[] }
+planningRouter.post('/batch', (req: any, res) =>
+  handlePlanningBatch(req, res, { add: req.body?.items }),
+);
+
+// ── PATCH /planning/batch ── body: { add?, move?, delete? }
+planningRouter.patch('/batch', (req: any, res) => handlePlanningBatch(req, res, req.body));
+
 planningRouter.put('/:id', async (req: any, res) => {
   try {
     const me = req.user as JwtPayload;
@@ -223,10 +309,11 @@ planningRouter.put('/:id', async (req: any, res) => {
       req.params.id,
     );
     const updated = await db.get('SELECT * FROM planning WHERE id = ?', req.params.id);
+    if (updated) recordPlanningUpdate(updated.user_id, updated.id, { meal: updated.meal });
     res.json({ success: true });
 
     // Real-time: notify group members
-    const groupId = await findUserGroupId(me.id);
+    const groupId = await getUserGroupId(me.id);
     if (groupId && updated) {
       emitPlanningChange(groupId, 'planning:updated', {
         id: req.params.id,
@@ -251,10 +338,11 @@ planningRouter.delete('/:id', async (req: any, res) => {
     const db = await getDB();
     const item = await db.get('SELECT * FROM planning WHERE id = ?', req.params.id);
     await db.run('DELETE FROM planning WHERE id = ?', req.params.id);
+    if (item) recordPlanningDelete(item.user_id, item.id);
     res.json({ success: true });
 
     // Real-time: notify group members
-    const groupId = await findUserGroupId(me.id);
+    const groupId = await getUserGroupId(me.id);
     if (groupId && item) {
       emitPlanningChange(groupId, 'planning:deleted', {
         id: req.params.id,
@@ -274,132 +362,27 @@ planningRouter.get('/:week/nutrition-summary', async (req: any, res) => {
     const me = req.user as JwtPayload;
     const groupId = req.query.groupId as string | undefined;
     const assignedTo = req.query.assignedTo as string | undefined; // userId or 'all'
-    const db = await getDB();
+    const db = await getReadDB();
 
     let userIds = [me.id];
     if (groupId) {
-      const members = await db.all('SELECT user_id FROM group_members WHERE group_id = ?', groupId);
-      userIds = members.map((m: { user_id: string }) => m.user_id);
+      userIds = await getGroupMemberIds(groupId);
     }
 
-    const placeholders = userIds.map(() => '?').join(',');
-
-    // Build the WHERE clause for assigned_to filtering
-    // If assignedTo is not provided or 'all', show items assigned to everyone (NULL) or to any member
-    // If assignedTo is a specific userId, show items assigned to NULL (everyone) or to that specific user
-    let assignedFilter = '';
-    const params: any[] = [req.params.week, ...userIds];
-
-    if (assignedTo && assignedTo !== 'all') {
-      assignedFilter = ` AND (p.assigned_to IS NULL OR p.assigned_to LIKE ?)`;
-      params.push(`%${assignedTo}%`);
-    }
-
-    const rows = await db.all(
-      `SELECT 
-        p.day,
-        ri.quantity_value,
-        ri.quantity_unit,
-        f.kcal,
-        f.protein,
-        f.fat,
-        f.carbs,
-        f.fiber,
-        f.default_unit,
-        p.servings as planned_servings,
-        r.servings as recipe_servings
-       FROM planning p
-       JOIN recipes r ON r.id = p.recipe_id
-       JOIN recipe_ingredients ri ON ri.recipe_id = p.recipe_id
-       LEFT JOIN foods f ON ri.food_id = f.id
-       WHERE p.week = ? AND p.user_id IN (${placeholders})${assignedFilter}`,
-      ...params,
+    // If assignedTo is a specific userId, count items assigned to everyone (NULL) or to that user
+    const { weeks } = await summarizeNutrition(
+      db,
+      userIds,
+      req.params.week,
+      req.params.week,
+      assignedTo && assignedTo !== 'all' ? assignedTo : undefined,
     );
+    const summary = weeks[0];
 
-    // Helper to convert quantity to grams for nutritional calculation
-    const toGrams = (value: number, unit: string): number => {
-      switch (unit) {
-        case 'GRAM':
-          return value;
-        case 'KILO':
-          return value * 1000;
-        case 'LITER':
-          return value * 1000; // approximate 1ml = 1g
-        case 'MILLILITER':
-          return value; // approximate 1ml = 1g
-        case 'PIECE':
-          return value * 100; // approximate 1 piece = 100g
-        default:
-          return value;
-      }
-    };
-
-    type DayNutrition = {
-      kcal: number;
-      protein: number;
-      fat: number;
-      carbs: number;
-      fiber: number;
-    };
-    const days: Record<string, DayNutrition> = {};
-    const weekTotal: DayNutrition = { kcal: 0, protein: 0, fat: 0, carbs: 0, fiber: 0 };
-
-    for (const r of rows) {
-      const plannedServings = r.planned_servings || 1;
-      const recipeServings = r.recipe_servings || 1;
-      const multiplier = plannedServings / recipeServings;
-
-      // If food has no nutritional info, skip
-      if (r.kcal == null && r.protein == null && r.fat == null && r.carbs == null) continue;
-
-      const quantityValue = (r.quantity_value || 0) * multiplier;
-      const unit = r.quantity_unit || r.default_unit || 'GRAM';
-      const grams = toGrams(quantityValue, unit);
-      const factor = grams / 100; // nutritional values are per 100g
-
-      const kcal = (r.kcal || 0) * factor;
-      const protein = (r.protein || 0) * factor;
-      const fat = (r.fat || 0) * factor;
-      const carbs = (r.carbs || 0) * factor;
-      const fiber = (r.fiber || 0) * factor;
-
-      const day = r.day || 'UNASSIGNED';
-      if (!days[day]) {
-        days[day] = { kcal: 0, protein: 0, fat: 0, carbs: 0, fiber: 0 };
-      }
-      days[day].kcal += kcal;
-      days[day].protein += protein;
-      days[day].fat += fat;
-      days[day].carbs += carbs;
-      days[day].fiber += fiber;
-
-      weekTotal.kcal += kcal;
-      weekTotal.protein += protein;
-      weekTotal.fat += fat;
-      weekTotal.carbs += carbs;
-      weekTotal.fiber += fiber;
-    }
-
-    // Round values
-    const round = (v: number) => Math.round(v * 10) / 10;
-    for (const key of Object.keys(days)) {
-      days[key].kcal = round(days[key].kcal);
-      days[key].protein = round(days[key].protein);
-      days[key].fat = round(days[key].fat);
-      days[key].carbs = round(days[key].carbs);
-      days[key].fiber = round(days[key].fiber);
-    }
-
-    res.json({
+    sendSerialized(res, serializeWeekNutrition, {
       week: req.params.week,
-      days,
-      weekTotal: {
-        kcal: round(weekTotal.kcal),
-        protein: round(weekTotal.protein),
-        fat: round(weekTotal.fat),
-        carbs: round(weekTotal.carbs),
-        fiber: round(weekTotal.fiber),
-      },
+      days: summary?.days || {},
+      weekTotal: summary?.weekTotal || { kcal: 0, protein: 0, fat: 0, carbs: 0, fiber: 0 },
     });
   } catch (err: unknown) {
     const message = err instanceof Error ? err.message : 'Unknown error';
@@ -407,72 +390,20 @@ planningRouter.get('/:week/nutrition-summary', async (req: any, res) => {
   }
 });
 
+// ── GET /planning/:week/suggestions?groupId=&meal= ──
+// Served from the precomputed usage counters in suggestions.ts
 planningRouter.get('/:week/suggestions', async (req: any, res) => {
   try {
     const me = req.user as JwtPayload;
     const groupId = req.query.groupId as string | undefined;
-    const db = await getDB();
+    const meal = req.query.meal as string | undefined;
 
     let userIds = [me.id];
     if (groupId) {
-      const members = await db.all('SELECT user_id FROM group_members WHERE group_id = ?', groupId);
-      userIds = members.map((m: { user_id: string }) => m.user_id);
+      userIds = await getGroupMemberIds(groupId);
     }
 
-    const placeholders = userIds.map(() => '?').join(',');
-
-    // Get recipes already planned for the current week
-    const currentWeekRecipes = await db.all(
-      `SELECT DISTINCT recipe_id FROM planning WHERE week = ? AND user_id IN (${placeholders})`,
-      req.params.week,
-      ...userIds,
-    );
-    const currentRecipeIds = new Set(
-      currentWeekRecipes.map((r: { recipe_id: string }) => r.recipe_id),
-    );
-
-    // Get most frequently planned recipes from past weeks, with last used info
-    const rows = await db.all(
-      `SELECT 
-        p.recipe_id,
-        p.recipe_name,
-        r.name as recipe_name_lookup,
-        r.type as recipe_type,
-        COUNT(*) as frequency,
-        MAX(p.week) as last_used_week,
-        GROUP_CONCAT(DISTINCT p.meal) as meals_used
-       FROM planning p
-       LEFT JOIN recipes r ON r.id = p.recipe_id
-       WHERE p.week != ? AND p.user_id IN (${placeholders})
-       GROUP BY p.recipe_id
-       ORDER BY frequency DESC
-       LIMIT 30`,
-      req.params.week,
-      ...userIds,
-    );
-
-    const suggestions = rows
-      .filter((r: { recipe_id: string }) => !currentRecipeIds.has(r.recipe_id))
-      .slice(0, 15)
-      .map(
-        (r: {
-          recipe_id: string;
-          recipe_name: string;
-          recipe_name_lookup: string;
-          recipe_type: string;
-          frequency: number;
-          last_used_week: string;
-          meals_used: string;
-        }) => ({
-          recipe_id: r.recipe_id,
-          recipe_name: r.recipe_name || r.recipe_name_lookup || '',
-          recipe_type: r.recipe_type || 'OTHER',
-          frequency: r.frequency,
-          last_used_week: r.last_used_week,
-          meals_used: r.meals_used ? [...new Set(r.meals_used.split(',').filter(Boolean))] : [],
-        }),
-      );
-
+    const suggestions = await getPlanningSuggestions(userIds, req.params.week, { meal });
     res.json(suggestions);
   } catch (err: unknown) {
     const message = err instanceof Error ? err.message : 'Unknown error';
@@ -485,26 +416,16 @@ planningRouter.get('/:week/shopping-list', async (req: any, res) => {
     const me = req.user as JwtPayload;
     const lang = req.acceptsLanguages('it', 'en') || 'en';
     const groupId = req.query.groupId as string | undefined;
-    const db = await getDB();
+    const db = await getReadDB();
 
     let userIds = [me.id];
     if (groupId) {
-      const members = await db.all('SELECT user_id FROM group_members WHERE group_id = ?', groupId);
-      userIds = members.map((m: { user_id: string }) => m.user_id);
+      userIds = await getGroupMemberIds(groupId);
     }
 
-    const placeholders = userIds.map(() => '?').join(',');
-    const rows = await db.all(
-      `SELECT ri.food_id, ri.name, ri.quantity_value, ri.quantity_unit, f.name as food_name_en, f.name_it as food_name_it, p.servings as planned_servings, r.servings as recipe_servings
-       FROM planning p 
-       JOIN recipes r ON r.id = p.recipe_id
-       JOIN recipe_ingredients ri ON ri.recipe_id = p.recipe_id
-       LEFT JOIN foods f ON ri.food_id = f.id
-       WHERE p.week = ? AND p.user_id IN (${placeholders})`,
-      req.params.week,
-      ...userIds,
-    );
+    const items = await getShoppingList(db, userIds, req.params.week, lang);
 
+    const placeholders = userIds.map(() => '?').join(',');
     // Find planned recipes with NO ingredients (WIP) → add "Cose per [recipe]" entries
     const wipRows = await db.all(
       `SELECT DISTINCT r.name as recipe_name, p.recipe_id
@@ -516,42 +437,17 @@ planningRouter.get('/:week/shopping-list', async (req: any, res) => {
       ...userIds,
     );
 
-    const map: Record<
-      string,
-      { id: string; name: string; quantity: { value: number; unit: string } }
-    > = {};
-    for (const r of rows) {
-      const translatedName = lang === 'it' ? r.food_name_it || r.name : r.food_name_en || r.name;
-      const key = translatedName || r.food_id || uuidv4();
-
-      const plannedServings = r.planned_servings || 1;
-      const recipeServings = r.recipe_servings || 1;
-      const multiplier = plannedServings / recipeServings;
-      const quantityValue = (r.quantity_value || 0) * multiplier;
-
-      if (map[key]) {
-        map[key].quantity.value = (map[key].quantity.value || 0) + quantityValue;
-      } else {
-        map[key] = {
-          id: r.food_id || key,
-          name: translatedName,
-          quantity: { value: quantityValue, unit: r.quantity_unit },
-        };
-      }
-    }
-
     // Add "Cose per [recipe]" entries for WIP recipes without ingredients
     const wipLabel = lang === 'it' ? 'Cose per' : 'Stuff for';
     for (const w of wipRows) {
-      const key = `wip:${w.recipe_id}`;
-      map[key] = {
-        id: key,
+      items.push({
+        id: `wip:${w.recipe_id}`,
         name: `${wipLabel} ${w.recipe_name}`,
         quantity: { value: 0, unit: '' },
-      };
+      });
     }
 
-    res.json(Object.values(map));
+    sendSerialized(res, serializeShoppingList, items);
   } catch (err: unknown) {
     const message = err instanceof Error ? err.message : 'Unknown error';
     res.status(500).json({ error: message });
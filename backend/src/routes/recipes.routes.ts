@@ -1,8 +1,28 @@
 import express from 'express';
-import { getDB } from '../db';
+import { Database } from 'sqlite';
+import { getDB, getReadDB, withTransaction } from '../db';
 import crypto from 'crypto';
 const uuidv4 = () => crypto.randomUUID();
 import { authenticateToken, JwtPayload } from '../auth.middleware';
+import { buildRecipe, hydrateRecipes, invalidateRecipe, RecipeRow } from '../recipe-hydration';
+import {
+  CursorKey,
+  decodeCursor,
+  encodeCursor,
+  NEXT_CURSOR_HEADER,
+  parseLimit,
+} from '../pagination';
+import { SEARCH_DEFAULT_LIMIT, toFtsQuery } from '../search';
+import { invalidateShoppingListsForRecipe, shoppingListsForRecipe } from '../shopping-list';
+import { emitShoppingListInvalidate } from '../socket';
+import { recordPlanningDelete } from '../suggestions';
+import { fanOutRecipe, feedPage } from '../feed';
+import {
+  sendSerialized,
+  serializeRecipe,
+  serializeRecipeEnvelope,
+  serializeRecipes,
+} from '../serializers';
 
 export const recipesRouter = express.Router();
 recipesRouter.use(authenticateToken);
@@ -13,242 +33,400 @@ function toMinOne(value: unknown, fallback: number) {
   return Math.max(1, Math.trunc(parsed));
 }
 
-async function buildRecipe(
-  recipeRow: {
-    id: string;
-    user_id: string;
-    name: string;
-    description?: string;
-    cuisine?: string;
-    type?: string;
-    time_value?: number;
-    time_unit?: string;
-    difficulty?: string;
-    servings?: number;
-    min_servings?: number;
-    split_servings?: number;
-    wip?: number;
-    notes?: string;
-  },
-  userId?: string,
-  lang: string = 'en',
-) {
-  const db = await getDB();
-  const ingredients = await db.all(
-    `SELECT ri.*, f.name as food_name_en, f.name_it as food_name_it 
-     FROM recipe_ingredients ri 
-     LEFT JOIN foods f ON ri.food_id = f.id 
-     WHERE ri.recipe_id = ? 
-     ORDER BY ri.sort_order`,
-    recipeRow.id,
-  );
-  const steps = await db.all(
-    'SELECT * FROM recipe_steps WHERE recipe_id = ? ORDER BY sort_order',
-    recipeRow.id,
-  );
-  const tagRows = await db.all('SELECT tag FROM recipe_tags WHERE recipe_id = ?', recipeRow.id);
-  const user = await db.get('SELECT name FROM users WHERE id = ?', recipeRow.user_id);
-
-  let isAdded = false;
-  if (userId) {
-    const saved = await db.get(
-      'SELECT 1 FROM saved_recipes WHERE user_id = ? AND recipe_id = ?',
-      userId,
-      recipeRow.id,
-    );
-    isAdded = !!saved;
+interface IngredientInput {
+  id?: string;
+  name: string;
+  quantity?: { value?: number; unit?: string };
+  brand?: string;
+}
+
+interface StoredChildRow {
+  id: number;
+  sort_order: number;
+  key: string;
+}
+
+/**
+ * Match the desired child rows (by content key, in order) against the stored ones.
+ *
+ * Unchanged rows are left alone or only re-numbered, changed rows overwrite a
+ * leftover stored row in place, and only the surplus is inserted or deleted.
+ */
+function diffChildRows(existing: StoredChildRow[], desiredKeys: string[]) {
+  const byKey = new Map<string, StoredChildRow[]>();
+  for (const row of existing) {
+    const list = byKey.get(row.key);
+    if (list) list.push(row);
+    else byKey.set(row.key, [row]);
   }
 
+  const matched = new Set<number>();
+  const reorder: { id: number; position: number }[] = [];
+  const unmatched: number[] = [];
+  desiredKeys.forEach((key, position) => {
+    const candidates = byKey.get(key);
+    if (!candidates || candidates.length === 0) {
+      unmatched.push(position);
+      return;
+    }
+    const samePosition = candidates.findIndex((r) => r.sort_order === position);
+    const [row] = candidates.splice(samePosition >= 0 ? samePosition : 0, 1);
+    matched.add(row.id);
+    if (row.sort_order !== position) reorder.push({ id: row.id, position });
+  });
+
+  const leftovers = existing.filter((r) => !matched.has(r.id));
   return {
-    id: recipeRow.id,
-    userId: recipeRow.user_id,
-    userName: user?.name || '',
-    name: recipeRow.name,
-    description: recipeRow.description || '',
-    cuisine: recipeRow.cuisine || '',
-    type: recipeRow.type || 'OTHER',
-    time: { value: recipeRow.time_value, unit: recipeRow.time_unit || 'MINUTE' },
-    difficulty: recipeRow.difficulty || 'EASY',
-    ingredients: ingredients.map(
-      (i: {
-        id: string;
-        food_id?: string;
-        name: string;
-        food_name_en?: string;
-        food_name_it?: string;
-        quantity_value?: number;
-        quantity_unit?: string;
-        brand?: string;
-      }) => ({
-        id: i.food_id || i.id,
-        name: lang === 'it' ? i.food_name_it || i.name : i.food_name_en || i.name,
-        quantity: { value: i.quantity_value, unit: i.quantity_unit },
-        brand: i.brand || '',
-      }),
-    ),
-    steps: steps.map((s: { text: string; image_url?: string }) => ({
-      text: s.text,
-      imageUrl: s.image_url || '',
-    })),
-    tags: tagRows.map((t: { tag: string }) => t.tag),
-    servings: recipeRow.servings || 4,
-    minServings: recipeRow.min_servings || 1,
-    splitServings: recipeRow.split_servings || 1,
-    wip: !!recipeRow.wip,
-    notes: recipeRow.notes || '',
-    isAdded,
+    reorder,
+    overwrite: unmatched
+      .slice(0, leftovers.length)
+      .map((position, i) => ({ id: leftovers[i].id, position })),
+    insert: unmatched.slice(leftovers.length),
+    remove: leftovers.slice(unmatched.length).map((r) => r.id),
   };
 }
 
+/**
+ * Sync a recipe's ingredients, steps and tags with the submitted lists.
+ * Must run inside `withTransaction` so the whole save commits atomically.
+ */
 async function saveRecipeDetails(
+  db: Database,
   recipeId: string,
-  ingredients: {
-    id?: string;
-    name: string;
-    quantity?: { value?: number; unit?: string };
-    brand?: string;
-  }[],
+  ingredients: IngredientInput[],
   steps: { text: string; imageUrl?: string }[],
   tags: string[],
 ) {
-  const db = await getDB();
-  await db.run('DELETE FROM recipe_ingredients WHERE recipe_id = ?', recipeId);
-  await db.run('DELETE FROM recipe_steps WHERE recipe_id = ?', recipeId);
-  await db.run('DELETE FROM recipe_tags WHERE recipe_id = ?', recipeId);
+  // ── Ingredients ──
+  // Rows are addressed by rowid: older quick-add rows were inserted without an id.
+  const storedIngredients = await db.all<
+    {
+      rowid: number;
+      id: string | null;
+      food_id: string | null;
+      name: string;
+      quantity_value: number | null;
+      quantity_unit: string | null;
+      brand: string | null;
+      sort_order: number;
+    }[]
+  >(
+    'SELECT rowid, id, food_id, name, quantity_value, quantity_unit, brand, sort_order FROM recipe_ingredients WHERE recipe_id = ?',
+    recipeId,
+  );
+  // Free-text ingredients are echoed back with their row id as `id`; keep them unlinked.
+  const freeTextRowIds = new Set(
+    storedIngredients.filter((r) => !r.food_id && r.id).map((r) => r.id),
+  );
+  const desiredIngredients = (ingredients || []).map((ing) => ({
+    food_id: ing.id && !freeTextRowIds.has(ing.id) ? ing.id : null,
+    name: ing.name,
+    quantity_value: ing.quantity?.value ?? null,
+    quantity_unit: ing.quantity?.unit || null,
+    brand: ing.brand || '',
+  }));
+  const ingredientKey = (r: {
+    food_id: string | null;
+    name: string;
+    quantity_value: number | null;
+    quantity_unit: string | null;
+    brand: string | null;
+  }) =>
+    JSON.stringify([r.food_id, r.name, r.quantity_value, r.quantity_unit || null, r.brand || '']);
 
-  for (let i = 0; i < (ingredients || []).length; i++) {
-    const ing = ingredients[i];
+  const ingredientDiff = diffChildRows(
+    storedIngredients.map((r) => ({
+      id: r.rowid,
+      sort_order: r.sort_order,
+      key: ingredientKey(r),
+    })),
+    desiredIngredients.map(ingredientKey),
+  );
+  for (const { id, position } of ingredientDiff.reorder) {
+    await db.run('UPDATE recipe_ingredients SET sort_order = ? WHERE rowid = ?', position, id);
+  }
+  for (const { id, position } of ingredientDiff.overwrite) {
+    const ing = desiredIngredients[position];
+    await db.run(
+      'UPDATE recipe_ingredients SET food_id = ?, name = ?, quantity_value = ?, quantity_unit = ?, sort_order = ?, brand = ? WHERE rowid = ?',
+      ing.food_id,
+      ing.name,
+      ing.quantity_value,
+      ing.quantity_unit,
+      position,
+      ing.brand,
+      id,
+    );
+  }
+  for (const position of ingredientDiff.insert) {
+    const ing = desiredIngredients[position];
     await db.run(
       `INSERT INTO recipe_ingredients (id, recipe_id, food_id, name, quantity_value, quantity_unit, sort_order, brand)
        VALUES (?, ?, ?, ?, ?, ?, ?, ?)`,
       uuidv4(),
       recipeId,
-      ing.id || null,
+      ing.food_id,
       ing.name,
-      ing.quantity?.value ?? null,
-      ing.quantity?.unit || null,
-      i,
-      ing.brand || '',
+      ing.quantity_value,
+      ing.quantity_unit,
+      position,
+      ing.brand,
     );
   }
+  for (const id of ingredientDiff.remove) {
+    await db.run('DELETE FROM recipe_ingredients WHERE rowid = ?', id);
+  }
 
-  for (let i = 0; i < (steps || []).length; i++) {
-    const step = steps[i];
+  // ── Steps ──
+  const storedSteps = await db.all<
+    { rowid: number; text: string; image_url: string | null; sort_order: number }[]
+  >('SELECT rowid, text, image_url, sort_order FROM recipe_steps WHERE recipe_id = ?', recipeId);
+  const desiredSteps = (steps || []).map((step) => ({
+    text: step.text,
+    image_url: step.imageUrl || '',
+  }));
+  const stepKey = (r: { text: string; image_url: string | null }) =>
+    JSON.stringify([r.text, r.image_url || '']);
+
+  const stepDiff = diffChildRows(
+    storedSteps.map((r) => ({ id: r.rowid, sort_order: r.sort_order, key: stepKey(r) })),
+    desiredSteps.map(stepKey),
+  );
+  for (const { id, position } of stepDiff.reorder) {
+    await db.run('UPDATE recipe_steps SET sort_order = ? WHERE rowid = ?', position, id);
+  }
+  for (const { id, position } of stepDiff.overwrite) {
+    const step = desiredSteps[position];
     await db.run(
-      `INSERT INTO recipe_steps (id, recipe_id, text, image_url, sort_order) VALUES (?, ?, ?, ?, ?)`,
+      'UPDATE recipe_steps SET text = ?, image_url = ?, sort_order = ? WHERE rowid = ?',
+      step.text,
+      step.image_url,
+      position,
+      id,
+    );
+  }
+  for (const position of stepDiff.insert) {
+    const step = desiredSteps[position];
+    await db.run(
+      'INSERT INTO recipe_steps (id, recipe_id, text, image_url, sort_order) VALUES (?, ?, ?, ?, ?)',
       uuidv4(),
       recipeId,
       step.text,
-      step.imageUrl || '',
-      i,
+      step.image_url,
+      position,
     );
   }
+  for (const id of stepDiff.remove) {
+    await db.run('DELETE FROM recipe_steps WHERE rowid = ?', id);
+  }
 
-  for (const tag of tags || []) {
-    await db.run('INSERT OR IGNORE INTO recipe_tags (recipe_id, tag) VALUES (?, ?)', recipeId, tag);
+  // ── Tags ──
+  const storedTags = new Set(
+    (
+      await db.all<{ tag: string }[]>('SELECT tag FROM recipe_tags WHERE recipe_id = ?', recipeId)
+    ).map((t) => t.tag),
+  );
+  const desiredTags = new Set(tags || []);
+  for (const tag of storedTags) {
+    if (!desiredTags.has(tag)) {
+      await db.run('DELETE FROM recipe_tags WHERE recipe_id = ? AND tag = ?', recipeId, tag);
+    }
+  }
+  for (const tag of desiredTags) {
+    if (!storedTags.has(tag)) {
+      await db.run('INSERT INTO recipe_tags (recipe_id, tag) VALUES (?, ?)', recipeId, tag);
+    }
   }
 }
 
+/** Rows hydrated and flushed per batch when streaming NDJSON. */
+const STREAM_BATCH_SIZE = 50;
+
+type ListRow = RecipeRow & { cursor_key: string };
+
+/** Fetch up to `limit` rows (-1 = all) after the `[cursor_key, id]` cursor, newest first. */
+type ListQuery = (cursor: CursorKey | null, limit: number) => Promise<ListRow[]>;
+
+async function fetchPage(query: ListQuery, cursor: CursorKey | null, limit?: number) {
+  if (limit === undefined) return { rows: await query(cursor, -1), nextKey: null };
+  const rows = await query(cursor, limit + 1);
+  if (rows.length <= limit) return { rows, nextKey: null };
+  const page = rows.slice(0, limit);
+  const last = page[page.length - 1];
+  return { rows: page, nextKey: [last.cursor_key, last.id] as CursorKey };
+}
+
+function wantsNdjson(req: any): boolean {
+  return (
+    req.query.format === 'ndjson' ||
+    req.accepts(['application/json', 'application/x-ndjson']) === 'application/x-ndjson'
+  );
+}
+
+/** Resolve on 'drain', or on 'close' so a vanished client cannot stall the loop. */
+function waitForDrain(res: express.Response): Promise<void> {
+  return new Promise((resolve) => {
+    const done = () => {
+      res.off('drain', done);
+      res.off('close', done);
+      resolve();
+    };
+    res.on('drain', done);
+    res.on('close', done);
+  });
+}
+
+/**
+ * Serve a recipe list page as a JSON array, with the next cursor in the
+ * X-Next-Cursor header. With `Accept: application/x-ndjson` (or
+ * `?format=ndjson`) recipes are instead written one per line, hydrated in
+ * small batches, so clients can render the first ones while the rest stream.
+ * A stream stops after `limit` recipes; resume with JSON pages if needed.
+ */
+async function sendRecipeList(
+  req: any,
+  res: express.Response,
+  query: ListQuery,
+  defaultLimit?: number,
+) {
+  const me = req.user as JwtPayload;
+  const lang = req.acceptsLanguages('it', 'en') || 'en';
+  let cursor: CursorKey | null = null;
+  if (req.query.cursor !== undefined) {
+    cursor = decodeCursor(req.query.cursor, 2);
+    if (!cursor) {
+      res.status(400).json({ error: 'Invalid cursor' });
+      return;
+    }
+  }
+  const limit = parseLimit(req.query.limit, defaultLimit);
+
+  if (!wantsNdjson(req)) {
+    const page = await fetchPage(query, cursor, limit);
+    if (page.nextKey) res.setHeader(NEXT_CURSOR_HEADER, encodeCursor(page.nextKey));
+    sendSerialized(res, serializeRecipes, await hydrateRecipes(page.rows, me.id, lang));
+    return;
+  }
+
+  res.setHeader('Content-Type', 'application/x-ndjson; charset=utf-8');
+  let remaining = limit ?? Infinity;
+  while (remaining > 0 && !res.destroyed) {
+    const page = await fetchPage(query, cursor, Math.min(STREAM_BATCH_SIZE, remaining));
+    const recipes = await hydrateRecipes(page.rows, me.id, lang);
+    for (const recipe of recipes) {
+      if (!res.write(serializeRecipe(recipe) + '\n')) await waitForDrain(res);
+    }
+    remaining -= page.rows.length;
+    if (!page.nextKey) break;
+    cursor = page.nextKey;
+  }
+  res.end();
+}
+
+/** Report a failure, or abort the response if a stream has already started. */
+function sendListError(res: express.Response, err: unknown) {
+  if (res.headersSent) {
+    res.destroy();
+    return;
+  }
+  const message = err instanceof Error ? err.message : 'Unknown error';
+  res.status(500).json({ error: message });
+}
+
 recipesRouter.get('/', async (req: any, res) => {
   try {
     const me = req.user as JwtPayload;
-    const lang = req.acceptsLanguages('it', 'en') || 'en';
     const userId = (req.query.userId as string) || me.id;
-    const db = await getDB();
-    const rows = await db.all(
-      'SELECT * FROM recipes WHERE user_id = ? ORDER BY created_at DESC',
-      userId,
-    );
-    const recipes = await Promise.all(
-      rows.map(
-        (r: {
-          id: string;
-          user_id: string;
-          name: string;
-          description?: string;
-          cuisine?: string;
-          type?: string;
-          time_value?: number;
-          time_unit?: string;
-          difficulty?: string;
-          servings?: number;
-          min_servings?: number;
-          split_servings?: number;
-          wip?: number;
-          notes?: string;
-        }) => buildRecipe(r, me.id, lang),
+    const db = await getReadDB();
+    await sendRecipeList(req, res, (cursor, limit) =>
+      db.all<ListRow[]>(
+        `SELECT *, created_at AS cursor_key FROM recipes
+         WHERE user_id = ?${cursor ? ' AND (created_at, id) < (?, ?)' : ''}
+         ORDER BY created_at DESC, id DESC LIMIT ?`,
+        userId,
+        ...(cursor || []),
+        limit,
       ),
     );
-    res.json(recipes);
   } catch (err: unknown) {
-    const message = err instanceof Error ? err.message : 'Unknown error';
-    res.status(500).json({ error: message });
+    sendListError(res, err);
   }
 });
 
 recipesRouter.get('/saved', async (req: any, res) => {
   try {
     const me = req.user as JwtPayload;
-    const lang = req.acceptsLanguages('it', 'en') || 'en';
-    const db = await getDB();
-    const rows = await db.all(
-      `SELECT r.* FROM recipes r JOIN saved_recipes sr ON sr.recipe_id = r.id WHERE sr.user_id = ? ORDER BY sr.created_at DESC`,
-      me.id,
-    );
-    const recipes = await Promise.all(
-      rows.map(
-        (r: {
-          id: string;
-          user_id: string;
-          name: string;
-          description?: string;
-          cuisine?: string;
-          type?: string;
-          time_value?: number;
-          time_unit?: string;
-          difficulty?: string;
-          servings?: number;
-          min_servings?: number;
-          split_servings?: number;
-          wip?: number;
-          notes?: string;
-        }) => buildRecipe(r, me.id, lang),
+    const db = await getReadDB();
+    await sendRecipeList(req, res, (cursor, limit) =>
+      db.all<ListRow[]>(
+        `SELECT r.*, sr.created_at AS cursor_key FROM saved_recipes sr
+         JOIN recipes r ON r.id = sr.recipe_id
+         WHERE sr.user_id = ?${cursor ? ' AND (sr.created_at, sr.recipe_id) < (?, ?)' : ''}
+         ORDER BY sr.created_at DESC, sr.recipe_id DESC LIMIT ?`,
+        me.id,
+        ...(cursor || []),
+        limit,
       ),
     );
-    res.json(recipes);
   } catch (err: unknown) {
-    const message = err instanceof Error ? err.message : 'Unknown error';
-    res.status(500).json({ error: message });
+    sendListError(res, err);
   }
 });
 
 recipesRouter.get('/discover', async (req: any, res) => {
+  try {
+    const db = await getReadDB();
+    await sendRecipeList(
+      req,
+      res,
+      (cursor, limit) =>
+        db.all<ListRow[]>(
+          `SELECT *, created_at AS cursor_key FROM recipes
+           ${cursor ? 'WHERE (created_at, id) < (?, ?)' : ''}
+           ORDER BY created_at DESC, id DESC LIMIT ?`,
+          ...(cursor || []),
+          limit,
+        ),
+      50,
+    );
+  } catch (err: unknown) {
+    sendListError(res, err);
+  }
+});
+
+// ── GET /recipes/feed ──────────────────────────────
+// Recipes from followed chefs, newest first (see feed.ts)
+recipesRouter.get('/feed', async (req: any, res) => {
+  try {
+    const me = req.user as JwtPayload;
+    const db = await getReadDB();
+    await sendRecipeList(req, res, (cursor, limit) => feedPage(db, me.id, cursor, limit), 50);
+  } catch (err: unknown) {
+    sendListError(res, err);
+  }
+});
+
+// ── GET /recipes/search?q= ─────────────────────────
+recipesRouter.get('/search', async (req: any, res) => {
   try {
     const me = req.user as JwtPayload;
     const lang = req.acceptsLanguages('it', 'en') || 'en';
-    const db = await getDB();
-    const rows = await db.all('SELECT * FROM recipes ORDER BY created_at DESC LIMIT 50');
-    const recipes = await Promise.all(
-      rows.map(
-        (r: {
-          id: string;
-          user_id: string;
-          name: string;
-          description?: string;
-          cuisine?: string;
-          type?: string;
-          time_value?: number;
-          time_unit?: string;
-          difficulty?: string;
-          servings?: number;
-          min_servings?: number;
-          split_servings?: number;
-          wip?: number;
-          notes?: string;
-        }) => buildRecipe(r, me.id, lang),
-      ),
+    const match = toFtsQuery(req.query.q);
+    if (!match) {
+      res.json([]);
+      return;
+    }
+    const db = await getReadDB();
+    // Weights: name, description, tags, ingredients (lower bm25 = better)
+    const rows = await db.all<RecipeRow[]>(
+      `SELECT r.* FROM recipes_fts
+       JOIN recipes r ON r.rowid = recipes_fts.rowid
+       WHERE recipes_fts MATCH ?
+       ORDER BY bm25(recipes_fts, 10.0, 2.0, 5.0, 3.0) LIMIT ?`,
+      match,
+      parseLimit(req.query.limit, SEARCH_DEFAULT_LIMIT),
     );
-    res.json(recipes);
+    sendSerialized(res, serializeRecipes, await hydrateRecipes(rows, me.id, lang));
   } catch (err: unknown) {
     const message = err instanceof Error ? err.message : 'Unknown error';
     res.status(500).json({ error: message });
@@ -259,14 +437,14 @@ recipesRouter.get('/:id', async (req: any, res) => {
   try {
     const me = req.user as JwtPayload;
     const lang = req.acceptsLanguages('it', 'en') || 'en';
-    const db = await getDB();
+    const db = await getReadDB();
     const row = await db.get('SELECT * FROM recipes WHERE id = ?', req.params.id);
     if (!row) {
       res.status(404).json({ error: 'Recipe not found' });
       return;
     }
     const recipe = await buildRecipe(row, me.id, lang);
-    res.json(recipe);
+    sendSerialized(res, serializeRecipe, recipe);
   } catch (err: unknown) {
     const message = err instanceof Error ? err.message : 'Unknown error';
     res.status(500).json({ error: message });
@@ -297,25 +475,28 @@ recipesRouter.post('/', async (req: any, res) => {
     const normalizedSplitServings = toMinOne(splitServings, 1);
     const db = await getDB();
     const id = uuidv4();
-    await db.run(
-      `INSERT INTO recipes (id, user_id, name, description, cuisine, type, difficulty, time_value, time_unit, servings, min_servings, split_servings, wip, notes)
-       VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)`,
-      id,
-      me.id,
-      name,
-      description || '',
-      cuisine || '',
-      type || 'OTHER',
-      difficulty || 'EASY',
-      time?.value ?? null,
-      time?.unit ?? 'MINUTE',
-      normalizedServings,
-      normalizedMinServings,
-      normalizedSplitServings,
-      wip ? 1 : 0,
-      notes || '',
-    );
-    await saveRecipeDetails(id, ingredients, steps, tags);
+    await withTransaction(async (tx) => {
+      await tx.run(
+        `INSERT INTO recipes (id, user_id, name, description, cuisine, type, difficulty, time_value, time_unit, servings, min_servings, split_servings, wip, notes)
+         VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)`,
+        id,
+        me.id,
+        name,
+        description || '',
+        cuisine || '',
+        type || 'OTHER',
+        difficulty || 'EASY',
+        time?.value ?? null,
+        time?.unit ?? 'MINUTE',
+        normalizedServings,
+        normalizedMinServings,
+        normalizedSplitServings,
+        wip ? 1 : 0,
+        notes || '',
+      );
+      await saveRecipeDetails(tx, id, ingredients, steps, tags);
+      await fanOutRecipe(tx, id);
+    });
     const row = await db.get('SELECT * FROM recipes WHERE id = ?', id);
     if (!row) {
       res.status(404).json({ error: 'Recipe not found after creation' });
@@ -323,7 +504,7 @@ recipesRouter.post('/', async (req: any, res) => {
     }
     const lang = req.acceptsLanguages('it', 'en') || 'en';
     const recipe = await buildRecipe(row, me.id, lang);
-    res.json({ data: recipe });
+    sendSerialized(res, serializeRecipeEnvelope, { data: recipe });
   } catch (err: unknown) {
     const message = err instanceof Error ? err.message : 'Unknown error';
     res.status(500).json({ error: message });
@@ -362,23 +543,28 @@ recipesRouter.put('/:id', async (req: any, res) => {
       res.status(404).json({ error: 'Recipe not found or not owned' });
       return;
     }
-    await db.run(
-      `UPDATE recipes SET name=?, description=?, cuisine=?, type=?, difficulty=?, time_value=?, time_unit=?, servings=?, min_servings=?, split_servings=?, wip=?, notes=? WHERE id = ?`,
-      name,
-      description || '',
-      cuisine || '',
-      type || 'OTHER',
-      difficulty || 'EASY',
-      time?.value ?? null,
-      time?.unit ?? 'MINUTE',
-      normalizedServings,
-      normalizedMinServings,
-      normalizedSplitServings,
-      wip ? 1 : 0,
-      notes || '',
-      req.params.id,
-    );
-    await saveRecipeDetails(req.params.id, ingredients, steps, tags);
+    await withTransaction(async (tx) => {
+      await tx.run(
+        `UPDATE recipes SET name=?, description=?, cuisine=?, type=?, difficulty=?, time_value=?, time_unit=?, servings=?, min_servings=?, split_servings=?, wip=?, notes=? WHERE id = ?`,
+        name,
+        description || '',
+        cuisine || '',
+        type || 'OTHER',
+        difficulty || 'EASY',
+        time?.value ?? null,
+        time?.unit ?? 'MINUTE',
+        normalizedServings,
+        normalizedMinServings,
+        normalizedSplitServings,
+        wip ? 1 : 0,
+        notes || '',
+        req.params.id,
+      );
+      await saveRecipeDetails(tx, req.params.id, ingredients, steps, tags);
+    });
+    invalidateRecipe(req.params.id);
+    // Before answering: once headers are sent, a failure here could not reach the client
+    await invalidateShoppingListsForRecipe(db, req.params.id);
     res.json({ success: true });
   } catch (err: unknown) {
     const message = err instanceof Error ? err.message : 'Unknown error';
@@ -388,8 +574,20 @@ recipesRouter.put('/:id', async (req: any, res) => {
 
 recipesRouter.delete('/:id', async (req: any, res) => {
   try {
-    const db = await getDB();
-    await db.run('DELETE FROM recipes WHERE id = ?', req.params.id);
+    // Planned rows go with the recipe (ON DELETE CASCADE); read them in the same
+    // transaction so a row planned meanwhile is not missed
+    const { planned, lists } = await withTransaction(async (tx) => {
+      const planned = await tx.all<{ id: string; user_id: string }[]>(
+        'SELECT id, user_id FROM planning WHERE recipe_id = ?',
+        req.params.id,
+      );
+      const lists = await shoppingListsForRecipe(tx, req.params.id);
+      await tx.run('DELETE FROM recipes WHERE id = ?', req.params.id);
+      return { planned, lists };
+    });
+    invalidateRecipe(req.params.id);
+    for (const row of planned) recordPlanningDelete(row.user_id, row.id);
+    for (const r of lists) emitShoppingListInvalidate(r.group_id, r.week);
     res.json({ success: true });
   } catch (err: unknown) {
     const message = err instanceof Error ? err.message : 'Unknown error';
@@ -1,18 +1,81 @@
 import express from 'express';
-import { getDB } from '../db';
+import { getReadDB, withTransaction } from '../db';
 import { authenticateToken, JwtPayload } from '../auth.middleware';
+import { followAuthor, unfollowAuthor } from '../feed';
+import {
+  CursorKey,
+  decodeCursor,
+  encodeCursor,
+  MAX_PAGE_SIZE,
+  NEXT_CURSOR_HEADER,
+  parseLimit,
+} from '../pagination';
 
 export const usersRouter = express.Router();
 usersRouter.use(authenticateToken);
 
+/** Users per directory page when `?limit=` is absent. */
+const USERS_PAGE_SIZE = 50;
+
+// ── GET /users?q=&cursor=&limit= ──
+// The user directory in name order, paginated with X-Next-Cursor; `q` keeps
+// names starting with it (case-insensitive). `?ids=a,b` returns just those
+// users instead, e.g. to show group members' names.
 usersRouter.get('/', async (req: any, res) => {
   try {
     const me = req.user as JwtPayload;
-    const db = await getDB();
-    const users = await db.all(
-      'SELECT id, name, email, avatar_url FROM users WHERE id != ?',
-      me.id,
+    const db = await getReadDB();
+
+    if (req.query.ids !== undefined) {
+      const ids = [...new Set(String(req.query.ids).split(',').filter(Boolean))];
+      const wanted = ids.slice(0, MAX_PAGE_SIZE);
+      const users = wanted.length
+        ? await db.all(
+            `SELECT id, name, email, avatar_url FROM users
+             WHERE id IN (${wanted.map(() => '?').join(', ')})`,
+            ...wanted,
+          )
+        : [];
+      res.json(users);
+      return;
+    }
+
+    let cursor: CursorKey | null = null;
+    if (req.query.cursor !== undefined) {
+      cursor = decodeCursor(req.query.cursor, 2);
+      if (!cursor) {
+        res.status(400).json({ error: 'Invalid cursor' });
+        return;
+      }
+    }
+    const limit = parseLimit(req.query.limit, USERS_PAGE_SIZE)!;
+    const prefix = typeof req.query.q === 'string' ? req.query.q.trim() : '';
+
+    // The prefix bounds, the cursor and the ORDER BY all follow idx_users_name,
+    // so a page is one index range scan however large the directory is
+    const where = ['id != ?'];
+    const params: unknown[] = [me.id];
+    if (prefix) {
+      // Every name starting with `prefix` sorts between it and prefix + U+10FFFF
+      where.push('name >= ? COLLATE NOCASE AND name < ? COLLATE NOCASE');
+      params.push(prefix, prefix + '\u{10FFFF}');
+    }
+    if (cursor) {
+      where.push('(name COLLATE NOCASE, id) > (?, ?)');
+      params.push(...cursor);
+    }
+    const users = await db.all<{ id: string; name: string }[]>(
+      `SELECT id, name, email, avatar_url FROM users
+       WHERE ${where.join(' AND ')}
+       ORDER BY name COLLATE NOCASE, id LIMIT ?`,
+      ...params,
+      limit + 1,
     );
+    if (users.length > limit) {
+      users.pop();
+      const last = users[users.length - 1];
+      res.setHeader(NEXT_CURSOR_HEADER, encodeCursor([last.name, last.id]));
+    }
     res.json(users);
   } catch (err: unknown) {
     const message = err instanceof Error ? err.message : 'Unknown error';
@@ -23,7 +86,7 @@ usersRouter.get('/', async (req: any, res) => {
 usersRouter.get('/:id', async (req: any, res) => {
   try {
     const me = req.user as JwtPayload;
-    const db = await getDB();
+    const db = await getReadDB();
     const user = await db.get(
       'SELECT id, name, email, avatar_url FROM users WHERE id = ?',
       req.params.id,
@@ -47,21 +110,16 @@ usersRouter.get('/:id', async (req: any, res) => {
 
 usersRouter.get('/:id/stats', async (req: any, res) => {
   try {
-    const db = await getDB();
-    const userId = req.params.id;
-    const saved = await db.get('SELECT COUNT(*) as c FROM saved_recipes WHERE user_id = ?', userId);
-    const followers = await db.get(
-      'SELECT COUNT(*) as c FROM followers WHERE followed_id = ?',
-      userId,
-    );
-    const followed = await db.get(
-      'SELECT COUNT(*) as c FROM followers WHERE follower_id = ?',
-      userId,
+    const db = await getReadDB();
+    // Counters are kept up to date by triggers (migration v10)
+    const stats = await db.get(
+      'SELECT saved_count, followers_count, followed_count FROM users WHERE id = ?',
+      req.params.id,
     );
     res.json({
-      saved: saved?.c || 0,
-      followers: followers?.c || 0,
-      followed: followed?.c || 0,
+      saved: stats?.saved_count || 0,
+      followers: stats?.followers_count || 0,
+      followed: stats?.followed_count || 0,
     });
   } catch (err: unknown) {
     const message = err instanceof Error ? err.message : 'Unknown error';
@@ -72,12 +130,14 @@ usersRouter.get('/:id/stats', async (req: any, res) => {
 usersRouter.post('/:id/follow', async (req: any, res) => {
   try {
     const me = req.user as JwtPayload;
-    const db = await getDB();
-    await db.run(
-      'INSERT OR IGNORE INTO followers (follower_id, followed_id) VALUES (?, ?)',
-      me.id,
-      req.params.id,
-    );
+    await withTransaction(async (tx) => {
+      const result = await tx.run(
+        'INSERT OR IGNORE INTO followers (follower_id, followed_id) VALUES (?, ?)',
+        me.id,
+        req.params.id,
+      );
+      if (result.changes) await followAuthor(tx, me.id, req.params.id);
+    });
     res.json({ success: true });
   } catch (err: unknown) {
     const message = err instanceof Error ? err.message : 'Unknown error';
@@ -88,12 +148,14 @@ usersRouter.post('/:id/follow', async (req: any, res) => {
 usersRouter.delete('/:id/follow', async (req: any, res) => {
   try {
     const me = req.user as JwtPayload;
-    const db = await getDB();
-    await db.run(
-      'DELETE FROM followers WHERE follower_id = ? AND followed_id = ?',
-      me.id,
-      req.params.id,
-    );
+    await withTransaction(async (tx) => {
+      await tx.run(
+        'DELETE FROM followers WHERE follower_id = ? AND followed_id = ?',
+        me.id,
+        req.params.id,
+      );
+      await unfollowAuthor(tx, me.id, req.params.id);
+    });
     res.json({ success: true });
   } catch (err: unknown) {
     const message = err instanceof Error ? err.message : 'Unknown error';
@@ -0,0 +1,27 @@
+/**
+ * Full-text search helpers (SQLite FTS5).
+ *
+ * `recipes_fts` and `foods_fts` are created by schema migration v4 and kept in
+ * sync by triggers; their rowid is the rowid of the source row, so results
+ * join back with `JOIN recipes r ON r.rowid = recipes_fts.rowid`.
+ */
+
+/** Results returned by a search endpoint when `?limit=` is absent. */
+export const SEARCH_DEFAULT_LIMIT = 20;
+
+/** Longest user query (in characters) that is turned into an FTS expression. */
+const MAX_QUERY_LENGTH = 100;
+
+/**
+ * Turn free user input into a safe FTS5 MATCH expression.
+ *
+ * Every word becomes a quoted prefix term (`"pom"*`), so FTS operators in the
+ * input are never interpreted and partially typed words already match.
+ * Returns null when the input contains nothing searchable.
+ */
+export function toFtsQuery(raw: unknown): string | null {
+  if (typeof raw !== 'string') return null;
+  const terms = raw.slice(0, MAX_QUERY_LENGTH).match(/[\p{L}\p{N}]+/gu);
+  if (!terms) return null;
+  return terms.map((t) => `"${t}"*`).join(' ');
+}
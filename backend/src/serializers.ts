@@ -0,0 +1,198 @@
+/**
+ * Schema-compiled JSON serializers for the main response payloads.
+ *
+ * `JSON.stringify` has to discover the shape of every object it visits. The
+ * hot payloads (recipes, planning weeks, shopping lists, nutrition
+ * summaries) have a fixed shape, so each schema below is compiled once into a
+ * function that writes the known properties in order. Strings without
+ * characters that need escaping are quoted directly.
+ *
+ * The output is what `JSON.stringify` would produce for a value of that
+ * shape: undefined properties are omitted, non-finite numbers become null,
+ * and any value that does not match its schema (null, a string where a
+ * number was declared, ...) falls back to `JSON.stringify` for that value.
+ * Properties missing from the schema are not written, so keep the schemas in
+ * step with the mappers that build the payloads.
+ */
+
+import type { Response } from 'express';
+
+export type Schema =
+  | { type: 'string' | 'number' | 'boolean' | 'any' }
+  | { type: 'array'; items: Schema }
+  | { type: 'object'; properties: Record<string, Schema> }
+  /** An object used as a dictionary, e.g. nutrition per day. */
+  | { type: 'map'; values: Schema };
+
+export type Serializer = (value: unknown) => string;
+
+const NEEDS_ESCAPE = /["\\\u0000-\u001f\ud800-\udfff]/;
+
+/** Strings shorter than this are scanned by hand, which beats the regex for them. */
+const SHORT_STRING = 42;
+
+const fallback = (v: unknown): string => JSON.stringify(v) ?? 'null';
+
+function quote(v: string): string {
+  if (v.length < SHORT_STRING) {
+    for (let i = 0; i < v.length; i++) {
+      const c = v.charCodeAt(i);
+      if (c < 32 || c === 34 || c === 92 || (c >= 0xd800 && c <= 0xdfff)) {
+        return JSON.stringify(v);
+      }
+    }
+    return `"${v}"`;
+  }
+  return NEEDS_ESCAPE.test(v) ? JSON.stringify(v) : `"${v}"`;
+}
+
+/** Compile `schema` into a function returning the JSON text of a value. */
+export function compileSerializer(schema: Schema): Serializer {
+  const functions: string[] = [];
+
+  // Source of an expression serializing the (defined) value in variable `x`.
+  // Primitives are inlined; containers get a generated function each.
+  const expr = (s: Schema, x: string): string => {
+    switch (s.type) {
+      case 'string':
+        return `(typeof ${x} === 'string' ? $quote(${x}) : $any(${x}))`;
+      case 'number':
+        return `(typeof ${x} === 'number' ? (Number.isFinite(${x}) ? '' + ${x} : 'null') : $any(${x}))`;
+      case 'boolean':
+        return `(${x} === true ? 'true' : ${x} === false ? 'false' : $any(${x}))`;
+      case 'any':
+        return `$any(${x})`;
+      default:
+        return `${emit(s)}(${x})`;
+    }
+  };
+
+  const emit = (s: Schema): string => {
+    const index = functions.push('') - 1;
+    let body: string;
+    if (s.type === 'array') {
+      body = `if (!Array.isArray(v)) return $any(v);
+        let out = '[';
+        for (let i = 0; i < v.length; i++) {
+          if (i > 0) out += ',';
+          const x = v[i];
+          out += x === undefined ? 'null' : ${expr(s.items, 'x')};
+        }
+        return out + ']';`;
+    } else if (s.type === 'map') {
+      body = `if (v === null || typeof v !== 'object' || Array.isArray(v)) return $any(v);
+        let out = '{';
+        for (const k of Object.keys(v)) {
+          const x = v[k];
+          if (x === undefined) continue;
+          out += (out.length > 1 ? ',' : '') + $quote(k) + ':' + ${expr(s.values, 'x')};
+        }
+        return out + '}';`;
+    } else if (s.type === 'object') {
+      // `out.length > 1` means a property was written already and needs a comma
+      const lines = Object.entries(s.properties).map(([key, property], i) => {
+        const name = JSON.stringify(`${JSON.stringify(key)}:`);
+        return `const x${i} = v[${JSON.stringify(key)}];
+          if (x${i} !== undefined) {
+            out += (out.length > 1 ? ',' + ${name} : ${name}) + ${expr(property, `x${i}`)};
+          }`;
+      });
+      body = `if (v === null || typeof v !== 'object' || Array.isArray(v)) return $any(v);
+        let out = '{';
+        ${lines.join('\n')}
+        return out + '}';`;
+    } else {
+      throw new Error(`Unknown schema type: ${(s as Schema).type}`);
+    }
+    functions[index] = `function f${index}(v) { ${body} }`;
+    return `f${index}`;
+  };
+
+  const root = expr(schema, 'value');
+  const factory = new Function('$quote', '$any', `${functions.join('\n')}
+    return (value) => (value === undefined ? 'null' : ${root});`);
+  return factory(quote, fallback);
+}
+
+/** Send `value` as JSON using a compiled serializer. */
+export function sendSerialized(res: Response, serialize: Serializer, value: unknown) {
+  res.type('json').send(serialize(value));
+}
+
+// ── Schemas ─────────────────────────────────────────
+
+const string = { type: 'string' } as const;
+const number = { type: 'number' } as const;
+const boolean = { type: 'boolean' } as const;
+
+const obj = (properties: Record<string, Schema>): Schema => ({ type: 'object', properties });
+const arrayOf = (items: Schema): Schema => ({ type: 'array', items });
+
+const quantity = obj({ value: number, unit: string });
+
+/** A hydrated recipe, as built by recipe-hydration.ts. */
+export const recipeSchema = obj({
+  id: string,
+  userId: string,
+  userName: string,
+  name: string,
+  description: string,
+  cuisine: string,
+  type: string,
+  time: quantity,
+  difficulty: string,
+  ingredients: arrayOf(obj({ id: string, name: string, quantity, brand: string })),
+  steps: arrayOf(obj({ text: string, imageUrl: string })),
+  tags: arrayOf(string),
+  servings: number,
+  minServings: number,
+  splitServings: number,
+  wip: boolean,
+  notes: string,
+  isAdded: boolean,
+});
+
+/** A planning entry, as built by `toPlannedItem`. */
+const plannedItemSchema = obj({
+  kind: string,
+  id: string,
+  user_id: string,
+  recipe_id: string,
+  recipe_name: string,
+  week: string,
+  day: string,
+  meal: string,
+  servings: number,
+  assignedTo: string,
+  minServings: number,
+  splitServings: number,
+});
+
+const nutrition = obj({ kcal: number, protein: number, fat: number, carbs: number, fiber: number });
+
+const weekNutrition = obj({
+  week: string,
+  days: { type: 'map', values: nutrition },
+  weekTotal: nutrition,
+});
+
+export const serializeRecipe = compileSerializer(recipeSchema);
+
+export const serializeRecipes = compileSerializer(arrayOf(recipeSchema));
+
+/** `POST /recipes` replies with `{ data: recipe }`. */
+export const serializeRecipeEnvelope = compileSerializer(obj({ data: recipeSchema }));
+
+export const serializePlanningWeek = compileSerializer(
+  obj({ startDate: string, recipes: arrayOf(plannedItemSchema) }),
+);
+
+export const serializeShoppingList = compileSerializer(
+  arrayOf(obj({ id: string, name: string, quantity })),
+);
+
+export const serializeWeekNutrition = compileSerializer(weekNutrition);
+
+export const serializeNutritionRange = compileSerializer(
+  obj({ from: string, to: string, weeks: arrayOf(weekNutrition), total: nutrition }),
+);
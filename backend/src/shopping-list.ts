@@ -0,0 +1,90 @@
+/**
+ * Shopping-list engine.
+ *
+ * Schema migration v6 maintains `shopping_list_totals` with triggers: every
+ * planning row contributes its recipe's ingredients, scaled by
+ * planning.servings / recipes.servings and converted through
+ * `unit_conversions` to a canonical unit (KILO → GRAM, LITER → MILLILITER),
+ * summed per (user, week, item, unit). Items are keyed by `food_id`, or by
+ * the normalized name for free-text ingredients.
+ *
+ * Reading a list is therefore a primary-key range lookup per member instead
+ * of a JOIN over planning, recipes and ingredients.
+ */
+
+import { Database } from 'sqlite';
+import { emitShoppingListInvalidate } from './socket';
+
+export interface ShoppingListItem {
+  id: string;
+  name: string;
+  quantity: { value: number; unit: string | null };
+}
+
+interface TotalRow {
+  item_key: string;
+  unit: string;
+  food_id: string | null;
+  name: string;
+  quantity: number;
+  food_name_en: string | null;
+  food_name_it: string | null;
+}
+
+/** Trim floating-point drift left by incremental add/subtract. */
+const roundQuantity = (v: number) => Math.round(v * 1000) / 1000;
+
+export async function getShoppingList(
+  db: Database,
+  userIds: string[],
+  week: string,
+  lang: string,
+): Promise<ShoppingListItem[]> {
+  if (userIds.length === 0) return [];
+  const placeholders = userIds.map(() => '?').join(',');
+  const rows = await db.all<TotalRow[]>(
+    `SELECT t.item_key, t.unit, MAX(t.food_id) AS food_id, MIN(t.name) AS name,
+       SUM(t.quantity) AS quantity, f.name AS food_name_en, f.name_it AS food_name_it
+     FROM shopping_list_totals t
+     LEFT JOIN foods f ON f.id = t.food_id
+     WHERE t.user_id IN (${placeholders}) AND t.week = ?
+     GROUP BY t.item_key, t.unit`,
+    ...userIds,
+    week,
+  );
+
+  // The same food in two incompatible units (e.g. GRAM and PIECE) is listed
+  // twice; keep ids unique for the client.
+  const unitsPerItem = new Map<string, number>();
+  for (const r of rows) unitsPerItem.set(r.item_key, (unitsPerItem.get(r.item_key) || 0) + 1);
+
+  return rows.map((r) => {
+    const base = r.food_id || r.item_key;
+    return {
+      id: unitsPerItem.get(r.item_key)! > 1 ? `${base}:${r.unit}` : base,
+      name: (lang === 'it' ? r.food_name_it : r.food_name_en) || r.name,
+      quantity: { value: roundQuantity(r.quantity), unit: r.unit || null },
+    };
+  });
+}
+
+/** The (group, week) shopping lists a recipe reaches through its planned rows. */
+export function shoppingListsForRecipe(db: Database, recipeId: string) {
+  return db.all<{ group_id: string; week: string }[]>(
+    `SELECT DISTINCT gm.group_id, p.week
+     FROM planning p
+     JOIN group_members gm ON gm.user_id = p.user_id
+     WHERE p.recipe_id = ?`,
+    recipeId,
+  );
+}
+
+/**
+ * Editing a recipe changes the lists of every week it is planned in; tell the
+ * groups concerned, as the planning routes do for their own changes.
+ */
+export async function invalidateShoppingListsForRecipe(db: Database, recipeId: string) {
+  for (const r of await shoppingListsForRecipe(db, recipeId)) {
+    emitShoppingListInvalidate(r.group_id, r.week);
+  }
+}
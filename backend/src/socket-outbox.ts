@@ -0,0 +1,157 @@
+/**
+ * Per-room outbox for group broadcasts.
+ *
+ * Planning changes and shopping-list invalidations are not emitted one by
+ * one. They are queued per room and flushed as a single `planning:batch`
+ * message once the room has been quiet for OUTBOX_WINDOW_MS, or at the latest
+ * OUTBOX_MAX_DELAY_MS after the first queued event. Changes to the same
+ * planning item merge (an update folds into a pending add, an add followed by
+ * a delete cancels out) and invalidated weeks are de-duplicated, so a burst of
+ * edits reaches each client as one small diff and at most one shopping-list
+ * refetch per week.
+ */
+
+export const OUTBOX_WINDOW_MS = Number(process.env.SOCKET_OUTBOX_WINDOW_MS ?? 50);
+export const OUTBOX_MAX_DELAY_MS = Number(process.env.SOCKET_OUTBOX_MAX_DELAY_MS ?? 250);
+
+export type PlanningChangeType = 'added' | 'updated' | 'deleted';
+
+/** A planning row, or the changed fields of one; always carries its `id`. */
+export type PlanningChange = { id: string; week?: string } & Record<string, unknown>;
+
+export interface PlanningBatchMessage {
+  added: PlanningChange[];
+  updated: PlanningChange[];
+  deleted: PlanningChange[];
+  /** Weeks whose shopping list changed. */
+  weeks: string[];
+}
+
+export interface OutboxStats {
+  queued: number;
+  flushed: number;
+}
+
+/** Drop fields the client derives itself and unset values. */
+function compact(change: PlanningChange): PlanningChange {
+  const out: PlanningChange = { id: change.id };
+  for (const [key, value] of Object.entries(change)) {
+    if (key !== 'kind' && value !== undefined) out[key] = value;
+  }
+  return out;
+}
+
+interface QueuedChange {
+  type: PlanningChangeType;
+  change: PlanningChange;
+}
+
+export class RoomOutbox {
+  private readonly changes = new Map<string, QueuedChange>();
+  private readonly weeks = new Set<string>();
+  private timer: ReturnType<typeof setTimeout> | null = null;
+  private firstQueuedAt = 0;
+
+  constructor(
+    private readonly send: (message: PlanningBatchMessage) => void,
+    private readonly windowMs = OUTBOX_WINDOW_MS,
+    private readonly maxDelayMs = OUTBOX_MAX_DELAY_MS,
+  ) {}
+
+  get pending(): boolean {
+    return this.changes.size > 0 || this.weeks.size > 0;
+  }
+
+  addChange(type: PlanningChangeType, change: PlanningChange) {
+    const previous = this.changes.get(change.id);
+    if (!previous) {
+      this.changes.set(change.id, { type, change });
+    } else if (type === 'added') {
+      // Deleted then re-added (e.g. moved to another week): the row itself changed
+      this.changes.set(change.id, { type: previous.type === 'deleted' ? 'updated' : type, change });
+    } else if (type === 'updated') {
+      // An update on top of a pending add or update is still one add/update
+      this.changes.set(change.id, {
+        type: previous.type === 'deleted' ? 'updated' : previous.type,
+        change: { ...previous.change, ...compact(change) },
+      });
+    } else if (previous.type === 'added') {
+      // Added and removed within one window: clients never need to see it
+      this.changes.delete(change.id);
+    } else {
+      this.changes.set(change.id, { type, change });
+    }
+    this.schedule();
+  }
+
+  invalidateWeek(week: string) {
+    this.weeks.add(week);
+    this.schedule();
+  }
+
+  /** Send everything queued now (no-op when empty). */
+  flush() {
+    if (this.timer) clearTimeout(this.timer);
+    this.timer = null;
+    if (!this.pending) return;
+
+    const message: PlanningBatchMessage = { added: [], updated: [], deleted: [], weeks: [] };
+    for (const { type, change } of this.changes.values()) message[type].push(compact(change));
+    message.weeks = [...this.weeks];
+    this.changes.clear();
+    this.weeks.clear();
+    this.send(message);
+  }
+
+  /** Debounce the flush, but never hold the first event longer than maxDelayMs. */
+  private schedule() {
+    const now = Date.now();
+    if (this.timer) clearTimeout(this.timer);
+    else this.firstQueuedAt = now;
+    const delay = Math.max(0, Math.min(this.windowMs, this.firstQueuedAt + this.maxDelayMs - now));
+    this.timer = setTimeout(() => this.flush(), delay);
+    if (typeof this.timer.unref === 'function') this.timer.unref();
+  }
+}
+
+/**
+ * Outboxes by room, created on first use and dropped after each flush so idle
+ * rooms hold no state.
+ */
+export class OutboxRegistry {
+  private readonly outboxes = new Map<string, RoomOutbox>();
+  private queued = 0;
+  private flushed = 0;
+
+  constructor(
+    private readonly send: (room: string, message: PlanningBatchMessage) => void,
+    private readonly windowMs = OUTBOX_WINDOW_MS,
+    private readonly maxDelayMs = OUTBOX_MAX_DELAY_MS,
+  ) {}
+
+  get(room: string): RoomOutbox {
+    let outbox = this.outboxes.get(room);
+    if (!outbox) {
+      outbox = new RoomOutbox(
+        (message) => {
+          this.outboxes.delete(room);
+          this.flushed++;
+          this.send(room, message);
+        },
+        this.windowMs,
+        this.maxDelayMs,
+      );
+      this.outboxes.set(room, outbox);
+    }
+    this.queued++;
+    return outbox;
+  }
+
+  flushAll() {
+    for (const outbox of [...this.outboxes.values()]) outbox.flush();
+  }
+
+  stats(): OutboxStats {
+    return { queued: this.queued, flushed: this.flushed };
+  }
+}
@@ -1,7 +1,11 @@
+import cluster from 'cluster';
 import { Server as HttpServer } from 'http';
 import { Server, Socket } from 'socket.io';
 import { keyStore, JwtPayload } from './key-store';
-import { getDB } from './db';
+import { getUserGroupId, isGroupMember } from './group-membership';
+import { OutboxRegistry, PlanningChange, PlanningChangeType } from './socket-outbox';
+import { onClusterMessage, publishToCluster } from './cluster-bus';
+import { CLUSTER_SOCKET_TRANSPORTS } from './cluster';
 
 let io: Server | null = null;
 
@@ -16,6 +20,8 @@ export function initSocketIO(httpServer: HttpServer) {
       origin: process.env.FRONTEND_URL || 'http://localhost:8100',
       credentials: true,
     },
+    // A session must stay on one worker: one WebSocket connection (see cluster.ts)
+    ...(cluster.isWorker && { transports: CLUSTER_SOCKET_TRANSPORTS }),
   });
 
   // Authenticate on connection using the JWT token
@@ -34,45 +40,73 @@ export function initSocketIO(httpServer: HttpServer) {
   io.on('connection', async (socket: Socket) => {
     const user = (socket as Socket & { user?: JwtPayload }).user as JwtPayload;
 
-    // Auto-join the user's group room (if they belong to a group)
-    try {
-      const db = await getDB();
-      const row = await db.get(
-        `SELECT g.id FROM groups_table g
-         JOIN group_members gm ON gm.group_id = g.id
-         WHERE gm.user_id = ? LIMIT 1`,
-        user.id,
-      );
-      if (row) {
-        socket.join(`group:${row.id}`);
+    // Allow client to explicitly join/leave a group room, but only their own groups.
+    // Registered before any await so an early join-group is not missed.
+    socket.on('join-group', async (groupId: string) => {
+      try {
+        if (await isGroupMember(groupId, user.id)) {
+          socket.join(`group:${groupId}`);
+        }
+      } catch {
+        // ignore – the client stays out of the room
       }
-    } catch {
-      // silently ignore – the user simply won't be in a room
-    }
-
-    // Allow client to explicitly join/leave a group room
-    socket.on('join-group', (groupId: string) => {
-      socket.join(`group:${groupId}`);
     });
 
     socket.on('leave-group', (groupId: string) => {
       socket.leave(`group:${groupId}`);
     });
+
+    // Auto-join the user's group room (if they belong to a group)
+    try {
+      const groupId = await getUserGroupId(user.id);
+      if (groupId) {
+        socket.join(`group:${groupId}`);
+      }
+    } catch {
+      // silently ignore – the user simply won't be in a room
+    }
   });
 }
 
-/** Broadcast a planning change to all group members (except sender) */
+/**
+ * Emit to a room's sockets on this process and, in cluster mode, on every
+ * other worker, since group members may be connected to any of them.
+ */
+function broadcast(room: string, event: string, payload: unknown) {
+  io?.to(room).emit(event, payload);
+  publishToCluster('socket:broadcast', { room, event, payload });
+}
+
+onClusterMessage('socket:broadcast', ({ room, event, payload }) => {
+  io?.to(room).emit(event, payload);
+});
+
+/** Queued group broadcasts, flushed as one `planning:batch` per room (see socket-outbox.ts). */
+export const outboxes = new OutboxRegistry((room, message) => {
+  broadcast(room, 'planning:batch', message);
+});
+
+/** Queue a planning change for all group members */
 export function emitPlanningChange(
   groupId: string,
-  event: 'planning:added' | 'planning:updated' | 'planning:deleted',
+  event: 'planning:added' | 'planning:updated' | 'planning:deleted' | 'planning:batch',
   payload: unknown,
 ) {
   if (!io) return;
-  io.to(`group:${groupId}`).emit(event, payload);
+  const outbox = outboxes.get(`group:${groupId}`);
+  if (event === 'planning:batch') {
+    const batch = payload as Record<PlanningChangeType, PlanningChange[]>;
+    for (const type of ['deleted', 'added', 'updated'] as const) {
+      for (const change of batch[type]) outbox.addChange(type, change);
+    }
+    return;
+  }
+  const type = event.slice('planning:'.length) as PlanningChangeType;
+  outbox.addChange(type, payload as PlanningChange);
 }
 
-/** Broadcast a shopping-list invalidation to all group members */
+/** Queue a shopping-list invalidation for all group members (de-duplicated per week) */
 export function emitShoppingListInvalidate(groupId: string, week: string) {
   if (!io) return;
-  io.to(`group:${groupId}`).emit('shopping-list:invalidate', { week });
+  outboxes.get(`group:${groupId}`).invalidateWeek(week);
 }
@@ -0,0 +1,316 @@
+/**
+ * Precomputed recipe usage for planning suggestions.
+ *
+ * Instead of aggregating a user's whole planning history on every
+ * `GET /planning/:week/suggestions`, each user's history is read once into
+ * per-recipe counters: how often the recipe was planned, a recency-decayed
+ * score, and how often it went into each meal slot. The planning routes then
+ * keep those counters current with `recordPlanningInsert/Update/Delete`, so a
+ * request only walks the user's recipes already ranked by score; its cost
+ * depends on how many distinct recipes a user plans, not on how many weeks of
+ * history they have. The exception is the first request after the counters
+ * were evicted, expired (SUGGESTIONS_CACHE_TTL_MS) or dropped by another
+ * process: it reads the whole history again, so it does grow with it.
+ *
+ * A row planned for week `w` weighs 2^((w - t) / half-life) at week `t`. The
+ * counters store weights relative to a fixed epoch instead, so adding or
+ * removing a row never touches the others and the ranking does not depend on
+ * `t`, which only scales the reported score.
+ *
+ * In cluster mode only the process that made a change can apply it to its
+ * counters; the others drop that user's counters and reload them when next
+ * asked.
+ */
+
+import { getReadDB } from './db';
+import { LruCache } from './lru-cache';
+import { onClusterMessage, publishToCluster } from './cluster-bus';
+
+export const SUGGESTION_HALF_LIFE_WEEKS = 8;
+export const DEFAULT_SUGGESTIONS = 15;
+
+const WEEK_MS = 7 * 24 * 60 * 60 * 1000;
+const DECAY_EPOCH = Date.UTC(2020, 0, 6);
+
+/**
+ * The planning routes only accept weeks in 2000-2099 (exponents within ±522),
+ * but older or scripted rows may lie anywhere. Clamping keeps their weights,
+ * and sums of them, finite: an Infinity would turn `remove` into NaN.
+ */
+const MAX_DECAY_EXPONENT = 600;
+
+/** Decay weight of `week` relative to the epoch (0 for an unparsable week). */
+function weekWeight(week: string): number {
+  const time = Date.parse(week);
+  if (Number.isNaN(time)) return 0;
+  const exponent = (time - DECAY_EPOCH) / WEEK_MS / SUGGESTION_HALF_LIFE_WEEKS;
+  return 2 ** Math.min(Math.max(exponent, -MAX_DECAY_EXPONENT), MAX_DECAY_EXPONENT);
+}
+
+function increment(counts: Map<string, number>, key: string, by: number) {
+  const next = (counts.get(key) ?? 0) + by;
+  if (next > 0) counts.set(key, next);
+  else counts.delete(key);
+}
+
+/** The fields of a planning row the engine tracks. */
+export interface PlanningUsageRow {
+  id: string;
+  recipe_id: string;
+  recipe_name?: string | null;
+  week: string;
+  meal?: string | null;
+}
+
+interface RecipeUsage {
+  recipeId: string;
+  recipeName: string;
+  frequency: number;
+  weight: number;
+  lastWeek: string;
+  /** Rows per week, and per meal slot ('' when the row has none). */
+  weeks: Map<string, number>;
+  meals: Map<string, number>;
+}
+
+interface TrackedRow {
+  recipeId: string;
+  week: string;
+  meal: string;
+}
+
+/** One user's counters. */
+export class UserUsage {
+  private readonly recipes = new Map<string, RecipeUsage>();
+  private readonly rows = new Map<string, TrackedRow>();
+  private ranked: RecipeUsage[] | null = null;
+
+  get size(): number {
+    return this.rows.size;
+  }
+
+  add(row: PlanningUsageRow) {
+    if (this.rows.has(row.id)) this.remove(row.id);
+    const tracked = { recipeId: row.recipe_id, week: row.week, meal: row.meal || '' };
+    this.rows.set(row.id, tracked);
+
+    let usage = this.recipes.get(tracked.recipeId);
+    if (!usage) {
+      usage = {
+        recipeId: tracked.recipeId,
+        recipeName: '',
+        frequency: 0,
+        weight: 0,
+        lastWeek: tracked.week,
+        weeks: new Map(),
+        meals: new Map(),
+      };
+      this.recipes.set(tracked.recipeId, usage);
+    }
+    if (row.recipe_name) usage.recipeName = row.recipe_name;
+    usage.frequency++;
+    usage.weight += weekWeight(tracked.week);
+    if (tracked.week > usage.lastWeek) usage.lastWeek = tracked.week;
+    increment(usage.weeks, tracked.week, 1);
+    increment(usage.meals, tracked.meal, 1);
+    this.ranked = null;
+  }
+
+  remove(id: string) {
+    const tracked = this.rows.get(id);
+    if (!tracked) return;
+    this.rows.delete(id);
+    const usage = this.recipes.get(tracked.recipeId)!;
+    this.ranked = null;
+    if (--usage.frequency === 0) {
+      this.recipes.delete(tracked.recipeId);
+      return;
+    }
+    const weight = weekWeight(tracked.week);
+    usage.weight -= weight;
+    increment(usage.weeks, tracked.week, -1);
+    increment(usage.meals, tracked.meal, -1);
+    // A weight that dwarfed the rest leaves mostly rounding error behind: re-sum
+    if (usage.weight < weight * 1e-6) {
+      usage.weight = 0;
+      for (const [week, count] of usage.weeks) usage.weight += count * weekWeight(week);
+    }
+    // Only a removed last week needs a scan, and only over that recipe's weeks
+    if (tracked.week === usage.lastWeek && !usage.weeks.has(tracked.week)) {
+      usage.lastWeek = [...usage.weeks.keys()].reduce((a, b) => (b > a ? b : a));
+    }
+  }
+
+  /** Apply a change of week and/or meal slot to a tracked row. */
+  update(id: string, changes: { week?: string; meal?: string | null }) {
+    const tracked = this.rows.get(id);
+    if (!tracked) return;
+    const recipeName = this.recipes.get(tracked.recipeId)!.recipeName;
+    this.remove(id);
+    this.add({
+      id,
+      recipe_id: tracked.recipeId,
+      recipe_name: recipeName,
+      week: changes.week ?? tracked.week,
+      meal: changes.meal !== undefined ? changes.meal : tracked.meal,
+    });
+  }
+
+  get(recipeId: string): RecipeUsage | undefined {
+    return this.recipes.get(recipeId);
+  }
+
+  /** Recipes by decayed score, then frequency; re-sorted only after a change. */
+  rank(): RecipeUsage[] {
+    if (!this.ranked) {
+      this.ranked = [...this.recipes.values()].sort(
+        (a, b) => b.weight - a.weight || b.frequency - a.frequency,
+      );
+    }
+    return this.ranked;
+  }
+}
+
+/** Loaded users; evicted or expired entries are simply read again. */
+export const usageCache = new LruCache<UserUsage>(
+  Number(process.env.SUGGESTIONS_CACHE_USERS ?? 1000),
+  Number(process.env.SUGGESTIONS_CACHE_TTL_MS ?? 30 * 60 * 1000),
+);
+/** Bumped on every recorded change so a load that raced with one is not kept. */
+let epoch = 0;
+
+async function loadUserUsage(userId: string): Promise<UserUsage> {
+  const cached = usageCache.get(userId);
+  if (cached) return cached;
+  const startEpoch = epoch;
+  const db = await getReadDB();
+  const rows = await db.all<PlanningUsageRow[]>(
+    'SELECT id, recipe_id, recipe_name, week, meal FROM planning WHERE user_id = ?',
+    userId,
+  );
+  const usage = new UserUsage();
+  for (const row of rows) usage.add(row);
+  if (epoch === startEpoch) usageCache.set(userId, usage);
+  return usage;
+}
+
+export function recordPlanningInsert(userId: string, row: PlanningUsageRow) {
+  epoch++;
+  usageCache.get(userId)?.add(row);
+  publishToCluster('planning-usage:forget', userId);
+}
+
+export function recordPlanningUpdate(
+  userId: string,
+  id: string,
+  changes: { week?: string; meal?: string | null },
+) {
+  epoch++;
+  usageCache.get(userId)?.update(id, changes);
+  publishToCluster('planning-usage:forget', userId);
+}
+
+export function recordPlanningDelete(userId: string, id: string) {
+  epoch++;
+  usageCache.get(userId)?.remove(id);
+  publishToCluster('planning-usage:forget', userId);
+}
+
+function dropUsage(userId: string) {
+  epoch++;
+  usageCache.delete(userId);
+}
+
+/** Drop a user's counters (e.g. when the account is deleted). */
+export function forgetPlanningUsage(userId: string) {
+  dropUsage(userId);
+  publishToCluster('planning-usage:forget', userId);
+}
+
+onClusterMessage('planning-usage:forget', dropUsage);
+
+export interface PlanningSuggestion {
+  recipe_id: string;
+  recipe_name: string;
+  recipe_type: string;
+  frequency: number;
+  last_used_week: string;
+  meals_used: string[];
+  /** Decayed usage as of the requested week (1 = planned once, that week). */
+  score: number;
+  /** Share of the recipe's uses per meal slot. */
+  meal_affinity: Record<string, number>;
+}
+
+/** Sum the counters of several users (a group) into one ranked list. */
+function mergeUsage(usages: UserUsage[]): RecipeUsage[] {
+  const merged = new Map<string, RecipeUsage>();
+  for (const usage of usages) {
+    for (const recipe of usage.rank()) {
+      const into = merged.get(recipe.recipeId);
+      if (!into) {
+        merged.set(recipe.recipeId, { ...recipe, meals: new Map(recipe.meals) });
+        continue;
+      }
+      into.recipeName ||= recipe.recipeName;
+      into.frequency += recipe.frequency;
+      into.weight += recipe.weight;
+      if (recipe.lastWeek > into.lastWeek) into.lastWeek = recipe.lastWeek;
+      for (const [meal, count] of recipe.meals) increment(into.meals, meal, count);
+    }
+  }
+  return [...merged.values()].sort((a, b) => b.weight - a.weight || b.frequency - a.frequency);
+}
+
+/**
+ * Recipes `userIds` planned before, best first, leaving out those already
+ * planned in `week`. With `meal`, recipes are ranked by score times their
+ * affinity for that slot, so recipes never eaten then come last.
+ */
+export async function getPlanningSuggestions(
+  userIds: string[],
+  week: string,
+  options: { meal?: string; limit?: number } = {},
+): Promise<PlanningSuggestion[]> {
+  const limit = options.limit ?? DEFAULT_SUGGESTIONS;
+  const usages = await Promise.all(userIds.map(loadUserUsage));
+  let ranked = usages.length === 1 ? usages[0].rank() : mergeUsage(usages);
+  if (options.meal) {
+    const meal = options.meal;
+    const affinity = (r: RecipeUsage) => r.weight * ((r.meals.get(meal) ?? 0) / r.frequency);
+    ranked = [...ranked].sort((a, b) => affinity(b) - affinity(a) || b.weight - a.weight);
+  }
+
+  const picked: RecipeUsage[] = [];
+  for (const recipe of ranked) {
+    if (picked.length === limit) break;
+    if (usages.some((u) => u.get(recipe.recipeId)?.weeks.has(week))) continue;
+    picked.push(recipe);
+  }
+  if (picked.length === 0) return [];
+
+  const db = await getReadDB();
+  const recipes = await db.all<{ id: string; name: string; type: string }[]>(
+    `SELECT id, name, type FROM recipes WHERE id IN (${picked.map(() => '?').join(',')})`,
+    ...picked.map((r) => r.recipeId),
+  );
+  const byId = new Map(recipes.map((r) => [r.id, r]));
+  const scale = weekWeight(week) || 1;
+
+  return picked.map((r) => {
+    const mealAffinity: Record<string, number> = {};
+    for (const [meal, count] of r.meals) {
+      if (meal) mealAffinity[meal] = Math.round((count / r.frequency) * 1000) / 1000;
+    }
+    return {
+      recipe_id: r.recipeId,
+      recipe_name: r.recipeName || byId.get(r.recipeId)?.name || '',
+      recipe_type: byId.get(r.recipeId)?.type || 'OTHER',
+      frequency: r.frequency,
+      last_used_week: r.lastWeek,
+      meals_used: Object.keys(mealAffinity),
+      score: Math.round((r.weight / scale) * 1000) / 1000,
+      meal_affinity: mealAffinity,
+    };
+  });
+}
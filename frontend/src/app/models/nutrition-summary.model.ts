@@ -11,3 +11,10 @@ export interface NutritionSummary {
   days: Record<string, DayNutrition>;
   weekTotal: DayNutrition;
 }
+
+export interface NutritionRangeSummary {
+  from: string;
+  to: string;
+  weeks: NutritionSummary[];
+  total: DayNutrition;
+}
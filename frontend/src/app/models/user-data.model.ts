@@ -15,3 +15,9 @@ export interface UserStats {
   followers?: number;
   followed?: number;
 }
+
+export interface UserPage {
+  users: UserData[];
+  /** Pass back to get the next page; absent on the last one. */
+  nextCursor?: string;
+}
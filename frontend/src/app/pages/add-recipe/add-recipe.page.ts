@@ -93,7 +93,6 @@ export class AddRecipePage implements OnInit {
   readonly selectedRecipe = signal<Recipe>(createRecipe());
 
   readonly isEdit = signal<boolean>(false);
-  stepsOfImagesToDelete: Step[] = [];
 
   readonly trackByIngredient = trackById;
   readonly trackByStep = trackByIndex;
@@ -229,12 +228,6 @@ export class AddRecipePage implements OnInit {
     }
   }
 
-  removeStepImage(step: Step) {
-    const copiedStep = Object.assign({}, step);
-    if (this.isEdit() && !copiedStep.imageToUpload && copiedStep.imageUrl)
-      this.stepsOfImagesToDelete.push(copiedStep);
-  }
-
   onAddStepClicked() {
     this.selectedRecipe.update((recipe) => {
       const steps = [...recipe.steps];
@@ -257,7 +250,6 @@ export class AddRecipePage implements OnInit {
   onRemoveStepImage(index: number) {
     this.selectedRecipe.update((recipe) => {
       const steps = [...recipe.steps];
-      this.removeStepImage(steps[index]);
       steps[index] = {
         ...steps[index],
         imageUrl: undefined,
@@ -270,7 +262,6 @@ export class AddRecipePage implements OnInit {
   onRemoveStepClicked(index: number) {
     this.selectedRecipe.update((recipe) => {
       const steps = [...recipe.steps];
-      this.removeStepImage(steps[index]);
       steps.splice(index, 1);
       return { ...recipe, steps };
     });
@@ -284,7 +275,6 @@ export class AddRecipePage implements OnInit {
     reader.readAsDataURL(file);
     reader.onload = () => {
       if (input) input.value = '';
-      this.removeStepImage(step);
       step.imageUrl = reader.result?.toString();
       step.imageToUpload = true;
       // Trigger update
@@ -306,7 +296,7 @@ export class AddRecipePage implements OnInit {
   async onConfirmEditClicked() {
     await this.loadingService.withLoader(async () => {
       try {
-        await this.dataService.editRecipe(this.selectedRecipe(), this.stepsOfImagesToDelete);
+        await this.dataService.editRecipe(this.selectedRecipe());
         this.navigationService.goToPreviousPage({ needToRefresh: true });
       } catch {
         this.navigationService.goToPreviousPage();
@@ -3,12 +3,16 @@ import {
   IonAvatar,
   IonContent,
   IonHeader,
+  IonInfiniteScroll,
+  IonInfiniteScrollContent,
   IonItem,
   IonLabel,
   IonList,
+  IonSearchbar,
   IonTitle,
   IonToolbar,
 } from '@ionic/angular/standalone';
+import { InfiniteScrollCustomEvent, SearchbarCustomEvent } from '@ionic/angular';
 import { TranslateModule } from '@ngx-translate/core';
 import { LoadingService } from 'src/app/services/loading.service';
 import { HomeNavigationPath, NavigationPath } from 'src/app/models/navigation-path.enum';
@@ -33,6 +37,9 @@ import { trackById } from 'src/app/utils/track-by';
     IonList,
     IonItem,
     IonAvatar,
+    IonSearchbar,
+    IonInfiniteScroll,
+    IonInfiniteScrollContent,
   ],
 })
 export class DiscoverPage {
@@ -41,18 +48,44 @@ export class DiscoverPage {
   private readonly navigationService = inject(NavigationService);
 
   readonly users = signal<UserData[] | undefined>(undefined);
+  readonly nextCursor = signal<string | undefined>(undefined);
 
   readonly trackByUser = trackById;
 
+  private query = '';
+
   constructor() {
     this.getData();
   }
 
   private async getData() {
-    await this.loadingService.withLoader(async () => {
-      const response = await this.dataService.getUsers();
-      this.users.set(response && response.length > 0 ? response : []);
-    });
+    await this.loadingService.withLoader(() => this.loadFirstPage());
+  }
+
+  private async loadFirstPage() {
+    const query = this.query;
+    const page = await this.dataService.searchUsers(query);
+    if (query !== this.query) return; // a newer search is under way
+    this.users.set(page?.users ?? []);
+    this.nextCursor.set(page?.nextCursor);
+  }
+
+  async onSearch(ev: SearchbarCustomEvent) {
+    this.query = (ev.detail?.value || '').trim();
+    await this.loadFirstPage();
+  }
+
+  async onLoadMore(ev: InfiniteScrollCustomEvent) {
+    const cursor = this.nextCursor();
+    if (cursor) {
+      const query = this.query;
+      const page = await this.dataService.searchUsers(query, cursor);
+      if (page && query === this.query) {
+        this.users.update((users) => [...(users ?? []), ...page.users]);
+        this.nextCursor.set(page.nextCursor);
+      }
+    }
+    await ev.target.complete();
   }
 
   async onUserClicked(user: UserData) {
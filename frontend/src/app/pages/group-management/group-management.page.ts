@@ -86,7 +86,7 @@ export class GroupManagementPage {
 
   private async resolveUserNames(group: Group) {
     const currentUser = this.authService.getCurrentUser();
-    const users = await this.dataService.getUsers();
+    const users = await this.dataService.getUsersByIds(group.users);
     const nameMap: Record<string, string> = {};
 
     // Current user
@@ -232,6 +232,11 @@ export class PlanningPage implements OnDestroy {
             (r) => r.kind === 'recipe' && r.id === planned.id,
           );
           if (existingIdx >= 0) {
+            // Moved to another week: it no longer belongs to this list
+            if (planned.week && !isCurrentWeek) {
+              this.removeLocalPlanned(planned.id);
+              break;
+            }
             const existing = currentPlanning.recipes[existingIdx] as PlannedRecipe;
             const merged = {
               ...existing,
@@ -244,29 +249,21 @@ export class PlanningPage implements OnDestroy {
             newRecipes[existingIdx] = merged;
             this.planning.set({ ...currentPlanning, recipes: newRecipes });
             this.sortList();
+          } else if (isCurrentWeek) {
+            // Moved into this week from another one
+            this.insertLocalPlanned(planned);
           }
           break;
         }
         case 'deleted': {
           // Remove the recipe from the local list
-          const exists = currentPlanning.recipes.some(
-            (r) => r.kind === 'recipe' && r.id === planned.id,
-          );
-          if (exists) {
-            this.planning.set({
-              ...currentPlanning,
-              recipes: currentPlanning.recipes.filter(
-                (r) => r.kind !== 'recipe' || r.id !== planned.id,
-              ),
-            });
-          }
+          this.removeLocalPlanned(planned.id);
           break;
         }
         case 'added': {
-          // For added events, do a targeted refetch (only planning, no group)
-          // since the socket payload may not include all recipe details
+          // Batched events carry the full row, so patch the list locally
           if (isCurrentWeek) {
-            this.refetchPlanning(currentPlanning.startDate);
+            this.insertLocalPlanned(planned);
           }
           break;
         }
@@ -274,6 +271,34 @@ export class PlanningPage implements OnDestroy {
     });
   }
 
+  /** Add a collaborator's planned recipe to the local list; refetch if the row is incomplete */
+  private insertLocalPlanned(planned: PlannedRecipe) {
+    const currentPlanning = this.planning();
+    if (!currentPlanning) return;
+    if (currentPlanning.recipes.some((r) => r.kind === 'recipe' && r.id === planned.id)) return;
+    if (!planned.recipe_id || !planned.recipe_name) {
+      this.refetchPlanning(currentPlanning.startDate);
+      return;
+    }
+    this.handleResponse({
+      ...currentPlanning,
+      recipes: [...currentPlanning.recipes.filter((r) => r.kind === 'recipe'), planned],
+    });
+    this.sortList();
+  }
+
+  private removeLocalPlanned(id: string) {
+    const currentPlanning = this.planning();
+    if (!currentPlanning) return;
+    const exists = currentPlanning.recipes.some((r) => r.kind === 'recipe' && r.id === id);
+    if (exists) {
+      this.planning.set({
+        ...currentPlanning,
+        recipes: currentPlanning.recipes.filter((r) => r.kind !== 'recipe' || r.id !== id),
+      });
+    }
+  }
+
   /** Refetch only the planning list (not the group) without showing the loader */
   private async refetchPlanning(startDate: string) {
     const group = this.group();
@@ -587,13 +612,7 @@ export class PlanningPage implements OnDestroy {
     const group = this.group();
     if (!group) return;
 
-    const users = await this.dataService.getUsers();
-    const currentUser = this.authService.getCurrentUser();
-    const allUsers = [...(users || [])];
-    if (currentUser) {
-      allUsers.push(currentUser);
-    }
-    const groupUsers = allUsers.filter((u) => group.users.includes(u.id));
+    const groupUsers = (await this.dataService.getUsersByIds(group.users)) || [];
 
     const currentAssigned = this.getAssignedUsers(plannedRecipe.assignedTo);
     // Se non c'è nessuno assegnato (null/vuoto), significa che è per tutti, quindi pre-selezioniamo tutti
@@ -677,13 +696,7 @@ export class PlanningPage implements OnDestroy {
     // Fetch group users for the filter
     let groupUsers: UserData[] = [];
     if (group) {
-      const users = await this.dataService.getUsers();
-      const currentUser = this.authService.getCurrentUser();
-      const allUsers = [...(users || [])];
-      if (currentUser) {
-        allUsers.push(currentUser);
-      }
-      groupUsers = allUsers.filter((u) => group.users.includes(u.id));
+      groupUsers = (await this.dataService.getUsersByIds(group.users)) || [];
     }
 
     const modal = await this.modalCtrl.create({
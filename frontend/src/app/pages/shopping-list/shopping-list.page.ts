@@ -56,6 +56,8 @@ export class ShoppingListPage implements OnDestroy {
   readonly trackByIngredient = trackById;
 
   private group: Group | undefined;
+  /** Week currently shown */
+  private startDate: string | undefined;
   private invalidateSub: Subscription | null = null;
 
   constructor() {}
@@ -79,8 +81,9 @@ export class ShoppingListPage implements OnDestroy {
       if (this.group) {
         this.dataService.connectRealtime(this.group);
         this.invalidateSub?.unsubscribe();
-        this.invalidateSub = this.dataService.shoppingListInvalidate$.subscribe(() => {
-          this.getShoppingList();
+        this.invalidateSub = this.dataService.shoppingListInvalidate$.subscribe((week) => {
+          // Other weeks' changes do not affect the list on screen
+          if (week === this.startDate) this.getShoppingList(week);
         });
       }
     });
@@ -88,6 +91,7 @@ export class ShoppingListPage implements OnDestroy {
 
   async getShoppingList(startDate?: string) {
     if (!startDate) startDate = dayjs().startOf('week').format('YYYY-MM-DD');
+    this.startDate = startDate;
     const response = await this.dataService.getShoppingList(startDate, this.group?.id);
     this.shoppingList.set(response && response.length > 0 ? response : []);
   }
@@ -6,9 +6,9 @@ import { Recipe } from '../models/recipe.model';
 import { AuthService } from './auth.service';
 import { Ingredient } from '../models/ingredient.model';
 import { Step } from '../models/step.model';
-import { UserData, UserStats } from '../models/user-data.model';
+import { UserData, UserPage, UserStats } from '../models/user-data.model';
 import { Group } from '../models/group.model';
-import { NutritionSummary } from '../models/nutrition-summary.model';
+import { NutritionRangeSummary, NutritionSummary } from '../models/nutrition-summary.model';
 import { WeekDay } from '../models/weekDay.enum';
 import { Meal } from '../models/meal.model';
 import { createPlanning } from '../utils/model-factories';
@@ -26,21 +26,44 @@ export class DataService {
   private readonly socketService = inject(SocketService);
   private readonly api = environment.apiUrl;
 
-  private cachedUsers?: UserData[];
+  private readonly usersById = new Map<string, UserData>();
   private cachedFoods?: Ingredient[];
 
   // ── Users ──────────────────────────────────────────
 
-  async getUsers(): Promise<UserData[] | undefined> {
-    if (this.cachedUsers) return this.cachedUsers;
+  /** One page of the user directory, filtered by name prefix when `query` is set. */
+  async searchUsers(query = '', cursor?: string): Promise<UserPage | undefined> {
     try {
-      this.cachedUsers = await firstValueFrom(this.http.get<UserData[]>(`${this.api}/users`));
-      return this.cachedUsers;
+      const params: Record<string, string> = {};
+      if (query) params['q'] = query;
+      if (cursor) params['cursor'] = cursor;
+      const response = await firstValueFrom(
+        this.http.get<UserData[]>(`${this.api}/users`, { params, observe: 'response' }),
+      );
+      const users = response.body ?? [];
+      for (const user of users) this.usersById.set(user.id, user);
+      return { users, nextCursor: response.headers.get('X-Next-Cursor') ?? undefined };
     } catch {
       return undefined;
     }
   }
 
+  /** The given users (e.g. group members); each one is fetched once per session. */
+  async getUsersByIds(ids: string[]): Promise<UserData[] | undefined> {
+    const missing = ids.filter((id) => !this.usersById.has(id));
+    if (missing.length > 0) {
+      try {
+        const users = await firstValueFrom(
+          this.http.get<UserData[]>(`${this.api}/users`, { params: { ids: missing.join(',') } }),
+        );
+        for (const user of users) this.usersById.set(user.id, user);
+      } catch {
+        return undefined;
+      }
+    }
+    return ids.map((id) => this.usersById.get(id)).filter((u): u is UserData => !!u);
+  }
+
   async getUser(user_id: string): Promise<UserData | undefined> {
     try {
       return await firstValueFrom(this.http.get<UserData>(`${this.api}/users/${user_id}`));
@@ -84,7 +107,7 @@ export class DataService {
   }
 
   async addRecipe(recipe: Recipe) {
-    await this.uploadStepImages('', recipe.steps);
+    await this.uploadStepImages(recipe.steps);
     return firstValueFrom(this.http.post<{ data: Recipe }>(`${this.api}/recipes`, recipe));
   }
 
@@ -96,15 +119,13 @@ export class DataService {
     }
   }
 
-  async editRecipe(recipe: Recipe, stepsOfImagesToDelete: Step[]) {
-    await this.uploadStepImages('', recipe.steps);
+  async editRecipe(recipe: Recipe) {
+    await this.uploadStepImages(recipe.steps);
     await firstValueFrom(this.http.put(`${this.api}/recipes/${recipe.id}`, recipe));
-    await this.deleteStepImages(stepsOfImagesToDelete);
   }
 
   async deleteRecipe(recipe: Recipe) {
     await firstValueFrom(this.http.delete(`${this.api}/recipes/${recipe.id}`));
-    await this.deleteStepImages(recipe.steps);
   }
 
   async getRecipeList(user_id?: string): Promise<Recipe[] | undefined> {
@@ -127,8 +148,34 @@ export class DataService {
     }
   }
 
+  async searchRecipes(query: string, limit = 20): Promise<Recipe[] | undefined> {
+    try {
+      return await firstValueFrom(
+        this.http.get<Recipe[]>(`${this.api}/recipes/search`, {
+          params: { q: query, limit },
+          context: new HttpContext().set(SKIP_LOADING, true),
+        }),
+      );
+    } catch {
+      return undefined;
+    }
+  }
+
   // ── Foods ──────────────────────────────────────────
 
+  async searchFoods(query: string, limit = 20): Promise<Ingredient[] | undefined> {
+    try {
+      return await firstValueFrom(
+        this.http.get<Ingredient[]>(`${this.api}/foods/search`, {
+          params: { q: query, limit },
+          context: new HttpContext().set(SKIP_LOADING, true),
+        }),
+      );
+    } catch {
+      return undefined;
+    }
+  }
+
   async getFoodList(): Promise<Ingredient[] | undefined> {
     if (this.cachedFoods) return this.cachedFoods;
     try {
@@ -252,6 +299,37 @@ export class DataService {
     );
   }
 
+  /** Apply many planning adds, moves and deletes in one request and one transaction. */
+  async applyPlanningBatch(batch: {
+    add?: {
+      recipe_id: string;
+      recipe_name?: string;
+      week: string;
+      day?: WeekDay;
+      meal?: Meal;
+      servings?: number;
+      assignedTo?: string;
+    }[];
+    move?: {
+      id: string;
+      week?: string;
+      day?: WeekDay;
+      meal?: Meal;
+      servings?: number;
+      assignedTo?: string;
+    }[];
+    delete?: string[];
+  }) {
+    const context = new HttpContext().set(SKIP_LOADING, true);
+    return firstValueFrom(
+      this.http.patch<{
+        added: PlannedRecipe[];
+        updated: PlannedRecipe[];
+        deleted: { id: string; week: string }[];
+      }>(`${this.api}/planning/batch`, batch, { context }),
+    );
+  }
+
   // ── Shopping List ──────────────────────────────────
 
   async getPlanningSuggestions(
@@ -320,6 +398,24 @@ export class DataService {
     }
   }
 
+  async getNutritionRange(
+    fromWeek: string,
+    toWeek: string,
+    groupId?: string,
+    assignedTo?: string,
+  ): Promise<NutritionRangeSummary | undefined> {
+    try {
+      const params: Record<string, string> = { from: fromWeek, to: toWeek };
+      if (groupId) params['groupId'] = groupId;
+      if (assignedTo) params['assignedTo'] = assignedTo;
+      return await firstValueFrom(
+        this.http.get<NutritionRangeSummary>(`${this.api}/planning/nutrition-summary`, { params }),
+      );
+    } catch {
+      return undefined;
+    }
+  }
+
   // ── Groups ─────────────────────────────────────────
 
   async retrieveGroup(skipLoading = false): Promise<Group | undefined> {
@@ -422,14 +518,27 @@ export class DataService {
     return this.socketService.shoppingListInvalidate.pipe(map((event) => event.week));
   }
 
-  // ── Image helpers (stubs) ──────────────────────────
+  // ── Image helpers ──────────────────────────────────
 
-  private async uploadStepImages(user_id: string, steps: Step[]) {
-    // TODO: implement image upload when backend supports it
-  }
-
-  private async deleteStepImages(steps: Step[]) {
-    // TODO: implement image deletion when backend supports it
+  /**
+   * Upload step images still held as data URLs (just picked, or saved inline
+   * by older versions) and point the steps at the stored files. Images no
+   * longer used are removed by the server.
+   */
+  private async uploadStepImages(steps: Step[]) {
+    await Promise.all(
+      steps
+        .filter((step) => step.imageUrl?.startsWith('data:'))
+        .map(async (step) => {
+          const form = new FormData();
+          form.append('image', this.dataURLtoFile(step.imageUrl!, this.getRandomFileName()));
+          const { url } = await firstValueFrom(
+            this.http.post<{ url: string }>(`${this.api}/images`, form),
+          );
+          step.imageUrl = `${this.api}${url}`;
+          step.imageToUpload = false;
+        }),
+    );
   }
 
   private getRandomFileName() {
@@ -9,6 +9,18 @@ export interface PlanningChangeEvent {
   payload: unknown;
 }
 
+/**
+ * Coalesced group changes. The server queues planning changes per group for a
+ * short window and sends them as one message, together with the weeks whose
+ * shopping list changed (each week once).
+ */
+export interface PlanningBatchEvent {
+  added: unknown[];
+  updated: unknown[];
+  deleted: unknown[];
+  weeks?: string[];
+}
+
 export interface ShoppingListInvalidateEvent {
   week: string;
 }
@@ -101,6 +113,13 @@ export class SocketService implements OnDestroy {
     this.socket.on('planning:deleted', (data: unknown) =>
       this.planningChanges$.next({ type: 'deleted', payload: data }),
     );
+    // A batch is replayed as individual changes so subscribers need no special case
+    this.socket.on('planning:batch', (data: PlanningBatchEvent) => {
+      data.added.forEach((payload) => this.planningChanges$.next({ type: 'added', payload }));
+      data.updated.forEach((payload) => this.planningChanges$.next({ type: 'updated', payload }));
+      data.deleted.forEach((payload) => this.planningChanges$.next({ type: 'deleted', payload }));
+      data.weeks?.forEach((week) => this.shoppingListInvalidate$.next({ week }));
+    });
     this.socket.on('shopping-list:invalidate', (data: ShoppingListInvalidateEvent) =>
       this.shoppingListInvalidate$.next(data),
     );